@@ -0,0 +1 @@
+# Benchmarks de rendimiento de System Medic
@@ -0,0 +1,380 @@
+#!/usr/bin/env python
+"""
+Prueba de carga HTTP con una mezcla de tráfico de consultorio
+
+Cada usuario virtual inicia sesión como uno de los usuarios de
+`manage.py seed_benchmark_data` (administrador, doctor o recepción, según --mix) y
+repite acciones ponderadas por rol: listados, búsquedas, detalles, alta de
+consultas y, de vez en cuando, exportaciones. Informa throughput, percentiles de
+latencia y tasa de errores por acción.
+
+Contra un servidor ya levantado:
+    python benchmarks/loadtest.py --target http://127.0.0.1:8000 --users 20 --duration 60
+
+Levantando gunicorn para comparar WSGI/ASGI y cantidad de workers (ASGI requiere uvicorn):
+    python benchmarks/loadtest.py --servers wsgi:2,wsgi:4,asgi:4 --users 32 --duration 60
+
+Los ids de pacientes, consultas y doctores se leen de la base con --settings, que
+debe apuntar a la misma base que el servidor
+"""
+import argparse
+import http.client
+import json
+import os
+import random
+import re
+import signal
+import subprocess
+import sys
+import threading
+import time
+from datetime import date, timedelta
+from http.cookies import SimpleCookie
+from pathlib import Path
+from urllib.parse import urlencode, urlsplit
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR))
+
+from benchmarks.suite import percentile  # noqa: E402
+from benchmarks.workers import free_port  # noqa: E402
+
+CSRF_INPUT_RE = re.compile(rb'name="csrfmiddlewaretoken" value="([^"]+)"')
+
+SERVER_COMMANDS = {
+    'wsgi': ['crud.wsgi:application'],
+    'asgi': ['-k', 'uvicorn.workers.UvicornWorker', 'crud.asgi:application'],
+}
+
+# Acción -> peso, por rol
+TRAFFIC_MIX = {
+    'admin': [
+        ('patient_list', 30), ('patient_search', 15), ('consult_list', 20),
+        ('patient_detail', 15), ('dashboard', 15), ('report_export', 5),
+    ],
+    'doctor': [
+        ('dashboard', 10), ('consult_list', 25), ('patient_list', 10), ('patient_search', 10),
+        ('patient_detail', 20), ('consult_detail', 15), ('consult_create', 10),
+    ],
+    'reception': [
+        ('patient_list', 35), ('patient_search', 35), ('patient_detail', 20), ('dashboard', 10),
+    ],
+}
+
+
+class LoadTestError(Exception):
+    pass
+
+
+class Session:
+    """Conexión HTTP persistente con cookies (sesión y CSRF) y sin seguir redirecciones"""
+
+    def __init__(self, base_url, timeout):
+        parts = urlsplit(base_url)
+        connection_class = http.client.HTTPSConnection if parts.scheme == 'https' else http.client.HTTPConnection
+        self.connection = connection_class(parts.hostname, parts.port, timeout=timeout)
+        self.cookies = {}
+        self.csrf_token = ''
+
+    def request(self, method, path, data=None):
+        headers = {'Cookie': '; '.join(f'{key}={value}' for key, value in self.cookies.items())}
+        body = None
+        if data is not None:
+            data = {**data, 'csrfmiddlewaretoken': self.csrf_token or self.cookies.get('csrftoken', '')}
+            body = urlencode(data)
+            headers['Content-Type'] = 'application/x-www-form-urlencoded'
+        try:
+            self.connection.request(method, path, body=body, headers=headers)
+            response = self.connection.getresponse()
+            content = response.read()
+        except (http.client.HTTPException, OSError):
+            # El worker sync de gunicorn cierra la conexión: se reintenta una vez con una nueva
+            self.connection.close()
+            self.connection.request(method, path, body=body, headers=headers)
+            response = self.connection.getresponse()
+            content = response.read()
+        # Con CSRF_USE_SESSIONS el token no viaja en una cookie: se toma del formulario
+        match = CSRF_INPUT_RE.search(content)
+        if match:
+            self.csrf_token = match.group(1).decode()
+        for header in response.msg.get_all('Set-Cookie') or []:
+            for key, morsel in SimpleCookie(header).items():
+                self.cookies[key] = morsel.value
+        return response
+
+    def login(self, username, password):
+        self.request('GET', '/login/')
+        response = self.request('POST', '/login/', {'username': username, 'password': password})
+        if response.status != 302:
+            raise LoadTestError(f'No se pudo iniciar sesión como {username} (estado {response.status})')
+
+    def close(self):
+        self.connection.close()
+
+
+class Stats:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.samples = {}  # acción -> [latencias ms]
+        self.errors = {}   # acción -> cantidad
+
+    def record(self, action, elapsed_ms, ok):
+        with self.lock:
+            self.samples.setdefault(action, []).append(elapsed_ms)
+            if not ok:
+                self.errors[action] = self.errors.get(action, 0) + 1
+
+    def summary(self, duration):
+        actions = {}
+        everything = []
+        for action, samples in sorted(self.samples.items()):
+            samples.sort()
+            everything.extend(samples)
+            actions[action] = {
+                'requests': len(samples),
+                'errors': self.errors.get(action, 0),
+                'p50_ms': round(percentile(samples, 0.50), 1),
+                'p95_ms': round(percentile(samples, 0.95), 1),
+                'p99_ms': round(percentile(samples, 0.99), 1),
+            }
+        everything.sort()
+        total_errors = sum(self.errors.values())
+        return {
+            'requests': len(everything),
+            'errors': total_errors,
+            'error_rate': round(total_errors / len(everything), 4) if everything else 0.0,
+            'throughput_rps': round(len(everything) / duration, 1) if duration else 0.0,
+            'p50_ms': round(percentile(everything, 0.50), 1) if everything else None,
+            'p95_ms': round(percentile(everything, 0.95), 1) if everything else None,
+            'p99_ms': round(percentile(everything, 0.99), 1) if everything else None,
+            'actions': actions,
+        }
+
+
+def load_fixtures(settings_module, sample_size):
+    """Usuarios e ids de ejemplo leídos de la base (una sola vez, antes de la carga)"""
+    os.environ['DJANGO_SETTINGS_MODULE'] = settings_module
+    import django
+    django.setup()
+    from django.db import connections
+    from history.benchmark_data import USERNAME_PREFIX
+    from history.models import Person, Doctor, Consult
+
+    doctors = []
+    for doctor in Doctor.objects.filter(user__username__startswith=f'{USERNAME_PREFIX}doctor').select_related('user'):
+        consults = list(Consult.objects.filter(doctor=doctor).order_by('-date').values_list('pk', 'patient_id')[:sample_size])
+        if not consults:
+            continue
+        doctors.append({
+            'username': doctor.user.username,
+            'doctor_id': doctor.pk,
+            'consult_ids': [pk for pk, _ in consults],
+            'patient_ids': sorted({patient_id for _, patient_id in consults}),
+        })
+    fixtures = {
+        'username_prefix': USERNAME_PREFIX,
+        'patient_ids': list(Person.objects.order_by('?').values_list('pk', flat=True)[:sample_size]),
+        'search_terms': sorted({name[:4] for name in Person.objects.values_list('last_name', flat=True)[:sample_size]}),
+        'doctors': doctors,
+    }
+    connections.close_all()
+    if not fixtures['patient_ids'] or not doctors:
+        raise LoadTestError('No hay datos de benchmark: ejecutar antes manage.py seed_benchmark_data')
+    return fixtures
+
+
+def run_action(session, action, rng, fixtures, profile):
+    """Ejecuta una acción y devuelve la respuesta"""
+    patient_ids = profile.get('patient_ids') or fixtures['patient_ids']
+    if action == 'patient_list':
+        return session.request('GET', f'/patients/?page={rng.randint(1, 5)}')
+    if action == 'patient_search':
+        return session.request('GET', f"/patients/?{urlencode({'search': rng.choice(fixtures['search_terms'])})}")
+    if action == 'patient_detail':
+        return session.request('GET', f'/patients/{rng.choice(patient_ids)}/')
+    if action == 'consult_list':
+        return session.request('GET', f'/consults/?page={rng.randint(1, 5)}')
+    if action == 'consult_detail':
+        return session.request('GET', f"/consults/{rng.choice(profile['consult_ids'])}/")
+    if action == 'dashboard':
+        return session.request('GET', '/')
+    if action == 'consult_create':
+        session.request('GET', '/consults/create/')
+        return session.request('POST', '/consults/create/', {
+            'patient': rng.choice(patient_ids),
+            'doctor': profile['doctor_id'],
+            'date': time.strftime('%Y-%m-%dT%H:%M'),
+            'consult_type': 'FOLLOW',
+            'reason': 'Control (prueba de carga)',
+            'symptoms': 'Sin cambios',
+        })
+    if action == 'report_export':
+        doctor = rng.choice(fixtures['doctors'])
+        today = date.today()
+        return session.request('POST', '/reports/consults/', {
+            'format': 'excel', 'doctor': doctor['doctor_id'],
+            'start_date': (today - timedelta(days=30)).isoformat(), 'end_date': today.isoformat(),
+        })
+    raise LoadTestError(f'Acción desconocida: {action}')
+
+
+def virtual_user(index, args, fixtures, stats, deadline, roles):
+    rng = random.Random(args.seed + index)
+    role = roles[index % len(roles)]
+    if role == 'doctor':
+        profile = fixtures['doctors'][index % len(fixtures['doctors'])]
+    else:
+        profile = {'username': f"{fixtures['username_prefix']}{role}"}
+    session = Session(args.target, args.timeout)
+    try:
+        session.login(profile['username'], args.password)
+        actions = [action for action, _ in TRAFFIC_MIX[role]]
+        weights = [weight for _, weight in TRAFFIC_MIX[role]]
+        while time.monotonic() < deadline:
+            action = rng.choices(actions, weights)[0]
+            start = time.perf_counter()
+            try:
+                response = run_action(session, action, rng, fixtures, profile)
+                # Una redirección al login significa que se perdió la sesión
+                ok = response.status < 400 and '/login/' not in (response.getheader('Location') or '')
+            except (http.client.HTTPException, OSError):
+                ok = False
+            stats.record(action, (time.perf_counter() - start) * 1000, ok)
+            if args.think:
+                time.sleep(rng.expovariate(1 / args.think))
+    except LoadTestError as exc:
+        stats.record('login', 0.0, False)
+        print(exc, file=sys.stderr)
+    finally:
+        session.close()
+
+
+def expand_mix(mix):
+    """'admin=1,doctor=6,reception=3' -> lista de roles para repartir entre usuarios"""
+    roles = []
+    for item in mix.split(','):
+        role, _, weight = item.partition('=')
+        if role not in TRAFFIC_MIX:
+            raise LoadTestError(f'Rol desconocido en --mix: {role}')
+        roles += [role] * int(weight or 1)
+    return roles
+
+
+def run_load(args, fixtures):
+    roles = expand_mix(args.mix)
+    stats = Stats()
+    start = time.monotonic()
+    deadline = start + args.duration
+    threads = [
+        threading.Thread(target=virtual_user, args=(index, args, fixtures, stats, deadline, roles), daemon=True)
+        for index in range(args.users)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return stats.summary(time.monotonic() - start)
+
+
+def wait_until_up(base_url, timeout=60):
+    parts = urlsplit(base_url)
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            connection = http.client.HTTPConnection(parts.hostname, parts.port, timeout=2)
+            connection.request('GET', '/healthz')
+            if connection.getresponse().status == 200:
+                return
+        except OSError:
+            pass
+        time.sleep(0.2)
+    raise LoadTestError(f'El servidor no respondió en {timeout}s')
+
+
+def run_server(server, args, fixtures):
+    """server: 'wsgi:4' o 'asgi:4' (interfaz:workers)"""
+    interface, _, workers = server.partition(':')
+    if interface not in SERVER_COMMANDS:
+        raise LoadTestError(f'Servidor desconocido: {server}')
+    if interface == 'asgi':
+        try:
+            import uvicorn  # noqa: F401
+        except ImportError:
+            raise LoadTestError('ASGI requiere uvicorn (pip install uvicorn)')
+
+    port = free_port()
+    env = dict(
+        os.environ,
+        DJANGO_SETTINGS_MODULE=args.settings,
+        GUNICORN_BIND=f'127.0.0.1:{port}',
+        GUNICORN_WORKERS=workers or '1',
+    )
+    process = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', *SERVER_COMMANDS[interface]],
+        cwd=BASE_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        args.target = f'http://127.0.0.1:{port}'
+        wait_until_up(args.target)
+        return run_load(args, fixtures)
+    finally:
+        process.send_signal(signal.SIGTERM)
+        process.wait()
+
+
+def print_summary(name, summary):
+    print(
+        f"\n{name}: {summary['requests']} peticiones, {summary['throughput_rps']} req/s, "
+        f"errores {summary['error_rate'] * 100:.2f}%, p50 {summary['p50_ms']} ms, "
+        f"p95 {summary['p95_ms']} ms, p99 {summary['p99_ms']} ms"
+    )
+    print(f"  {'acción':<16}{'peticiones':>11}{'errores':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}")
+    for action, result in summary['actions'].items():
+        print(
+            f"  {action:<16}{result['requests']:>11}{result['errors']:>9}"
+            f"{result['p50_ms']:>9}{result['p95_ms']:>9}{result['p99_ms']:>9}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument('--target', help='URL de un servidor ya levantado')
+    target.add_argument('--servers', help='Configuraciones a levantar con gunicorn, p. ej. wsgi:2,wsgi:4,asgi:4')
+    parser.add_argument('--users', type=int, default=10, help='Usuarios virtuales concurrentes (default: 10)')
+    parser.add_argument('--duration', type=float, default=30, help='Segundos de carga por servidor (default: 30)')
+    parser.add_argument('--think', type=float, default=0.0, help='Pausa media entre acciones en segundos (default: 0)')
+    parser.add_argument('--mix', default='admin=1,doctor=6,reception=3', help='Proporción de roles (default: admin=1,doctor=6,reception=3)')
+    parser.add_argument('--password', default='bench-pass', help='Contraseña de los usuarios generados')
+    parser.add_argument('--settings', default='crud.settings', help='Settings para leer los datos de ejemplo (default: crud.settings)')
+    parser.add_argument('--sample-size', type=int, default=500, help='Ids de ejemplo por tipo (default: 500)')
+    parser.add_argument('--timeout', type=float, default=60, help='Timeout por petición en segundos (default: 60)')
+    parser.add_argument('--seed', type=int, default=1, help='Semilla de los usuarios virtuales (default: 1)')
+    parser.add_argument('--json', action='store_true', help='Salida en JSON')
+    args = parser.parse_args()
+
+    try:
+        fixtures = load_fixtures(args.settings, args.sample_size)
+        if args.target:
+            results = {args.target: run_load(args, fixtures)}
+        else:
+            results = {server: run_server(server, args, fixtures) for server in args.servers.split(',')}
+    except LoadTestError as exc:
+        parser.exit(2, f'{exc}\n')
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    for name, summary in results.items():
+        print_summary(name, summary)
+    if len(results) > 1:
+        print(f"\n{'servidor':<14}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'errores':>9}")
+        for name, summary in results.items():
+            print(
+                f"{name:<14}{summary['throughput_rps']:>9}{summary['p50_ms']:>9}{summary['p95_ms']:>9}"
+                f"{summary['p99_ms']:>9}{summary['error_rate'] * 100:>8.2f}%"
+            )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,167 @@
+#!/usr/bin/env python
+"""
+Benchmark de consultas por petición según el motor de sesiones
+
+Con CSRF_USE_SESSIONS el token CSRF vive en la sesión: con el motor db cada GET y
+cada POST leen django_session. Compara:
+    db             django.contrib.sessions.backends.db (comportamiento anterior)
+    cached_db      history.sessions (caché + base de datos)
+    signed_cookie  history.sessions con el rol en SESSION_SIGNED_COOKIE_ROLES
+
+Usa una base de datos de prueba temporal (no toca la configurada) y un Client con
+verificación CSRF. En los tres modos inicia sesión el mismo usuario de recepción
+(las vistas hacen las mismas consultas) y mide GET del listado de pacientes y POST
+del alta: recepción no puede dar altas, pero el POST pasa antes por la verificación
+CSRF, que es lo que lee la sesión
+
+Corre en un solo proceso con la caché LocMem: con varios workers el resultado de
+cached_db solo vale si la caché es compartida (redis)
+
+Uso:
+    python benchmarks/sessions.py
+    python benchmarks/sessions.py --requests 200 --json
+"""
+import argparse
+import json
+import os
+import re
+import sys
+import time
+from contextlib import ExitStack
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR))
+
+CSRF_INPUT_RE = re.compile(r'name="csrfmiddlewaretoken" value="([^"]+)"')
+PASSWORD = 'bench-pass'
+
+MODES = {
+    'db': {'SESSION_ENGINE': 'django.contrib.sessions.backends.db', 'SESSION_SIGNED_COOKIE_ROLES': []},
+    'cached_db': {'SESSION_ENGINE': 'history.sessions', 'SESSION_SIGNED_COOKIE_ROLES': []},
+    'signed_cookie': {'SESSION_ENGINE': 'history.sessions', 'SESSION_SIGNED_COOKIE_ROLES': ['reception']},
+}
+
+
+class QueryCounter:
+    def __init__(self):
+        self.total = 0
+        self.session = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.total += 1
+        if 'django_session' in sql:
+            self.session += 1
+        return execute(sql, params, many, context)
+
+
+def setup_django(settings_module):
+    os.environ['DJANGO_SETTINGS_MODULE'] = settings_module
+    import django
+    django.setup()
+    from django.test.utils import setup_test_environment
+    setup_test_environment()
+
+
+def create_user():
+    from django.contrib.auth.models import User
+    from history.models import UserProfile
+
+    reception = User.objects.create_user(username='reception', password=PASSWORD)
+    UserProfile.objects.create(user=reception, role='RECEPTION', phone='+54911234567')
+
+
+def login(username):
+    from django.test import Client
+    from django.urls import reverse
+
+    client = Client(enforce_csrf_checks=True)
+    page = client.get(reverse('login')).content.decode()
+    response = client.post(reverse('login'), {
+        'username': username, 'password': PASSWORD, 'csrfmiddlewaretoken': CSRF_INPUT_RE.search(page).group(1)
+    })
+    if response.status_code != 302:
+        raise RuntimeError(f'No se pudo iniciar sesión como {username}')
+    return client
+
+
+def measure(client, method, url, requests):
+    from django.db import connections
+    from django.middleware.csrf import CSRF_SESSION_KEY
+
+    # Con CSRF_USE_SESSIONS el secreto guardado en la sesión es un token válido
+    token = client.session.get(CSRF_SESSION_KEY)
+
+    counter = QueryCounter()
+    start = time.perf_counter()
+    with ExitStack() as stack:
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(counter))
+        for _ in range(requests):
+            if method == 'post':
+                client.post(url, {'csrfmiddlewaretoken': token})
+            else:
+                client.get(url)
+    elapsed = time.perf_counter() - start
+    return {
+        'queries_per_request': round(counter.total / requests, 2),
+        'session_queries_per_request': round(counter.session / requests, 2),
+        'ms_per_request': round(elapsed * 1000 / requests, 3),
+    }
+
+
+def run(modes, requests):
+    from django.core.cache import cache
+    from django.test.utils import override_settings
+    from django.urls import reverse
+
+    results = {}
+    cases = [
+        ('GET', 'get', reverse('patient_list')),
+        ('POST', 'post', reverse('patient_create')),
+    ]
+    for mode in modes:
+        with override_settings(**MODES[mode]):
+            cache.clear()
+            client = login('reception')
+            for label, method, url in cases:
+                results[f'{mode} {label} {url}'] = measure(client, method, url, requests)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--settings', default='crud.settings_test', help='Módulo de settings (default: crud.settings_test)')
+    parser.add_argument('--modes', default=','.join(MODES), help=f"Modos separados por coma (default: {','.join(MODES)})")
+    parser.add_argument('--requests', type=int, default=100, help='Peticiones medidas por caso (default: 100)')
+    parser.add_argument('--json', action='store_true', help='Salida en JSON')
+    args = parser.parse_args()
+
+    modes = args.modes.split(',')
+    unknown = set(modes) - set(MODES)
+    if unknown:
+        parser.error(f"Modos desconocidos: {', '.join(sorted(unknown))}")
+
+    setup_django(args.settings)
+    from django.db import connection
+
+    old_name = connection.creation.create_test_db(verbosity=0)
+    try:
+        create_user()
+        results = run(modes, args.requests)
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"{'caso':<36} {'consultas':>10} {'de sesión':>10} {'ms':>8}")
+    for name, result in results.items():
+        print(
+            f"{name:<36} {result['queries_per_request']:>10.2f} "
+            f"{result['session_queries_per_request']:>10.2f} {result['ms_per_request']:>8.2f}"
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,98 @@
+#!/usr/bin/env python
+"""
+Benchmark de arranque de un worker: tiempo de importación de crud.wsgi + URLconf
+y memoria residente (RSS) del proceso
+
+Uso:
+    python benchmarks/startup.py                  # estado actual (reportes perezosos)
+    python benchmarks/startup.py --eager-reports  # simula la carga anterior de ReportLab/openpyxl
+    python benchmarks/startup.py --runs 10 --settings crud.settings_production
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+# Se ejecuta en un intérprete nuevo para medir un arranque en frío
+CHILD_SCRIPT = r'''
+import json, os, sys, time
+start = time.perf_counter()
+import crud.wsgi
+wsgi_done = time.perf_counter()
+from django.urls import get_resolver
+get_resolver().url_patterns
+if EAGER_REPORTS:
+    import history.report_backends.pdf, history.report_backends.excel
+end = time.perf_counter()
+
+def rss_kb():
+    try:
+        with open('/proc/self/status') as status:
+            for line in status:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    import resource
+    usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return usage // 1024 if sys.platform == 'darwin' else usage
+
+print(json.dumps({
+    'wsgi_import_ms': (wsgi_done - start) * 1000,
+    'total_ms': (end - start) * 1000,
+    'rss_kb': rss_kb(),
+    'reportlab_loaded': 'reportlab' in sys.modules,
+    'openpyxl_loaded': 'openpyxl' in sys.modules,
+}))
+'''
+
+
+def run_once(settings_module, eager_reports):
+    env = dict(os.environ, DJANGO_SETTINGS_MODULE=settings_module)
+    script = CHILD_SCRIPT.replace('EAGER_REPORTS', repr(eager_reports))
+    output = subprocess.run(
+        [sys.executable, '-c', script],
+        cwd=BASE_DIR, env=env, check=True, capture_output=True, text=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=5, help='Cantidad de arranques a medir (default: 5)')
+    parser.add_argument('--settings', default='crud.settings', help='Módulo de settings (default: crud.settings)')
+    parser.add_argument('--eager-reports', action='store_true', help='Importar también los backends de reportes')
+    parser.add_argument('--json', action='store_true', help='Salida en JSON')
+    args = parser.parse_args()
+
+    samples = [run_once(args.settings, args.eager_reports) for _ in range(args.runs)]
+    summary = {
+        'runs': args.runs,
+        'eager_reports': args.eager_reports,
+        'wsgi_import_ms_median': statistics.median(s['wsgi_import_ms'] for s in samples),
+        'total_ms_median': statistics.median(s['total_ms'] for s in samples),
+        'total_ms_min': min(s['total_ms'] for s in samples),
+        'rss_mb_median': statistics.median(s['rss_kb'] for s in samples) / 1024,
+        'reportlab_loaded': samples[-1]['reportlab_loaded'],
+        'openpyxl_loaded': samples[-1]['openpyxl_loaded'],
+    }
+
+    if args.json:
+        print(json.dumps(summary, indent=2))
+        return
+
+    print(f"Arranques medidos:        {summary['runs']}")
+    print(f"Importar crud.wsgi:       {summary['wsgi_import_ms_median']:.1f} ms (mediana)")
+    print(f"crud.wsgi + URLconf:      {summary['total_ms_median']:.1f} ms (mediana, mín {summary['total_ms_min']:.1f} ms)")
+    print(f"RSS por worker:           {summary['rss_mb_median']:.1f} MB (mediana)")
+    print(f"ReportLab cargado:        {'sí' if summary['reportlab_loaded'] else 'no'}")
+    print(f"openpyxl cargado:         {'sí' if summary['openpyxl_loaded'] else 'no'}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,289 @@
+#!/usr/bin/env python
+"""
+Suite de benchmarks de vistas, estadísticas y exportaciones contra el conjunto de datos
+generado con `manage.py seed_benchmark_data`
+
+Para cada caso mide latencia (p50/p95/p99), consultas SQL por ejecución y pico de
+memoria (tracemalloc, en una ejecución aparte para no distorsionar la latencia).
+Guarda los resultados en JSON y, con --baseline, los compara contra una corrida
+anterior: sale con código 1 si algún caso empeora más que los umbrales
+
+Uso:
+    python benchmarks/suite.py --save-baseline benchmarks/baseline.json
+    python benchmarks/suite.py --baseline benchmarks/baseline.json
+    python benchmarks/suite.py --only patient_list,export --export-sizes 1000 --iterations 50
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+from contextlib import ExitStack
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR))
+
+
+class BenchmarkError(Exception):
+    pass
+
+
+class QueryCounter:
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+def setup_django(settings_module):
+    os.environ['DJANGO_SETTINGS_MODULE'] = settings_module
+    import django
+    django.setup()
+    # Habilita el host 'testserver' del Client
+    from django.test.utils import setup_test_environment
+    setup_test_environment()
+
+
+def percentile(values, fraction):
+    """Percentil con interpolación lineal sobre valores ordenados"""
+    if len(values) == 1:
+        return values[0]
+    position = (len(values) - 1) * fraction
+    lower = int(position)
+    upper = min(lower + 1, len(values) - 1)
+    return values[lower] + (values[upper] - values[lower]) * (position - lower)
+
+
+def measure(func, iterations, warmup):
+    from django.db import connections
+
+    for _ in range(warmup):
+        func()
+
+    counter = QueryCounter()
+    timings = []
+    queries = []
+    with ExitStack() as stack:
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(counter))
+        for _ in range(iterations):
+            counter.count = 0
+            start = time.perf_counter()
+            func()
+            timings.append((time.perf_counter() - start) * 1000)
+            queries.append(counter.count)
+
+    gc.collect()
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    timings.sort()
+    return {
+        'iterations': iterations,
+        'p50_ms': round(percentile(timings, 0.50), 3),
+        'p95_ms': round(percentile(timings, 0.95), 3),
+        'p99_ms': round(percentile(timings, 0.99), 3),
+        'mean_ms': round(statistics.fmean(timings), 3),
+        'min_ms': round(timings[0], 3),
+        'max_ms': round(timings[-1], 3),
+        'queries': max(queries),
+        'peak_memory_kb': round(peak / 1024, 1),
+    }
+
+
+def get_client():
+    from django.contrib.auth.models import User
+    from django.test import Client
+    from history.benchmark_data import USERNAME_PREFIX
+
+    user = (
+        User.objects.filter(username=f'{USERNAME_PREFIX}admin').first()
+        or User.objects.filter(is_superuser=True).order_by('pk').first()
+    )
+    if user is None:
+        raise BenchmarkError('No hay un administrador: ejecutar antes manage.py seed_benchmark_data')
+    client = Client()
+    client.force_login(user)
+    return client
+
+
+def view_benchmark(client, url):
+    def run():
+        response = client.get(url)
+        if response.status_code != 200:
+            raise BenchmarkError(f'GET {url} devolvió {response.status_code}')
+        if response.streaming:
+            b''.join(response.streaming_content)
+    return run
+
+
+def build_benchmarks(args):
+    """[(nombre, función, iteraciones)]"""
+    from django.db.models import Count
+    from django.urls import reverse
+    from history.models import Person, Consult, ConsultListing
+    from history.reports import ReportGenerator, get_statistics_data, workbook_to_bytes
+
+    client = get_client()
+    total_consults = Consult.objects.count()
+    deep_page = max(1, int(total_consults / 10 * 0.9))
+    busiest = (
+        Consult.objects.values('patient_id').annotate(n=Count('id')).order_by('-n').values_list('patient_id', flat=True).first()
+        or Person.objects.values_list('pk', flat=True).first()
+    )
+    search = Person.objects.values_list('last_name', flat=True).first() or 'Pérez'
+
+    benchmarks = [
+        ('patient_list', view_benchmark(client, reverse('patient_list')), args.iterations),
+        ('patient_list_search', view_benchmark(client, f"{reverse('patient_list')}?search={search[:4]}"), args.iterations),
+        ('consult_list', view_benchmark(client, reverse('consult_list')), args.iterations),
+        ('consult_list_deep_page', view_benchmark(client, f"{reverse('consult_list')}?page={deep_page}"), args.iterations),
+        ('dashboard', view_benchmark(client, reverse('dashboard')), args.iterations),
+        ('statistics_data', get_statistics_data, args.iterations),
+    ]
+    if busiest:
+        benchmarks.append(
+            ('patient_detail', view_benchmark(client, reverse('patient_detail', args=[busiest])), args.iterations)
+        )
+
+    generator = ReportGenerator()
+    for size in args.export_sizes:
+        def consults(size=size):
+            return ConsultListing.objects.order_by('-date')[:size]
+
+        benchmarks += [
+            (f'export_consults_pdf_{size}', lambda consults=consults: generator.generate_consults_pdf(consults()), args.export_iterations),
+            (
+                f'export_consults_excel_{size}',
+                lambda consults=consults: workbook_to_bytes(generator.generate_consults_excel(consults())),
+                args.export_iterations
+            ),
+        ]
+
+    if args.only:
+        benchmarks = [item for item in benchmarks if any(name in item[0] for name in args.only)]
+    return benchmarks
+
+
+def run_suite(args):
+    from django.conf import settings
+    from django.db import connection
+    from history.models import Person, Consult
+
+    results = {}
+    for name, func, iterations in build_benchmarks(args):
+        print(f'{name}...', end=' ', flush=True, file=sys.stderr)
+        try:
+            results[name] = measure(func, iterations, args.warmup)
+            print(f"p50 {results[name]['p50_ms']:.1f} ms", file=sys.stderr)
+        except Exception as exc:
+            results[name] = {'error': f'{type(exc).__name__}: {exc}'}
+            print('error', file=sys.stderr)
+
+    return {
+        'created_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'settings': settings.SETTINGS_MODULE,
+        'database': connection.vendor,
+        'python': platform.python_version(),
+        'dataset': {'patients': Person.objects.count(), 'consults': Consult.objects.count()},
+        'benchmarks': results,
+    }
+
+
+def compare(current, baseline, latency_threshold, memory_threshold, query_threshold, min_delta_ms):
+    """Lista de regresiones respecto de la línea de base"""
+    regressions = []
+    for name, result in current['benchmarks'].items():
+        base = baseline['benchmarks'].get(name)
+        if base is None or 'error' in base:
+            continue
+        if 'error' in result:
+            regressions.append(f"{name}: {result['error']}")
+            continue
+        for metric in ('p50_ms', 'p95_ms'):
+            limit = base[metric] * (1 + latency_threshold)
+            if result[metric] > limit and result[metric] - base[metric] > min_delta_ms:
+                regressions.append(f'{name}: {metric} {base[metric]:.1f} -> {result[metric]:.1f} ms')
+        if result['queries'] > base['queries'] + query_threshold:
+            regressions.append(f"{name}: consultas {base['queries']} -> {result['queries']}")
+        if result['peak_memory_kb'] > base['peak_memory_kb'] * (1 + memory_threshold):
+            regressions.append(f"{name}: memoria {base['peak_memory_kb']:.0f} -> {result['peak_memory_kb']:.0f} KB")
+    return regressions
+
+
+def print_table(current, baseline=None):
+    print(f"{'caso':<30} {'p50 ms':>10} {'p95 ms':>10} {'p99 ms':>10} {'queries':>8} {'pico KB':>10} {'vs base p50':>12}")
+    for name, result in current['benchmarks'].items():
+        if 'error' in result:
+            print(f"{name:<30} {result['error']}")
+            continue
+        base = (baseline or {}).get('benchmarks', {}).get(name)
+        delta = ''
+        if base and 'error' not in base and base['p50_ms']:
+            delta = f"{(result['p50_ms'] / base['p50_ms'] - 1) * 100:+.0f}%"
+        print(
+            f"{name:<30} {result['p50_ms']:>10.1f} {result['p95_ms']:>10.1f} {result['p99_ms']:>10.1f} "
+            f"{result['queries']:>8} {result['peak_memory_kb']:>10.0f} {delta:>12}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--settings', default='crud.settings', help='Módulo de settings (default: crud.settings)')
+    parser.add_argument('--iterations', type=int, default=20, help='Ejecuciones medidas por caso (default: 20)')
+    parser.add_argument('--warmup', type=int, default=2, help='Ejecuciones previas sin medir (default: 2)')
+    parser.add_argument(
+        '--export-sizes', type=lambda value: [int(size) for size in value.split(',')], default=[1000, 100000],
+        help='Filas de las exportaciones, separadas por coma (default: 1000,100000)'
+    )
+    parser.add_argument('--export-iterations', type=int, default=3, help='Ejecuciones por exportación (default: 3)')
+    parser.add_argument('--only', type=lambda value: value.split(','), help='Solo los casos cuyo nombre contenga alguno de estos textos')
+    parser.add_argument('--output', default=str(BASE_DIR / 'benchmarks' / 'results.json'), help='Archivo JSON de resultados')
+    parser.add_argument('--baseline', help='JSON de una corrida anterior contra el cual comparar')
+    parser.add_argument('--save-baseline', help='Guardar también los resultados como nueva línea de base')
+    parser.add_argument('--latency-threshold', type=float, default=0.20, help='Aumento relativo tolerado de p50/p95 (default: 0.20)')
+    parser.add_argument('--min-delta-ms', type=float, default=2.0, help='Aumento absoluto mínimo para considerar regresión (default: 2 ms)')
+    parser.add_argument('--query-threshold', type=int, default=0, help='Consultas extra toleradas (default: 0)')
+    parser.add_argument('--memory-threshold', type=float, default=0.25, help='Aumento relativo tolerado del pico de memoria (default: 0.25)')
+    args = parser.parse_args()
+
+    setup_django(args.settings)
+    try:
+        current = run_suite(args)
+    except BenchmarkError as exc:
+        parser.exit(2, f'{exc}\n')
+
+    for path in filter(None, (args.output, args.save_baseline)):
+        Path(path).write_text(json.dumps(current, indent=2))
+
+    baseline = json.loads(Path(args.baseline).read_text()) if args.baseline else None
+    print_table(current, baseline)
+    if baseline is None:
+        return
+
+    if baseline.get('dataset') != current['dataset']:
+        print(f"\nAviso: el conjunto de datos difiere de la línea de base ({baseline.get('dataset')})")
+    regressions = compare(
+        current, baseline, args.latency_threshold, args.memory_threshold, args.query_threshold, args.min_delta_ms
+    )
+    if regressions:
+        print('\nRegresiones:')
+        for regression in regressions:
+            print(f'  {regression}')
+        sys.exit(1)
+    print('\nSin regresiones respecto de la línea de base')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,169 @@
+#!/usr/bin/env python
+"""
+Benchmark de workers de gunicorn: latencia de la primera petición de cada worker
+y memoria compartida vs privada por worker (Linux, /proc/<pid>/smaps_rollup)
+
+Compara tres modos de arranque:
+    cold     sin --preload y sin warm-up (comportamiento anterior)
+    warm     sin --preload, cada worker se precalienta tras el fork
+    preload  --preload + warm-up y gc.freeze() en el maestro
+
+Uso:
+    python benchmarks/workers.py
+    python benchmarks/workers.py --workers 4 --modes cold,preload --path /login/ --json
+"""
+import argparse
+import json
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+MODES = {
+    'cold': {'GUNICORN_PRELOAD': 'false', 'GUNICORN_WARMUP': 'false'},
+    'warm': {'GUNICORN_PRELOAD': 'false', 'GUNICORN_WARMUP': 'true'},
+    'preload': {'GUNICORN_PRELOAD': 'true', 'GUNICORN_WARMUP': 'true'},
+}
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def worker_pids(master_pid):
+    try:
+        with open(f'/proc/{master_pid}/task/{master_pid}/children') as children:
+            return [int(pid) for pid in children.read().split()]
+    except OSError:
+        return []
+
+
+def memory_kb(pid):
+    """Devuelve (compartida, privada) en KB a partir de smaps_rollup"""
+    shared = private = 0
+    with open(f'/proc/{pid}/smaps_rollup') as rollup:
+        for line in rollup:
+            key, _, value = line.partition(':')
+            if key in ('Shared_Clean', 'Shared_Dirty'):
+                shared += int(value.split()[0])
+            elif key in ('Private_Clean', 'Private_Dirty'):
+                private += int(value.split()[0])
+    return shared, private
+
+
+def timed_get(url):
+    start = time.perf_counter()
+    try:
+        with urllib.request.urlopen(url, timeout=30) as response:
+            response.read()
+    except urllib.error.HTTPError as exc:
+        exc.read()
+    return (time.perf_counter() - start) * 1000
+
+
+def wait_for_workers(master_pid, count, timeout=60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if len(worker_pids(master_pid)) >= count:
+            return
+        time.sleep(0.05)
+    raise RuntimeError(f'gunicorn no levantó {count} workers en {timeout}s')
+
+
+def run_mode(mode, workers, path, settings_module, settle):
+    port = free_port()
+    env = dict(
+        os.environ,
+        DJANGO_SETTINGS_MODULE=settings_module,
+        DEBUG=os.environ.get('DEBUG', 'False'),
+        GUNICORN_BIND=f'127.0.0.1:{port}',
+        GUNICORN_WORKERS='1',
+        **MODES[mode],
+    )
+    url = f'http://127.0.0.1:{port}{path}'
+
+    # Latencia de la primera petición: un solo worker para saber quién la atiende
+    process = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', 'crud.wsgi:application'],
+        cwd=BASE_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        wait_for_workers(process.pid, 1)
+        time.sleep(settle)
+        first_ms = timed_get(url)
+        second_ms = timed_get(url)
+    finally:
+        process.send_signal(signal.SIGTERM)
+        process.wait()
+
+    # Memoria: todos los workers después de atender algunas peticiones
+    env['GUNICORN_WORKERS'] = str(workers)
+    process = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', 'crud.wsgi:application'],
+        cwd=BASE_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        wait_for_workers(process.pid, workers)
+        time.sleep(settle)
+        for _ in range(workers * 4):
+            timed_get(url)
+        pids = worker_pids(process.pid)
+        memory = [memory_kb(pid) for pid in pids]
+    finally:
+        process.send_signal(signal.SIGTERM)
+        process.wait()
+
+    return {
+        'mode': mode,
+        'first_request_ms': round(first_ms, 1),
+        'second_request_ms': round(second_ms, 1),
+        'workers': len(memory),
+        'shared_mb_per_worker': round(sum(s for s, _ in memory) / len(memory) / 1024, 1),
+        'private_mb_per_worker': round(sum(p for _, p in memory) / len(memory) / 1024, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--workers', type=int, default=3, help='Workers para medir memoria (default: 3)')
+    parser.add_argument('--modes', default='cold,warm,preload', help='Modos a comparar (default: cold,warm,preload)')
+    parser.add_argument('--path', default='/login/', help='Ruta a pedir (default: /login/)')
+    parser.add_argument('--settings', default='crud.settings', help='Módulo de settings (default: crud.settings)')
+    parser.add_argument('--settle', type=float, default=1.0, help='Segundos de espera tras el arranque (default: 1)')
+    parser.add_argument('--json', action='store_true', help='Salida en JSON')
+    args = parser.parse_args()
+
+    if not os.path.exists('/proc/self/smaps_rollup'):
+        parser.error('Este benchmark necesita Linux (/proc/<pid>/smaps_rollup)')
+
+    results = [
+        run_mode(mode, args.workers, args.path, args.settings, args.settle)
+        for mode in args.modes.split(',')
+    ]
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"{'Modo':<10}{'1ª petición':>14}{'2ª petición':>14}{'Compartida/worker':>20}{'Privada/worker':>17}")
+    for result in results:
+        print(
+            f"{result['mode']:<10}"
+            f"{result['first_request_ms']:>11.1f} ms"
+            f"{result['second_request_ms']:>11.1f} ms"
+            f"{result['shared_mb_per_worker']:>17.1f} MB"
+            f"{result['private_mb_per_worker']:>14.1f} MB"
+        )
+
+
+if __name__ == '__main__':
+    main()
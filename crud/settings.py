@@ -49,6 +49,9 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'history.middleware.RequestInstrumentationMiddleware',
+    'history.middleware.MetricsMiddleware',
+    'history.middleware.RequestProfilerMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
@@ -65,7 +68,9 @@ ROOT_URLCONF = 'crud.urls'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        # DjangoTemplates que además mide el tiempo de renderizado por petición
+        'BACKEND': 'history.instrumentation.InstrumentedDjangoTemplates',
+        'NAME': 'django',
         'DIRS': [],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -207,6 +212,15 @@ MEDIA_ROOT = BASE_DIR / 'media'
 # Configuración de sesiones
 SESSION_COOKIE_AGE = 3600  # 1 hora
 SESSION_EXPIRE_AT_BROWSER_CLOSE = True
+# history.sessions (caché + base de datos, cached_db) necesita una caché compartida entre
+# procesos: con LocMem cada worker guarda su copia y un logout en uno no cierra la sesión
+# en los demás. Por eso acá (LocMem) el motor por defecto es el de base de datos;
+# settings_production pasa a history.sessions cuando CACHE_BACKEND=redis
+SESSION_ENGINE = config('SESSION_ENGINE', default='django.contrib.sessions.backends.db')
+# Roles cuya sesión viaja en una cookie firmada (sin caché ni base de datos), p. ej. 'reception,patient'
+SESSION_SIGNED_COOKIE_ROLES = config(
+    'SESSION_SIGNED_COOKIE_ROLES', default='', cast=lambda v: [s.strip() for s in v.split(',') if s.strip()]
+)
 
 # Configuración de seguridad
 SECURE_BROWSER_XSS_FILTER = True
@@ -226,6 +240,81 @@ CSRF_COOKIE_HTTPONLY = False
 CSRF_COOKIE_SAMESITE = 'Lax'
 CSRF_USE_SESSIONS = True
 
+# Caché por defecto (registra aciertos/fallos para la instrumentación por petición)
+CACHES = {
+    'default': {
+        'BACKEND': 'history.cache_backends.LocMemCache',
+    }
+}
+
+# Caché de fragmentos de plantilla ({% cachefragment %}, history.fragment_cache)
+FRAGMENT_CACHE = {
+    'ENABLED': config('FRAGMENT_CACHE_ENABLED', default=True, cast=bool),
+    'TIMEOUT': config('FRAGMENT_CACHE_TIMEOUT', default=3600, cast=int),
+}
+
+# GET condicional (ETag/Last-Modified) en las páginas de paciente, consulta e historia clínica
+CONDITIONAL_GET = {
+    'ENABLED': config('CONDITIONAL_GET_ENABLED', default=True, cast=bool),
+    # Identificador del despliegue (p. ej. el commit): invalida las páginas guardadas por los navegadores
+    'RELEASE': config('RELEASE', default=''),
+}
+
+# Agenda de seguimientos (history.followups)
+FOLLOW_UPS = {
+    'OVERDUE_DAYS': config('FOLLOW_UPS_OVERDUE_DAYS', default=90, cast=int),
+    'MAX_DAYS': config('FOLLOW_UPS_MAX_DAYS', default=60, cast=int),
+    'SNAPSHOT_TIMEOUT': config('FOLLOW_UPS_SNAPSHOT_TIMEOUT', default=86400, cast=int),
+}
+
+# Email: en desarrollo un servidor SMTP de depuración local (ver README); settings_production.py usa el real
+EMAIL_BACKEND = config('EMAIL_BACKEND', default='django.core.mail.backends.smtp.EmailBackend')
+EMAIL_HOST = config('EMAIL_HOST', default='localhost')
+EMAIL_PORT = config('EMAIL_PORT', default=1025, cast=int)
+EMAIL_USE_TLS = config('EMAIL_USE_TLS', default=False, cast=bool)
+EMAIL_TIMEOUT = config('EMAIL_TIMEOUT', default=10, cast=int)
+DEFAULT_FROM_EMAIL = config('DEFAULT_FROM_EMAIL', default='noreply@medicconsult.com')
+
+# Recordatorios de seguimiento por email (history.reminders)
+REMINDERS = {
+    'DAYS_AHEAD': config('REMINDERS_DAYS_AHEAD', default=1, cast=int),
+    'BATCH_SIZE': config('REMINDERS_BATCH_SIZE', default=50, cast=int),
+    'RATE': config('REMINDERS_RATE', default=5.0, cast=float),
+    'MAX_ATTEMPTS': config('REMINDERS_MAX_ATTEMPTS', default=3, cast=int),
+    'RETRY_DELAY': config('REMINDERS_RETRY_DELAY', default=300, cast=int),
+    'CLINIC_NAME': config('CLINIC_NAME', default='System Medic'),
+}
+
+# Catálogo CIE-10 (history.icd10); rutas vacías = history/data/icd10_es.tsv y su .idx
+ICD10 = {
+    'SOURCE_PATH': config('ICD10_SOURCE_PATH', default=''),
+    'INDEX_PATH': config('ICD10_INDEX_PATH', default=''),
+    'STRICT': config('ICD10_STRICT', default=False, cast=bool),
+}
+
+# Instrumentación por petición (history.middleware.RequestInstrumentationMiddleware)
+REQUEST_INSTRUMENTATION = {
+    'ENABLED': config('REQUEST_INSTRUMENTATION', default=True, cast=bool),
+    'SAMPLE_RATE': config('REQUEST_INSTRUMENTATION_SAMPLE_RATE', default=1.0, cast=float),
+    # Server-Timing solo para staff y las IPs/token de /metrics; SERVER_TIMING_PUBLIC lo abre a todos
+    'SERVER_TIMING': config('SERVER_TIMING_HEADER', default=True, cast=bool),
+    'SERVER_TIMING_PUBLIC': config('SERVER_TIMING_PUBLIC', default=False, cast=bool),
+    'LOG': True,
+    'SLOW_REQUEST_MS': config('SLOW_REQUEST_MS', default=0, cast=int),
+}
+
+# Perfilado de peticiones lentas (history.profiler); se consultan en /admin/profiles/
+PROFILER = {
+    'ENABLED': config('PROFILER_ENABLED', default=True, cast=bool),
+    'SAMPLE_RATE': config('PROFILER_SAMPLE_RATE', default=0.0, cast=float),
+    'SLOW_REQUEST_MS': config('PROFILER_SLOW_REQUEST_MS', default=1000, cast=int),
+    'MAX_ENTRIES': config('PROFILER_MAX_ENTRIES', default=100, cast=int),
+}
+
+# Endpoint /metrics: IPs permitidas y token opcional (Authorization: Bearer <token>)
+METRICS_ALLOWED_IPS = config('METRICS_ALLOWED_IPS', default='127.0.0.1,::1', cast=lambda v: [s.strip() for s in v.split(',')])
+METRICS_TOKEN = config('METRICS_TOKEN', default='')
+
 # Configuración de logging
 LOGGING = {
     'version': 1,
@@ -236,6 +325,11 @@ LOGGING = {
             'class': 'logging.FileHandler',
             'filename': BASE_DIR / 'logs' / 'django.log',
         },
+        'performance': {
+            'level': 'INFO',
+            'class': 'logging.FileHandler',
+            'filename': BASE_DIR / 'logs' / 'performance.log',
+        },
     },
     'loggers': {
         'django': {
@@ -243,5 +337,10 @@ LOGGING = {
             'level': 'INFO',
             'propagate': True,
         },
+        'history.performance': {
+            'handlers': ['performance'],
+            'level': 'INFO',
+            'propagate': False,
+        },
     },
 }
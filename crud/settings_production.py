@@ -21,6 +21,7 @@ DATABASES = {
         'PORT': config('DB_PORT', default='5432'),
         'OPTIONS': {
             'sslmode': 'prefer',
+            'connect_timeout': config('DB_CONNECT_TIMEOUT', default=5, cast=int),
         },
     }
 }
@@ -58,6 +59,11 @@ LOGGING = {
             'class': 'logging.StreamHandler',
             'formatter': 'simple',
         },
+        'performance': {
+            'level': 'INFO',
+            'class': 'logging.FileHandler',
+            'filename': '/app/logs/performance.log',
+        },
     },
     'loggers': {
         'django': {
@@ -70,9 +76,28 @@ LOGGING = {
             'level': 'INFO',
             'propagate': True,
         },
+        'history.performance': {
+            'handlers': ['performance'],
+            'level': 'INFO',
+            'propagate': False,
+        },
     },
 }
 
+# Perfiles de peticiones lentas en el volumen de logs
+PROFILER = {
+    **PROFILER,
+    'SAMPLE_RATE': config('PROFILER_SAMPLE_RATE', default=0.01, cast=float),
+    'DIRECTORY': '/app/logs/profiles',
+}
+
+# En producción se mide una muestra de las peticiones y solo se loguean las lentas
+REQUEST_INSTRUMENTATION = {
+    **REQUEST_INSTRUMENTATION,
+    'SAMPLE_RATE': config('REQUEST_INSTRUMENTATION_SAMPLE_RATE', default=0.1, cast=float),
+    'SLOW_REQUEST_MS': config('SLOW_REQUEST_MS', default=200, cast=int),
+}
+
 # Configuración de seguridad
 SECURE_BROWSER_XSS_FILTER = True
 SECURE_CONTENT_TYPE_NOSNIFF = True
@@ -105,18 +130,22 @@ EMAIL_USE_TLS = config('EMAIL_USE_TLS', default=True, cast=bool)
 EMAIL_HOST_USER = config('EMAIL_HOST_USER', default='')
 EMAIL_HOST_PASSWORD = config('EMAIL_HOST_PASSWORD', default='')
 DEFAULT_FROM_EMAIL = config('EMAIL_HOST_USER', default='noreply@medicconsult.com')
+EMAIL_TIMEOUT = config('EMAIL_TIMEOUT', default=10, cast=int)
 
 # Configuración de cache (Redis - opcional)
 if config('CACHE_BACKEND', default='') == 'redis':
     CACHES = {
         'default': {
-            'BACKEND': 'django_redis.cache.RedisCache',
+            # django_redis.cache.RedisCache con registro de aciertos/fallos
+            'BACKEND': 'history.cache_backends.RedisCache',
             'LOCATION': config('REDIS_URL', default='redis://redis:6379/1'),
             'OPTIONS': {
                 'CLIENT_CLASS': 'django_redis.client.DefaultClient',
             }
         }
     }
+    # Con la caché compartida las sesiones pueden leerse de ella (history.sessions)
+    SESSION_ENGINE = config('SESSION_ENGINE', default='history.sessions')
 
 # Configuración de CORS
 CORS_ALLOWED_ORIGINS = config('CORS_ALLOWED_ORIGINS', default='http://localhost:3000,http://127.0.0.1:3000').split(',')
@@ -149,4 +178,6 @@ BACKUP_SCHEDULE = config('BACKUP_SCHEDULE', default='0 2 * * *')
 HEALTH_CHECK = {
     'DISK_USAGE_MAX': 90,  # 90%
     'MEMORY_MIN': 100,     # 100MB
+    'DB_TIMEOUT': 2,       # segundos
+    'CACHE_SECONDS': 5,    # /readyz reutiliza el resultado durante este tiempo
 }
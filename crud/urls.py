@@ -20,9 +20,13 @@ from django.contrib.auth import views as auth_views
 from django.conf import settings
 from django.conf.urls.static import static
 from history import views
+from history import monitoring_views
 from history import report_views
 
 urlpatterns = [
+    # Perfiles de peticiones lentas (history.profiler), antes de las URLs del admin
+    path('admin/profiles/', admin.site.admin_view(monitoring_views.profile_list), name='admin_profile_list'),
+    path('admin/profiles/<str:entry_id>/', admin.site.admin_view(monitoring_views.profile_detail), name='admin_profile_detail'),
     path('admin/', admin.site.urls),
     
     # Autenticación
@@ -43,9 +47,13 @@ urlpatterns = [
     
     # Consultas
     path('consults/', views.consult_list, name='consult_list'),
+    path('consults/search/', views.consult_search, name='consult_search'),
     path('consults/<int:pk>/', views.consult_detail, name='consult_detail'),
     path('consults/create/', views.consult_create, name='consult_create'),
     
+    # Seguimientos
+    path('follow-ups/', views.follow_up_list, name='follow_up_list'),
+    
     # Doctores
     path('doctors/', views.doctor_list, name='doctor_list'),
     path('doctors/create/', views.doctor_create, name='doctor_create'),
@@ -60,6 +68,12 @@ urlpatterns = [
     
     # API
     path('api/dashboard-data/', report_views.dashboard_data_api, name='dashboard_data_api'),
+    path('api/v1/', include('history.api_urls')),
+
+    # Monitoreo interno
+    path('metrics', monitoring_views.metrics_view, name='metrics'),
+    path('healthz', monitoring_views.healthz, name='healthz'),
+    path('readyz', monitoring_views.readyz, name='readyz'),
 ]
 
 # Servir archivos de medios en desarrollo
@@ -24,6 +24,12 @@ collect_static() {
     python manage.py collectstatic --noinput
 }
 
+# Función para compilar el índice del catálogo CIE-10
+build_icd10_index() {
+    echo "Compilando índice CIE-10..."
+    python manage.py build_icd10_index
+}
+
 # Función para crear superusuario si no existe
 create_superuser() {
     echo "Verificando superusuario..."
@@ -57,14 +63,22 @@ main() {
         wait_for_db
     fi
     
-    # Ejecutar migraciones
-    run_migrations
-    
-    # Recolectar archivos estáticos
-    collect_static
-    
-    # Crear superusuario si no existe
-    create_superuser
+    # Los servicios auxiliares (SKIP_BOOTSTRAP=true) esperan a que web termine el
+    # arranque: correr migraciones y collectstatic a la vez en varios contenedores
+    # genera carreras
+    if [ "$SKIP_BOOTSTRAP" != "true" ]; then
+        # Ejecutar migraciones
+        run_migrations
+        
+        # Recolectar archivos estáticos
+        collect_static
+        
+        # Índice CIE-10 compartido por los workers
+        build_icd10_index
+        
+        # Crear superusuario si no existe
+        create_superuser
+    fi
     
     echo "=== MedicConsult iniciado correctamente ==="
     
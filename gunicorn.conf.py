@@ -0,0 +1,49 @@
+"""
+Configuración de gunicorn (se carga automáticamente desde el directorio de trabajo)
+
+Con preload_app la aplicación se importa una sola vez en el proceso maestro y
+history.warmup precalienta vistas, plantillas y cachés antes de crear los workers,
+que comparten esa memoria copy-on-write. Sin preload, cada worker se precalienta
+después de arrancar para no pagar el costo en su primera petición
+"""
+import os
+import tempfile
+
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:8000')
+workers = int(os.environ.get('GUNICORN_WORKERS', '3'))
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', '120'))
+preload_app = os.environ.get('GUNICORN_PRELOAD', 'true').lower() in ('1', 'true', 'yes')
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', '0'))
+max_requests_jitter = int(os.environ.get('GUNICORN_MAX_REQUESTS_JITTER', '0'))
+
+# Métricas de Prometheus compartidas entre workers (history.metrics); se define
+# antes de que se importe la app para que prometheus_client use archivos mmap.
+# Un directorio nuevo por arranque evita sumar valores de ejecuciones anteriores
+if not os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+    os.environ['PROMETHEUS_MULTIPROC_DIR'] = tempfile.mkdtemp(prefix='medicconsult-metrics-')
+
+# No es un setting de gunicorn: permite desactivar el precalentamiento (p. ej. para comparar)
+WARMUP = os.environ.get('GUNICORN_WARMUP', 'true').lower() in ('1', 'true', 'yes')
+
+
+def when_ready(server):
+    # Se ejecuta en el maestro después de cargar la app y antes del primer fork
+    if WARMUP and server.cfg.preload_app:
+        from history.warmup import warm_up
+
+        stats = warm_up(freeze=True)
+        server.log.info('Warm-up previo al fork: %s', stats)
+
+
+def post_worker_init(worker):
+    if WARMUP and not worker.cfg.preload_app:
+        from history.warmup import warm_up
+
+        warm_up(freeze=False)
+
+
+def child_exit(server, worker):
+    from prometheus_client import multiprocess
+
+    # Saca al worker de los gauges "livesum" (conexiones abiertas, reportes en curso)
+    multiprocess.mark_process_dead(worker.pid)
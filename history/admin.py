@@ -1,7 +1,13 @@
-from django.contrib import admin
+from django.contrib import admin, messages
 from django.contrib.auth.admin import UserAdmin
 from django.contrib.auth.models import User
-from .models import Person, Doctor, Consult, Diagnosis, Treatment, MedicalRecord
+from django.core.exceptions import PermissionDenied
+from django.shortcuts import render
+from django.urls import path
+from .models import Person, Doctor, Consult, Diagnosis, Treatment, MedicalRecord, FollowUpReminder
+from .forms import PatientImportUploadForm
+from .importers import PatientImporter, iter_rows
+from .utils import log_audit_action
 
 class DoctorInline(admin.StackedInline):
     model = Doctor
@@ -34,19 +40,67 @@ class PersonAdmin(admin.ModelAdmin):
             'classes': ('collapse',)
         }),
     )
+    change_list_template = 'admin/history/person/change_list.html'
+
+    def get_urls(self):
+        custom_urls = [
+            path('import/', self.admin_site.admin_view(self.import_view), name='history_person_import'),
+        ]
+        return custom_urls + super().get_urls()
+
+    def import_view(self, request):
+        """Importación masiva de pacientes desde CSV/XLSX"""
+        if not self.has_add_permission(request):
+            raise PermissionDenied
+
+        result = None
+        if request.method == 'POST':
+            form = PatientImportUploadForm(request.POST, request.FILES)
+            if form.is_valid():
+                uploaded = form.cleaned_data['file']
+                importer = PatientImporter(
+                    batch_size=form.cleaned_data['batch_size'],
+                    dry_run=form.cleaned_data['dry_run']
+                )
+                result = importer.run(iter_rows(uploaded, uploaded.name))
+
+                if not form.cleaned_data['dry_run']:
+                    log_audit_action(
+                        request.user, 'CREATE', 'Person',
+                        description=f'Importación masiva: {result.created} pacientes desde {uploaded.name}',
+                        request=request
+                    )
+                self.message_user(
+                    request,
+                    f'{result.created} de {result.total} filas importadas en {result.elapsed:.2f}s '
+                    f'({result.rows_per_second:.0f} filas/s)',
+                    messages.WARNING if result.errors else messages.SUCCESS
+                )
+        else:
+            form = PatientImportUploadForm()
+
+        context = {
+            **self.admin_site.each_context(request),
+            'opts': self.model._meta,
+            'title': 'Importar pacientes',
+            'form': form,
+            'result': result,
+            'errors': result.errors[:500] if result else [],
+        }
+        return render(request, 'admin/history/person/import.html', context)
 
 @admin.register(Doctor)
 class DoctorAdmin(admin.ModelAdmin):
     list_display = ('user', 'license_number', 'specialty', 'phone', 'is_active')
     list_filter = ('specialty', 'is_active', 'created_at')
-    search_fields = ('user__first_name', 'user__last_name', 'license_number')
+    search_fields = ('display_name', 'license_number')
     readonly_fields = ('created_at', 'updated_at')
 
 @admin.register(Consult)
 class ConsultAdmin(admin.ModelAdmin):
     list_display = ('id', 'patient', 'doctor', 'date', 'consult_type', 'created_at')
     list_filter = ('consult_type', 'date', 'created_at')
-    search_fields = ('patient__name', 'patient__last_name', 'doctor__user__first_name')
+    search_fields = ('patient__name', 'patient__last_name', 'doctor__display_name')
     readonly_fields = ('created_at', 'updated_at')
     date_hierarchy = 'date'
 
@@ -68,6 +122,13 @@ class MedicalRecordAdmin(admin.ModelAdmin):
     search_fields = ('patient__name', 'patient__last_name')
     readonly_fields = ('created_at', 'updated_at')
 
+@admin.register(FollowUpReminder)
+class FollowUpReminderAdmin(admin.ModelAdmin):
+    list_display = ('email', 'follow_up_date', 'status', 'attempts', 'sent_at')
+    list_filter = ('status', 'follow_up_date')
+    search_fields = ('email',)
+    readonly_fields = ('treatment', 'created_at', 'updated_at', 'sent_at')
+
 # Re-register UserAdmin
 admin.site.unregister(User)
 admin.site.register(User, CustomUserAdmin)
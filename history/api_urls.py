@@ -0,0 +1,16 @@
+"""
+Rutas de la API REST (v1)
+"""
+from rest_framework.routers import DefaultRouter
+from . import api_views
+
+router = DefaultRouter()
+router.register('patients', api_views.PersonViewSet, basename='api-patient')
+router.register('doctors', api_views.DoctorViewSet, basename='api-doctor')
+router.register('consults', api_views.ConsultViewSet, basename='api-consult')
+router.register('medical-records', api_views.MedicalRecordViewSet, basename='api-medical-record')
+router.register('consult-search', api_views.ConsultSearchViewSet, basename='api-consult-search')
+router.register('icd10', api_views.ICD10ViewSet, basename='api-icd10')
+router.register('follow-ups', api_views.FollowUpViewSet, basename='api-follow-up')
+
+urlpatterns = router.urls
@@ -0,0 +1,303 @@
+"""
+Vistas de la API REST (v1)
+"""
+from django.db.models import Count
+from django_filters.rest_framework import DjangoFilterBackend
+from rest_framework import status, viewsets
+from rest_framework.decorators import action
+from rest_framework.pagination import CursorPagination
+from rest_framework.parsers import BaseParser, JSONParser
+from rest_framework.permissions import BasePermission
+from rest_framework.response import Response
+from .followups import (
+    DEFAULT_UPCOMING_DAYS, FOLLOW_UP_PAGE_SIZE, WINDOWS, follow_up_scope, get_follow_up_page
+)
+from .icd10 import AUTOCOMPLETE_LIMIT, get_icd10_catalog
+from .importers import ConsultIngester
+from .search import SEARCH_PAGE_SIZE, search_consults, search_scope
+from .timeline import TIMELINE_PAGE_SIZE, get_timeline_page
+from .models import Person, Doctor, Consult, Diagnosis, MedicalRecord
+from .serializers import (
+    PersonSerializer, DoctorSerializer, ConsultSerializer, MedicalRecordSerializer,
+    parse_fields_param
+)
+from .utils import (
+    is_administrator, is_doctor, get_accessible_patients, get_accessible_consults, log_audit_action
+)
+
+
+class HistoryCursorPagination(CursorPagination):
+    """Paginación por cursor, estable aunque se inserten filas nuevas"""
+    page_size = 20
+    max_page_size = 100
+    page_size_query_param = 'page_size'
+    ordering = '-created_at'
+
+    def get_ordering(self, request, queryset, view):
+        ordering = getattr(view, 'cursor_ordering', self.ordering)
+        if isinstance(ordering, str):
+            return (ordering,)
+        return tuple(ordering)
+
+
+class NDJSONParser(BaseParser):
+    """Un objeto JSON por línea; devuelve las líneas sin decodificar"""
+    media_type = 'application/x-ndjson'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        encoding = (parser_context or {}).get('encoding', 'utf-8')
+        return stream.read().decode(encoding).splitlines()
+
+
+class IsAdministrator(BasePermission):
+    """Solo administradores (mismo criterio que require_role('administrator'))"""
+
+    def has_permission(self, request, view):
+        return is_administrator(request.user)
+
+
+class IsDoctorOrAdministrator(BasePermission):
+    """Mismo criterio que require_role('doctor')"""
+
+    def has_permission(self, request, view):
+        return is_administrator(request.user) or is_doctor(request.user)
+
+
+def _int_param(request, name, default):
+    try:
+        return int(request.query_params.get(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+class OptimizedReadOnlyViewSet(viewsets.ReadOnlyModelViewSet):
+    """
+    ViewSet de solo lectura que aplica select_related/prefetch_related
+    únicamente para los campos que se van a serializar
+    """
+    pagination_class = HistoryCursorPagination
+    filter_backends = [DjangoFilterBackend]
+
+    # campo serializado -> relaciones necesarias para resolverlo
+    select_related_fields = {}
+    prefetch_related_fields = {}
+
+    def scope_queryset(self, queryset):
+        """Restringe el queryset según el rol del usuario"""
+        return queryset
+
+    def get_queryset(self):
+        queryset = self.scope_queryset(super().get_queryset())
+        requested = parse_fields_param(self.request)
+
+        select_related = self._related_for(self.select_related_fields, requested)
+        if select_related:
+            queryset = queryset.select_related(*select_related)
+
+        prefetch_related = self._related_for(self.prefetch_related_fields, requested)
+        if prefetch_related:
+            queryset = queryset.prefetch_related(*prefetch_related)
+
+        return queryset
+
+    @staticmethod
+    def _related_for(mapping, requested):
+        related = []
+        for field_name, lookups in mapping.items():
+            if requested is None or field_name in requested:
+                related.extend(lookup for lookup in lookups if lookup not in related)
+        return related
+
+
+class PersonViewSet(OptimizedReadOnlyViewSet):
+    queryset = Person.objects.filter(is_active=True)
+    serializer_class = PersonSerializer
+    filterset_fields = ['gender', 'dni']
+    cursor_ordering = 'id'
+
+    def scope_queryset(self, queryset):
+        return get_accessible_patients(self.request.user, queryset)
+
+    @action(detail=True, methods=['get'])
+    def timeline(self, request, pk=None):
+        """Historial de consultas del paciente paginado con ?cursor="""
+        patient = self.get_object()
+        try:
+            limit = min(int(request.query_params.get('limit', TIMELINE_PAGE_SIZE)), 100)
+        except ValueError:
+            limit = TIMELINE_PAGE_SIZE
+
+        items, next_cursor = get_timeline_page(patient, request.query_params.get('cursor'), max(limit, 1))
+        return Response({'results': items, 'next_cursor': next_cursor})
+
+
+class DoctorViewSet(OptimizedReadOnlyViewSet):
+    queryset = Doctor.objects.all()
+    serializer_class = DoctorSerializer
+    permission_classes = [IsAdministrator]
+    filterset_fields = ['specialty', 'is_active', 'license_number']
+    cursor_ordering = 'id'
+    select_related_fields = {
+        'email': ['user'],
+    }
+
+
+class ConsultViewSet(OptimizedReadOnlyViewSet):
+    queryset = Consult.objects.all()
+    serializer_class = ConsultSerializer
+    filterset_fields = {
+        'patient': ['exact'],
+        'doctor': ['exact'],
+        'consult_type': ['exact'],
+        'date': ['gte', 'lte'],
+    }
+    cursor_ordering = '-date'
+    select_related_fields = {
+        'patient_name': ['patient'],
+        'doctor_name': ['doctor'],
+        'diagnosis': ['diagnosis'],
+        'treatment': ['treatment'],
+    }
+
+    def scope_queryset(self, queryset):
+        return get_accessible_consults(self.request.user, queryset)
+
+    @action(
+        detail=False, methods=['post'], url_path='bulk',
+        permission_classes=[IsAdministrator], parser_classes=[NDJSONParser, JSONParser]
+    )
+    def bulk(self, request):
+        """Ingesta masiva: lista JSON o NDJSON de consultas (ver ConsultIngester)"""
+        records = request.data
+        if not isinstance(records, list):
+            return Response(
+                {'error': 'Se espera una lista JSON o un cuerpo NDJSON'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        dry_run = request.query_params.get('dry_run') in ('1', 'true')
+        result = ConsultIngester(dry_run=dry_run).run(records)
+
+        if result.created and not dry_run:
+            log_audit_action(
+                request.user, 'CREATE', 'Consult',
+                description=f'Ingesta masiva: {result.created} consultas',
+                request=request
+            )
+        if dry_run:
+            response_status = status.HTTP_200_OK
+        elif result.created:
+            response_status = status.HTTP_201_CREATED
+        else:
+            response_status = status.HTTP_400_BAD_REQUEST
+        return Response(result.as_dict(), status=response_status)
+
+
+class MedicalRecordViewSet(OptimizedReadOnlyViewSet):
+    queryset = MedicalRecord.objects.filter(patient__is_active=True)
+    serializer_class = MedicalRecordSerializer
+    filterset_fields = ['patient']
+    cursor_ordering = 'id'
+
+    def scope_queryset(self, queryset):
+        patients = get_accessible_patients(self.request.user)
+        return queryset.filter(patient__in=patients.values('id'))
+
+
+class FollowUpViewSet(viewsets.ViewSet):
+    """
+    Agenda de seguimientos: ?window=overdue|today|upcoming&days=&doctor=&cursor=&limit=
+    Los doctores ven solo la suya; los administradores toda la clínica o un doctor
+    """
+    permission_classes = [IsDoctorOrAdministrator]
+
+    def list(self, request):
+        window = request.query_params.get('window', 'upcoming')
+        if window not in WINDOWS:
+            return Response(
+                {'error': f'window debe ser uno de: {", ".join(WINDOWS)}'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        doctor_id = _int_param(request, 'doctor', None)
+        scope = follow_up_scope(request.user, doctor_id)
+        if scope is False:
+            return Response({'results': [], 'next_cursor': None})
+
+        items, next_cursor = get_follow_up_page(
+            window, scope,
+            days=_int_param(request, 'days', DEFAULT_UPCOMING_DAYS),
+            cursor=request.query_params.get('cursor'),
+            limit=max(min(_int_param(request, 'limit', FOLLOW_UP_PAGE_SIZE), 200), 1),
+        )
+        return Response({'results': items, 'next_cursor': next_cursor})
+
+
+class ConsultSearchViewSet(viewsets.ViewSet):
+    """
+    Búsqueda de texto en las consultas: ?q=&consult_type=&icd_code=&page=&page_size=
+    Resultados por relevancia con fragmento resaltado y facetas por tipo y código ICD.
+    Los doctores solo encuentran sus consultas
+    """
+    permission_classes = [IsDoctorOrAdministrator]
+
+    def list(self, request):
+        query = request.query_params.get('q', '').strip()
+        if not query:
+            return Response({'error': 'Falta el parámetro q'}, status=status.HTTP_400_BAD_REQUEST)
+        scope = search_scope(request.user)
+        if scope is False:
+            return Response({'query': query, 'total': 0, 'results': [], 'facets': {}})
+
+        results = search_consults(
+            query, scope,
+            consult_type=request.query_params.get('consult_type') or None,
+            icd_code=request.query_params.get('icd_code') or None,
+            page=max(_int_param(request, 'page', 1), 1),
+            page_size=max(min(_int_param(request, 'page_size', SEARCH_PAGE_SIZE), 100), 1),
+        )
+        return Response(results.as_dict())
+
+
+class ICD10ViewSet(viewsets.ViewSet):
+    """
+    Catálogo CIE-10: autocompletado (?q=&limit=), detalle por código y, en rollup/,
+    los diagnósticos de las consultas accesibles agrupados por capítulo o agrupación
+    (?level=chapter|block)
+    """
+    lookup_value_regex = '[^/]+'
+
+    def _serialize(self, catalog, entry):
+        chapter = catalog.chapter(entry.code)
+        block = catalog.block(entry.code)
+        return {
+            'code': entry.code,
+            'description': entry.description,
+            'chapter': chapter.number if chapter else None,
+            'block': f'{block.first}-{block.last}' if block else None,
+        }
+
+    def list(self, request):
+        catalog = get_icd10_catalog()
+        limit = max(min(_int_param(request, 'limit', AUTOCOMPLETE_LIMIT), 100), 1)
+        entries = catalog.complete(request.query_params.get('q', ''), limit=limit)
+        return Response({'results': [self._serialize(catalog, entry) for entry in entries]})
+
+    def retrieve(self, request, pk=None):
+        catalog = get_icd10_catalog()
+        entry = catalog.lookup(pk)
+        if entry is None:
+            return Response({'error': f'Código {pk} no encontrado'}, status=status.HTTP_404_NOT_FOUND)
+        return Response(self._serialize(catalog, entry))
+
+    @action(detail=False)
+    def rollup(self, request):
+        level = request.query_params.get('level', 'chapter')
+        if level not in ('chapter', 'block'):
+            return Response({'error': 'level debe ser chapter o block'}, status=status.HTTP_400_BAD_REQUEST)
+        consults = get_accessible_consults(request.user)
+        counts = (
+            Diagnosis.objects.filter(consult__in=consults.values('id'))
+            .exclude(icd_code__isnull=True).exclude(icd_code='')
+            .values_list('icd_code').annotate(count=Count('id')).order_by()
+        )
+        return Response({'level': level, 'results': get_icd10_catalog().rollup(counts, level)})
@@ -4,3 +4,15 @@ from django.apps import AppConfig
 class HistoryConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'history'
+
+    def ready(self):
+        from django.contrib.auth.models import User
+        from django.core import checks
+        from django.db.models.signals import post_save
+        from . import fragment_cache, listing, sessions, summaries
+        from .models import sync_doctor_names
+        post_save.connect(sync_doctor_names, sender=User, dispatch_uid='doctor-names')
+        fragment_cache.connect_signals()
+        listing.connect_signals()
+        summaries.connect_signals()
+        checks.register(sessions.check_session_cache, checks.Tags.caches)
@@ -0,0 +1,406 @@
+"""
+Generación de datos sintéticos a gran escala para benchmarks
+
+BenchmarkDataSeeder crea pacientes, doctores, consultas, diagnósticos, tratamientos y
+logs de auditoría con una distribución realista:
+- pocos doctores concentran la mayoría de las consultas (pesos tipo Zipf)
+- una fracción de pacientes crónicos consulta muchas más veces que el resto
+- más consultas en invierno y en días hábiles, en horario de consultorio
+
+Con la misma semilla, cantidades y fecha final el resultado es idéntico. Los ids se
+asignan explícitamente (las secuencias se reajustan al terminar) para poder insertar
+los hijos sin esperar a que la base devuelva los ids; en PostgreSQL se puede usar
+COPY FROM STDIN en lugar de bulk_create
+"""
+import io
+import random
+import time
+from bisect import bisect
+from datetime import datetime, time as dt_time, timedelta
+from itertools import accumulate
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.utils import timezone
+from .models import Person, Doctor, Consult, Diagnosis, Treatment, AuditLog, UserProfile
+from .signals import consults_bulk_created
+
+EMAIL_DOMAIN = 'bench.example.com'
+USERNAME_PREFIX = 'bench_'
+LICENSE_PREFIX = 'BENCH'
+DNI_OFFSET = 30000000
+
+FIRST_NAMES = [
+    'Juan', 'María', 'José', 'Ana', 'Carlos', 'Lucía', 'Jorge', 'Sofía', 'Luis', 'Valentina',
+    'Miguel', 'Camila', 'Diego', 'Martina', 'Pablo', 'Julieta', 'Martín', 'Paula', 'Sergio', 'Florencia',
+]
+LAST_NAMES = [
+    'González', 'Rodríguez', 'Gómez', 'Fernández', 'López', 'Díaz', 'Martínez', 'Pérez', 'García', 'Sánchez',
+    'Romero', 'Sosa', 'Torres', 'Álvarez', 'Ruiz', 'Ramírez', 'Flores', 'Acosta', 'Benítez', 'Medina',
+]
+STREETS = ['Av. Rivadavia', 'Av. Corrientes', 'Calle Florida', 'Av. Santa Fe', 'Calle Mitre', 'Av. Belgrano']
+REASONS = [
+    ('Control de presión arterial', 'Cefalea leve ocasional', 'I10', 'Hipertensión esencial'),
+    ('Tos y fiebre', 'Tos productiva, fiebre de 38°C', 'J06.9', 'Infección respiratoria aguda'),
+    ('Dolor lumbar', 'Dolor lumbar al levantar peso', 'M54.5', 'Lumbalgia'),
+    ('Control de diabetes', 'Poliuria, polidipsia', 'E11.9', 'Diabetes mellitus tipo 2'),
+    ('Dolor de garganta', 'Odinofagia, fiebre', 'J02.9', 'Faringitis aguda'),
+    ('Erupción cutánea', 'Prurito y lesiones eritematosas', 'L30.9', 'Dermatitis'),
+    ('Ansiedad', 'Insomnio, palpitaciones', 'F41.1', 'Trastorno de ansiedad generalizada'),
+    ('Chequeo anual', 'Sin síntomas', 'Z00.0', 'Examen médico general'),
+    ('Dolor abdominal', 'Dolor epigástrico posprandial', 'K29.7', 'Gastritis'),
+    ('Control pediátrico', 'Sin síntomas', 'Z00.1', 'Control de salud del niño'),
+]
+MEDICATIONS = ['Enalapril 10 mg', 'Ibuprofeno 400 mg', 'Metformina 850 mg', 'Amoxicilina 500 mg', 'Omeprazol 20 mg', None]
+CONSULT_TYPES = [('FOLLOW', 45), ('ROUTINE', 30), ('FIRST', 20), ('EMERGENCY', 5)]
+AUDIT_ACTIONS = [('VIEW', 70), ('UPDATE', 20), ('CREATE', 10)]
+# Más consultas en los meses fríos (hemisferio sur): enero..diciembre
+MONTH_WEIGHTS = [0.7, 0.7, 0.9, 1.0, 1.2, 1.4, 1.5, 1.4, 1.1, 1.0, 0.9, 0.8]
+# Lunes..domingo
+WEEKDAY_WEIGHTS = [1.0, 1.0, 1.0, 1.0, 0.9, 0.25, 0.05]
+SEED_MODELS = [User, UserProfile, Doctor, Person, Consult, Diagnosis, Treatment, AuditLog]
+
+
+class SeedError(Exception):
+    pass
+
+
+class SeedReport:
+    """Filas escritas y tiempo de escritura por tabla"""
+
+    def __init__(self, method):
+        self.method = method
+        self.tables = {}
+        self.started_at = time.monotonic()
+        self.elapsed = 0.0
+
+    def add(self, model, rows, seconds):
+        stats = self.tables.setdefault(model._meta.db_table, [0, 0.0])
+        stats[0] += rows
+        stats[1] += seconds
+
+    def finish(self):
+        self.elapsed = time.monotonic() - self.started_at
+
+    @property
+    def total_rows(self):
+        return sum(rows for rows, _ in self.tables.values())
+
+    @property
+    def rows_per_second(self):
+        return self.total_rows / self.elapsed if self.elapsed else 0.0
+
+    def lines(self):
+        for table, (rows, seconds) in self.tables.items():
+            rate = rows / seconds if seconds else 0.0
+            yield f'{table:<24} {rows:>12,} filas {seconds:>9.2f}s {rate:>12,.0f} filas/s'
+        yield (
+            f"{'total':<24} {self.total_rows:>12,} filas {self.elapsed:>9.2f}s "
+            f'{self.rows_per_second:>12,.0f} filas/s ({self.method}, incluye generación)'
+        )
+
+
+class BulkCreateWriter:
+    method = 'bulk_create'
+
+    def __init__(self, batch_size):
+        self.batch_size = batch_size
+
+    def write(self, model, objs):
+        model.objects.bulk_create(objs, batch_size=self.batch_size)
+
+
+def copy_value(value):
+    """Valor en el formato de texto de COPY"""
+    if value is None:
+        return '\\N'
+    if value is True:
+        return 't'
+    if value is False:
+        return 'f'
+    return (
+        str(value).replace('\\', '\\\\').replace('\t', '\\t').replace('\n', '\\n').replace('\r', '\\r')
+    )
+
+
+class CopyWriter:
+    """COPY FROM STDIN (solo PostgreSQL): evita el armado de INSERT con parámetros"""
+    method = 'copy'
+
+    def write(self, model, objs):
+        fields = model._meta.concrete_fields
+        buffer = io.StringIO()
+        for obj in objs:
+            buffer.write('\t'.join(
+                copy_value(field.get_db_prep_save(field.pre_save(obj, True), connection))
+                for field in fields
+            ))
+            buffer.write('\n')
+        buffer.seek(0)
+        columns = ', '.join(connection.ops.quote_name(field.column) for field in fields)
+        table = connection.ops.quote_name(model._meta.db_table)
+        with connection.cursor() as cursor:
+            cursor.copy_expert(f'COPY {table} ({columns}) FROM STDIN', buffer)
+
+
+def get_writer(method, batch_size):
+    """method: 'auto' (COPY si la base es PostgreSQL), 'copy' o 'bulk'"""
+    if method == 'copy' and connection.vendor != 'postgresql':
+        raise SeedError('COPY solo está disponible con PostgreSQL')
+    if method == 'copy' or (method == 'auto' and connection.vendor == 'postgresql'):
+        return CopyWriter()
+    return BulkCreateWriter(batch_size)
+
+
+def has_benchmark_data():
+    return (
+        Person.objects.filter(email__endswith=f'@{EMAIL_DOMAIN}').exists()
+        or User.objects.filter(username__startswith=USERNAME_PREFIX).exists()
+    )
+
+
+def clear_benchmark_data():
+    """Borra los datos generados (las consultas y sus hijos caen en cascada)"""
+    with transaction.atomic():
+        Person.objects.filter(email__endswith=f'@{EMAIL_DOMAIN}').delete()
+        User.objects.filter(username__startswith=USERNAME_PREFIX).delete()
+
+
+def next_id(model):
+    last = model.objects.order_by('-pk').values_list('pk', flat=True).first()
+    return (last or 0) + 1
+
+
+class WeightedChoice:
+    """Elección ponderada sobre range(n) con la tabla acumulada precalculada"""
+
+    def __init__(self, rng, weights):
+        self.rng = rng
+        self.cum_weights = list(accumulate(weights))
+        self.total = self.cum_weights[-1]
+
+    def __call__(self):
+        return bisect(self.cum_weights, self.rng.random() * self.total)
+
+
+class BenchmarkDataSeeder:
+    def __init__(
+        self, patients=10000, consults=100000, doctors=50, seed=42, batch_size=5000, method='auto',
+        diagnosis_ratio=0.8, treatment_ratio=0.6, audit_ratio=1.0, chronic_ratio=0.1, years=3,
+        end_date=None, password='bench-pass', progress=None
+    ):
+        if patients < 1 or doctors < 1 or consults < 0 or batch_size < 1:
+            raise SeedError('Se necesita al menos un paciente, un doctor y un lote de tamaño positivo')
+        self.patients = patients
+        self.consults = consults
+        self.doctors = doctors
+        self.seed = seed
+        self.batch_size = batch_size
+        self.method = method
+        self.diagnosis_ratio = diagnosis_ratio
+        self.treatment_ratio = treatment_ratio
+        self.audit_ratio = audit_ratio
+        self.chronic_ratio = chronic_ratio
+        self.end_date = end_date or timezone.localdate()
+        self.start_date = self.end_date - timedelta(days=365 * years)
+        self.password = password
+        self.progress = progress or (lambda message: None)
+        self.rng = random.Random(seed)
+
+    def run(self):
+        if has_benchmark_data():
+            raise SeedError('Ya hay datos de benchmark cargados (usar --clear para borrarlos)')
+
+        writer = get_writer(self.method, self.batch_size)
+        report = SeedReport(writer.method)
+        self.writer = writer
+        self.report = report
+
+        doctor_ids, doctor_user_ids = self.seed_users_and_doctors()
+        first_patient_id = self.seed_patients()
+        self.seed_consults(first_patient_id, doctor_ids, doctor_user_ids)
+        self.reset_sequences()
+
+        report.finish()
+        return report
+
+    def write(self, model, objs):
+        if not objs:
+            return
+        start = time.monotonic()
+        self.writer.write(model, objs)
+        self.report.add(model, len(objs), time.monotonic() - start)
+
+    def reset_sequences(self):
+        statements = connection.ops.sequence_reset_sql(no_style(), SEED_MODELS)
+        if statements:
+            with connection.cursor() as cursor:
+                for sql in statements:
+                    cursor.execute(sql)
+
+    # ========== Usuarios y doctores ==========
+
+    def seed_users_and_doctors(self):
+        """Un administrador, una recepcionista y un usuario por doctor (misma contraseña)"""
+        password = make_password(self.password)
+        user_id = next_id(User)
+        profile_id = next_id(UserProfile)
+        doctor_id = next_id(Doctor)
+
+        users = [
+            User(id=user_id, username=f'{USERNAME_PREFIX}admin', password=password, is_staff=True,
+                 is_superuser=True, first_name='Admin', last_name='Benchmark', email=f'admin@{EMAIL_DOMAIN}'),
+            User(id=user_id + 1, username=f'{USERNAME_PREFIX}reception', password=password,
+                 first_name='Recepción', last_name='Benchmark', email=f'reception@{EMAIL_DOMAIN}'),
+        ]
+        profiles = [
+            UserProfile(id=profile_id, user_id=user_id, role='ADMIN', phone='+541140000000'),
+            UserProfile(id=profile_id + 1, user_id=user_id + 1, role='RECEPTION', phone='+541140000001'),
+        ]
+        doctors = []
+        specialties = [code for code, _ in Doctor.SPECIALTY_CHOICES]
+        for index in range(self.doctors):
+            doctor_user_id = user_id + 2 + index
+            user = User(
+                id=doctor_user_id,
+                username=f'{USERNAME_PREFIX}doctor{index}',
+                password=password,
+                first_name=self.rng.choice(FIRST_NAMES),
+                last_name=self.rng.choice(LAST_NAMES),
+                email=f'doctor{index}@{EMAIL_DOMAIN}',
+            )
+            users.append(user)
+            profiles.append(UserProfile(
+                id=profile_id + 2 + index, user_id=doctor_user_id, role='DOCTOR', phone=f'+5491140{index:06d}'
+            ))
+            doctors.append(Doctor(
+                id=doctor_id + index,
+                user_id=doctor_user_id,
+                license_number=f'{LICENSE_PREFIX}{index:06d}',
+                specialty=specialties[index % len(specialties)],
+                phone=f'+5491140{index:06d}',
+            ))
+            # bulk_create no pasa por Doctor.save()
+            doctors[-1].display_name, doctors[-1].sort_name = Doctor.names_for(user.first_name, user.last_name)
+
+        with transaction.atomic():
+            self.write(User, users)
+            self.write(UserProfile, profiles)
+            self.write(Doctor, doctors)
+        return [doctor.id for doctor in doctors], [doctor.user_id for doctor in doctors]
+
+    # ========== Pacientes ==========
+
+    def seed_patients(self):
+        first_id = next_id(Person)
+        for start in range(0, self.patients, self.batch_size):
+            batch = [self.build_patient(first_id, index) for index in range(start, min(start + self.batch_size, self.patients))]
+            with transaction.atomic():
+                self.write(Person, batch)
+            self.progress(f'Pacientes: {start + len(batch):,}/{self.patients:,}')
+        return first_id
+
+    def build_patient(self, first_id, index):
+        rng = self.rng
+        age = int(rng.triangular(0, 95, 45))
+        birth_date = self.end_date - timedelta(days=age * 365 + rng.randrange(365))
+        return Person(
+            id=first_id + index,
+            name=rng.choice(FIRST_NAMES),
+            last_name=rng.choice(LAST_NAMES),
+            dni=str(DNI_OFFSET + index),
+            birth_date=birth_date,
+            gender=rng.choices('MFO', cum_weights=(48, 98, 100))[0],
+            phone=f'+54911{index:08d}',
+            email=f'paciente{index}@{EMAIL_DOMAIN}',
+            address=f'{rng.choice(STREETS)} {rng.randrange(1, 9000)}',
+        )
+
+    # ========== Consultas ==========
+
+    def seed_consults(self, first_patient_id, doctor_ids, doctor_user_ids):
+        rng = self.rng
+        # Zipf (s=1.1): el primer doctor atiende muchas más consultas que el último
+        pick_doctor = WeightedChoice(rng, [1 / (rank + 1) ** 1.1 for rank in range(len(doctor_ids))])
+        # Los crónicos pesan 20 veces más que el resto
+        pick_patient = WeightedChoice(
+            rng, [20 if rng.random() < self.chronic_ratio else 1 for _ in range(self.patients)]
+        )
+        consult_types = [code for code, _ in CONSULT_TYPES]
+        type_weights = list(accumulate(weight for _, weight in CONSULT_TYPES))
+        audit_actions = [code for code, _ in AUDIT_ACTIONS]
+        audit_weights = list(accumulate(weight for _, weight in AUDIT_ACTIONS))
+
+        consult_id = next_id(Consult)
+        diagnosis_id = next_id(Diagnosis)
+        treatment_id = next_id(Treatment)
+        audit_id = next_id(AuditLog)
+
+        for start in range(0, self.consults, self.batch_size):
+            consults, diagnoses, treatments, audit_logs = [], [], [], []
+            for _ in range(min(self.batch_size, self.consults - start)):
+                doctor_index = pick_doctor()
+                reason, symptoms, icd_code, description = REASONS[rng.randrange(len(REASONS))]
+                consult = Consult(
+                    id=consult_id,
+                    patient_id=first_patient_id + pick_patient(),
+                    doctor_id=doctor_ids[doctor_index],
+                    date=self.random_datetime(),
+                    consult_type=rng.choices(consult_types, cum_weights=type_weights)[0],
+                    reason=reason,
+                    symptoms=symptoms,
+                    vital_signs=f'TA {rng.randrange(100, 160)}/{rng.randrange(60, 100)} FC {rng.randrange(55, 110)}',
+                )
+                consults.append(consult)
+
+                if rng.random() < self.diagnosis_ratio:
+                    diagnoses.append(Diagnosis(id=diagnosis_id, consult_id=consult_id, description=description, icd_code=icd_code))
+                    diagnosis_id += 1
+                if rng.random() < self.treatment_ratio:
+                    follow_up = consult.date.date() + timedelta(days=rng.randrange(7, 90)) if rng.random() < 0.3 else None
+                    treatments.append(Treatment(
+                        id=treatment_id,
+                        consult_id=consult_id,
+                        description=f'Tratamiento para {description.lower()}',
+                        medications=rng.choice(MEDICATIONS),
+                        instructions='Control según evolución',
+                        follow_up_date=follow_up,
+                    ))
+                    treatment_id += 1
+
+                logs = int(self.audit_ratio) + (rng.random() < self.audit_ratio % 1)
+                for _ in range(logs):
+                    audit_logs.append(AuditLog(
+                        id=audit_id,
+                        user_id=doctor_user_ids[doctor_index],
+                        action=rng.choices(audit_actions, cum_weights=audit_weights)[0],
+                        model_name='Consult',
+                        object_id=str(consult_id),
+                        description=f'Consulta {consult_id}',
+                        ip_address=f'10.0.{rng.randrange(256)}.{rng.randrange(1, 255)}',
+                    ))
+                    audit_id += 1
+                consult_id += 1
+
+            with transaction.atomic():
+                self.write(Consult, consults)
+                self.write(Diagnosis, diagnoses)
+                self.write(Treatment, treatments)
+                self.write(AuditLog, audit_logs)
+                consults_bulk_created.send(sender=Consult, consults=consults)
+            self.progress(f'Consultas: {start + len(consults):,}/{self.consults:,}')
+
+    def random_datetime(self):
+        """Día con estacionalidad (mes y día de la semana) y hora de consultorio"""
+        rng = self.rng
+        span = (self.end_date - self.start_date).days
+        max_weight = max(MONTH_WEIGHTS) * max(WEEKDAY_WEIGHTS)
+        while True:
+            day = self.start_date + timedelta(days=rng.randrange(span + 1))
+            weight = MONTH_WEIGHTS[day.month - 1] * WEEKDAY_WEIGHTS[day.weekday()]
+            if rng.random() * max_weight < weight:
+                break
+        moment = datetime.combine(day, dt_time(rng.randrange(8, 20), rng.choice((0, 15, 30, 45))))
+        return timezone.make_aware(moment) if settings.USE_TZ else moment
@@ -0,0 +1,45 @@
+"""
+Backends de caché que registran aciertos y fallos en la petición en curso
+(ver history.instrumentation)
+
+Se usan en CACHES['default']['BACKEND'] en lugar del backend original
+"""
+from django.core.cache.backends.locmem import LocMemCache as BaseLocMemCache
+from .instrumentation import record_cache_access
+
+_MISSING = object()
+
+
+class InstrumentedGetMixin:
+
+    def get(self, key, default=None, version=None):
+        value = super().get(key, _MISSING, version=version)
+        if value is _MISSING:
+            record_cache_access(misses=1)
+            return default
+        record_cache_access(hits=1)
+        return value
+
+
+class InstrumentedGetManyMixin:
+    """Solo para backends con get_many propio (el de BaseCache ya llama a get)"""
+
+    def get_many(self, keys, version=None):
+        keys = list(keys)
+        found = super().get_many(keys, version=version)
+        record_cache_access(hits=len(found), misses=len(keys) - len(found))
+        return found
+
+
+class LocMemCache(InstrumentedGetMixin, BaseLocMemCache):
+    pass
+
+
+try:
+    from django_redis.cache import RedisCache as BaseRedisCache
+except ImportError:  # django-redis es opcional (CACHE_BACKEND=redis en producción)
+    BaseRedisCache = None
+
+if BaseRedisCache is not None:
+    class RedisCache(InstrumentedGetMixin, InstrumentedGetManyMixin, BaseRedisCache):
+        pass
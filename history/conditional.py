@@ -0,0 +1,167 @@
+"""
+GET condicional (ETag/Last-Modified) para las páginas de paciente, consulta e
+historia clínica
+
+Antes de ejecutar la vista se corre una sonda barata: el máximo updated_at de las
+filas que muestra la página y la cantidad de consultas (para notar los borrados).
+La ficha del paciente muestra la edad, que cambia sin tocar la base: su sonda suma
+el comienzo del día del último cumpleaños.
+El ETag combina la sonda con el usuario, su rol y su último login, así que nadie
+reutiliza la respuesta de otro usuario ni la de una sesión anterior. Si el navegador
+manda el mismo ETag se responde 304 sin ejecutar la vista
+
+No hay sonda (la vista responde como siempre) si el usuario no tiene acceso, si hay
+mensajes pendientes de mostrar o si el método no es GET/HEAD
+"""
+import hashlib
+from datetime import date, datetime, time
+from functools import wraps
+from django.conf import settings
+from django.contrib.messages import get_messages
+from django.db.models import Count, Max, Q
+from django.utils import timezone
+from django.utils.cache import patch_cache_control
+from django.views.decorators.http import condition
+from .models import Person, Consult
+from .utils import get_doctor_profile, get_user_role
+
+CONDITIONAL_GET_DEFAULTS = {
+    'ENABLED': True,
+    'RELEASE': '',      # cambiarlo en cada despliegue invalida los ETag de plantillas viejas
+}
+
+
+def get_conditional_get_config():
+    return {**CONDITIONAL_GET_DEFAULTS, **getattr(settings, 'CONDITIONAL_GET', {})}
+
+
+def _access(user):
+    """(rol, doctor); doctor es None para administradores y False si no hay acceso"""
+    role = get_user_role(user)
+    if role == 'administrator':
+        return role, None
+    if role == 'doctor':
+        return role, get_doctor_profile(user) or False
+    return role, False
+
+
+def last_birthday(birth_date, today=None):
+    """Inicio (aware) del día en que cambió Person.age por última vez"""
+    today = today or timezone.now().date()  # el mismo día que usa Person.age
+    for year in (today.year, today.year - 1):
+        try:
+            birthday = birth_date.replace(year=year)
+        except ValueError:
+            # 29 de febrero en año no bisiesto: Person.age suma el año el 1 de marzo
+            birthday = date(year, 3, 1)
+        if birthday <= today:
+            return timezone.make_aware(datetime.combine(birthday, time.min))
+
+
+def probe_patient(request, pk):
+    """Ficha del paciente: paciente, historia clínica y sus consultas con doctor, diagnóstico y tratamiento"""
+    role, doctor = _access(request.user)
+    if doctor is False:
+        return None
+    person = Person.objects.filter(pk=pk, is_active=True).values_list(
+        'updated_at', 'medicalrecord__updated_at', 'birth_date'
+    ).first()
+    if person is None:
+        return None
+    *person, birth_date = person
+
+    aggregates = {
+        'count': Count('id'),
+        'consult': Max('updated_at'),
+        'diagnosis': Max('diagnosis__updated_at'),
+        'treatment': Max('treatment__updated_at'),
+        # La ficha muestra el nombre del doctor de cada consulta ('doctor' chocaría con el filtro 'own')
+        'doctor_updated': Max('doctor__updated_at'),
+    }
+    if doctor:
+        aggregates['own'] = Count('id', filter=Q(doctor=doctor))
+    consults = Consult.objects.filter(patient_id=pk).aggregate(**aggregates)
+    if doctor and not consults['own']:
+        return None
+    return [
+        role, *person, consults['count'], consults['consult'], consults['diagnosis'], consults['treatment'],
+        consults['doctor_updated'], last_birthday(birth_date),
+    ]
+
+
+def probe_consult(request, pk):
+    """Detalle de la consulta: consulta, paciente, doctor, diagnóstico y tratamiento"""
+    role, doctor = _access(request.user)
+    if doctor is False:
+        return None
+    consult = Consult.objects.filter(pk=pk).values_list(
+        'doctor_id', 'updated_at', 'patient__updated_at', 'doctor__updated_at',
+        'diagnosis__updated_at', 'treatment__updated_at',
+    ).first()
+    if consult is None or (doctor and consult[0] != doctor.pk):
+        return None
+    return [role, *consult]
+
+
+def probe_medical_record(request, patient_pk):
+    """Formulario de la historia clínica: paciente e historia"""
+    role, doctor = _access(request.user)
+    if doctor is False:
+        return None
+    person = Person.objects.filter(pk=patient_pk, is_active=True).values_list('updated_at', 'medicalrecord__updated_at').first()
+    if person is None:
+        return None
+    if doctor and not Consult.objects.filter(patient_id=patient_pk, doctor=doctor).exists():
+        return None
+    return [role, *person]
+
+
+def _run_probe(request, probe, args, kwargs):
+    """(etag, last_modified) o None si la página no admite respuesta condicional"""
+    config = get_conditional_get_config()
+    if not config['ENABLED'] or request.method not in ('GET', 'HEAD'):
+        return None
+    if len(get_messages(request)):
+        return None
+    parts = probe(request, *args, **kwargs)
+    if parts is None:
+        return None
+
+    user = request.user
+    values = [config['RELEASE'], probe.__name__, user.pk, user.last_login, *parts]
+    etag = hashlib.md5(repr(values).encode(), usedforsecurity=False).hexdigest()
+    dates = [part for part in parts if hasattr(part, 'tzinfo')]
+    return etag, max(dates) if dates else None
+
+
+def conditional_page(probe):
+    """
+    Decorador: responde 304 cuando el ETag o Last-Modified del navegador coinciden
+    con la sonda. Va debajo de login_required/require_role
+    """
+    def get_probe(request, *args, **kwargs):
+        probes = request.__dict__.setdefault('_conditional_probes', {})
+        if probe not in probes:
+            probes[probe] = _run_probe(request, probe, args, kwargs)
+        return probes[probe]
+
+    def etag_func(request, *args, **kwargs):
+        result = get_probe(request, *args, **kwargs)
+        return result and result[0]
+
+    def last_modified_func(request, *args, **kwargs):
+        result = get_probe(request, *args, **kwargs)
+        return result and result[1]
+
+    def decorator(view_func):
+        conditional_view = condition(etag_func=etag_func, last_modified_func=last_modified_func)(view_func)
+
+        @wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            response = conditional_view(request, *args, **kwargs)
+            if get_probe(request, *args, **kwargs):
+                # El navegador guarda la página pero la revalida en cada recarga
+                patch_cache_control(response, private=True, no_cache=True)
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,206 @@
+"""
+Agenda de seguimientos (Treatment.follow_up_date)
+
+Ventanas: vencidos (los últimos OVERDUE_DAYS días), hoy y próximos N días; de un
+doctor o de toda la clínica. Solo se listan los seguimientos pendientes: posteriores
+al día de la última consulta del paciente (PatientSummary), porque una visita
+posterior ya los cumplió.
+
+La lista de cada día se guarda en caché como una instantánea con todas las filas de
+la clínica. Su clave lleva una marca del día sacada de la base (probe_days: cantidad
+de tratamientos y máximo updated_at del tratamiento, la consulta, el paciente, su
+resumen y el doctor), así que cualquier alta, edición o borrado la invalida aunque
+venga de otro worker o de un comando (ingest_consults, import_patients...), que no
+comparten la caché LocMem ni sus contadores de versión. La marca de todo el rango es
+una sola consulta agregada; los días que faltan se recalculan juntos en otra, por
+rango de fechas. Las dos usan el índice parcial treatment_follow_up_idx. Las páginas
+se arman sobre las instantáneas con un cursor (fecha, id de tratamiento)
+"""
+import base64
+import hashlib
+from datetime import timedelta
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Max
+from django.db.models.functions import TruncDate
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from django.utils.text import Truncator
+from .models import Treatment
+from .utils import get_doctor_profile, is_administrator
+
+FOLLOW_UPS_DEFAULTS = {
+    'OVERDUE_DAYS': 90,         # hasta cuántos días atrás se listan los vencidos
+    'MAX_DAYS': 60,             # tope de la ventana de próximos días
+    'SNAPSHOT_TIMEOUT': 86400,  # segundos; la clave ya cambia con los datos (probe_days)
+}
+
+FOLLOW_UP_PAGE_SIZE = 50
+DEFAULT_UPCOMING_DAYS = 7
+WINDOWS = ('overdue', 'today', 'upcoming')
+
+SNAPSHOT_KEY_PREFIX = 'followups:v3'
+SUMMARY_LENGTH = 80
+
+
+def get_follow_ups_config():
+    return {**FOLLOW_UPS_DEFAULTS, **getattr(settings, 'FOLLOW_UPS', {})}
+
+
+def encode_cursor(day, treatment_id):
+    raw = f'{day.isoformat()}|{treatment_id}'.encode()
+    return base64.urlsafe_b64encode(raw).decode()
+
+
+def decode_cursor(cursor):
+    """Devuelve (fecha, id) o None si el cursor es inválido"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode()).decode()
+        day_value, treatment_id = raw.rsplit('|', 1)
+        day = parse_date(day_value)
+        if day is None:
+            return None
+        return day, int(treatment_id)
+    except (ValueError, UnicodeError):
+        return None
+
+
+def window_range(window, days=DEFAULT_UPCOMING_DAYS, today=None):
+    """(primer día, último día) de la ventana, ambos incluidos"""
+    today = today or timezone.localdate()
+    config = get_follow_ups_config()
+    if window == 'overdue':
+        return today - timedelta(days=config['OVERDUE_DAYS']), today - timedelta(days=1)
+    if window == 'today':
+        return today, today
+    if window == 'upcoming':
+        return today + timedelta(days=1), today + timedelta(days=min(max(days, 1), config['MAX_DAYS']))
+    raise ValueError(f'Ventana desconocida: {window}')
+
+
+def follow_up_scope(user, doctor_id=None):
+    """
+    doctor_id de la agenda que puede ver el usuario (None es toda la clínica) o False
+    si no tiene acceso. Los administradores eligen doctor; los doctores ven la suya
+    """
+    if is_administrator(user):
+        return doctor_id
+    doctor = get_doctor_profile(user)
+    return doctor.pk if doctor else False
+
+
+def probe_days(first_day, last_day):
+    """{día: marca} de los días del rango con seguimientos; cambia con cualquier edición"""
+    rows = (
+        Treatment.objects.filter(follow_up_date__isnull=False, follow_up_date__range=(first_day, last_day))
+        .order_by()
+        .values('follow_up_date')
+        .annotate(
+            treatments=Count('id'),
+            treatment_updated=Max('updated_at'),
+            consult_updated=Max('consult__updated_at'),
+            patient_updated=Max('consult__patient__updated_at'),
+            summary_updated=Max('consult__patient__summary__updated_at'),
+            doctor_updated=Max('consult__doctor__updated_at'),
+        )
+    )
+    stamps = {}
+    for row in rows:
+        day = row.pop('follow_up_date')
+        stamps[day] = hashlib.md5(repr(sorted(row.items())).encode(), usedforsecurity=False).hexdigest()
+    return stamps
+
+
+def _snapshot_key(day, stamp):
+    return f'{SNAPSHOT_KEY_PREFIX}:{day.isoformat()}:{stamp}'
+
+
+def _build_item(row):
+    return {
+        'treatment_id': row['id'],
+        'follow_up_date': row['follow_up_date'],
+        'consult_id': row['consult_id'],
+        'patient_id': row['consult__patient_id'],
+        'patient_name': f"{row['consult__patient__name']} {row['consult__patient__last_name']}",
+        'patient_dni': row['consult__patient__dni'],
+        'patient_phone': row['consult__patient__phone'],
+        'patient_email': row['consult__patient__email'],
+        'doctor_id': row['consult__doctor_id'],
+        'doctor_name': row['consult__doctor__display_name'],
+        'treatment_summary': Truncator(row['description'] or '').chars(SUMMARY_LENGTH),
+        'url': reverse('patient_detail', args=[row['consult__patient_id']]),
+    }
+
+
+def compute_day_lists(first_day, last_day):
+    """{día: filas} de los seguimientos pendientes del rango, en una sola consulta"""
+    rows = (
+        Treatment.objects.filter(
+            follow_up_date__isnull=False,
+            follow_up_date__range=(first_day, last_day),
+            consult__patient__is_active=True,
+            follow_up_date__gt=TruncDate('consult__patient__summary__last_consult_date'),
+        )
+        .order_by('follow_up_date', 'id')
+        .values(
+            'id', 'follow_up_date', 'consult_id', 'description',
+            'consult__patient_id', 'consult__patient__name', 'consult__patient__last_name',
+            'consult__patient__dni', 'consult__patient__phone', 'consult__patient__email',
+            'consult__doctor_id', 'consult__doctor__display_name',
+        )
+    )
+    lists = {first_day + timedelta(days=offset): [] for offset in range((last_day - first_day).days + 1)}
+    for row in rows:
+        lists[row['follow_up_date']].append(_build_item(row))
+    return lists
+
+
+def get_day_snapshots(first_day, last_day):
+    """{día: filas} desde la caché; los días que faltan se calculan y se guardan"""
+    stamps = probe_days(first_day, last_day)
+    days = [first_day + timedelta(days=offset) for offset in range((last_day - first_day).days + 1)]
+    # Los días sin tratamientos no necesitan caché: su lista está vacía
+    snapshots = {day: [] for day in days if day not in stamps}
+    keys = {_snapshot_key(day, stamps[day]): day for day in days if day in stamps}
+    found = cache.get_many(keys)
+    snapshots.update({keys[key]: items for key, items in found.items()})
+
+    missing = [day for day in keys.values() if day not in snapshots]
+    if missing:
+        computed = compute_day_lists(min(missing), max(missing))
+        fresh = {day: computed[day] for day in missing}
+        cache.set_many(
+            {_snapshot_key(day, stamps[day]): items for day, items in fresh.items()},
+            timeout=get_follow_ups_config()['SNAPSHOT_TIMEOUT'],
+        )
+        snapshots.update(fresh)
+    return snapshots
+
+
+def get_follow_up_page(window, doctor_id=None, days=DEFAULT_UPCOMING_DAYS, cursor=None,
+                       limit=FOLLOW_UP_PAGE_SIZE, today=None):
+    """
+    Página de la agenda (por fecha y luego por tratamiento). doctor_id None es toda
+    la clínica. Devuelve (items, next_cursor)
+    """
+    first_day, last_day = window_range(window, days, today)
+    position = decode_cursor(cursor) if cursor else None
+    if position:
+        first_day = max(first_day, position[0])
+    if first_day > last_day:
+        return [], None
+
+    items = []
+    snapshots = get_day_snapshots(first_day, last_day)
+    for day in sorted(snapshots):
+        for item in snapshots[day]:
+            if doctor_id is not None and item['doctor_id'] != doctor_id:
+                continue
+            if position and (day, item['treatment_id']) <= position:
+                continue
+            items.append(item)
+            if len(items) > limit:
+                last = items[limit - 1]
+                return items[:limit], encode_cursor(last['follow_up_date'], last['treatment_id'])
+    return items, None
@@ -1,6 +1,8 @@
 from django import forms
 from django.contrib.auth.forms import UserCreationForm
 from django.contrib.auth.models import User
+from django.urls import reverse_lazy
+from .icd10 import validate_icd10_code
 from .models import Person, Doctor, Consult, Diagnosis, Treatment, MedicalRecord
 
 class PatientForm(forms.ModelForm):
@@ -61,9 +63,24 @@ class DiagnosisForm(forms.ModelForm):
         fields = ['description', 'icd_code']
         widgets = {
             'description': forms.Textarea(attrs={'class': 'form-control', 'rows': 4, 'placeholder': 'Descripción detallada del diagnóstico'}),
-            'icd_code': forms.TextInput(attrs={'class': 'form-control', 'placeholder': 'Código ICD-10 (opcional)'}),
+            'icd_code': forms.TextInput(attrs={
+                'class': 'form-control',
+                'placeholder': 'Código ICD-10 (opcional)',
+                'autocomplete': 'off',
+                'data-icd10-autocomplete': reverse_lazy('api-icd10-list'),
+            }),
         }
 
+    def clean_icd_code(self):
+        # Catálogo CIE-10 en memoria (history.icd10); se guarda normalizado (g430 -> G43.0)
+        icd_code = self.cleaned_data.get('icd_code')
+        if not icd_code:
+            return icd_code
+        try:
+            return validate_icd10_code(icd_code)
+        except ValueError as error:
+            raise forms.ValidationError(str(error))
+
 class TreatmentForm(forms.ModelForm):
     class Meta:
         model = Treatment
@@ -100,4 +117,80 @@ class PatientSearchForm(forms.Form):
         required=False,
         widget=forms.Select(attrs={'class': 'form-control'})
     )
+    order = forms.ChoiceField(
+        choices=[
+            ('', 'Apellido y nombre'),
+            ('-last_visit', 'Última visita más reciente'),
+            ('last_visit', 'Última visita más antigua'),
+            ('follow_up', 'Próximo seguimiento'),
+            ('-consults', 'Más consultas'),
+        ],
+        required=False,
+        widget=forms.Select(attrs={'class': 'form-control'})
+    )
+    follow_up_due = forms.BooleanField(
+        label='Seguimiento vencido',
+        required=False,
+        widget=forms.CheckboxInput(attrs={'class': 'form-check-input'})
+    )
+
+
+class ConsultSearchForm(forms.Form):
+    search = forms.CharField(max_length=100, required=False)
+    consult_type = forms.ChoiceField(choices=[('', 'Todos')] + Consult.CONSULT_TYPE_CHOICES, required=False)
+    date_from = forms.DateField(required=False)
+    date_to = forms.DateField(required=False)
+
+
+class FollowUpFilterForm(forms.Form):
+    window = forms.ChoiceField(
+        choices=[('overdue', 'Vencidos'), ('today', 'Hoy'), ('upcoming', 'Próximos días')],
+        required=False,
+        widget=forms.Select(attrs={'class': 'form-control'})
+    )
+    days = forms.IntegerField(
+        min_value=1,
+        required=False,
+        widget=forms.NumberInput(attrs={'class': 'form-control', 'placeholder': 'Días'})
+    )
+    doctor = forms.ModelChoiceField(
+        queryset=Doctor.objects.filter(is_active=True),
+        required=False,
+        empty_label='Toda la clínica',
+        widget=forms.Select(attrs={'class': 'form-control'})
+    )
+
+
+class ConsultTextSearchForm(forms.Form):
+    q = forms.CharField(
+        max_length=200,
+        required=False,
+        widget=forms.TextInput(attrs={
+            'class': 'form-control',
+            'placeholder': 'Motivo, síntomas, diagnóstico, medicación...'
+        })
+    )
+    consult_type = forms.ChoiceField(choices=[('', 'Todos')] + Consult.CONSULT_TYPE_CHOICES, required=False)
+    icd_code = forms.CharField(max_length=10, required=False)
+    page = forms.IntegerField(min_value=1, required=False)
+
+
+class PatientImportUploadForm(forms.Form):
+    file = forms.FileField(
+        label='Archivo CSV o XLSX',
+        widget=forms.ClearableFileInput(attrs={'class': 'form-control', 'accept': '.csv,.xlsx'})
+    )
+    batch_size = forms.IntegerField(
+        label='Filas por lote',
+        initial=1000,
+        min_value=1,
+        max_value=10000,
+        widget=forms.NumberInput(attrs={'class': 'form-control'})
+    )
+    dry_run = forms.BooleanField(label='Solo validar (no guardar)', required=False)
 
+    def clean_file(self):
+        uploaded = self.cleaned_data['file']
+        if not uploaded.name.lower().endswith(('.csv', '.xlsx')):
+            raise forms.ValidationError('El archivo debe ser CSV o XLSX')
+        return uploaded
@@ -0,0 +1,121 @@
+"""
+Caché de fragmentos de plantilla con claves por versión de modelo
+
+La clave de un fragmento ({% cachefragment %}, ver templatetags/fragment_cache.py)
+se arma con su nombre y cada una de sus partes:
+
+- instancia de modelo: etiqueta, id y updated_at, así que cambia al guardarla
+- etiqueta de modelo ('history.Diagnosis'): contador de versión del modelo, que se
+  incrementa en cada save/delete y en consults_bulk_created. Sirve para datos que
+  se muestran en el fragmento pero no tienen instancia en la clave (p. ej. el
+  resumen del tratamiento en una fila de consulta)
+- cualquier otro valor: su texto (p. ej. la edad, que cambia sin guardar nada)
+
+Lo que depende del rol o del usuario (botones de editar/eliminar) va fuera del
+fragmento: el mismo HTML se comparte entre todos los usuarios
+"""
+import hashlib
+import time
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Model
+from django.db.models.signals import post_delete, post_save
+from .signals import consults_bulk_created
+
+FRAGMENT_CACHE_DEFAULTS = {
+    'ENABLED': True,
+    'TIMEOUT': 3600,    # segundos; la clave ya cambia con los datos, esto solo libera memoria
+}
+
+FRAGMENT_KEY_PREFIX = 'fragment'
+VERSION_KEY_PREFIX = 'model-version'
+
+# Modelos con contador de versión
+VERSIONED_MODELS = (
+    'history.Person',
+    'history.Doctor',
+    'history.Consult',
+    'history.Diagnosis',
+    'history.Treatment',
+    'history.MedicalRecord',
+)
+
+
+def get_fragment_cache_config():
+    return {**FRAGMENT_CACHE_DEFAULTS, **getattr(settings, 'FRAGMENT_CACHE', {})}
+
+
+def version_key(label):
+    return f'{VERSION_KEY_PREFIX}:{label}'
+
+
+def _initial_version():
+    # Si la caché pierde el contador no se vuelve a un número ya usado
+    return int(time.time() * 1000)
+
+
+def get_model_versions(labels):
+    """{etiqueta: versión}; crea el contador de los modelos que no lo tienen"""
+    keys = {version_key(label): label for label in labels}
+    found = cache.get_many(keys)
+    versions = {keys[key]: value for key, value in found.items()}
+    for key, label in keys.items():
+        if label not in versions:
+            version = _initial_version()
+            if not cache.add(key, version, timeout=None):
+                version = cache.get(key, version)
+            versions[label] = version
+    return versions
+
+
+def bump_model_version(label):
+    try:
+        return cache.incr(version_key(label))
+    except ValueError:
+        version = _initial_version()
+        cache.set(version_key(label), version, timeout=None)
+        return version
+
+
+def _instance_part(instance):
+    updated_at = getattr(instance, 'updated_at', None)
+    stamp = updated_at.isoformat() if updated_at else ''
+    return f'{instance._meta.label}:{instance.pk}:{stamp}'
+
+
+def make_fragment_key(name, parts, versions=None):
+    """
+    Clave de caché del fragmento. versions ({etiqueta: versión}) se completa con los
+    contadores leídos y evita volver a leerlos cuando se renderizan muchos fragmentos
+    """
+    if versions is None:
+        versions = {}
+    missing = [
+        part for part in parts
+        if isinstance(part, str) and part in VERSIONED_MODELS and part not in versions
+    ]
+    if missing:
+        versions.update(get_model_versions(missing))
+
+    values = []
+    for part in parts:
+        if isinstance(part, Model):
+            values.append(_instance_part(part))
+        elif isinstance(part, str) and part in VERSIONED_MODELS:
+            values.append(f'{part}@{versions[part]}')
+        else:
+            values.append(str(part))
+    digest = hashlib.md5('|'.join(values).encode(), usedforsecurity=False).hexdigest()
+    return f'{FRAGMENT_KEY_PREFIX}:{name}:{digest}'
+
+
+def _bump_sender_version(sender, **kwargs):
+    bump_model_version(sender._meta.label)
+
+
+def connect_signals():
+    """Se llama desde HistoryConfig.ready()"""
+    for label in VERSIONED_MODELS:
+        post_save.connect(_bump_sender_version, sender=label, dispatch_uid=f'fragment-version-save-{label}')
+        post_delete.connect(_bump_sender_version, sender=label, dispatch_uid=f'fragment-version-delete-{label}')
+    consults_bulk_created.connect(_bump_sender_version, dispatch_uid='fragment-version-bulk-consults')
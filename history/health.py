@@ -0,0 +1,141 @@
+"""
+Comprobaciones de salud para /healthz (liveness) y /readyz (readiness)
+
+La readiness se calcula como mucho una vez cada HEALTH_CHECK['CACHE_SECONDS'] por
+proceso: los probes del orquestador reciben el último resultado sin volver a
+consultar la base de datos
+"""
+import os
+import shutil
+import threading
+import time
+import uuid
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.db.migrations.executor import MigrationExecutor
+
+HEALTH_CHECK_DEFAULTS = {
+    'DISK_USAGE_MAX': 90,      # % máximo de uso del disco
+    'MEMORY_MIN': 100,         # MB mínimos de memoria disponible
+    'DB_TIMEOUT': 2,           # segundos para el ping a la base de datos
+    'CACHE_SECONDS': 5,        # tiempo que se reutiliza el resultado de /readyz
+    'DISK_PATH': None,         # por defecto MEDIA_ROOT (o BASE_DIR)
+}
+
+_lock = threading.Lock()
+_last_result = None
+_last_checked_at = 0.0
+_migrations_applied = False
+
+
+def get_health_config():
+    return {**HEALTH_CHECK_DEFAULTS, **getattr(settings, 'HEALTH_CHECK', {})}
+
+
+def check_database(timeout):
+    connection = connections[DEFAULT_DB_ALIAS]
+    with transaction.atomic(using=DEFAULT_DB_ALIAS):
+        with connection.cursor() as cursor:
+            if connection.vendor == 'postgresql':
+                # SET LOCAL: solo dura hasta el fin de esta transacción
+                cursor.execute('SET LOCAL statement_timeout = %s', [int(timeout * 1000)])
+            cursor.execute('SELECT 1')
+            cursor.fetchone()
+    return 'ok'
+
+
+def check_cache():
+    key = 'health:readyz'
+    value = uuid.uuid4().hex
+    cache.set(key, value, 10)
+    if cache.get(key) != value:
+        raise RuntimeError('el valor leído no coincide con el escrito')
+    return 'ok'
+
+
+def check_disk(max_usage, path):
+    usage = shutil.disk_usage(path)
+    percent = usage.used * 100 / usage.total
+    if percent > max_usage:
+        raise RuntimeError(f'uso de disco {percent:.0f}% > {max_usage}%')
+    return f'{percent:.0f}%'
+
+
+def available_memory_mb():
+    """Memoria disponible según /proc/meminfo; None si no se puede leer"""
+    try:
+        with open('/proc/meminfo') as meminfo:
+            for line in meminfo:
+                if line.startswith('MemAvailable:'):
+                    return int(line.split()[1]) // 1024
+    except OSError:
+        pass
+    return None
+
+
+def check_memory(min_mb):
+    available = available_memory_mb()
+    if available is None:
+        return 'desconocida'
+    if available < min_mb:
+        raise RuntimeError(f'memoria disponible {available} MB < {min_mb} MB')
+    return f'{available} MB'
+
+
+def check_migrations():
+    """Una vez aplicadas, las migraciones no cambian hasta el próximo despliegue"""
+    global _migrations_applied
+    if not _migrations_applied:
+        executor = MigrationExecutor(connections[DEFAULT_DB_ALIAS])
+        pending = executor.migration_plan(executor.loader.graph.leaf_nodes())
+        if pending:
+            raise RuntimeError(f'{len(pending)} migraciones pendientes')
+        _migrations_applied = True
+    return 'ok'
+
+
+def run_readiness_checks():
+    """Ejecuta todas las comprobaciones; devuelve (ok, {nombre: detalle})"""
+    config = get_health_config()
+    disk_path = config['DISK_PATH'] or settings.MEDIA_ROOT
+    if not disk_path or not os.path.exists(disk_path):
+        disk_path = settings.BASE_DIR
+    checks = {
+        'database': lambda: check_database(config['DB_TIMEOUT']),
+        'migrations': check_migrations,
+        'cache': check_cache,
+        'disk': lambda: check_disk(config['DISK_USAGE_MAX'], disk_path),
+        'memory': lambda: check_memory(config['MEMORY_MIN']),
+    }
+
+    results = {}
+    ok = True
+    for name, check in checks.items():
+        if name == 'migrations' and results['database']['status'] != 'ok':
+            results[name] = {'status': 'skipped'}
+            continue
+        try:
+            results[name] = {'status': 'ok', 'detail': check()}
+        except Exception as exc:
+            ok = False
+            results[name] = {'status': 'error', 'detail': str(exc)}
+    return ok, results
+
+
+def get_readiness():
+    """Resultado de readiness cacheado por proceso durante CACHE_SECONDS"""
+    global _last_result, _last_checked_at
+    ttl = get_health_config()['CACHE_SECONDS']
+    with _lock:
+        if _last_result is None or time.monotonic() - _last_checked_at >= ttl:
+            _last_result = run_readiness_checks()
+            _last_checked_at = time.monotonic()
+        return _last_result
+
+
+def reset_readiness_cache():
+    global _last_result, _migrations_applied
+    with _lock:
+        _last_result = None
+        _migrations_applied = False
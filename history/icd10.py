@@ -0,0 +1,364 @@
+"""
+Catálogo CIE-10 (ICD-10) con índice por prefijo
+
+El catálogo se carga de un archivo de texto (history/data/icd10_es.tsv: capítulos,
+agrupaciones y códigos) y se compila a un índice binario inmutable:
+
+    encabezado | códigos ordenados (clave de 8 bytes, posición y largo de la descripción)
+               | palabras de las descripciones ordenadas (24 bytes, número de código)
+               | capítulos y agrupaciones (JSON) | descripciones (UTF-8)
+
+El índice se abre con mmap de solo lectura, así que todos los workers comparten las
+mismas páginas (con gunicorn --preload lo abre el maestro en history.warmup). Las
+búsquedas son bisecciones sobre los registros de ancho fijo, sin copiar el catálogo
+a objetos de Python: validar un código o completar un prefijo lleva microsegundos.
+
+El índice se recompila solo si falta o es más viejo que el archivo de texto; si no
+se puede escribir, se compila en memoria en cada proceso. El comando
+build_icd10_index lo genera antes del despliegue.
+
+Las claves son el código sin punto y en mayúsculas (G43.0 -> G430); el punto se
+agrega al mostrarlo
+"""
+import bisect
+import json
+import mmap
+import os
+import re
+import struct
+import tempfile
+import unicodedata
+from collections import namedtuple
+from functools import lru_cache
+from django.conf import settings
+
+ICD10_DEFAULTS = {
+    'SOURCE_PATH': None,    # por defecto history/data/icd10_es.tsv
+    'INDEX_PATH': None,     # por defecto el mismo archivo con extensión .idx
+    'STRICT': False,        # exigir que el código esté en el catálogo (con el catálogo completo)
+}
+
+AUTOCOMPLETE_LIMIT = 20
+
+MAGIC = b'ICD10v1\0'
+HEADER = struct.Struct('<8sIIII')       # magic, códigos, palabras, largo del JSON, largo del texto
+CODE_RECORD = struct.Struct('<8sII')    # clave, posición y largo de la descripción
+WORD_RECORD = struct.Struct('<24sI')    # palabra normalizada, número de código
+KEY_SIZE = 8
+WORD_SIZE = 24
+MIN_WORD_LENGTH = 3
+
+CODE_RE = re.compile(r'^[A-Z][0-9]{2}[0-9A-Z]{0,4}$')
+WORD_RE = re.compile(r'[a-z0-9]+')
+
+ICD10Entry = namedtuple('ICD10Entry', ['code', 'description'])
+Chapter = namedtuple('Chapter', ['number', 'first', 'last', 'title'])
+Block = namedtuple('Block', ['first', 'last', 'title'])
+
+ROMAN_NUMERALS = (
+    'I', 'II', 'III', 'IV', 'V', 'VI', 'VII', 'VIII', 'IX', 'X', 'XI', 'XII',
+    'XIII', 'XIV', 'XV', 'XVI', 'XVII', 'XVIII', 'XIX', 'XX', 'XXI', 'XXII',
+)
+
+
+def get_icd10_config():
+    config = {**ICD10_DEFAULTS, **getattr(settings, 'ICD10', {})}
+    if not config['SOURCE_PATH']:
+        config['SOURCE_PATH'] = os.path.join(os.path.dirname(__file__), 'data', 'icd10_es.tsv')
+    if not config['INDEX_PATH']:
+        config['INDEX_PATH'] = os.path.splitext(config['SOURCE_PATH'])[0] + '.idx'
+    return config
+
+
+def normalize_code(value):
+    """Clave del código: mayúsculas, sin punto ni espacios (' g43.0' -> 'G430')"""
+    return re.sub(r'[\s.]', '', value or '').upper()
+
+
+def display_code(key):
+    return f'{key[:3]}.{key[3:]}' if len(key) > 3 else key
+
+
+def normalize_words(text):
+    """Palabras en minúsculas y sin acentos"""
+    folded = unicodedata.normalize('NFKD', text.lower())
+    return WORD_RE.findall(''.join(char for char in folded if not unicodedata.combining(char)))
+
+
+def _pad(value, size):
+    return value.encode('ascii', 'ignore')[:size].ljust(size, b'\0')
+
+
+# ========== Compilación ==========
+
+def parse_source(lines):
+    """(capítulos, agrupaciones, {clave: descripción}) del archivo de texto"""
+    chapters, blocks, codes = [], [], {}
+    for number, line in enumerate(lines, start=1):
+        line = line.rstrip('\r\n')
+        if not line.strip() or line.startswith('#'):
+            continue
+        try:
+            kind, code, title = line.split('\t', 2)
+        except ValueError:
+            raise ValueError(f'Línea {number}: se esperaban tres columnas separadas por tabulador')
+        if kind in ('chapter', 'block'):
+            first, _, last = code.partition('-')
+            first, last = normalize_code(first), normalize_code(last or first)
+            if not (CODE_RE.match(first) and CODE_RE.match(last)) or first > last:
+                raise ValueError(f'Línea {number}: rango inválido {code!r}')
+            if kind == 'chapter':
+                if len(chapters) == len(ROMAN_NUMERALS):
+                    raise ValueError(f'Línea {number}: demasiados capítulos')
+                chapters.append(Chapter(ROMAN_NUMERALS[len(chapters)], first[:3], last[:3], title.strip()))
+            else:
+                blocks.append(Block(first[:3], last[:3], title.strip()))
+        elif kind == 'code':
+            key = normalize_code(code)
+            if not CODE_RE.match(key):
+                raise ValueError(f'Línea {number}: código inválido {code!r}')
+            codes[key] = title.strip()
+        else:
+            raise ValueError(f'Línea {number}: tipo desconocido {kind!r}')
+    return chapters, blocks, codes
+
+
+def compile_catalog(lines):
+    """Índice binario (bytes) a partir de las líneas del archivo de texto"""
+    chapters, blocks, codes = parse_source(lines)
+    keys = sorted(codes)
+
+    records, words, text = [], set(), bytearray()
+    for index, key in enumerate(keys):
+        description = codes[key].encode()
+        records.append(CODE_RECORD.pack(_pad(key, KEY_SIZE), len(text), len(description)))
+        text += description
+        for word in normalize_words(codes[key]):
+            if len(word) >= MIN_WORD_LENGTH:
+                words.add((_pad(word, WORD_SIZE), index))
+
+    meta = json.dumps({
+        'chapters': sorted(chapters, key=lambda chapter: chapter.first),
+        'blocks': sorted(blocks),
+    }, ensure_ascii=False).encode()
+    return b''.join([
+        HEADER.pack(MAGIC, len(keys), len(words), len(meta), len(text)),
+        *records,
+        *(WORD_RECORD.pack(word, index) for word, index in sorted(words)),
+        meta,
+        bytes(text),
+    ])
+
+
+def build_index_file(source_path, index_path):
+    """Compila el archivo de texto y reemplaza el índice de forma atómica"""
+    with open(source_path, encoding='utf-8') as source:
+        data = compile_catalog(source)
+    directory = os.path.dirname(os.path.abspath(index_path))
+    fd, temp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as index:
+            index.write(data)
+        os.chmod(temp_path, 0o644)
+        os.replace(temp_path, index_path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.unlink(temp_path)
+        raise
+    return len(data)
+
+
+# ========== Índice ==========
+
+class _Keys:
+    """Secuencia de claves de ancho fijo sobre el buffer, para bisect"""
+
+    def __init__(self, buffer, start, count, record_size, key_size):
+        self.buffer = buffer
+        self.start = start
+        self.count = count
+        self.record_size = record_size
+        self.key_size = key_size
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, index):
+        offset = self.start + index * self.record_size
+        return self.buffer[offset:offset + self.key_size]
+
+
+class ICD10Catalog:
+    """
+    Catálogo de solo lectura sobre un índice compilado (mmap o bytes)
+
+    catalog.lookup('g43.0') -> ICD10Entry('G43.0', 'Migraña sin aura [migraña común]')
+    """
+
+    def __init__(self, buffer):
+        magic, code_count, word_count, meta_length, text_length = HEADER.unpack_from(buffer, 0)
+        if magic != MAGIC:
+            raise ValueError('El archivo no es un índice CIE-10 compilado')
+        self.buffer = buffer
+        self.codes_start = HEADER.size
+        self.words_start = self.codes_start + code_count * CODE_RECORD.size
+        meta_start = self.words_start + word_count * WORD_RECORD.size
+        self.text_start = meta_start + meta_length
+        self.keys = _Keys(buffer, self.codes_start, code_count, CODE_RECORD.size, KEY_SIZE)
+        self.words = _Keys(buffer, self.words_start, word_count, WORD_RECORD.size, WORD_SIZE)
+
+        # Capítulos y agrupaciones son pocos: se leen una vez
+        meta = json.loads(bytes(buffer[meta_start:self.text_start]).decode())
+        self.chapters = [Chapter(*chapter) for chapter in meta['chapters']]
+        self.blocks = [Block(*block) for block in meta['blocks']]
+        self._chapter_starts = [chapter.first for chapter in self.chapters]
+        self._block_starts = [block.first for block in self.blocks]
+
+    def __len__(self):
+        return len(self.keys)
+
+    def entry(self, index):
+        key, offset, length = CODE_RECORD.unpack_from(self.buffer, self.codes_start + index * CODE_RECORD.size)
+        start = self.text_start + offset
+        description = bytes(self.buffer[start:start + length]).decode()
+        return ICD10Entry(display_code(key.rstrip(b'\0').decode()), description)
+
+    def _find(self, key):
+        padded = _pad(key, KEY_SIZE)
+        index = bisect.bisect_left(self.keys, padded)
+        if index < len(self.keys) and self.keys[index] == padded:
+            return index
+        return None
+
+    def lookup(self, code):
+        """ICD10Entry del código o None si no está en el catálogo"""
+        index = self._find(normalize_code(code))
+        return self.entry(index) if index is not None else None
+
+    def __contains__(self, code):
+        return self._find(normalize_code(code)) is not None
+
+    def _prefix_indexes(self, keys, prefix, width):
+        """Números de registro cuya clave empieza con prefix (en orden de clave)"""
+        prefix = prefix[:width]
+        index = bisect.bisect_left(keys, prefix)
+        while index < len(keys) and keys[index].startswith(prefix):
+            yield index
+            index += 1
+
+    def complete(self, query, limit=AUTOCOMPLETE_LIMIT):
+        """
+        Autocompletado: por prefijo de código (g43, G43.) o, si no parece un código,
+        por prefijo de las palabras de la descripción (todas deben coincidir)
+        """
+        key = normalize_code(query)
+        if re.match(r'^[A-Z][0-9]', key):
+            indexes = self._prefix_indexes(self.keys, key.encode('ascii', 'ignore'), KEY_SIZE)
+            return [self.entry(index) for _, index in zip(range(limit), indexes)]
+
+        terms = [word for word in normalize_words(query or '') if len(word) >= MIN_WORD_LENGTH]
+        if not terms:
+            return []
+        # La palabra más larga suele ser la más selectiva
+        terms.sort(key=len, reverse=True)
+        first, rest = terms[0], terms[1:]
+        candidates = set()
+        for position in self._prefix_indexes(self.words, first.encode(), WORD_SIZE):
+            _, index = WORD_RECORD.unpack_from(self.buffer, self.words_start + position * WORD_RECORD.size)
+            candidates.add(index)
+
+        entries = []
+        for index in sorted(candidates):
+            entry = self.entry(index)
+            words = normalize_words(entry.description)
+            if all(any(word.startswith(term) for word in words) for term in rest):
+                entries.append(entry)
+                if len(entries) == limit:
+                    break
+        return entries
+
+    def _range_for(self, ranges, starts, code):
+        category = normalize_code(code)[:3]
+        position = bisect.bisect_right(starts, category) - 1
+        if position >= 0 and category <= ranges[position].last:
+            return ranges[position]
+        return None
+
+    def chapter(self, code):
+        return self._range_for(self.chapters, self._chapter_starts, code)
+
+    def block(self, code):
+        return self._range_for(self.blocks, self._block_starts, code)
+
+    def rollup(self, counts, level='chapter'):
+        """
+        Agrupa [(código, cantidad)] por capítulo o por agrupación. Los códigos de una
+        agrupación que no está en el catálogo quedan en su categoría de tres caracteres;
+        los inválidos, en 'Sin clasificar'. Devuelve [{key, title, count}] de mayor a menor
+        """
+        groups = {}
+        for code, count in counts:
+            key = normalize_code(code)
+            group = None
+            if CODE_RE.match(key):
+                if level == 'chapter':
+                    chapter = self.chapter(key)
+                    group = (chapter.number, chapter.title) if chapter else None
+                else:
+                    block = self.block(key)
+                    if block:
+                        group = (block.first if block.first == block.last else f'{block.first}-{block.last}',
+                                 block.title)
+                    else:
+                        category = self.lookup(key[:3])
+                        group = (key[:3], category.description if category else '')
+            group = group or (None, 'Sin clasificar')
+            groups[group] = groups.get(group, 0) + count
+        return [
+            {'key': key, 'title': title, 'count': count}
+            for (key, title), count in sorted(groups.items(), key=lambda item: (-item[1], item[0][1]))
+        ]
+
+
+# ========== Carga ==========
+
+def _open_index(path):
+    with open(path, 'rb') as index:
+        return mmap.mmap(index.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+@lru_cache(maxsize=1)
+def get_icd10_catalog():
+    """
+    Catálogo del proceso, abierto una vez. Recompila el índice si falta o quedó viejo;
+    si no se puede escribir, lo compila en memoria
+    """
+    config = get_icd10_config()
+    source_path, index_path = config['SOURCE_PATH'], config['INDEX_PATH']
+    try:
+        stale = (not os.path.exists(index_path)
+                 or os.path.getmtime(index_path) < os.path.getmtime(source_path))
+        if stale:
+            build_index_file(source_path, index_path)
+        return ICD10Catalog(_open_index(index_path))
+    except OSError:
+        with open(source_path, encoding='utf-8') as source:
+            return ICD10Catalog(compile_catalog(source))
+
+
+def validate_icd10_code(value, strict=None):
+    """
+    Código normalizado para guardar (g430 -> G43.0). ValueError si no tiene formato
+    CIE-10, si no cae en ningún capítulo o, en modo estricto, si no está en el catálogo
+    """
+    key = normalize_code(value)
+    if not CODE_RE.match(key):
+        raise ValueError(f'"{value}" no es un código CIE-10 válido (por ejemplo: J06.9)')
+    catalog = get_icd10_catalog()
+    if strict is None:
+        strict = get_icd10_config()['STRICT']
+    if strict and key not in catalog:
+        raise ValueError(f'El código {display_code(key)} no está en el catálogo CIE-10')
+    if catalog.chapter(key) is None:
+        raise ValueError(f'El código {display_code(key)} no pertenece a ningún capítulo de la CIE-10')
+    return display_code(key)
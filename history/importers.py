@@ -0,0 +1,314 @@
+"""
+Importación masiva de datos (CSV/XLSX)
+"""
+import csv
+import io
+import json
+import time
+from datetime import date, datetime
+from itertools import islice
+from django.db import connection, transaction
+from django.db.models import Q
+from .forms import PatientForm, ConsultForm, DiagnosisForm, TreatmentForm
+from .models import Person, Doctor, Consult, Diagnosis, Treatment
+from .signals import consults_bulk_created
+
+
+class PatientImportForm(PatientForm):
+    """
+    Mismas validaciones que PatientForm pero sin las consultas de unicidad por fila
+    Los duplicados de DNI/email se detectan por lote en PatientImporter
+    """
+
+    def validate_unique(self):
+        pass
+
+
+class ConsultIngestForm(ConsultForm):
+    """ConsultForm sin paciente/doctor: se resuelven por DNI y matrícula en lote"""
+
+    class Meta(ConsultForm.Meta):
+        fields = ['date', 'consult_type', 'reason', 'symptoms', 'vital_signs']
+
+
+class ImportResult:
+    """Resultado de una importación masiva"""
+
+    def __init__(self, error_fields=('dni', 'email')):
+        self.error_fields = error_fields
+        self.total = 0
+        self.created = 0
+        self.errors = []  # (fila, datos, mensaje)
+        self.started_at = time.monotonic()
+        self.elapsed = 0.0
+
+    def add_error(self, line, row, message):
+        self.errors.append((line, row, message))
+
+    def finish(self):
+        self.elapsed = time.monotonic() - self.started_at
+        self.errors.sort(key=lambda error: error[0])
+
+    @property
+    def rows_per_second(self):
+        if not self.elapsed:
+            return 0.0
+        return self.total / self.elapsed
+
+    def write_errors(self, fileobj):
+        """Escribe un CSV con una fila por error (número de fila original y motivo)"""
+        writer = csv.writer(fileobj)
+        writer.writerow(['row', *self.error_fields, 'errors'])
+        for line, row, message in self.errors:
+            writer.writerow([line, *(row.get(field, '') for field in self.error_fields), message])
+
+    def as_dict(self, max_errors=1000):
+        return {
+            'total': self.total,
+            'created': self.created,
+            'elapsed': round(self.elapsed, 3),
+            'rows_per_second': round(self.rows_per_second, 1),
+            'errors': [
+                {'row': line, 'error': message}
+                for line, _, message in self.errors[:max_errors]
+            ],
+        }
+
+
+def _cell_to_str(value):
+    if value is None:
+        return ''
+    if isinstance(value, datetime):
+        return value.date().isoformat()
+    if isinstance(value, date):
+        return value.isoformat()
+    if isinstance(value, float) and value.is_integer():
+        # Excel guarda DNI y teléfonos numéricos como float
+        return str(int(value))
+    return str(value).strip()
+
+
+def iter_csv_rows(fileobj):
+    """Itera las filas de un CSV abierto en modo texto como diccionarios"""
+    for row in csv.DictReader(fileobj):
+        yield {key.strip(): _cell_to_str(value) for key, value in row.items() if key}
+
+
+def iter_xlsx_rows(fileobj):
+    """Itera las filas de la primera hoja de un XLSX sin cargarlo completo en memoria"""
+    import openpyxl
+
+    wb = openpyxl.load_workbook(fileobj, read_only=True, data_only=True)
+    try:
+        rows = wb.active.iter_rows(values_only=True)
+        header = [_cell_to_str(value) for value in next(rows, [])]
+        for values in rows:
+            if all(value is None for value in values):
+                continue
+            yield {key: _cell_to_str(value) for key, value in zip(header, values) if key}
+    finally:
+        wb.close()
+
+
+def iter_rows(fileobj, filename):
+    """Elige el lector según la extensión del archivo (fileobj abierto en modo binario)"""
+    if filename.lower().endswith('.xlsx'):
+        return iter_xlsx_rows(fileobj)
+    # Los archivos subidos envuelven el archivo real en .file
+    raw = getattr(fileobj, 'file', fileobj)
+    return iter_csv_rows(io.TextIOWrapper(raw, encoding='utf-8-sig', newline=''))
+
+
+def format_form_errors(errors):
+    return '; '.join(
+        f"{field}: {' '.join(messages)}" for field, messages in errors.items()
+    )
+
+
+def chunked(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+class PatientImporter:
+    """
+    Importa pacientes por lotes:
+    - valida cada fila con las reglas de PatientForm
+    - detecta DNI/email duplicados con una sola consulta por lote
+    - inserta con bulk_create dentro de una transacción por lote
+    """
+    fields = PatientForm.Meta.fields
+
+    def __init__(self, batch_size=1000, dry_run=False):
+        self.batch_size = batch_size
+        self.dry_run = dry_run
+
+    def run(self, rows):
+        result = ImportResult()
+        # La fila 1 es el encabezado
+        for batch in chunked(enumerate(rows, start=2), self.batch_size):
+            self._process_batch(batch, result)
+        result.finish()
+        return result
+
+    def _process_batch(self, batch, result):
+        candidates = []
+        for line, row in batch:
+            result.total += 1
+            form = PatientImportForm(data={field: row.get(field, '') for field in self.fields})
+            if not form.is_valid():
+                result.add_error(line, row, format_form_errors(form.errors))
+                continue
+            candidates.append((line, row, form.instance))
+
+        if not candidates:
+            return
+
+        dnis = {person.dni for _, _, person in candidates}
+        emails = {person.email for _, _, person in candidates}
+        existing = Person.objects.filter(Q(dni__in=dnis) | Q(email__in=emails)).values_list('dni', 'email')
+        taken_dnis = set()
+        taken_emails = set()
+        for dni, email in existing:
+            taken_dnis.add(dni)
+            taken_emails.add(email)
+
+        to_create = []
+        for line, row, person in candidates:
+            if person.dni in taken_dnis:
+                result.add_error(line, row, f'DNI duplicado: {person.dni}')
+                continue
+            if person.email in taken_emails:
+                result.add_error(line, row, f'Email duplicado: {person.email}')
+                continue
+            # También evita duplicados dentro del mismo archivo
+            taken_dnis.add(person.dni)
+            taken_emails.add(person.email)
+            to_create.append(person)
+
+        if to_create and not self.dry_run:
+            with transaction.atomic():
+                Person.objects.bulk_create(to_create, batch_size=self.batch_size)
+        result.created += len(to_create)
+
+
+class ConsultIngester:
+    """
+    Ingesta masiva de consultas históricas (una consulta JSON por registro):
+    - resuelve DNI de paciente y matrícula de doctor con un mapa por lote
+    - valida con ConsultForm, DiagnosisForm y TreatmentForm
+    - inserta consultas, diagnósticos y tratamientos con bulk_create por lote
+    - notifica consults_bulk_created una vez por lote para actualizar datos derivados
+    """
+    consult_fields = ConsultIngestForm.Meta.fields
+
+    def __init__(self, batch_size=500, dry_run=False):
+        self.batch_size = batch_size
+        self.dry_run = dry_run
+
+    def run(self, records):
+        result = ImportResult(error_fields=('patient_dni', 'doctor_license', 'date'))
+        numbered = (
+            (line, record) for line, record in enumerate(records, start=1)
+            if not (isinstance(record, (str, bytes)) and not record.strip())
+        )
+        for batch in chunked(numbered, self.batch_size):
+            self._process_batch(batch, result)
+        result.finish()
+        return result
+
+    def _process_batch(self, batch, result):
+        parsed = []
+        for line, record in batch:
+            result.total += 1
+            if isinstance(record, (str, bytes)):
+                try:
+                    record = json.loads(record)
+                except ValueError as exc:
+                    result.add_error(line, {}, f'JSON inválido: {exc}')
+                    continue
+            if not isinstance(record, dict):
+                result.add_error(line, {}, 'Cada registro debe ser un objeto JSON')
+                continue
+            parsed.append((line, record))
+
+        if not parsed:
+            return
+
+        dnis = {str(record.get('patient_dni', '')) for _, record in parsed}
+        licenses = {str(record.get('doctor_license', '')) for _, record in parsed}
+        patient_ids = dict(Person.objects.filter(dni__in=dnis).values_list('dni', 'id'))
+        doctor_ids = dict(Doctor.objects.filter(license_number__in=licenses).values_list('license_number', 'id'))
+
+        items = []
+        for line, record in parsed:
+            item = self._build(line, record, patient_ids, doctor_ids, result)
+            if item:
+                items.append(item)
+
+        if items and not self.dry_run:
+            with transaction.atomic():
+                consults = self._insert_consults([consult for consult, _, _ in items])
+                diagnoses = []
+                treatments = []
+                for consult, diagnosis, treatment in items:
+                    if diagnosis:
+                        diagnosis.consult = consult
+                        diagnoses.append(diagnosis)
+                    if treatment:
+                        treatment.consult = consult
+                        treatments.append(treatment)
+                Diagnosis.objects.bulk_create(diagnoses, batch_size=self.batch_size)
+                Treatment.objects.bulk_create(treatments, batch_size=self.batch_size)
+                # Dentro de la transacción: si falla un dato derivado no queda el lote a medias
+                consults_bulk_created.send(sender=Consult, consults=consults)
+        result.created += len(items)
+
+    def _build(self, line, record, patient_ids, doctor_ids, result):
+        patient_id = patient_ids.get(str(record.get('patient_dni', '')))
+        if patient_id is None:
+            result.add_error(line, record, f"Paciente no encontrado: DNI {record.get('patient_dni', '')}")
+            return None
+
+        doctor_id = doctor_ids.get(str(record.get('doctor_license', '')))
+        if doctor_id is None:
+            result.add_error(line, record, f"Doctor no encontrado: matrícula {record.get('doctor_license', '')}")
+            return None
+
+        form = ConsultIngestForm(data={field: record.get(field) for field in self.consult_fields})
+        if not form.is_valid():
+            result.add_error(line, record, format_form_errors(form.errors))
+            return None
+        consult = form.instance
+        consult.patient_id = patient_id
+        consult.doctor_id = doctor_id
+
+        children = []
+        for key, form_class in (('diagnosis', DiagnosisForm), ('treatment', TreatmentForm)):
+            data = record.get(key)
+            if not data:
+                children.append(None)
+                continue
+            if not isinstance(data, dict):
+                result.add_error(line, record, f'{key}: debe ser un objeto JSON')
+                return None
+            child_form = form_class(data=data)
+            if not child_form.is_valid():
+                result.add_error(line, record, f'{key}: ' + format_form_errors(child_form.errors))
+                return None
+            children.append(child_form.instance)
+
+        return consult, children[0], children[1]
+
+    @staticmethod
+    def _insert_consults(consults):
+        # Los hijos necesitan el id de la consulta: solo bulk_create si la base lo devuelve
+        if connection.features.can_return_rows_from_bulk_insert:
+            return Consult.objects.bulk_create(consults)
+        for consult in consults:
+            consult.save()
+        return consults
@@ -0,0 +1,137 @@
+"""
+Instrumentación por petición: cantidad de consultas SQL, tiempo de base de datos,
+consulta más lenta, aciertos/fallos de caché y tiempo de renderizado
+
+RequestInstrumentationMiddleware (history.middleware) abre un RequestMetrics por
+petición muestreada; las fuentes de datos lo encuentran con get_current_metrics():
+- QueryTimer: execute wrapper de cada conexión de base de datos
+- history.cache_backends: backends de caché que registran aciertos y fallos
+- InstrumentedDjangoTemplates: backend de plantillas que mide el renderizado
+"""
+import time
+from contextvars import ContextVar
+from django.template import TemplateDoesNotExist
+from django.template.backends.django import DjangoTemplates, Template, reraise
+
+SLOW_QUERY_SQL_LENGTH = 300
+
+_current_metrics = ContextVar('request_metrics', default=None)
+
+
+class RequestMetrics:
+    """Métricas acumuladas durante una petición"""
+
+    def __init__(self):
+        self.started_at = time.perf_counter()
+        self.query_count = 0
+        self.db_time = 0.0
+        self.slowest_query_time = 0.0
+        self.slowest_query_sql = ''
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.render_time = 0.0
+        self.total_time = 0.0
+
+    def record_query(self, sql, duration):
+        self.query_count += 1
+        self.db_time += duration
+        if duration > self.slowest_query_time:
+            self.slowest_query_time = duration
+            self.slowest_query_sql = sql[:SLOW_QUERY_SQL_LENGTH]
+
+    def record_cache(self, hits=0, misses=0):
+        self.cache_hits += hits
+        self.cache_misses += misses
+
+    def record_render(self, duration):
+        self.render_time += duration
+
+    def finish(self):
+        self.total_time = time.perf_counter() - self.started_at
+
+    def server_timing(self):
+        """Valor del encabezado Server-Timing (duraciones en milisegundos)"""
+        return ', '.join([
+            f'db;dur={self.db_time * 1000:.1f};desc="{self.query_count} queries"',
+            f'db-slowest;dur={self.slowest_query_time * 1000:.1f}',
+            f'cache;desc="hit={self.cache_hits} miss={self.cache_misses}"',
+            f'render;dur={self.render_time * 1000:.1f}',
+            f'total;dur={self.total_time * 1000:.1f}',
+        ])
+
+    def as_dict(self):
+        return {
+            'queries': self.query_count,
+            'db_ms': round(self.db_time * 1000, 2),
+            'slowest_query_ms': round(self.slowest_query_time * 1000, 2),
+            'slowest_query': self.slowest_query_sql,
+            'cache_hits': self.cache_hits,
+            'cache_misses': self.cache_misses,
+            'render_ms': round(self.render_time * 1000, 2),
+            'total_ms': round(self.total_time * 1000, 2),
+        }
+
+
+def get_current_metrics():
+    """RequestMetrics de la petición en curso, o None si no se está midiendo"""
+    return _current_metrics.get()
+
+
+def start_metrics():
+    """Empieza a medir en el contexto actual; devuelve (metrics, token para stop_metrics)"""
+    metrics = RequestMetrics()
+    return metrics, _current_metrics.set(metrics)
+
+
+def stop_metrics(token):
+    _current_metrics.reset(token)
+
+
+def record_cache_access(hits=0, misses=0):
+    metrics = _current_metrics.get()
+    if metrics is not None:
+        metrics.record_cache(hits, misses)
+
+
+class QueryTimer:
+    """Execute wrapper (connection.execute_wrapper) que mide cada consulta"""
+
+    def __init__(self, metrics):
+        self.metrics = metrics
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.metrics.record_query(sql, time.perf_counter() - start)
+
+
+class TimedTemplate(Template):
+    """Plantilla que suma su tiempo de renderizado a la petición en curso"""
+
+    def render(self, context=None, request=None):
+        metrics = _current_metrics.get()
+        if metrics is None:
+            return super().render(context, request)
+        start = time.perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            metrics.record_render(time.perf_counter() - start)
+
+
+class InstrumentedDjangoTemplates(DjangoTemplates):
+    """
+    DjangoTemplates que mide el renderizado de las plantillas de nivel superior
+    (los {% include %} y {% extends %} quedan dentro de ese tiempo)
+    """
+
+    def from_string(self, template_code):
+        return TimedTemplate(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        try:
+            return TimedTemplate(self.engine.get_template(template_name), self)
+        except TemplateDoesNotExist as exc:
+            reraise(exc, self)
@@ -0,0 +1,148 @@
+"""
+Mantenimiento del modelo de lectura ConsultListing
+
+Cada consulta tiene una fila con los datos que muestran el listado, el dashboard y
+las exportaciones, así esas pantallas no hacen el JOIN consulta → paciente → doctor
+→ usuario (+ diagnóstico y tratamiento). Las señales la mantienen al día:
+
+- alta o edición de consulta, diagnóstico o tratamiento: se regenera su fila
+- edición de paciente o doctor (también el nombre de su usuario): se actualizan sus filas
+- consults_bulk_created (importaciones, datos de benchmark): filas del lote en bloque
+- borrado de consulta, paciente o doctor: la fila cae en cascada
+
+Las escrituras con QuerySet.update() o SQL directo no disparan señales: después de
+una de esas se corre `manage.py rebuild_consult_listing`
+"""
+from django.db.models.signals import post_delete, post_save
+from django.utils import timezone
+from .signals import consults_bulk_created
+
+REBUILD_BATCH_SIZE = 2000
+
+LISTING_SOURCE_FIELDS = (
+    'id', 'patient_id', 'doctor_id', 'date', 'consult_type', 'reason',
+    'patient__name', 'patient__last_name', 'patient__dni', 'doctor__display_name', 'doctor__specialty',
+    'diagnosis__icd_code', 'treatment__follow_up_date',
+)
+
+
+def _build_listing(listing_model, row):
+    return listing_model(
+        consult_id=row['id'],
+        patient_id=row['patient_id'],
+        doctor_id=row['doctor_id'],
+        date=row['date'],
+        consult_type=row['consult_type'],
+        reason=row['reason'],
+        patient_name=row['patient__name'],
+        patient_last_name=row['patient__last_name'],
+        patient_dni=row['patient__dni'],
+        doctor_name=row['doctor__display_name'],
+        doctor_specialty=row['doctor__specialty'],
+        icd_code=row['diagnosis__icd_code'] or '',
+        follow_up_date=row['treatment__follow_up_date'],
+    )
+
+
+def copy_listings(consults, listing_model, batch_size=REBUILD_BATCH_SIZE, replace=True):
+    """
+    Regenera las filas de las consultas del queryset (una consulta con JOIN y un
+    bulk_create por lote; replace=False omite el borrado previo cuando se sabe que
+    no hay filas). Devuelve cuántas filas escribió
+    """
+    written = 0
+    last_id = 0
+    while True:
+        rows = list(consults.filter(id__gt=last_id).order_by('id').values(*LISTING_SOURCE_FIELDS)[:batch_size])
+        if not rows:
+            return written
+        ids = [row['id'] for row in rows]
+        if replace:
+            listing_model.objects.filter(consult_id__in=ids).delete()
+        listing_model.objects.bulk_create([_build_listing(listing_model, row) for row in rows])
+        written += len(rows)
+        if len(rows) < batch_size:
+            return written
+        last_id = ids[-1]
+
+
+def refresh_consult_listings(consult_ids, replace=True):
+    from .models import Consult, ConsultListing
+
+    consult_ids = list(consult_ids)
+    written = 0
+    for start in range(0, len(consult_ids), REBUILD_BATCH_SIZE):
+        batch = consult_ids[start:start + REBUILD_BATCH_SIZE]
+        written += copy_listings(Consult.objects.filter(id__in=batch), ConsultListing, replace=replace)
+    return written
+
+
+def rebuild_consult_listing(batch_size=REBUILD_BATCH_SIZE):
+    """Vacía y vuelve a llenar la tabla completa"""
+    from .models import Consult, ConsultListing
+
+    ConsultListing.objects.all().delete()
+    return copy_listings(Consult.objects.all(), ConsultListing, batch_size=batch_size, replace=False)
+
+
+def _update_listings(**filters):
+    from .models import ConsultListing
+
+    def update(**values):
+        ConsultListing.objects.filter(**filters).update(updated_at=timezone.now(), **values)
+    return update
+
+
+def consult_saved(sender, instance, raw=False, **kwargs):
+    if not raw:
+        refresh_consult_listings([instance.pk])
+
+
+def consult_child_saved(sender, instance, raw=False, **kwargs):
+    """Alta o edición de diagnóstico o tratamiento"""
+    if not raw:
+        refresh_consult_listings([instance.consult_id])
+
+
+def diagnosis_deleted(sender, instance, **kwargs):
+    # UPDATE y no regeneración: si se está borrando la consulta no se recrea su fila
+    _update_listings(consult_id=instance.consult_id)(icd_code='')
+
+
+def treatment_deleted(sender, instance, **kwargs):
+    _update_listings(consult_id=instance.consult_id)(follow_up_date=None)
+
+
+def patient_saved(sender, instance, created=False, raw=False, **kwargs):
+    if raw or created:
+        return
+    _update_listings(patient_id=instance.pk)(
+        patient_name=instance.name, patient_last_name=instance.last_name, patient_dni=instance.dni
+    )
+
+
+def doctor_saved(sender, instance, created=False, raw=False, **kwargs):
+    if raw or created:
+        return
+    _update_listings(doctor_id=instance.pk)(
+        doctor_name=instance.full_name, doctor_specialty=instance.specialty
+    )
+
+
+def consults_bulk_saved(sender, consults, **kwargs):
+    # Se regeneran: si la base no devuelve ids en bulk_create, ConsultIngester guarda
+    # las consultas una por una y post_save ya les creó una fila (sin diagnóstico ni
+    # tratamiento)
+    refresh_consult_listings(consult.pk for consult in consults)
+
+
+def connect_signals():
+    """Se llama desde HistoryConfig.ready()"""
+    post_save.connect(consult_saved, sender='history.Consult', dispatch_uid='listing-consult')
+    for label in ('history.Diagnosis', 'history.Treatment'):
+        post_save.connect(consult_child_saved, sender=label, dispatch_uid=f'listing-save-{label}')
+    post_delete.connect(diagnosis_deleted, sender='history.Diagnosis', dispatch_uid='listing-delete-diagnosis')
+    post_delete.connect(treatment_deleted, sender='history.Treatment', dispatch_uid='listing-delete-treatment')
+    post_save.connect(patient_saved, sender='history.Person', dispatch_uid='listing-patient')
+    post_save.connect(doctor_saved, sender='history.Doctor', dispatch_uid='listing-doctor')
+    consults_bulk_created.connect(consults_bulk_saved, dispatch_uid='listing-bulk-consults')
@@ -0,0 +1,35 @@
+"""
+Compila el catálogo CIE-10 (history.icd10) a su índice binario
+"""
+import time
+from django.core.management.base import BaseCommand, CommandError
+from history.icd10 import ICD10Catalog, build_index_file, get_icd10_config
+
+
+class Command(BaseCommand):
+    help = (
+        'Compila el archivo de texto del catálogo CIE-10 al índice que los workers abren '
+        'con mmap. Correr al desplegar o al cambiar el catálogo; los procesos ya '
+        'iniciados siguen con el índice anterior hasta reiniciarse'
+    )
+
+    def add_arguments(self, parser):
+        config = get_icd10_config()
+        parser.add_argument('--source', default=config['SOURCE_PATH'],
+                            help=f'Archivo de texto (default: {config["SOURCE_PATH"]})')
+        parser.add_argument('--output', default=config['INDEX_PATH'],
+                            help=f'Índice a generar (default: {config["INDEX_PATH"]})')
+
+    def handle(self, *args, **options):
+        start = time.monotonic()
+        try:
+            size = build_index_file(options['source'], options['output'])
+        except (OSError, ValueError) as error:
+            raise CommandError(str(error))
+
+        with open(options['output'], 'rb') as index:
+            catalog = ICD10Catalog(index.read())
+        self.stdout.write(self.style.SUCCESS(
+            f'{len(catalog)} códigos, {len(catalog.blocks)} agrupaciones y {len(catalog.chapters)} '
+            f'capítulos ({size / 1024:.1f} KB) en {time.monotonic() - start:.2f}s'
+        ))
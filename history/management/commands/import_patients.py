@@ -0,0 +1,39 @@
+"""
+Importa pacientes en forma masiva desde un archivo CSV o XLSX
+"""
+from django.core.management.base import BaseCommand, CommandError
+from history.importers import PatientImporter, iter_rows
+
+
+class Command(BaseCommand):
+    help = 'Importa pacientes desde un archivo CSV o XLSX usando bulk_create por lotes'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Archivo CSV o XLSX con encabezados (name, last_name, dni, ...)')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Filas por lote (default: 1000)')
+        parser.add_argument('--errors-file', help='Ruta del CSV donde guardar las filas rechazadas')
+        parser.add_argument('--dry-run', action='store_true', help='Valida sin escribir en la base de datos')
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size debe ser mayor a 0')
+
+        importer = PatientImporter(batch_size=options['batch_size'], dry_run=options['dry_run'])
+        try:
+            with open(options['path'], 'rb') as fileobj:
+                result = importer.run(iter_rows(fileobj, options['path']))
+        except OSError as exc:
+            raise CommandError(f'No se pudo leer el archivo: {exc}')
+
+        if options['errors_file'] and result.errors:
+            with open(options['errors_file'], 'w', newline='', encoding='utf-8') as errors_file:
+                result.write_errors(errors_file)
+
+        action = 'validados' if options['dry_run'] else 'creados'
+        self.stdout.write(self.style.SUCCESS(
+            f'{result.created} pacientes {action} de {result.total} filas '
+            f'en {result.elapsed:.2f}s ({result.rows_per_second:.0f} filas/s)'
+        ))
+        if result.errors:
+            destination = f" (ver {options['errors_file']})" if options['errors_file'] else ''
+            self.stdout.write(self.style.WARNING(f'{len(result.errors)} filas rechazadas{destination}'))
@@ -0,0 +1,47 @@
+"""
+Ingesta masiva de consultas históricas desde un archivo NDJSON
+"""
+import sys
+from django.core.management.base import BaseCommand, CommandError
+from history.importers import ConsultIngester
+
+
+class Command(BaseCommand):
+    help = (
+        'Ingesta consultas históricas desde NDJSON (una consulta por línea con '
+        'patient_dni, doctor_license, date, consult_type, reason, symptoms, '
+        'vital_signs y opcionalmente diagnosis/treatment)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="Archivo NDJSON ('-' para leer de la entrada estándar)")
+        parser.add_argument('--batch-size', type=int, default=500, help='Consultas por lote (default: 500)')
+        parser.add_argument('--errors-file', help='Ruta del CSV donde guardar los registros rechazados')
+        parser.add_argument('--dry-run', action='store_true', help='Valida sin escribir en la base de datos')
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size debe ser mayor a 0')
+
+        ingester = ConsultIngester(batch_size=options['batch_size'], dry_run=options['dry_run'])
+        try:
+            if options['path'] == '-':
+                result = ingester.run(sys.stdin)
+            else:
+                with open(options['path'], encoding='utf-8') as fileobj:
+                    result = ingester.run(fileobj)
+        except OSError as exc:
+            raise CommandError(f'No se pudo leer el archivo: {exc}')
+
+        if options['errors_file'] and result.errors:
+            with open(options['errors_file'], 'w', newline='', encoding='utf-8') as errors_file:
+                result.write_errors(errors_file)
+
+        action = 'validadas' if options['dry_run'] else 'creadas'
+        self.stdout.write(self.style.SUCCESS(
+            f'{result.created} consultas {action} de {result.total} registros '
+            f'en {result.elapsed:.2f}s ({result.rows_per_second:.0f} registros/s)'
+        ))
+        if result.errors:
+            destination = f" (ver {options['errors_file']})" if options['errors_file'] else ''
+            self.stdout.write(self.style.WARNING(f'{len(result.errors)} registros rechazados{destination}'))
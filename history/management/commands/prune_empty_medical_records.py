@@ -0,0 +1,41 @@
+"""
+Elimina historias clínicas vacías creadas por lecturas de la ficha del paciente
+"""
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+from history.models import MedicalRecord
+
+TEXT_FIELDS = ['allergies', 'chronic_conditions', 'family_history', 'social_history']
+
+
+def empty_medical_records():
+    """Historias clínicas sin ningún dato cargado"""
+    condition = Q()
+    for field in TEXT_FIELDS:
+        condition &= Q(**{f'{field}__isnull': True}) | Q(**{field: ''})
+    return MedicalRecord.objects.filter(condition)
+
+
+class Command(BaseCommand):
+    help = 'Elimina historias clínicas sin datos (se vuelven a crear al guardarlas por primera vez)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=5000, help='Filas a borrar por lote (default: 5000)')
+        parser.add_argument('--dry-run', action='store_true', help='Solo cuenta los registros a eliminar')
+
+    def handle(self, *args, **options):
+        if options['dry_run']:
+            count = empty_medical_records().count()
+            self.stdout.write(f'{count} historias clínicas vacías para eliminar')
+            return
+
+        deleted = 0
+        while True:
+            # Lotes acotados para no mantener un bloqueo largo sobre la tabla
+            ids = list(empty_medical_records().values_list('id', flat=True)[:options['batch_size']])
+            if not ids:
+                break
+            count, _ = MedicalRecord.objects.filter(id__in=ids).delete()
+            deleted += count
+
+        self.stdout.write(self.style.SUCCESS(f'{deleted} historias clínicas vacías eliminadas'))
@@ -0,0 +1,29 @@
+"""
+Regenera la tabla ConsultListing (modelo de lectura del listado de consultas)
+"""
+import time
+from django.core.management.base import BaseCommand, CommandError
+from history.listing import REBUILD_BATCH_SIZE, rebuild_consult_listing
+
+
+class Command(BaseCommand):
+    help = (
+        'Vacía y vuelve a llenar ConsultListing desde las consultas. Necesario después de '
+        'escrituras que no disparan señales (QuerySet.update, SQL directo, restauraciones)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=REBUILD_BATCH_SIZE,
+            help=f'Consultas por lote (default: {REBUILD_BATCH_SIZE})'
+        )
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size debe ser mayor a 0')
+
+        start = time.monotonic()
+        written = rebuild_consult_listing(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f'{written} filas de listado regeneradas en {time.monotonic() - start:.2f}s'
+        ))
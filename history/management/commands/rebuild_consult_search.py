@@ -0,0 +1,25 @@
+"""
+Recrea el índice de búsqueda de texto de las consultas (history.search)
+"""
+import time
+from django.core.management.base import BaseCommand, CommandError
+from history.search import SearchUnavailable, install_search_index
+
+
+class Command(BaseCommand):
+    help = (
+        'Crea la tabla y los triggers de la búsqueda de texto si faltan y vuelve a '
+        'indexar todas las consultas. En SQLite, una migración que rehace las tablas de '
+        'consultas, diagnósticos o tratamientos borra sus triggers: correr este comando '
+        'después'
+    )
+
+    def handle(self, *args, **options):
+        start = time.monotonic()
+        try:
+            install_search_index()
+        except SearchUnavailable as error:
+            raise CommandError(str(error))
+        self.stdout.write(self.style.SUCCESS(
+            f'Índice de búsqueda reconstruido en {time.monotonic() - start:.2f}s'
+        ))
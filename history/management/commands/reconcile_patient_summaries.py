@@ -0,0 +1,31 @@
+"""
+Repara la tabla PatientSummary (resumen de consultas por paciente)
+"""
+import time
+from django.core.management.base import BaseCommand, CommandError
+from history.summaries import RECONCILE_BATCH_SIZE, reconcile_patient_summaries
+
+
+class Command(BaseCommand):
+    help = (
+        'Recalcula el resumen de consultas de cada paciente y corrige las filas que no '
+        'coinciden. Necesario después de escrituras que no disparan señales '
+        '(QuerySet.update, SQL directo, restauraciones)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=RECONCILE_BATCH_SIZE,
+            help=f'Pacientes por lote (default: {RECONCILE_BATCH_SIZE})'
+        )
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size debe ser mayor a 0')
+
+        start = time.monotonic()
+        checked, written, removed = reconcile_patient_summaries(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f'{checked} pacientes revisados: {written} resúmenes corregidos, {removed} borrados '
+            f'en {time.monotonic() - start:.2f}s'
+        ))
@@ -0,0 +1,63 @@
+"""
+Genera un conjunto de datos sintético y reproducible para benchmarks
+"""
+from datetime import date
+from django.core.management.base import BaseCommand, CommandError
+from history.benchmark_data import (
+    BenchmarkDataSeeder, SeedError, USERNAME_PREFIX, clear_benchmark_data, has_benchmark_data
+)
+
+
+class Command(BaseCommand):
+    help = (
+        'Genera pacientes, doctores, consultas, diagnósticos, tratamientos y logs de auditoría '
+        'sintéticos con distribución realista (doctores muy demandados, pacientes crónicos, '
+        'estacionalidad). Con la misma semilla y fecha final el resultado es idéntico'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--patients', type=int, default=10000, help='Pacientes (default: 10000)')
+        parser.add_argument('--consults', type=int, default=100000, help='Consultas (default: 100000)')
+        parser.add_argument('--doctors', type=int, default=50, help='Doctores (default: 50)')
+        parser.add_argument('--seed', type=int, default=42, help='Semilla del generador (default: 42)')
+        parser.add_argument('--batch-size', type=int, default=5000, help='Filas por lote (default: 5000)')
+        parser.add_argument(
+            '--method', choices=['auto', 'bulk', 'copy'], default='auto',
+            help='auto: COPY en PostgreSQL y bulk_create en el resto (default: auto)'
+        )
+        parser.add_argument('--diagnosis-ratio', type=float, default=0.8, help='Fracción de consultas con diagnóstico')
+        parser.add_argument('--treatment-ratio', type=float, default=0.6, help='Fracción de consultas con tratamiento')
+        parser.add_argument('--audit-ratio', type=float, default=1.0, help='Logs de auditoría por consulta')
+        parser.add_argument('--chronic-ratio', type=float, default=0.1, help='Fracción de pacientes crónicos')
+        parser.add_argument('--years', type=int, default=3, help='Años de historia hasta --end-date (default: 3)')
+        parser.add_argument(
+            '--end-date', type=date.fromisoformat,
+            help='Última fecha de consulta (AAAA-MM-DD, default: hoy). Fijarla para datos idénticos entre días'
+        )
+        parser.add_argument('--password', default='bench-pass', help='Contraseña de los usuarios generados')
+        parser.add_argument('--clear', action='store_true', help='Borra los datos generados antes de empezar')
+
+    def handle(self, *args, **options):
+        if options['clear'] and has_benchmark_data():
+            self.stdout.write('Borrando datos de benchmark anteriores...')
+            clear_benchmark_data()
+
+        seeder_options = {
+            key: options[key] for key in (
+                'patients', 'consults', 'doctors', 'seed', 'batch_size', 'method', 'diagnosis_ratio',
+                'treatment_ratio', 'audit_ratio', 'chronic_ratio', 'years', 'end_date', 'password'
+            )
+        }
+        verbose = options['verbosity'] > 1
+        try:
+            seeder = BenchmarkDataSeeder(progress=self.stdout.write if verbose else None, **seeder_options)
+            report = seeder.run()
+        except SeedError as exc:
+            raise CommandError(str(exc))
+
+        for line in report.lines():
+            self.stdout.write(line)
+        self.stdout.write(self.style.SUCCESS(
+            f'Datos de benchmark generados. Usuarios: {USERNAME_PREFIX}admin, {USERNAME_PREFIX}reception '
+            f'y {USERNAME_PREFIX}doctor0..{options["doctors"] - 1}'
+        ))
@@ -0,0 +1,55 @@
+"""
+Envía los recordatorios de seguimiento por email (history.reminders)
+"""
+import time
+from django.core.management.base import BaseCommand, CommandError
+from history.reminders import ReminderSender, SMTPUnavailable
+
+
+class Command(BaseCommand):
+    help = (
+        'Manda un recordatorio por email a los pacientes con seguimiento pendiente en los '
+        'próximos días, por lotes sobre una conexión SMTP. Repetirlo no reenvía los ya '
+        'mandados. Con --interval queda corriendo y repite el envío cada N segundos'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days-ahead', type=int, help='Seguimientos de hoy y de los próximos N días')
+        parser.add_argument('--batch-size', type=int, help='Mensajes por lote')
+        parser.add_argument('--rate', type=float, help='Mensajes por segundo (0 sin límite)')
+        parser.add_argument('--dry-run', action='store_true', help='Solo contar los recordatorios debidos')
+        parser.add_argument('--interval', type=int, help='Repetir cada N segundos en lugar de terminar')
+
+    def handle(self, *args, **options):
+        if options['batch_size'] is not None and options['batch_size'] < 1:
+            raise CommandError('--batch-size debe ser mayor a 0')
+        if options['days_ahead'] is not None and options['days_ahead'] < 0:
+            raise CommandError('--days-ahead no puede ser negativo')
+
+        while True:
+            sender = ReminderSender(
+                days_ahead=options['days_ahead'], batch_size=options['batch_size'],
+                rate=options['rate'], dry_run=options['dry_run'],
+            )
+            try:
+                result = sender.run()
+            except SMTPUnavailable as error:
+                if not options['interval']:
+                    raise CommandError(f'Servidor SMTP no disponible: {error}')
+                self.stderr.write(f'Servidor SMTP no disponible: {error}')
+            else:
+                self.report(result, options['dry_run'])
+            if not options['interval']:
+                return
+            time.sleep(options['interval'])
+
+    def report(self, result, dry_run):
+        if dry_run:
+            self.stdout.write(f'{result.queued} recordatorios debidos (sin enviar)')
+            return
+        for email, message in result.errors:
+            self.stderr.write(f'{email}: {message}')
+        self.stdout.write(self.style.SUCCESS(
+            f'{result.sent} enviados, {result.failed} fallidos, {result.skipped} en curso en otro proceso '
+            f'({result.queued} nuevos) en {result.elapsed:.2f}s'
+        ))
@@ -0,0 +1,30 @@
+"""
+Borra las sesiones vencidas de django_session por lotes
+"""
+import time
+from django.core.management.base import BaseCommand, CommandError
+from history.sessions import sweep_expired_sessions
+
+
+class Command(BaseCommand):
+    help = (
+        'Borra las sesiones vencidas en lotes cortos. Con --interval queda corriendo y '
+        'repite la limpieza cada N segundos (para un contenedor o proceso en segundo plano)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=5000, help='Sesiones por lote (default: 5000)')
+        parser.add_argument('--pause', type=float, default=0.0, help='Segundos de espera entre lotes (default: 0)')
+        parser.add_argument('--interval', type=int, help='Repetir cada N segundos en lugar de terminar')
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size debe ser mayor a 0')
+
+        while True:
+            start = time.monotonic()
+            deleted = sweep_expired_sessions(batch_size=options['batch_size'], pause=options['pause'])
+            self.stdout.write(f'{deleted} sesiones vencidas borradas en {time.monotonic() - start:.2f}s')
+            if not options['interval']:
+                return
+            time.sleep(options['interval'])
@@ -0,0 +1,119 @@
+"""
+Métricas en formato Prometheus
+
+Con gunicorn cada worker es un proceso: si PROMETHEUS_MULTIPROC_DIR está definido
+(gunicorn.conf.py lo define antes de importar la app) prometheus_client guarda los
+valores en archivos mmap por proceso y la vista /metrics los agrega con
+MultiProcessCollector, así cualquier worker devuelve los totales de todos
+"""
+import os
+import time
+from contextlib import contextmanager
+from django.db import connections
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge, Histogram,
+    generate_latest, multiprocess
+)
+
+UNRESOLVED_VIEW = '<unresolved>'
+
+REQUEST_LATENCY = Histogram(
+    'history_request_duration_seconds',
+    'Duración de las peticiones HTTP por vista',
+    ['view', 'method', 'status'],
+    buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+REQUEST_DB_QUERIES = Histogram(
+    'history_request_db_queries',
+    'Consultas SQL por petición (peticiones muestreadas)',
+    ['view'],
+    buckets=(0, 1, 2, 5, 10, 20, 50, 100, 200),
+)
+REQUEST_DB_SECONDS = Histogram(
+    'history_request_db_seconds',
+    'Tiempo de base de datos por petición (peticiones muestreadas)',
+    ['view'],
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5),
+)
+CACHE_REQUESTS = Counter(
+    'history_cache_requests_total',
+    'Lecturas de caché por resultado (peticiones muestreadas)',
+    ['result'],
+)
+DB_CONNECTIONS_OPEN = Gauge(
+    'history_db_connections_open',
+    'Conexiones de base de datos abiertas al responder la última petición (suma de los workers vivos)',
+    ['alias'],
+    multiprocess_mode='livesum',
+)
+REPORT_DURATION = Histogram(
+    'history_report_generation_seconds',
+    'Duración de la generación de reportes',
+    ['report', 'format'],
+    buckets=(0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60),
+)
+REPORTS_IN_PROGRESS = Gauge(
+    'history_reports_in_progress',
+    'Reportes generándose en este momento (suma de los workers vivos)',
+    ['format'],
+    multiprocess_mode='livesum',
+)
+AUDIT_LOG_WRITES = Counter(
+    'history_audit_log_writes_total',
+    'Registros escritos en el log de auditoría',
+    ['action'],
+)
+
+
+def view_label(request):
+    """Nombre de la vista resuelta; las URLs no resueltas comparten una etiqueta"""
+    match = getattr(request, 'resolver_match', None)
+    return match.view_name if match and match.view_name else UNRESOLVED_VIEW
+
+
+def observe_request(request, response, duration, request_metrics=None):
+    """Registra una petición; request_metrics es el RequestMetrics si fue muestreada"""
+    view = view_label(request)
+    REQUEST_LATENCY.labels(view, request.method, str(response.status_code)).observe(duration)
+
+    if request_metrics is not None:
+        REQUEST_DB_QUERIES.labels(view).observe(request_metrics.query_count)
+        REQUEST_DB_SECONDS.labels(view).observe(request_metrics.db_time)
+        if request_metrics.cache_hits:
+            CACHE_REQUESTS.labels('hit').inc(request_metrics.cache_hits)
+        if request_metrics.cache_misses:
+            CACHE_REQUESTS.labels('miss').inc(request_metrics.cache_misses)
+
+    for connection in connections.all():
+        DB_CONNECTIONS_OPEN.labels(connection.alias).set(1 if connection.connection is not None else 0)
+
+
+@contextmanager
+def track_report(report, report_format):
+    """Mide la generación de un reporte y cuenta los que están en curso"""
+    in_progress = REPORTS_IN_PROGRESS.labels(report_format)
+    in_progress.inc()
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        in_progress.dec()
+        REPORT_DURATION.labels(report, report_format).observe(time.perf_counter() - start)
+
+
+def record_audit_write(action):
+    AUDIT_LOG_WRITES.labels(action).inc()
+
+
+def is_multiprocess():
+    return bool(os.environ.get('PROMETHEUS_MULTIPROC_DIR'))
+
+
+def render_metrics():
+    """Devuelve (contenido, content type) con las métricas de todos los procesos"""
+    if is_multiprocess():
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
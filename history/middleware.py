@@ -1,7 +1,36 @@
 from django.core.cache import cache
-from django.http import HttpResponseTooManyRequests
+from django.http import HttpResponse
 from django.conf import settings
+from django.db import connections
+from contextlib import ExitStack
+import json
+import logging
+import random
 import time
+from .instrumentation import QueryTimer, get_current_metrics, start_metrics, stop_metrics
+from .metrics import observe_request
+from .monitoring_views import is_internal_request
+from .profiler import (
+    QueryRecorder, build_entry, get_profile_store, get_profiler_config,
+    is_valid_profile_token, start_profile
+)
+
+performance_logger = logging.getLogger('history.performance')
+
+REQUEST_INSTRUMENTATION_DEFAULTS = {
+    'ENABLED': True,
+    'SAMPLE_RATE': 1.0,       # fracción de peticiones medidas (0.0 - 1.0)
+    'SERVER_TIMING': True,    # agregar el encabezado Server-Timing (solo staff o peticiones internas)
+    'SERVER_TIMING_PUBLIC': False,  # enviarlo a cualquier cliente (expone tiempos internos)
+    'LOG': True,              # línea JSON en el logger history.performance
+    'SLOW_REQUEST_MS': 0,     # solo loguear peticiones más lentas que esto (0 = todas)
+}
+
+
+class HttpResponseTooManyRequests(HttpResponse):
+    # Django no incluye una respuesta 429
+    status_code = 429
+
 
 class RateLimitMiddleware:
     """
@@ -44,3 +73,123 @@ class RateLimitMiddleware:
             ip = request.META.get('REMOTE_ADDR')
         return ip
 
+
+
+class RequestInstrumentationMiddleware:
+    """
+    Mide cada petición muestreada: consultas SQL, tiempo de base de datos, consulta
+    más lenta, aciertos/fallos de caché y renderizado (ver history.instrumentation)
+    Debe ir primero en MIDDLEWARE para que el total incluya al resto de middlewares
+    """
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.options = {
+            **REQUEST_INSTRUMENTATION_DEFAULTS,
+            **getattr(settings, 'REQUEST_INSTRUMENTATION', {}),
+        }
+
+    def __call__(self, request):
+        if not self.is_sampled():
+            return self.get_response(request)
+
+        metrics, token = start_metrics()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(QueryTimer(metrics)))
+                response = self.get_response(request)
+        finally:
+            stop_metrics(token)
+        metrics.finish()
+
+        if self.options['SERVER_TIMING'] and self.may_see_timings(request):
+            response['Server-Timing'] = metrics.server_timing()
+        if self.options['LOG'] and metrics.total_time * 1000 >= self.options['SLOW_REQUEST_MS']:
+            self.log(request, response, metrics)
+        return response
+
+    def is_sampled(self):
+        if not self.options['ENABLED']:
+            return False
+        rate = self.options['SAMPLE_RATE']
+        return rate >= 1 or random.random() < rate
+
+    def may_see_timings(self, request):
+        """Igual que /metrics (IP o token interno), más los usuarios staff"""
+        if self.options['SERVER_TIMING_PUBLIC'] or is_internal_request(request):
+            return True
+        user = getattr(request, 'user', None)
+        return user is not None and user.is_staff
+
+    def log(self, request, response, metrics):
+        match = getattr(request, 'resolver_match', None)
+        user = getattr(request, 'user', None)
+        performance_logger.info(json.dumps({
+            'method': request.method,
+            'path': request.path,
+            'url_name': match.view_name if match else None,
+            'status': response.status_code,
+            'user_id': user.pk if user is not None and user.is_authenticated else None,
+            **metrics.as_dict(),
+        }))
+
+
+class MetricsMiddleware:
+    """
+    Registra latencia por vista en las métricas de Prometheus (history.metrics)
+    Va después de RequestInstrumentationMiddleware para aprovechar sus mediciones
+    de base de datos y caché en las peticiones muestreadas
+    """
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        start = time.perf_counter()
+        response = self.get_response(request)
+        observe_request(request, response, time.perf_counter() - start, get_current_metrics())
+        return response
+
+
+class RequestProfilerMiddleware:
+    """
+    Perfila con cProfile una muestra de las peticiones o las que traen el encabezado
+    firmado, y guarda las lentas en el buffer de history.profiler
+    """
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.config = get_profiler_config()
+        self.header = 'HTTP_' + self.config['HEADER'].upper().replace('-', '_')
+
+    def __call__(self, request):
+        if not self.config['ENABLED']:
+            return self.get_response(request)
+
+        forced = self.is_forced(request)
+        if not forced and random.random() >= self.config['SAMPLE_RATE']:
+            return self.get_response(request)
+
+        profile = start_profile()
+        if profile is None:
+            return self.get_response(request)
+
+        recorder = QueryRecorder()
+        start = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(recorder))
+                response = self.get_response(request)
+        finally:
+            profile.disable()
+        duration = time.perf_counter() - start
+
+        if forced or duration * 1000 >= self.config['SLOW_REQUEST_MS']:
+            entry = build_entry(request, response, duration, profile, recorder.queries, self.config, forced)
+            entry_id = get_profile_store(self.config).save(entry)
+            if forced:
+                response['X-Profile-Id'] = entry_id
+        return response
+
+    def is_forced(self, request):
+        token = request.META.get(self.header)
+        return bool(token) and is_valid_profile_token(token, self.config['TOKEN_MAX_AGE'])
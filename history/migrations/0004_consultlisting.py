@@ -0,0 +1,80 @@
+# Generated by Django 4.2.16 on 2026-10-19 05:05
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+# Copia fija de history.listing a la fecha de esta migración: las migraciones no
+# importan el código actual, que puede cambiar con los modelos
+LISTING_SOURCE_FIELDS = (
+    'id', 'patient_id', 'doctor_id', 'date', 'consult_type', 'reason',
+    'patient__name', 'patient__last_name', 'patient__dni', 'doctor__specialty',
+    'doctor__user__first_name', 'doctor__user__last_name',
+    'diagnosis__icd_code', 'treatment__follow_up_date',
+)
+BATCH_SIZE = 2000
+
+
+def fill_consult_listing(apps, schema_editor):
+    Consult = apps.get_model('history', 'Consult')
+    ConsultListing = apps.get_model('history', 'ConsultListing')
+    last_id = 0
+    while True:
+        rows = list(Consult.objects.filter(id__gt=last_id).order_by('id').values(*LISTING_SOURCE_FIELDS)[:BATCH_SIZE])
+        if not rows:
+            return
+        ConsultListing.objects.bulk_create([
+            ConsultListing(
+                consult_id=row['id'],
+                patient_id=row['patient_id'],
+                doctor_id=row['doctor_id'],
+                date=row['date'],
+                consult_type=row['consult_type'],
+                reason=row['reason'],
+                patient_name=row['patient__name'],
+                patient_last_name=row['patient__last_name'],
+                patient_dni=row['patient__dni'],
+                doctor_name=f"{row['doctor__user__first_name']} {row['doctor__user__last_name']}".strip(),
+                doctor_specialty=row['doctor__specialty'],
+                icd_code=row['diagnosis__icd_code'] or '',
+                follow_up_date=row['treatment__follow_up_date'],
+            )
+            for row in rows
+        ])
+        last_id = rows[-1]['id']
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('history', '0003_auto_20250923_1747'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ConsultListing',
+            fields=[
+                ('consult', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='listing', serialize=False, to='history.consult', verbose_name='Consulta')),
+                ('date', models.DateTimeField(verbose_name='Fecha y Hora')),
+                ('consult_type', models.CharField(choices=[('FIRST', 'Primera Consulta'), ('FOLLOW', 'Consulta de Seguimiento'), ('EMERGENCY', 'Emergencia'), ('ROUTINE', 'Consulta de Rutina')], max_length=10, verbose_name='Tipo de Consulta')),
+                ('reason', models.TextField(verbose_name='Motivo de Consulta')),
+                ('patient_name', models.CharField(max_length=100, verbose_name='Nombre del Paciente')),
+                ('patient_last_name', models.CharField(max_length=100, verbose_name='Apellido del Paciente')),
+                ('patient_dni', models.CharField(max_length=20, verbose_name='DNI')),
+                ('doctor_name', models.CharField(max_length=301, verbose_name='Doctor')),
+                ('doctor_specialty', models.CharField(choices=[('GP', 'Medicina General'), ('CARD', 'Cardiología'), ('DERM', 'Dermatología'), ('NEURO', 'Neurología'), ('PED', 'Pediatría'), ('GYN', 'Ginecología'), ('ORTH', 'Ortopedia'), ('PSYCH', 'Psiquiatría'), ('OTHER', 'Otra')], max_length=10, verbose_name='Especialidad')),
+                ('icd_code', models.CharField(blank=True, default='', max_length=10, verbose_name='Código ICD-10')),
+                ('follow_up_date', models.DateField(blank=True, null=True, verbose_name='Fecha de Seguimiento')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('doctor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='history.doctor', verbose_name='Doctor')),
+                ('patient', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='history.person', verbose_name='Paciente')),
+            ],
+            options={
+                'verbose_name': 'Listado de Consulta',
+                'verbose_name_plural': 'Listado de Consultas',
+                'ordering': ['-date'],
+                'indexes': [models.Index(fields=['-date'], name='listing_date_idx'), models.Index(fields=['consult_type', '-date'], name='listing_type_date_idx'), models.Index(fields=['doctor', '-date'], name='listing_doctor_date_idx'), models.Index(fields=['patient', '-date'], name='listing_patient_date_idx'), models.Index(fields=['patient_dni'], name='listing_dni_idx')],
+            },
+        ),
+        migrations.RunPython(fill_consult_listing, migrations.RunPython.noop),
+    ]
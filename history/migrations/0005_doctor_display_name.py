@@ -0,0 +1,43 @@
+# Generated by Django 4.2.16 on 2026-10-19 05:14
+
+from django.db import migrations, models
+
+
+def fill_doctor_names(apps, schema_editor):
+    # Copia de Doctor.names_for: las migraciones no importan los modelos actuales
+    Doctor = apps.get_model('history', 'Doctor')
+    doctors = list(Doctor.objects.select_related('user'))
+    for doctor in doctors:
+        first_name, last_name = doctor.user.first_name, doctor.user.last_name
+        doctor.display_name = f'{first_name} {last_name}'.strip()
+        doctor.sort_name = f'{last_name}\t{first_name}'.casefold()
+    Doctor.objects.bulk_update(doctors, ['display_name', 'sort_name'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('history', '0004_consultlisting'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='doctor',
+            options={'ordering': ['sort_name'], 'verbose_name': 'Doctor', 'verbose_name_plural': 'Doctores'},
+        ),
+        migrations.AddField(
+            model_name='doctor',
+            name='display_name',
+            field=models.CharField(blank=True, editable=False, max_length=301, verbose_name='Nombre'),
+        ),
+        migrations.AddField(
+            model_name='doctor',
+            name='sort_name',
+            field=models.CharField(blank=True, editable=False, max_length=301),
+        ),
+        migrations.AddIndex(
+            model_name='doctor',
+            index=models.Index(fields=['sort_name'], name='doctor_sort_name_idx'),
+        ),
+        migrations.RunPython(fill_doctor_names, migrations.RunPython.noop),
+    ]
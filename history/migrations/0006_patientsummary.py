@@ -0,0 +1,65 @@
+# Generated by Django 4.2.16 on 2026-10-19 05:19
+
+from django.db import migrations, models
+from django.db.models import Count, Max, Min
+from django.utils import timezone
+import django.db.models.deletion
+
+BATCH_SIZE = 2000
+
+
+def fill_patient_summaries(apps, schema_editor):
+    # Copia fija de history.summaries.compute_summaries a la fecha de esta migración:
+    # las migraciones no importan el código actual, que puede cambiar con los modelos
+    Consult = apps.get_model('history', 'Consult')
+    Treatment = apps.get_model('history', 'Treatment')
+    PatientSummary = apps.get_model('history', 'PatientSummary')
+    patient_ids = list(Consult.objects.values_list('patient_id', flat=True).distinct().order_by('patient_id'))
+    for start in range(0, len(patient_ids), BATCH_SIZE):
+        batch = patient_ids[start:start + BATCH_SIZE]
+        rows = (
+            Consult.objects.filter(patient_id__in=batch)
+            .values('patient_id')
+            .annotate(consult_count=Count('id'), first_consult_date=Min('date'), last_consult_date=Max('date'))
+            .order_by()
+        )
+        summaries = {row.pop('patient_id'): {**row, 'next_follow_up_date': None} for row in rows}
+        follow_ups = Treatment.objects.filter(
+            consult__patient_id__in=batch, follow_up_date__isnull=False
+        ).values_list('consult__patient_id', 'follow_up_date')
+        for patient_id, follow_up in follow_ups:
+            summary = summaries[patient_id]
+            pending = summary['next_follow_up_date']
+            if follow_up > timezone.localdate(summary['last_consult_date']) and (pending is None or follow_up < pending):
+                summary['next_follow_up_date'] = follow_up
+        # La tabla se acaba de crear: alcanza con INSERT, sin upsert
+        PatientSummary.objects.bulk_create(
+            [PatientSummary(patient_id=patient_id, **values) for patient_id, values in summaries.items()]
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('history', '0005_doctor_display_name'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PatientSummary',
+            fields=[
+                ('patient', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='summary', serialize=False, to='history.person', verbose_name='Paciente')),
+                ('consult_count', models.PositiveIntegerField(default=0, verbose_name='Consultas')),
+                ('first_consult_date', models.DateTimeField(blank=True, null=True, verbose_name='Primera Consulta')),
+                ('last_consult_date', models.DateTimeField(blank=True, null=True, verbose_name='Última Consulta')),
+                ('next_follow_up_date', models.DateField(blank=True, null=True, verbose_name='Próximo Seguimiento')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Resumen de Paciente',
+                'verbose_name_plural': 'Resúmenes de Pacientes',
+                'indexes': [models.Index(fields=['last_consult_date'], name='summary_last_consult_idx'), models.Index(fields=['next_follow_up_date'], name='summary_follow_up_idx'), models.Index(fields=['consult_count'], name='summary_consult_count_idx')],
+            },
+        ),
+        migrations.RunPython(fill_patient_summaries, migrations.RunPython.noop),
+    ]
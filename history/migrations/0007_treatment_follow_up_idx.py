@@ -0,0 +1,17 @@
+# Generated by Django 4.2.16 on 2026-10-19 05:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('history', '0006_patientsummary'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='treatment',
+            index=models.Index(condition=models.Q(('follow_up_date__isnull', False)), fields=['follow_up_date'], name='treatment_follow_up_idx'),
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 4.2.16 on 2026-10-19 05:30
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('history', '0007_treatment_follow_up_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FollowUpReminder',
+            fields=[
+                ('id', models.AutoField(primary_key=True, serialize=False)),
+                ('follow_up_date', models.DateField(verbose_name='Fecha de Seguimiento')),
+                ('email', models.EmailField(max_length=254, verbose_name='Email')),
+                ('status', models.CharField(choices=[('PENDING', 'Pendiente'), ('SENDING', 'Enviando'), ('SENT', 'Enviado'), ('FAILED', 'Fallido')], default='PENDING', max_length=10, verbose_name='Estado')),
+                ('attempts', models.PositiveSmallIntegerField(default=0, verbose_name='Intentos')),
+                ('next_attempt_at', models.DateTimeField(blank=True, null=True, verbose_name='Próximo Intento')),
+                ('last_error', models.TextField(blank=True, default='', verbose_name='Último Error')),
+                ('sent_at', models.DateTimeField(blank=True, null=True, verbose_name='Enviado')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('treatment', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='reminders', to='history.treatment', verbose_name='Tratamiento')),
+            ],
+            options={
+                'verbose_name': 'Recordatorio de Seguimiento',
+                'verbose_name_plural': 'Recordatorios de Seguimiento',
+                'ordering': ['follow_up_date', 'id'],
+                'indexes': [models.Index(fields=['status', 'follow_up_date'], name='reminder_status_date_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='followupreminder',
+            constraint=models.UniqueConstraint(fields=('treatment', 'follow_up_date'), name='unique_reminder_per_follow_up'),
+        ),
+    ]
@@ -0,0 +1,171 @@
+# Índice de búsqueda de texto de las consultas (history.search)
+#
+# El SQL es una copia fija de history.search a la fecha de esta migración: un cambio
+# posterior en las columnas, los pesos o los triggers va en una migración nueva y no
+# cambia lo que crea esta. history.search.install_search_index queda para el comando
+# rebuild_consult_search
+
+from django.db import migrations
+
+# ========== PostgreSQL ==========
+
+POSTGRES_DOCUMENT = """
+    setweight(to_tsvector('spanish', coalesce(c.reason, '')), 'A') ||
+    setweight(to_tsvector('spanish', coalesce(c.symptoms, '')), 'B') ||
+    setweight(to_tsvector('spanish', coalesce(d.description, '') || ' ' || coalesce(d.icd_code, '')), 'A') ||
+    setweight(to_tsvector('spanish', coalesce(t.description, '') || ' ' || coalesce(t.medications, '')), 'C')
+"""
+
+POSTGRES_SOURCE = """
+    FROM history_consult c
+    LEFT JOIN history_diagnosis d ON d.consult_id = c.id
+    LEFT JOIN history_treatment t ON t.consult_id = c.id
+"""
+
+POSTGRES_INSTALL = [
+    """
+    CREATE TABLE IF NOT EXISTS history_consultsearch (
+        consult_id integer PRIMARY KEY REFERENCES history_consult (id) ON DELETE CASCADE,
+        document tsvector NOT NULL
+    )
+    """,
+    'CREATE INDEX IF NOT EXISTS history_consultsearch_document_idx ON history_consultsearch USING GIN (document)',
+    f"""
+    CREATE OR REPLACE FUNCTION history_consultsearch_refresh(target integer) RETURNS void AS $$
+    BEGIN
+        INSERT INTO history_consultsearch (consult_id, document)
+        SELECT c.id, {POSTGRES_DOCUMENT} {POSTGRES_SOURCE}
+        WHERE c.id = target
+        ON CONFLICT (consult_id) DO UPDATE SET document = EXCLUDED.document;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE OR REPLACE FUNCTION history_consultsearch_consult_trigger() RETURNS trigger AS $$
+    BEGIN
+        PERFORM history_consultsearch_refresh(NEW.id);
+        RETURN NULL;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE OR REPLACE FUNCTION history_consultsearch_child_trigger() RETURNS trigger AS $$
+    BEGIN
+        IF TG_OP IN ('UPDATE', 'DELETE') THEN
+            PERFORM history_consultsearch_refresh(OLD.consult_id);
+        END IF;
+        IF TG_OP IN ('INSERT', 'UPDATE') THEN
+            PERFORM history_consultsearch_refresh(NEW.consult_id);
+        END IF;
+        RETURN NULL;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    'DROP TRIGGER IF EXISTS history_consultsearch_consult ON history_consult',
+    """
+    CREATE TRIGGER history_consultsearch_consult
+    AFTER INSERT OR UPDATE OF reason, symptoms ON history_consult
+    FOR EACH ROW EXECUTE PROCEDURE history_consultsearch_consult_trigger()
+    """,
+    'DROP TRIGGER IF EXISTS history_consultsearch_diagnosis ON history_diagnosis',
+    """
+    CREATE TRIGGER history_consultsearch_diagnosis
+    AFTER INSERT OR UPDATE OR DELETE ON history_diagnosis
+    FOR EACH ROW EXECUTE PROCEDURE history_consultsearch_child_trigger()
+    """,
+    'DROP TRIGGER IF EXISTS history_consultsearch_treatment ON history_treatment',
+    """
+    CREATE TRIGGER history_consultsearch_treatment
+    AFTER INSERT OR UPDATE OR DELETE ON history_treatment
+    FOR EACH ROW EXECUTE PROCEDURE history_consultsearch_child_trigger()
+    """,
+    'TRUNCATE history_consultsearch',
+    f'INSERT INTO history_consultsearch (consult_id, document) SELECT c.id, {POSTGRES_DOCUMENT} {POSTGRES_SOURCE}',
+]
+
+POSTGRES_UNINSTALL = [
+    'DROP TRIGGER IF EXISTS history_consultsearch_consult ON history_consult',
+    'DROP TRIGGER IF EXISTS history_consultsearch_diagnosis ON history_diagnosis',
+    'DROP TRIGGER IF EXISTS history_consultsearch_treatment ON history_treatment',
+    'DROP FUNCTION IF EXISTS history_consultsearch_consult_trigger()',
+    'DROP FUNCTION IF EXISTS history_consultsearch_child_trigger()',
+    'DROP FUNCTION IF EXISTS history_consultsearch_refresh(integer)',
+    'DROP TABLE IF EXISTS history_consultsearch',
+]
+
+# ========== SQLite ==========
+
+SQLITE_ROW = """
+    SELECT c.id, c.reason, c.symptoms,
+           coalesce(d.description, '') || ' ' || coalesce(d.icd_code, ''),
+           coalesce(t.description, '') || ' ' || coalesce(t.medications, '')
+    FROM history_consult c
+    LEFT JOIN history_diagnosis d ON d.consult_id = c.id
+    LEFT JOIN history_treatment t ON t.consult_id = c.id
+"""
+
+SQLITE_INSERT = 'INSERT INTO history_consult_fts (rowid, reason, symptoms, diagnosis, treatment)'
+
+
+def sqlite_refresh(target):
+    return (
+        f'DELETE FROM history_consult_fts WHERE rowid = {target}; '
+        f'{SQLITE_INSERT} {SQLITE_ROW} WHERE c.id = {target};'
+    )
+
+
+SQLITE_TRIGGERS = {
+    'history_consult_fts_ai': ('AFTER INSERT ON history_consult', sqlite_refresh('NEW.id')),
+    'history_consult_fts_au': ('AFTER UPDATE OF reason, symptoms ON history_consult', sqlite_refresh('NEW.id')),
+    'history_consult_fts_ad': ('AFTER DELETE ON history_consult',
+                               'DELETE FROM history_consult_fts WHERE rowid = OLD.id;'),
+    'history_consult_fts_diagnosis_ai': ('AFTER INSERT ON history_diagnosis', sqlite_refresh('NEW.consult_id')),
+    'history_consult_fts_diagnosis_au': ('AFTER UPDATE ON history_diagnosis',
+                                         sqlite_refresh('OLD.consult_id') + sqlite_refresh('NEW.consult_id')),
+    'history_consult_fts_diagnosis_ad': ('AFTER DELETE ON history_diagnosis', sqlite_refresh('OLD.consult_id')),
+    'history_consult_fts_treatment_ai': ('AFTER INSERT ON history_treatment', sqlite_refresh('NEW.consult_id')),
+    'history_consult_fts_treatment_au': ('AFTER UPDATE ON history_treatment',
+                                         sqlite_refresh('OLD.consult_id') + sqlite_refresh('NEW.consult_id')),
+    'history_consult_fts_treatment_ad': ('AFTER DELETE ON history_treatment', sqlite_refresh('OLD.consult_id')),
+}
+
+SQLITE_INSTALL = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS history_consult_fts USING fts5(
+        reason, symptoms, diagnosis, treatment,
+        tokenize = 'unicode61 remove_diacritics 2'
+    )
+    """,
+] + [
+    f'CREATE TRIGGER IF NOT EXISTS {name} {event} FOR EACH ROW BEGIN {body} END'
+    for name, (event, body) in SQLITE_TRIGGERS.items()
+] + [
+    'DELETE FROM history_consult_fts',
+    f'{SQLITE_INSERT} {SQLITE_ROW}',
+]
+
+SQLITE_UNINSTALL = [
+    f'DROP TRIGGER IF EXISTS {name}' for name in SQLITE_TRIGGERS
+] + ['DROP TABLE IF EXISTS history_consult_fts']
+
+# Las demás bases no tienen búsqueda de texto: la migración no hace nada
+INSTALL = {'postgresql': POSTGRES_INSTALL, 'sqlite': SQLITE_INSTALL}
+UNINSTALL = {'postgresql': POSTGRES_UNINSTALL, 'sqlite': SQLITE_UNINSTALL}
+
+
+def run_statements(statements_by_vendor):
+    def run(apps, schema_editor):
+        for statement in statements_by_vendor.get(schema_editor.connection.vendor, []):
+            schema_editor.execute(statement, params=None)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('history', '0008_followupreminder'),
+    ]
+
+    operations = [
+        migrations.RunPython(run_statements(INSTALL), run_statements(UNINSTALL)),
+    ]
@@ -110,20 +110,59 @@ class Doctor(models.Model):
         verbose_name="Teléfono"
     )
     is_active = models.BooleanField(default=True, verbose_name="Activo")
+    # Copias del nombre del usuario: ordenar y mostrar doctores sin JOIN con auth_user
+    display_name = models.CharField(max_length=301, blank=True, editable=False, verbose_name="Nombre")
+    sort_name = models.CharField(max_length=301, blank=True, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         verbose_name = "Doctor"
         verbose_name_plural = "Doctores"
-        ordering = ['user__last_name', 'user__first_name']
+        ordering = ['sort_name']
+        indexes = [
+            models.Index(fields=['sort_name'], name='doctor_sort_name_idx'),
+        ]
 
     def __str__(self) -> str:
-        return f"Dr. {self.user.get_full_name()} - {self.get_specialty_display()}"
+        return f"Dr. {self.display_name} - {self.get_specialty_display()}"
     
     @property
     def full_name(self):
-        return self.user.get_full_name()
+        return self.display_name
+
+    @staticmethod
+    def names_for(first_name, last_name):
+        """(display_name, sort_name) para el nombre y apellido del usuario"""
+        display_name = f'{first_name} {last_name}'.strip()  # igual que User.get_full_name()
+        sort_name = f'{last_name}\t{first_name}'.casefold()
+        return display_name, sort_name
+
+    def sync_names(self):
+        """Copia el nombre del usuario; devuelve True si cambió"""
+        names = self.names_for(self.user.first_name, self.user.last_name)
+        if (self.display_name, self.sort_name) == names:
+            return False
+        self.display_name, self.sort_name = names
+        return True
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        if self.sync_names() and update_fields is not None:
+            kwargs['update_fields'] = {*update_fields, 'display_name', 'sort_name'}
+        super().save(*args, **kwargs)
+
+
+def sync_doctor_names(sender, instance, created=False, raw=False, update_fields=None, **kwargs):
+    """post_save de User: lleva el nombre nuevo al perfil de doctor"""
+    # El login guarda solo last_login: no cambia el nombre
+    if raw or created or (update_fields and not {'first_name', 'last_name'} & set(update_fields)):
+        return
+    for doctor in Doctor.objects.filter(user=instance):
+        doctor.user = instance
+        if doctor.sync_names():
+            # save() y no update(): el listado y la caché de fragmentos escuchan post_save de Doctor
+            doctor.save(update_fields=['display_name', 'sort_name', 'updated_at'])
 
 class Consult(models.Model):
     CONSULT_TYPE_CHOICES = [
@@ -180,6 +219,13 @@ class Treatment(models.Model):
     class Meta:
         verbose_name = "Tratamiento"
         verbose_name_plural = "Tratamientos"
+        indexes = [
+            # Agenda de seguimientos: solo los tratamientos con fecha de seguimiento
+            models.Index(
+                fields=['follow_up_date'], name='treatment_follow_up_idx',
+                condition=models.Q(follow_up_date__isnull=False),
+            ),
+        ]
 
     def __str__(self) -> str:
         return f"Tratamiento para consulta {self.consult.id}"
@@ -257,4 +303,113 @@ class AuditLog(models.Model):
 
     def __str__(self):
         return f"{self.user} - {self.get_action_display()} - {self.model_name} - {self.created_at}"
-    
+
+class ConsultListing(models.Model):
+    """
+    Fila desnormalizada del listado de consultas: nombres, DNI, especialidad, código
+    ICD y fecha de seguimiento sin el JOIN con paciente, doctor, usuario, diagnóstico
+    y tratamiento. La mantiene history.listing con señales
+    """
+    consult = models.OneToOneField(
+        Consult, on_delete=models.CASCADE, primary_key=True, related_name='listing', verbose_name="Consulta"
+    )
+    patient = models.ForeignKey(Person, on_delete=models.CASCADE, related_name='+', verbose_name="Paciente")
+    doctor = models.ForeignKey(Doctor, on_delete=models.CASCADE, related_name='+', verbose_name="Doctor")
+    date = models.DateTimeField(verbose_name="Fecha y Hora")
+    consult_type = models.CharField(max_length=10, choices=Consult.CONSULT_TYPE_CHOICES, verbose_name="Tipo de Consulta")
+    reason = models.TextField(verbose_name="Motivo de Consulta")
+    patient_name = models.CharField(max_length=100, verbose_name="Nombre del Paciente")
+    patient_last_name = models.CharField(max_length=100, verbose_name="Apellido del Paciente")
+    patient_dni = models.CharField(max_length=20, verbose_name="DNI")
+    doctor_name = models.CharField(max_length=301, verbose_name="Doctor")
+    doctor_specialty = models.CharField(max_length=10, choices=Doctor.SPECIALTY_CHOICES, verbose_name="Especialidad")
+    icd_code = models.CharField(max_length=10, blank=True, default='', verbose_name="Código ICD-10")
+    follow_up_date = models.DateField(blank=True, null=True, verbose_name="Fecha de Seguimiento")
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Listado de Consulta"
+        verbose_name_plural = "Listado de Consultas"
+        ordering = ['-date']
+        indexes = [
+            # Listado general y filtros de fecha, tipo, doctor y paciente
+            models.Index(fields=['-date'], name='listing_date_idx'),
+            models.Index(fields=['consult_type', '-date'], name='listing_type_date_idx'),
+            models.Index(fields=['doctor', '-date'], name='listing_doctor_date_idx'),
+            models.Index(fields=['patient', '-date'], name='listing_patient_date_idx'),
+            models.Index(fields=['patient_dni'], name='listing_dni_idx'),
+        ]
+
+    def __str__(self) -> str:
+        return f"Consulta {self.consult_id} - {self.patient_name} {self.patient_last_name} con Dr. {self.doctor_name}"
+
+
+class PatientSummary(models.Model):
+    """
+    Resumen de consultas por paciente para ordenar y filtrar el listado de pacientes
+    sin agregar sobre Consult y Treatment. Lo mantiene history.summaries con señales;
+    solo tienen fila los pacientes con consultas
+    """
+    patient = models.OneToOneField(
+        Person, on_delete=models.CASCADE, primary_key=True, related_name='summary', verbose_name="Paciente"
+    )
+    consult_count = models.PositiveIntegerField(default=0, verbose_name="Consultas")
+    first_consult_date = models.DateTimeField(null=True, blank=True, verbose_name="Primera Consulta")
+    last_consult_date = models.DateTimeField(null=True, blank=True, verbose_name="Última Consulta")
+    # Primer seguimiento posterior a la última consulta (pendiente de visita)
+    next_follow_up_date = models.DateField(null=True, blank=True, verbose_name="Próximo Seguimiento")
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Resumen de Paciente"
+        verbose_name_plural = "Resúmenes de Pacientes"
+        indexes = [
+            models.Index(fields=['last_consult_date'], name='summary_last_consult_idx'),
+            models.Index(fields=['next_follow_up_date'], name='summary_follow_up_idx'),
+            models.Index(fields=['consult_count'], name='summary_consult_count_idx'),
+        ]
+
+    def __str__(self) -> str:
+        return f"Resumen de {self.patient_id}: {self.consult_count} consultas"
+
+
+class FollowUpReminder(models.Model):
+    """
+    Registro de cada recordatorio de seguimiento por email (history.reminders). Es
+    único por tratamiento y fecha de seguimiento, así que repetir el envío no manda
+    dos veces el mismo recordatorio; si cambia la fecha corresponde uno nuevo
+    """
+    STATUS_CHOICES = [
+        ('PENDING', 'Pendiente'),
+        ('SENDING', 'Enviando'),
+        ('SENT', 'Enviado'),
+        ('FAILED', 'Fallido'),
+    ]
+
+    id = models.AutoField(primary_key=True)
+    treatment = models.ForeignKey(
+        Treatment, on_delete=models.CASCADE, related_name='reminders', verbose_name="Tratamiento"
+    )
+    follow_up_date = models.DateField(verbose_name="Fecha de Seguimiento")
+    email = models.EmailField(verbose_name="Email")
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='PENDING', verbose_name="Estado")
+    attempts = models.PositiveSmallIntegerField(default=0, verbose_name="Intentos")
+    next_attempt_at = models.DateTimeField(null=True, blank=True, verbose_name="Próximo Intento")
+    last_error = models.TextField(blank=True, default='', verbose_name="Último Error")
+    sent_at = models.DateTimeField(null=True, blank=True, verbose_name="Enviado")
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Recordatorio de Seguimiento"
+        verbose_name_plural = "Recordatorios de Seguimiento"
+        ordering = ['follow_up_date', 'id']
+        constraints = [
+            models.UniqueConstraint(fields=['treatment', 'follow_up_date'], name='unique_reminder_per_follow_up'),
+        ]
+        indexes = [
+            models.Index(fields=['status', 'follow_up_date'], name='reminder_status_date_idx'),
+        ]
+
+    def __str__(self):
+        return f"Recordatorio {self.follow_up_date} para {self.email} - {self.get_status_display()}"
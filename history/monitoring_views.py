@@ -0,0 +1,85 @@
+"""
+Vistas internas de monitoreo (no requieren sesión)
+"""
+from django.conf import settings
+from django.contrib import admin
+from django.core.exceptions import PermissionDenied
+from django.http import Http404, HttpResponse, HttpResponseForbidden, JsonResponse
+from django.shortcuts import render
+from django.utils.crypto import constant_time_compare
+from django.views.decorators.cache import never_cache
+from django.views.decorators.http import require_GET
+from .health import get_readiness
+from .metrics import render_metrics
+from .profiler import get_profile_store, get_profiler_config, make_profile_token
+
+
+def is_internal_request(request):
+    """
+    La petición viene de una IP de METRICS_ALLOWED_IPS o trae el token
+    de METRICS_TOKEN en el encabezado Authorization: Bearer <token>
+    """
+    token = getattr(settings, 'METRICS_TOKEN', '')
+    if token:
+        header = request.META.get('HTTP_AUTHORIZATION', '')
+        if header.startswith('Bearer ') and constant_time_compare(header[7:], token):
+            return True
+    allowed_ips = getattr(settings, 'METRICS_ALLOWED_IPS', ['127.0.0.1', '::1'])
+    return request.META.get('REMOTE_ADDR') in allowed_ips
+
+
+@require_GET
+def metrics_view(request):
+    """Métricas de la aplicación en formato de texto de Prometheus"""
+    if not is_internal_request(request):
+        return HttpResponseForbidden('Acceso restringido')
+    content, content_type = render_metrics()
+    return HttpResponse(content, content_type=content_type)
+
+
+@never_cache
+@require_GET
+def healthz(request):
+    """Liveness: el proceso responde; no toca la base de datos ni la caché"""
+    return JsonResponse({'status': 'ok'})
+
+
+@never_cache
+@require_GET
+def readyz(request):
+    """Readiness: base de datos, migraciones, caché, disco y memoria (ver history.health)"""
+    ok, checks = get_readiness()
+    return JsonResponse(
+        {'status': 'ok' if ok else 'error', 'checks': checks},
+        status=200 if ok else 503
+    )
+
+
+def profile_list(request):
+    """Perfiles guardados por RequestProfilerMiddleware (solo superusuarios)"""
+    if not request.user.is_superuser:
+        raise PermissionDenied
+    config = get_profiler_config()
+    context = {
+        **admin.site.each_context(request),
+        'title': 'Perfiles de peticiones lentas',
+        'entries': get_profile_store(config).list(),
+        'config': config,
+        'profile_header': config['HEADER'],
+        'profile_token': make_profile_token(),
+    }
+    return render(request, 'admin/history/profiles/list.html', context)
+
+
+def profile_detail(request, entry_id):
+    if not request.user.is_superuser:
+        raise PermissionDenied
+    entry = get_profile_store().get(entry_id)
+    if entry is None:
+        raise Http404('Perfil no encontrado')
+    context = {
+        **admin.site.each_context(request),
+        'title': f"{entry['method']} {entry['path']}",
+        'entry': entry,
+    }
+    return render(request, 'admin/history/profiles/detail.html', context)
@@ -0,0 +1,198 @@
+"""
+Perfilado de peticiones lentas bajo demanda
+
+RequestProfilerMiddleware (history.middleware) perfila con cProfile una muestra de
+las peticiones (PROFILER['SAMPLE_RATE']) o las que traen el encabezado firmado
+(PROFILER['HEADER']). Se guardan las que superan PROFILER['SLOW_REQUEST_MS'] (o todas
+las pedidas con el encabezado) en un buffer circular en disco: estadísticas de
+cProfile, lista de consultas SQL (sin parámetros) y EXPLAIN de las más lentas.
+Los administradores lo consultan en /admin/profiles/
+"""
+import cProfile
+import io
+import json
+import os
+import pstats
+import re
+import time
+from django.conf import settings
+from django.core import signing
+from django.db import DatabaseError, connections
+from django.utils import timezone
+
+PROFILER_DEFAULTS = {
+    'ENABLED': True,
+    'SAMPLE_RATE': 0.0,         # fracción de peticiones perfiladas sin encabezado
+    'SLOW_REQUEST_MS': 1000,    # solo se guardan las muestras más lentas que esto
+    'HEADER': 'X-Profile',      # encabezado con el token firmado (ver make_profile_token)
+    'TOKEN_MAX_AGE': 3600,      # validez del token en segundos
+    'DIRECTORY': None,          # por defecto BASE_DIR/logs/profiles
+    'MAX_ENTRIES': 100,         # tamaño del buffer circular
+    'MAX_QUERIES': 200,         # consultas guardadas por perfil
+    'EXPLAIN_SLOWEST': 3,       # consultas SELECT más lentas con EXPLAIN
+    'STATS_LINES': 40,          # funciones listadas en el resumen de cProfile
+}
+
+TOKEN_SALT = 'history.profiler'
+TOKEN_VALUE = 'profile'
+ENTRY_ID_RE = re.compile(r'^\d+-\d+$')
+
+
+def get_profiler_config():
+    config = {**PROFILER_DEFAULTS, **getattr(settings, 'PROFILER', {})}
+    if not config['DIRECTORY']:
+        config['DIRECTORY'] = os.path.join(settings.BASE_DIR, 'logs', 'profiles')
+    return config
+
+
+def make_profile_token():
+    """Token para el encabezado de perfilado (válido TOKEN_MAX_AGE segundos)"""
+    return signing.TimestampSigner(salt=TOKEN_SALT).sign(TOKEN_VALUE)
+
+
+def is_valid_profile_token(token, max_age):
+    try:
+        return signing.TimestampSigner(salt=TOKEN_SALT).unsign(token, max_age=max_age) == TOKEN_VALUE
+    except signing.BadSignature:
+        return False
+
+
+class QueryRecorder:
+    """Execute wrapper que guarda cada consulta con su duración"""
+
+    def __init__(self):
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append({
+                'alias': context['connection'].alias,
+                'sql': sql,
+                'params': params,
+                'many': many,
+                'duration_ms': (time.perf_counter() - start) * 1000,
+            })
+
+
+def explain_queries(queries, limit):
+    """EXPLAIN de las consultas SELECT más lentas (se ejecutan con sus parámetros)"""
+    candidates = [
+        query for query in queries
+        if not query['many'] and query['sql'].lstrip().upper().startswith('SELECT')
+    ]
+    candidates.sort(key=lambda query: query['duration_ms'], reverse=True)
+
+    plans = []
+    for query in candidates[:limit]:
+        connection = connections[query['alias']]
+        prefix = connection.ops.explain_query_prefix()
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute(f"{prefix} {query['sql']}", query['params'])
+                plan = '\n'.join(' '.join(str(value) for value in row) for row in cursor.fetchall())
+        except DatabaseError as exc:
+            plan = f'No se pudo obtener el plan: {exc}'
+        plans.append({'sql': query['sql'], 'duration_ms': round(query['duration_ms'], 2), 'plan': plan})
+    return plans
+
+
+def format_stats(profile, lines):
+    stream = io.StringIO()
+    stats = pstats.Stats(profile, stream=stream)
+    stats.strip_dirs().sort_stats('cumulative').print_stats(lines)
+    return stream.getvalue()
+
+
+def build_entry(request, response, duration, profile, queries, config, forced):
+    match = getattr(request, 'resolver_match', None)
+    user = getattr(request, 'user', None)
+    return {
+        'created_at': timezone.now().isoformat(timespec='seconds'),
+        'method': request.method,
+        'path': request.path,
+        'view': match.view_name if match else None,
+        'status': response.status_code,
+        'user_id': user.pk if user is not None and user.is_authenticated else None,
+        'forced': forced,
+        'duration_ms': round(duration * 1000, 2),
+        'query_count': len(queries),
+        'db_ms': round(sum(query['duration_ms'] for query in queries), 2),
+        # Sin parámetros: pueden contener datos de pacientes
+        'queries': [
+            {'sql': query['sql'], 'duration_ms': round(query['duration_ms'], 2)}
+            for query in queries[:config['MAX_QUERIES']]
+        ],
+        'explain': explain_queries(queries, config['EXPLAIN_SLOWEST']),
+        'stats': format_stats(profile, config['STATS_LINES']),
+    }
+
+
+class ProfileStore:
+    """Buffer circular en disco: un JSON por perfil, se borran los más viejos"""
+
+    def __init__(self, directory, max_entries):
+        self.directory = directory
+        self.max_entries = max_entries
+
+    def save(self, entry):
+        os.makedirs(self.directory, exist_ok=True)
+        entry_id = f'{time.time_ns()}-{os.getpid()}'
+        path = os.path.join(self.directory, f'{entry_id}.json')
+        tmp_path = f'{path}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as fileobj:
+            json.dump({'id': entry_id, **entry}, fileobj)
+        # rename atómico: quien lista nunca ve un archivo a medio escribir
+        os.replace(tmp_path, path)
+        self.prune()
+        return entry_id
+
+    def entry_ids(self):
+        """Ids de más nuevo a más viejo"""
+        try:
+            names = os.listdir(self.directory)
+        except FileNotFoundError:
+            return []
+        ids = [name[:-5] for name in names if name.endswith('.json') and ENTRY_ID_RE.match(name[:-5])]
+        return sorted(ids, key=lambda entry_id: int(entry_id.split('-')[0]), reverse=True)
+
+    def prune(self):
+        for entry_id in self.entry_ids()[self.max_entries:]:
+            try:
+                os.remove(os.path.join(self.directory, f'{entry_id}.json'))
+            except FileNotFoundError:
+                pass  # lo borró otro worker
+
+    def get(self, entry_id):
+        if not ENTRY_ID_RE.match(entry_id):
+            return None
+        try:
+            with open(os.path.join(self.directory, f'{entry_id}.json'), encoding='utf-8') as fileobj:
+                return json.load(fileobj)
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def list(self):
+        entries = []
+        for entry_id in self.entry_ids():
+            entry = self.get(entry_id)
+            if entry:
+                entries.append(entry)
+        return entries
+
+
+def get_profile_store(config=None):
+    config = config or get_profiler_config()
+    return ProfileStore(config['DIRECTORY'], config['MAX_ENTRIES'])
+
+
+def start_profile():
+    """Activa cProfile; None si ya hay otro perfilador activo en el proceso"""
+    profile = cProfile.Profile()
+    try:
+        profile.enable()
+    except ValueError:
+        return None
+    return profile
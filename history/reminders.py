@@ -0,0 +1,264 @@
+"""
+Recordatorios de seguimiento por email
+
+Busca los seguimientos pendientes de los próximos DAYS_AHEAD días (los mismos que
+muestra la agenda, history.followups) y manda a cada paciente un email armado con las
+plantillas emails/follow_up_reminder_*. Cada recordatorio queda registrado en
+FollowUpReminder (único por tratamiento y fecha), así que volver a correr el envío
+no manda dos veces el mismo.
+
+El envío va por lotes de BATCH_SIZE sobre una sola conexión SMTP abierta
+(get_connection + send_messages), a no más de RATE mensajes por segundo; cada
+mensaje va en su propio send_messages para saber cuál falló. Antes de
+mandar un lote se toman sus registros pasándolos a SENDING con un UPDATE
+condicional, para que dos procesos a la vez no manden el mismo. Si un envío falla
+por un error transitorio (conexión, 4xx) se reabre la conexión y el registro vuelve a
+intentarse en una corrida posterior, esperando RETRY_DELAY segundos duplicados en
+cada intento y hasta MAX_ATTEMPTS. Los rechazos definitivos (5xx, destinatario
+inválido) no se reintentan.
+
+Un registro que queda en SENDING (proceso cortado a mitad de lote) no se reenvía
+solo: no se sabe si el servidor lo aceptó
+"""
+import smtplib
+import time
+from datetime import timedelta
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.db.models import F, Q
+from django.template.loader import render_to_string
+from django.utils import timezone
+from .followups import compute_day_lists
+from .models import FollowUpReminder
+
+REMINDERS_DEFAULTS = {
+    'DAYS_AHEAD': 1,        # seguimientos de hoy y de los próximos N días
+    'BATCH_SIZE': 50,       # mensajes por lote (una toma de registros y una actualización)
+    'RATE': 5.0,            # mensajes por segundo; 0 sin límite
+    'MAX_ATTEMPTS': 3,
+    'RETRY_DELAY': 300,     # segundos antes del primer reintento; se duplica en cada uno
+    'CLINIC_NAME': 'System Medic',
+}
+
+TEMPLATE_PREFIX = 'emails/follow_up_reminder'
+
+
+def get_reminders_config():
+    return {**REMINDERS_DEFAULTS, **getattr(settings, 'REMINDERS', {})}
+
+
+class ReminderResult:
+    """Resultado de una corrida de recordatorios"""
+
+    def __init__(self):
+        self.queued = 0     # registros nuevos
+        self.sent = 0
+        self.failed = 0
+        self.skipped = 0    # tomados por otro proceso
+        self.errors = []    # (email, mensaje)
+        self.started_at = time.monotonic()
+        self.elapsed = 0.0
+
+    def finish(self):
+        self.elapsed = time.monotonic() - self.started_at
+
+
+class SMTPUnavailable(Exception):
+    """No se pudo abrir (o reabrir) la conexión SMTP"""
+
+
+def _is_permanent(error):
+    if isinstance(error, (smtplib.SMTPRecipientsRefused, smtplib.SMTPSenderRefused)):
+        return True
+    code = getattr(error, 'smtp_code', None)
+    return isinstance(code, int) and code >= 500
+
+
+class ReminderSender:
+    """
+    Encola y envía los recordatorios debidos
+
+    sender = ReminderSender(); result = sender.run()
+    """
+
+    def __init__(self, days_ahead=None, batch_size=None, rate=None, dry_run=False,
+                 connection=None, today=None, sleep=time.sleep):
+        config = get_reminders_config()
+        self.config = config
+        self.days_ahead = config['DAYS_AHEAD'] if days_ahead is None else days_ahead
+        self.batch_size = batch_size or config['BATCH_SIZE']
+        self.rate = config['RATE'] if rate is None else rate
+        self.dry_run = dry_run
+        self.connection = connection
+        self.today = today
+        self.sleep = sleep
+        self._last_send = None
+
+    # ========== Registros ==========
+
+    def due_items(self):
+        """Seguimientos pendientes de la ventana con email, por tratamiento"""
+        today = self.today or timezone.localdate()
+        lists = compute_day_lists(today, today + timedelta(days=self.days_ahead))
+        return {
+            item['treatment_id']: item
+            for items in lists.values() for item in items if item['patient_email']
+        }
+
+    def queue(self, items):
+        """Crea los registros que faltan; los existentes (ya enviados o en curso) no se tocan"""
+        existing = set(
+            FollowUpReminder.objects.filter(treatment_id__in=list(items))
+            .values_list('treatment_id', 'follow_up_date')
+        )
+        new = [
+            FollowUpReminder(treatment_id=item['treatment_id'], follow_up_date=item['follow_up_date'],
+                             email=item['patient_email'])
+            for item in items.values() if (item['treatment_id'], item['follow_up_date']) not in existing
+        ]
+        FollowUpReminder.objects.bulk_create(new, ignore_conflicts=True)
+        return len(new)
+
+    def sendable(self, items):
+        """Registros de la ventana que se pueden tomar: pendientes o fallidos con reintento vencido"""
+        now = timezone.now()
+        retry_due = Q(status='FAILED', attempts__lt=self.config['MAX_ATTEMPTS'], next_attempt_at__lte=now)
+        return FollowUpReminder.objects.filter(
+            Q(status='PENDING') | retry_due,
+            treatment_id__in=list(items),
+        ).order_by('follow_up_date', 'id')
+
+    def claim(self, reminders):
+        """Pasa a SENDING los registros que sigan disponibles; devuelve los tomados"""
+        claimed = []
+        for reminder in reminders:
+            taken = FollowUpReminder.objects.filter(pk=reminder.pk, status=reminder.status).update(
+                status='SENDING', updated_at=timezone.now()
+            )
+            if taken:
+                claimed.append(reminder)
+        return claimed
+
+    def release(self, reminders):
+        """Devuelve a su estado anterior los registros tomados que no se llegaron a mandar"""
+        for reminder in reminders:
+            FollowUpReminder.objects.filter(pk=reminder.pk, status='SENDING').update(
+                status=reminder.status, updated_at=timezone.now()
+            )
+
+    # ========== Mensajes ==========
+
+    def build_message(self, reminder, item):
+        context = {
+            'patient_name': item['patient_name'],
+            'doctor_name': item['doctor_name'],
+            'follow_up_date': reminder.follow_up_date,
+            'clinic_name': self.config['CLINIC_NAME'],
+        }
+        subject = ' '.join(render_to_string(f'{TEMPLATE_PREFIX}_subject.txt', context).split())
+        message = EmailMultiAlternatives(
+            subject=subject,
+            body=render_to_string(f'{TEMPLATE_PREFIX}.txt', context),
+            to=[reminder.email],
+        )
+        message.attach_alternative(render_to_string(f'{TEMPLATE_PREFIX}.html', context), 'text/html')
+        return message
+
+    def throttle(self):
+        if not self.rate:
+            return
+        if self._last_send is not None:
+            wait = 1.0 / self.rate - (time.monotonic() - self._last_send)
+            if wait > 0:
+                self.sleep(wait)
+        self._last_send = time.monotonic()
+
+    def open_connection(self):
+        try:
+            if self.connection is None:
+                self.connection = get_connection(fail_silently=False)
+            self.connection.open()
+        except (smtplib.SMTPException, OSError) as error:
+            raise SMTPUnavailable(str(error)) from error
+
+    def reopen_connection(self):
+        try:
+            self.connection.close()
+        except (smtplib.SMTPException, OSError):
+            pass
+        self.open_connection()
+
+    def send_batch(self, batch, items, result):
+        """Manda el lote por la conexión abierta y registra el resultado de cada mensaje"""
+        sent, failed = [], []
+        for index, reminder in enumerate(batch):
+            message = self.build_message(reminder, items[reminder.treatment_id])
+            self.throttle()
+            try:
+                self.connection.send_messages([message])
+            except (smtplib.SMTPException, OSError) as error:
+                reminder.attempts += 1
+                reminder.last_error = str(error)[:1000]
+                if _is_permanent(error):
+                    reminder.attempts = max(reminder.attempts, self.config['MAX_ATTEMPTS'])
+                    reminder.next_attempt_at = None
+                else:
+                    delay = self.config['RETRY_DELAY'] * 2 ** (reminder.attempts - 1)
+                    reminder.next_attempt_at = timezone.now() + timedelta(seconds=delay)
+                failed.append(reminder)
+                result.errors.append((reminder.email, reminder.last_error))
+                if not _is_permanent(error):
+                    try:
+                        self.reopen_connection()
+                    except SMTPUnavailable:
+                        self.record(sent, failed, result)
+                        self.release(batch[index + 1:])
+                        raise
+            else:
+                sent.append(reminder)
+        self.record(sent, failed, result)
+
+    def record(self, sent, failed, result):
+        if sent:
+            FollowUpReminder.objects.filter(pk__in=[reminder.pk for reminder in sent]).update(
+                status='SENT', sent_at=timezone.now(), attempts=F('attempts') + 1,
+                last_error='', next_attempt_at=None, updated_at=timezone.now()
+            )
+        for reminder in failed:
+            reminder.status = 'FAILED'
+            reminder.updated_at = timezone.now()
+        FollowUpReminder.objects.bulk_update(
+            failed, ['status', 'attempts', 'last_error', 'next_attempt_at', 'updated_at']
+        )
+        result.sent += len(sent)
+        result.failed += len(failed)
+
+    # ========== Corrida ==========
+
+    def run(self):
+        result = ReminderResult()
+        items = self.due_items()
+        if self.dry_run:
+            result.queued = len(items)
+            result.finish()
+            return result
+
+        result.queued = self.queue(items)
+        # Un registro de una fecha anterior del mismo tratamiento ya no corresponde
+        current = {(item['treatment_id'], item['follow_up_date']) for item in items.values()}
+        reminders = [
+            reminder for reminder in self.sendable(items)
+            if (reminder.treatment_id, reminder.follow_up_date) in current
+        ]
+        if reminders:
+            self.open_connection()
+            try:
+                for start in range(0, len(reminders), self.batch_size):
+                    batch = self.claim(reminders[start:start + self.batch_size])
+                    result.skipped += min(self.batch_size, len(reminders) - start) - len(batch)
+                    if batch:
+                        self.send_batch(batch, items, result)
+            finally:
+                self.connection.close()
+        result.finish()
+        return result
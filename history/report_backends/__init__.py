@@ -0,0 +1,6 @@
+"""
+Backends de exportación de reportes por formato
+
+Cada backend importa su librería (ReportLab, openpyxl) a nivel de módulo, por eso
+solo se cargan a través de history.reports.get_report_backend() al primer uso
+"""
@@ -0,0 +1,182 @@
+"""
+Backend de reportes en Excel (openpyxl)
+Se importa solo al generar el primer reporte Excel del proceso
+"""
+from datetime import datetime
+import openpyxl
+from openpyxl.styles import Font, Alignment, PatternFill
+from openpyxl.utils import get_column_letter
+from ..models import Person, Consult
+
+class ExcelReportBackend:
+    """Generador de reportes en Excel"""
+    
+    def patients(self, patients, title="Reporte de Pacientes"):
+        """Generar reporte de pacientes en Excel"""
+        wb = openpyxl.Workbook()
+        ws = wb.active
+        ws.title = "Pacientes"
+        
+        # Estilos
+        header_font = Font(bold=True, color="FFFFFF")
+        header_fill = PatternFill(start_color="366092", end_color="366092", fill_type="solid")
+        center_alignment = Alignment(horizontal="center", vertical="center")
+        
+        # Título
+        ws['A1'] = title
+        ws['A1'].font = Font(bold=True, size=16, color="366092")
+        ws.merge_cells('A1:F1')
+        ws['A1'].alignment = center_alignment
+        
+        # Información del reporte
+        ws['A3'] = f"Fecha de generación: {datetime.now().strftime('%d/%m/%Y %H:%M')}"
+        ws['A4'] = f"Total de pacientes: {patients.count()}"
+        
+        # Encabezados
+        headers = ['Nombre', 'Apellido', 'DNI', 'Edad', 'Teléfono', 'Email', 'Dirección']
+        for col, header in enumerate(headers, 1):
+            cell = ws.cell(row=6, column=col, value=header)
+            cell.font = header_font
+            cell.fill = header_fill
+            cell.alignment = center_alignment
+        
+        # Datos
+        row = 7
+        for patient in patients:
+            ws.cell(row=row, column=1, value=patient.name)
+            ws.cell(row=row, column=2, value=patient.last_name)
+            ws.cell(row=row, column=3, value=patient.dni)
+            ws.cell(row=row, column=4, value=patient.age)
+            ws.cell(row=row, column=5, value=patient.phone)
+            ws.cell(row=row, column=6, value=patient.email)
+            ws.cell(row=row, column=7, value=patient.address)
+            row += 1
+        
+        # Ajustar ancho de columnas
+        for column in ws.columns:
+            max_length = 0
+            column_letter = get_column_letter(column[0].column)
+            for cell in column:
+                try:
+                    if len(str(cell.value)) > max_length:
+                        max_length = len(str(cell.value))
+                except:
+                    pass
+            adjusted_width = min(max_length + 2, 50)
+            ws.column_dimensions[column_letter].width = adjusted_width
+        
+        return wb
+
+    def consults(self, consults, title="Reporte de Consultas"):
+        """Generar reporte de consultas en Excel (filas de ConsultListing)"""
+        wb = openpyxl.Workbook()
+        ws = wb.active
+        ws.title = "Consultas"
+        
+        # Estilos
+        header_font = Font(bold=True, color="FFFFFF")
+        header_fill = PatternFill(start_color="366092", end_color="366092", fill_type="solid")
+        center_alignment = Alignment(horizontal="center", vertical="center")
+        
+        # Título
+        ws['A1'] = title
+        ws['A1'].font = Font(bold=True, size=16, color="366092")
+        ws.merge_cells('A1:E1')
+        ws['A1'].alignment = center_alignment
+        
+        # Información del reporte
+        ws['A3'] = f"Fecha de generación: {datetime.now().strftime('%d/%m/%Y %H:%M')}"
+        ws['A4'] = f"Total de consultas: {consults.count()}"
+        
+        # Encabezados
+        headers = ['Fecha', 'Paciente', 'Doctor', 'Tipo', 'Motivo']
+        for col, header in enumerate(headers, 1):
+            cell = ws.cell(row=6, column=col, value=header)
+            cell.font = header_font
+            cell.fill = header_fill
+            cell.alignment = center_alignment
+        
+        # Datos
+        row = 7
+        for consult in consults:
+            ws.cell(row=row, column=1, value=consult.date.strftime('%d/%m/%Y %H:%M'))
+            ws.cell(row=row, column=2, value=f"{consult.patient_name} {consult.patient_last_name}")
+            ws.cell(row=row, column=3, value=f"Dr. {consult.doctor_name}")
+            ws.cell(row=row, column=4, value=consult.get_consult_type_display())
+            ws.cell(row=row, column=5, value=consult.reason)
+            row += 1
+        
+        # Ajustar ancho de columnas
+        for column in ws.columns:
+            max_length = 0
+            column_letter = get_column_letter(column[0].column)
+            for cell in column:
+                try:
+                    if len(str(cell.value)) > max_length:
+                        max_length = len(str(cell.value))
+                except:
+                    pass
+            adjusted_width = min(max_length + 2, 50)
+            ws.column_dimensions[column_letter].width = adjusted_width
+        
+        return wb
+
+
+    def statistics(self, stats_data, title="Estadísticas Generales"):
+        """Generar reporte de estadísticas en Excel con múltiples hojas"""
+        wb = openpyxl.Workbook()
+        
+        # Hoja 1: Resumen general
+        ws1 = wb.active
+        ws1.title = "Resumen General"
+        
+        ws1['A1'] = title
+        ws1['A1'].font = Font(bold=True, size=16)
+        
+        ws1['A3'] = "Total de Pacientes"
+        ws1['B3'] = stats_data['total_patients']
+        ws1['A4'] = "Total de Doctores"
+        ws1['B4'] = stats_data['total_doctors']
+        ws1['A5'] = "Total de Consultas"
+        ws1['B5'] = stats_data['total_consults']
+        ws1['A6'] = "Consultas este mes"
+        ws1['B6'] = stats_data['consults_this_month']
+        
+        # Hoja 2: Consultas por tipo
+        ws2 = wb.create_sheet("Consultas por Tipo")
+        ws2['A1'] = "Tipo de Consulta"
+        ws2['B1'] = "Cantidad"
+        
+        row = 2
+        for item in stats_data['consults_by_type']:
+            consult_type_display = dict(Consult.CONSULT_TYPE_CHOICES).get(item['consult_type'], item['consult_type'])
+            ws2[f'A{row}'] = consult_type_display
+            ws2[f'B{row}'] = item['count']
+            row += 1
+        
+        # Hoja 3: Pacientes por género
+        ws3 = wb.create_sheet("Pacientes por Género")
+        ws3['A1'] = "Género"
+        ws3['B1'] = "Cantidad"
+        
+        row = 2
+        for item in stats_data['patients_by_gender']:
+            gender_display = dict(Person.GENDER_CHOICES).get(item['gender'], item['gender'])
+            ws3[f'A{row}'] = gender_display
+            ws3[f'B{row}'] = item['count']
+            row += 1
+        
+        # Hoja 4: Diagnósticos por capítulo CIE-10
+        ws4 = wb.create_sheet("Diagnósticos por Capítulo")
+        ws4['A1'] = "Capítulo"
+        ws4['B1'] = "Descripción"
+        ws4['C1'] = "Cantidad"
+        
+        row = 2
+        for item in stats_data.get('diagnoses_by_chapter', []):
+            ws4[f'A{row}'] = item['key'] or '-'
+            ws4[f'B{row}'] = item['title']
+            ws4[f'C{row}'] = item['count']
+            row += 1
+        
+        return wb
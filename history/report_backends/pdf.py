@@ -0,0 +1,225 @@
+"""
+Backend de reportes en PDF (ReportLab)
+Se importa solo al generar el primer reporte PDF del proceso
+"""
+import io
+from datetime import datetime, timedelta
+from django.db.models import Count
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import A4
+from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
+from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from ..models import Person, Doctor, Consult
+
+class PDFReportBackend:
+    """Generador de reportes en PDF"""
+    
+    def __init__(self):
+        self.styles = getSampleStyleSheet()
+        self.setup_custom_styles()
+    
+    def setup_custom_styles(self):
+        """Configurar estilos personalizados para PDF"""
+        self.title_style = ParagraphStyle(
+            'CustomTitle',
+            parent=self.styles['Heading1'],
+            fontSize=16,
+            spaceAfter=30,
+            alignment=1,  # Centrado
+            textColor=colors.darkblue
+        )
+        
+        self.subtitle_style = ParagraphStyle(
+            'CustomSubtitle',
+            parent=self.styles['Heading2'],
+            fontSize=12,
+            spaceAfter=12,
+            textColor=colors.darkblue
+        )
+        
+        self.normal_style = ParagraphStyle(
+            'CustomNormal',
+            parent=self.styles['Normal'],
+            fontSize=10,
+            spaceAfter=6
+        )
+
+    def patients(self, patients, title="Reporte de Pacientes"):
+        """Generar reporte de pacientes en PDF"""
+        buffer = io.BytesIO()
+        doc = SimpleDocTemplate(buffer, pagesize=A4, rightMargin=72, leftMargin=72, topMargin=72, bottomMargin=18)
+        
+        # Contenido del documento
+        story = []
+        
+        # Título
+        story.append(Paragraph(title, self.title_style))
+        story.append(Spacer(1, 12))
+        
+        # Información del reporte
+        story.append(Paragraph(f"Fecha de generación: {datetime.now().strftime('%d/%m/%Y %H:%M')}", self.normal_style))
+        story.append(Paragraph(f"Total de pacientes: {patients.count()}", self.normal_style))
+        story.append(Spacer(1, 20))
+        
+        # Tabla de pacientes
+        if patients.exists():
+            data = [['Nombre', 'Apellido', 'DNI', 'Edad', 'Teléfono', 'Email']]
+            
+            for patient in patients:
+                data.append([
+                    patient.name,
+                    patient.last_name,
+                    patient.dni,
+                    str(patient.age),
+                    patient.phone,
+                    patient.email
+                ])
+            
+            table = Table(data)
+            table.setStyle(TableStyle([
+                ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+                ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+                ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+                ('FONTSIZE', (0, 0), (-1, 0), 10),
+                ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+                ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+                ('GRID', (0, 0), (-1, -1), 1, colors.black)
+            ]))
+            
+            story.append(table)
+        else:
+            story.append(Paragraph("No se encontraron pacientes con los criterios especificados.", self.normal_style))
+        
+        doc.build(story)
+        buffer.seek(0)
+        return buffer
+
+    def consults(self, consults, title="Reporte de Consultas"):
+        """Generar reporte de consultas en PDF (filas de ConsultListing)"""
+        buffer = io.BytesIO()
+        doc = SimpleDocTemplate(buffer, pagesize=A4, rightMargin=72, leftMargin=72, topMargin=72, bottomMargin=18)
+        
+        story = []
+        
+        # Título
+        story.append(Paragraph(title, self.title_style))
+        story.append(Spacer(1, 12))
+        
+        # Información del reporte
+        story.append(Paragraph(f"Fecha de generación: {datetime.now().strftime('%d/%m/%Y %H:%M')}", self.normal_style))
+        story.append(Paragraph(f"Total de consultas: {consults.count()}", self.normal_style))
+        story.append(Spacer(1, 20))
+        
+        # Tabla de consultas
+        if consults.exists():
+            data = [['Fecha', 'Paciente', 'Doctor', 'Tipo', 'Motivo']]
+            
+            for consult in consults:
+                data.append([
+                    consult.date.strftime('%d/%m/%Y %H:%M'),
+                    f"{consult.patient_name} {consult.patient_last_name}",
+                    f"Dr. {consult.doctor_name}",
+                    consult.get_consult_type_display(),
+                    consult.reason[:50] + "..." if len(consult.reason) > 50 else consult.reason
+                ])
+            
+            table = Table(data)
+            table.setStyle(TableStyle([
+                ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+                ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+                ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+                ('FONTSIZE', (0, 0), (-1, 0), 9),
+                ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+                ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+                ('GRID', (0, 0), (-1, -1), 1, colors.black)
+            ]))
+            
+            story.append(table)
+        else:
+            story.append(Paragraph("No se encontraron consultas con los criterios especificados.", self.normal_style))
+        
+        doc.build(story)
+        buffer.seek(0)
+        return buffer
+
+    def statistics(self, title="Estadísticas Generales"):
+        """Generar reporte de estadísticas en PDF"""
+        buffer = io.BytesIO()
+        doc = SimpleDocTemplate(buffer, pagesize=A4, rightMargin=72, leftMargin=72, topMargin=72, bottomMargin=18)
+        
+        story = []
+        
+        # Título
+        story.append(Paragraph(title, self.title_style))
+        story.append(Spacer(1, 12))
+        
+        # Estadísticas generales
+        total_patients = Person.objects.filter(is_active=True).count()
+        total_doctors = Doctor.objects.filter(is_active=True).count()
+        total_consults = Consult.objects.count()
+        
+        # Consultas por mes (últimos 6 meses)
+        six_months_ago = datetime.now() - timedelta(days=180)
+        consults_by_month = Consult.objects.filter(date__gte=six_months_ago).extra(
+            select={'month': "EXTRACT(month FROM date)"}
+        ).values('month').annotate(count=Count('id')).order_by('month')
+        
+        # Consultas por tipo
+        consults_by_type = Consult.objects.values('consult_type').annotate(count=Count('id'))
+        
+        story.append(Paragraph(f"Fecha de generación: {datetime.now().strftime('%d/%m/%Y %H:%M')}", self.normal_style))
+        story.append(Spacer(1, 20))
+        
+        # Resumen general
+        story.append(Paragraph("Resumen General", self.subtitle_style))
+        summary_data = [
+            ['Métrica', 'Valor'],
+            ['Total de Pacientes', str(total_patients)],
+            ['Total de Doctores', str(total_doctors)],
+            ['Total de Consultas', str(total_consults)],
+        ]
+        
+        summary_table = Table(summary_data)
+        summary_table.setStyle(TableStyle([
+            ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, 0), 12),
+            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+            ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+            ('GRID', (0, 0), (-1, -1), 1, colors.black)
+        ]))
+        
+        story.append(summary_table)
+        story.append(Spacer(1, 20))
+        
+        # Consultas por tipo
+        if consults_by_type:
+            story.append(Paragraph("Consultas por Tipo", self.subtitle_style))
+            type_data = [['Tipo de Consulta', 'Cantidad']]
+            
+            for item in consults_by_type:
+                consult_type_display = dict(Consult.CONSULT_TYPE_CHOICES).get(item['consult_type'], item['consult_type'])
+                type_data.append([consult_type_display, str(item['count'])])
+            
+            type_table = Table(type_data)
+            type_table.setStyle(TableStyle([
+                ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+                ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+                ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+                ('FONTSIZE', (0, 0), (-1, 0), 10),
+                ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+                ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+                ('GRID', (0, 0), (-1, -1), 1, colors.black)
+            ]))
+            
+            story.append(type_table)
+        
+        doc.build(story)
+        buffer.seek(0)
+        return buffer
+
@@ -8,9 +8,9 @@ from django.http import HttpResponse, JsonResponse
 from django.db.models import Count, Q
 from django.utils import timezone
 from datetime import datetime, timedelta
-from .models import Person, Doctor, Consult, Report, AuditLog
-from .reports import ReportGenerator, get_statistics_data
-from .utils import get_user_role, require_role
+from .models import Person, Doctor, Consult, ConsultListing, Report
+from .reports import ReportGenerator, get_statistics_data, workbook_to_bytes
+from .utils import get_user_role, require_role, log_audit_action
 import json
 
 @login_required
@@ -87,7 +87,7 @@ def generate_patients_report(request):
         else:  # Excel
             wb = generator.generate_patients_excel(patients, title)
             response = HttpResponse(
-                wb.save,
+                workbook_to_bytes(wb),
                 content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
             )
             response['Content-Disposition'] = f'attachment; filename="reporte_pacientes_{datetime.now().strftime("%Y%m%d_%H%M")}.xlsx"'
@@ -97,14 +97,9 @@ def generate_patients_report(request):
             report.save()
         
         # Log de auditoría
-        AuditLog.objects.create(
-            user=request.user,
-            action='CREATE',
-            model_name='Report',
-            object_id=str(report.id),
-            description=f'Generó reporte de pacientes: {title}',
-            ip_address=request.META.get('REMOTE_ADDR'),
-            user_agent=request.META.get('HTTP_USER_AGENT')
+        log_audit_action(
+            request.user, 'CREATE', 'Report', object_id=report.id,
+            description=f'Generó reporte de pacientes: {title}', request=request
         )
         
         return response
@@ -122,8 +117,8 @@ def generate_consults_report(request):
     if request.method == 'POST':
         form_data = request.POST
         
-        # Aplicar filtros
-        consults = Consult.objects.all()
+        # Aplicar filtros (sobre el modelo de lectura: nombres sin JOIN)
+        consults = ConsultListing.objects.all()
         
         # Filtro por doctor
         doctor_id = form_data.get('doctor', '')
@@ -171,7 +166,7 @@ def generate_consults_report(request):
         else:  # Excel
             wb = generator.generate_consults_excel(consults, title)
             response = HttpResponse(
-                wb.save,
+                workbook_to_bytes(wb),
                 content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
             )
             response['Content-Disposition'] = f'attachment; filename="reporte_consultas_{datetime.now().strftime("%Y%m%d_%H%M")}.xlsx"'
@@ -180,14 +175,9 @@ def generate_consults_report(request):
             report.save()
         
         # Log de auditoría
-        AuditLog.objects.create(
-            user=request.user,
-            action='CREATE',
-            model_name='Report',
-            object_id=str(report.id),
-            description=f'Generó reporte de consultas: {title}',
-            ip_address=request.META.get('REMOTE_ADDR'),
-            user_agent=request.META.get('HTTP_USER_AGENT')
+        log_audit_action(
+            request.user, 'CREATE', 'Report', object_id=report.id,
+            description=f'Generó reporte de consultas: {title}', request=request
         )
         
         return response
@@ -229,52 +219,10 @@ def generate_statistics_report(request):
             report.save()
             
         else:  # Excel - Para estadísticas, generamos un Excel con múltiples hojas
-            wb = openpyxl.Workbook()
-            
-            # Hoja 1: Resumen general
-            ws1 = wb.active
-            ws1.title = "Resumen General"
-            
-            stats_data = get_statistics_data()
-            
-            ws1['A1'] = "Estadísticas Generales"
-            ws1['A1'].font = openpyxl.styles.Font(bold=True, size=16)
-            
-            ws1['A3'] = "Total de Pacientes"
-            ws1['B3'] = stats_data['total_patients']
-            ws1['A4'] = "Total de Doctores"
-            ws1['B4'] = stats_data['total_doctors']
-            ws1['A5'] = "Total de Consultas"
-            ws1['B5'] = stats_data['total_consults']
-            ws1['A6'] = "Consultas este mes"
-            ws1['B6'] = stats_data['consults_this_month']
-            
-            # Hoja 2: Consultas por tipo
-            ws2 = wb.create_sheet("Consultas por Tipo")
-            ws2['A1'] = "Tipo de Consulta"
-            ws2['B1'] = "Cantidad"
-            
-            row = 2
-            for item in stats_data['consults_by_type']:
-                consult_type_display = dict(Consult.CONSULT_TYPE_CHOICES).get(item['consult_type'], item['consult_type'])
-                ws2[f'A{row}'] = consult_type_display
-                ws2[f'B{row}'] = item['count']
-                row += 1
-            
-            # Hoja 3: Pacientes por género
-            ws3 = wb.create_sheet("Pacientes por Género")
-            ws3['A1'] = "Género"
-            ws3['B1'] = "Cantidad"
-            
-            row = 2
-            for item in stats_data['patients_by_gender']:
-                gender_display = dict(Person.GENDER_CHOICES).get(item['gender'], item['gender'])
-                ws3[f'A{row}'] = gender_display
-                ws3[f'B{row}'] = item['count']
-                row += 1
+            wb = generator.generate_statistics_excel(title)
             
             response = HttpResponse(
-                wb.save,
+                workbook_to_bytes(wb),
                 content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
             )
             response['Content-Disposition'] = f'attachment; filename="estadisticas_{datetime.now().strftime("%Y%m%d_%H%M")}.xlsx"'
@@ -283,14 +231,9 @@ def generate_statistics_report(request):
             report.save()
         
         # Log de auditoría
-        AuditLog.objects.create(
-            user=request.user,
-            action='CREATE',
-            model_name='Report',
-            object_id=str(report.id),
-            description=f'Generó reporte de estadísticas: {title}',
-            ip_address=request.META.get('REMOTE_ADDR'),
-            user_agent=request.META.get('HTTP_USER_AGENT')
+        log_audit_action(
+            request.user, 'CREATE', 'Report', object_id=report.id,
+            description=f'Generó reporte de estadísticas: {title}', request=request
         )
         
         return response
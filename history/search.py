@@ -0,0 +1,441 @@
+"""
+Búsqueda de texto completo en el contenido de las consultas
+
+Indexa por consulta el motivo, los síntomas, el diagnóstico (descripción y código
+ICD) y el tratamiento (descripción y medicación). El índice vive en la base de datos
+y lo mantienen triggers, así que también sigue a los bulk_create, los
+QuerySet.update y las escrituras por SQL:
+
+- PostgreSQL: tabla history_consultsearch con un tsvector con configuración
+  'spanish' (raíces en español, pesos A motivo/diagnóstico, B síntomas,
+  C tratamiento) e índice GIN. La consulta se interpreta con websearch_to_tsquery
+  ("frase exacta", -excluir, or).
+- SQLite: tabla virtual FTS5 history_consult_fts (unicode61 sin acentos). FTS5 no
+  tiene raíces en español: cada palabra buscada se usa como prefijo (dolor* encuentra
+  dolores).
+
+Los resultados salen ordenados por relevancia (ts_rank_cd / bm25) con un fragmento
+del texto resaltado, y con facetas por tipo de consulta y código ICD. Los datos de
+cada fila (paciente, doctor, fecha) vienen de ConsultListing. Los doctores solo
+encuentran sus consultas, igual que en can_access_consult.
+
+La tabla y los triggers se crean en la migración 0009, que tiene su propia copia fija
+del SQL: un cambio acá en las columnas, los pesos o los triggers necesita además una
+migración nueva. El comando rebuild_consult_search los vuelve a crear si faltan (en
+SQLite una migración que rehace una de las tablas se lleva sus triggers) y reindexa todo
+"""
+import re
+from django.db import connection as default_connection
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+from .models import ConsultListing
+from .utils import get_doctor_profile, is_administrator
+
+SEARCH_PAGE_SIZE = 20
+ICD_FACET_LIMIT = 15
+MAX_QUERY_TERMS = 12
+
+# Marcas del fragmento: se escapa el texto y recién después se cambian por <mark>
+HIGHLIGHT_START = '\x02'
+HIGHLIGHT_STOP = '\x03'
+
+CONSULT_TYPE_LABELS = dict(ConsultListing._meta.get_field('consult_type').choices)
+
+
+# ========== PostgreSQL ==========
+
+POSTGRES_DOCUMENT = """
+    setweight(to_tsvector('spanish', coalesce(c.reason, '')), 'A') ||
+    setweight(to_tsvector('spanish', coalesce(c.symptoms, '')), 'B') ||
+    setweight(to_tsvector('spanish', coalesce(d.description, '') || ' ' || coalesce(d.icd_code, '')), 'A') ||
+    setweight(to_tsvector('spanish', coalesce(t.description, '') || ' ' || coalesce(t.medications, '')), 'C')
+"""
+
+POSTGRES_SOURCE = """
+    FROM history_consult c
+    LEFT JOIN history_diagnosis d ON d.consult_id = c.id
+    LEFT JOIN history_treatment t ON t.consult_id = c.id
+"""
+
+POSTGRES_INSTALL = [
+    """
+    CREATE TABLE IF NOT EXISTS history_consultsearch (
+        consult_id integer PRIMARY KEY REFERENCES history_consult (id) ON DELETE CASCADE,
+        document tsvector NOT NULL
+    )
+    """,
+    'CREATE INDEX IF NOT EXISTS history_consultsearch_document_idx ON history_consultsearch USING GIN (document)',
+    f"""
+    CREATE OR REPLACE FUNCTION history_consultsearch_refresh(target integer) RETURNS void AS $$
+    BEGIN
+        INSERT INTO history_consultsearch (consult_id, document)
+        SELECT c.id, {POSTGRES_DOCUMENT} {POSTGRES_SOURCE}
+        WHERE c.id = target
+        ON CONFLICT (consult_id) DO UPDATE SET document = EXCLUDED.document;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE OR REPLACE FUNCTION history_consultsearch_consult_trigger() RETURNS trigger AS $$
+    BEGIN
+        PERFORM history_consultsearch_refresh(NEW.id);
+        RETURN NULL;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE OR REPLACE FUNCTION history_consultsearch_child_trigger() RETURNS trigger AS $$
+    BEGIN
+        IF TG_OP IN ('UPDATE', 'DELETE') THEN
+            PERFORM history_consultsearch_refresh(OLD.consult_id);
+        END IF;
+        IF TG_OP IN ('INSERT', 'UPDATE') THEN
+            PERFORM history_consultsearch_refresh(NEW.consult_id);
+        END IF;
+        RETURN NULL;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    'DROP TRIGGER IF EXISTS history_consultsearch_consult ON history_consult',
+    """
+    CREATE TRIGGER history_consultsearch_consult
+    AFTER INSERT OR UPDATE OF reason, symptoms ON history_consult
+    FOR EACH ROW EXECUTE PROCEDURE history_consultsearch_consult_trigger()
+    """,
+    'DROP TRIGGER IF EXISTS history_consultsearch_diagnosis ON history_diagnosis',
+    """
+    CREATE TRIGGER history_consultsearch_diagnosis
+    AFTER INSERT OR UPDATE OR DELETE ON history_diagnosis
+    FOR EACH ROW EXECUTE PROCEDURE history_consultsearch_child_trigger()
+    """,
+    'DROP TRIGGER IF EXISTS history_consultsearch_treatment ON history_treatment',
+    """
+    CREATE TRIGGER history_consultsearch_treatment
+    AFTER INSERT OR UPDATE OR DELETE ON history_treatment
+    FOR EACH ROW EXECUTE PROCEDURE history_consultsearch_child_trigger()
+    """,
+]
+
+POSTGRES_REBUILD = [
+    'TRUNCATE history_consultsearch',
+    f'INSERT INTO history_consultsearch (consult_id, document) SELECT c.id, {POSTGRES_DOCUMENT} {POSTGRES_SOURCE}',
+]
+
+POSTGRES_UNINSTALL = [
+    'DROP TRIGGER IF EXISTS history_consultsearch_consult ON history_consult',
+    'DROP TRIGGER IF EXISTS history_consultsearch_diagnosis ON history_diagnosis',
+    'DROP TRIGGER IF EXISTS history_consultsearch_treatment ON history_treatment',
+    'DROP FUNCTION IF EXISTS history_consultsearch_consult_trigger()',
+    'DROP FUNCTION IF EXISTS history_consultsearch_child_trigger()',
+    'DROP FUNCTION IF EXISTS history_consultsearch_refresh(integer)',
+    'DROP TABLE IF EXISTS history_consultsearch',
+]
+
+
+# ========== SQLite ==========
+
+SQLITE_ROW = """
+    SELECT c.id, c.reason, c.symptoms,
+           coalesce(d.description, '') || ' ' || coalesce(d.icd_code, ''),
+           coalesce(t.description, '') || ' ' || coalesce(t.medications, '')
+    FROM history_consult c
+    LEFT JOIN history_diagnosis d ON d.consult_id = c.id
+    LEFT JOIN history_treatment t ON t.consult_id = c.id
+"""
+
+SQLITE_INSERT = 'INSERT INTO history_consult_fts (rowid, reason, symptoms, diagnosis, treatment)'
+
+
+def _sqlite_refresh(target):
+    """Sentencias de un trigger que rehacen la fila de la consulta target"""
+    return (
+        f'DELETE FROM history_consult_fts WHERE rowid = {target}; '
+        f'{SQLITE_INSERT} {SQLITE_ROW} WHERE c.id = {target};'
+    )
+
+
+SQLITE_TRIGGERS = {
+    'history_consult_fts_ai': ('AFTER INSERT ON history_consult', _sqlite_refresh('NEW.id')),
+    'history_consult_fts_au': ('AFTER UPDATE OF reason, symptoms ON history_consult', _sqlite_refresh('NEW.id')),
+    'history_consult_fts_ad': ('AFTER DELETE ON history_consult',
+                               'DELETE FROM history_consult_fts WHERE rowid = OLD.id;'),
+    'history_consult_fts_diagnosis_ai': ('AFTER INSERT ON history_diagnosis', _sqlite_refresh('NEW.consult_id')),
+    'history_consult_fts_diagnosis_au': ('AFTER UPDATE ON history_diagnosis',
+                                         _sqlite_refresh('OLD.consult_id') + _sqlite_refresh('NEW.consult_id')),
+    'history_consult_fts_diagnosis_ad': ('AFTER DELETE ON history_diagnosis', _sqlite_refresh('OLD.consult_id')),
+    'history_consult_fts_treatment_ai': ('AFTER INSERT ON history_treatment', _sqlite_refresh('NEW.consult_id')),
+    'history_consult_fts_treatment_au': ('AFTER UPDATE ON history_treatment',
+                                         _sqlite_refresh('OLD.consult_id') + _sqlite_refresh('NEW.consult_id')),
+    'history_consult_fts_treatment_ad': ('AFTER DELETE ON history_treatment', _sqlite_refresh('OLD.consult_id')),
+}
+
+SQLITE_INSTALL = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS history_consult_fts USING fts5(
+        reason, symptoms, diagnosis, treatment,
+        tokenize = 'unicode61 remove_diacritics 2'
+    )
+    """,
+] + [
+    f'CREATE TRIGGER IF NOT EXISTS {name} {event} FOR EACH ROW BEGIN {body} END'
+    for name, (event, body) in SQLITE_TRIGGERS.items()
+]
+
+SQLITE_REBUILD = [
+    'DELETE FROM history_consult_fts',
+    f'{SQLITE_INSERT} {SQLITE_ROW}',
+]
+
+SQLITE_UNINSTALL = [
+    f'DROP TRIGGER IF EXISTS {name}' for name in SQLITE_TRIGGERS
+] + ['DROP TABLE IF EXISTS history_consult_fts']
+
+
+# ========== Backends ==========
+
+class PostgreSQLSearchBackend:
+    """tsvector 'spanish' + GIN, ranking ts_rank_cd y fragmentos con ts_headline"""
+    install_sql = POSTGRES_INSTALL
+    rebuild_sql = POSTGRES_REBUILD
+    uninstall_sql = POSTGRES_UNINSTALL
+
+    source = (
+        "history_consultsearch m CROSS JOIN websearch_to_tsquery('spanish', %s) AS q "
+        "JOIN history_consultlisting l ON l.consult_id = m.consult_id"
+    )
+    match = 'm.document @@ q'
+    headline_options = (
+        f'StartSel={HIGHLIGHT_START}, StopSel={HIGHLIGHT_STOP}, MaxWords=25, MinWords=8, '
+        'MaxFragments=2, FragmentDelimiter=" … "'
+    )
+
+    def prepare_query(self, text):
+        return text.strip() or None
+
+    def page_sql(self, filters):
+        # ts_headline es caro: solo sobre las filas de la página
+        return f"""
+            SELECT r.consult_id, r.rank, ts_headline(
+                'spanish',
+                concat_ws(' … ', c.reason, c.symptoms, d.description, d.icd_code, t.description, t.medications),
+                websearch_to_tsquery('spanish', %s), %s
+            )
+            FROM (
+                SELECT m.consult_id, l.date, ts_rank_cd(m.document, q) AS rank
+                FROM {self.source}
+                WHERE {self.match}{filters}
+                ORDER BY rank DESC, l.date DESC
+                LIMIT %s OFFSET %s
+            ) r
+            JOIN history_consult c ON c.id = r.consult_id
+            LEFT JOIN history_diagnosis d ON d.consult_id = r.consult_id
+            LEFT JOIN history_treatment t ON t.consult_id = r.consult_id
+            ORDER BY r.rank DESC, r.date DESC
+        """
+
+    def page_params(self, query, filter_params, limit, offset):
+        return [query, self.headline_options, query, *filter_params, limit, offset]
+
+
+class SQLiteSearchBackend:
+    """FTS5 con ranking bm25 y fragmentos con snippet()"""
+    install_sql = SQLITE_INSTALL
+    rebuild_sql = SQLITE_REBUILD
+    uninstall_sql = SQLITE_UNINSTALL
+
+    source = 'history_consult_fts JOIN history_consultlisting l ON l.consult_id = history_consult_fts.rowid'
+    match = 'history_consult_fts MATCH %s'
+    # Pesos de bm25 por columna: motivo, síntomas, diagnóstico, tratamiento
+    weights = (2.0, 1.0, 2.0, 0.5)
+
+    def prepare_query(self, text):
+        """Cada palabra entre comillas (sin operadores de FTS5) y como prefijo"""
+        terms = re.findall(r'\w+', text)[:MAX_QUERY_TERMS]
+        return ' '.join(f'"{term}"*' for term in terms) or None
+
+    def page_sql(self, filters):
+        weights = ', '.join(str(weight) for weight in self.weights)
+        return f"""
+            SELECT history_consult_fts.rowid, -bm25(history_consult_fts, {weights}) AS rank,
+                   snippet(history_consult_fts, -1, char(2), char(3), ' … ', 16)
+            FROM {self.source}
+            WHERE {self.match}{filters}
+            ORDER BY rank DESC, l.date DESC
+            LIMIT %s OFFSET %s
+        """
+
+    def page_params(self, query, filter_params, limit, offset):
+        return [query, *filter_params, limit, offset]
+
+
+SEARCH_BACKENDS = {
+    'postgresql': PostgreSQLSearchBackend,
+    'sqlite': SQLiteSearchBackend,
+}
+
+
+class SearchUnavailable(Exception):
+    """La base de datos no tiene búsqueda de texto completo"""
+
+
+def get_search_backend(connection=None):
+    connection = connection or default_connection
+    try:
+        return SEARCH_BACKENDS[connection.vendor]()
+    except KeyError:
+        raise SearchUnavailable(f'Búsqueda de texto no disponible en {connection.vendor}')
+
+
+def _execute(connection, statements):
+    with connection.cursor() as cursor:
+        for statement in statements:
+            cursor.execute(statement)
+
+
+def install_search_index(connection=None):
+    """Crea la tabla y los triggers si faltan y llena el índice con lo existente"""
+    connection = connection or default_connection
+    backend = get_search_backend(connection)
+    _execute(connection, backend.install_sql)
+    _execute(connection, backend.rebuild_sql)
+
+
+def rebuild_search_index(connection=None):
+    connection = connection or default_connection
+    _execute(connection, get_search_backend(connection).rebuild_sql)
+
+
+def uninstall_search_index(connection=None):
+    connection = connection or default_connection
+    _execute(connection, get_search_backend(connection).uninstall_sql)
+
+
+# ========== Consultas ==========
+
+def search_scope(user):
+    """
+    doctor_id al que se limita la búsqueda (None: todas las consultas) o False si el
+    usuario no puede ver consultas. Mismas reglas que can_access_consult
+    """
+    if is_administrator(user):
+        return None
+    doctor = get_doctor_profile(user)
+    return doctor.pk if doctor else False
+
+
+def highlight(snippet):
+    """Fragmento seguro para HTML con las coincidencias en <mark>"""
+    text = escape(snippet or '')
+    return mark_safe(text.replace(HIGHLIGHT_START, '<mark>').replace(HIGHLIGHT_STOP, '</mark>'))
+
+
+def _filter_sql(doctor_id=None, consult_type=None, icd_code=None):
+    clauses, params = [], []
+    for column, value in (('doctor_id', doctor_id), ('consult_type', consult_type), ('icd_code', icd_code)):
+        if value not in (None, ''):
+            clauses.append(f' AND l.{column} = %s')
+            params.append(value)
+    return ''.join(clauses), params
+
+
+class SearchResults:
+    """Página de resultados con el total y las facetas de toda la búsqueda"""
+
+    def __init__(self, query, items=(), total=0, type_facets=(), icd_facets=(), page=1,
+                 page_size=SEARCH_PAGE_SIZE):
+        self.query = query
+        self.items = list(items)
+        self.total = total
+        self.type_facets = list(type_facets)
+        self.icd_facets = list(icd_facets)
+        self.page = page
+        self.page_size = page_size
+        self.previous_url = None
+        self.next_url = None
+
+    @property
+    def has_next(self):
+        return self.page * self.page_size < self.total
+
+    @property
+    def has_previous(self):
+        return self.page > 1
+
+    def as_dict(self):
+        return {
+            'query': self.query,
+            'total': self.total,
+            'page': self.page,
+            'has_next': self.has_next,
+            'results': [{**item, 'snippet': str(item['snippet'])} for item in self.items],
+            'facets': {'consult_type': self.type_facets, 'icd_code': self.icd_facets},
+        }
+
+
+def search_consults(text, doctor_id=None, consult_type=None, icd_code=None, page=1,
+                    page_size=SEARCH_PAGE_SIZE, connection=None):
+    """
+    Busca text en las consultas (de doctor_id, o de todos si es None), opcionalmente
+    filtradas por tipo y código ICD. Cada faceta se cuenta con el resto de los filtros
+    aplicados pero no el propio, para poder cambiar de opción
+    """
+    connection = connection or default_connection
+    backend = get_search_backend(connection)
+    query = backend.prepare_query(text or '')
+    page = max(page, 1)
+    if query is None:
+        return SearchResults(text, page=page, page_size=page_size)
+
+    with connection.cursor() as cursor:
+        filters, filter_params = _filter_sql(doctor_id, icd_code=icd_code)
+        cursor.execute(
+            f'SELECT l.consult_type, COUNT(*) FROM {backend.source} '
+            f'WHERE {backend.match}{filters} GROUP BY l.consult_type',
+            [query, *filter_params],
+        )
+        type_counts = dict(cursor.fetchall())
+
+        filters, filter_params = _filter_sql(doctor_id, consult_type=consult_type)
+        cursor.execute(
+            f"SELECT l.icd_code, COUNT(*) AS total FROM {backend.source} "
+            f"WHERE {backend.match}{filters} AND l.icd_code <> '' "
+            f"GROUP BY l.icd_code ORDER BY total DESC, l.icd_code LIMIT %s",
+            [query, *filter_params, ICD_FACET_LIMIT],
+        )
+        icd_facets = [{'value': code, 'count': count, 'selected': code == icd_code}
+                      for code, count in cursor.fetchall()]
+
+        total = type_counts.get(consult_type, 0) if consult_type else sum(type_counts.values())
+        rows = []
+        if total > (page - 1) * page_size:
+            filters, filter_params = _filter_sql(doctor_id, consult_type, icd_code)
+            cursor.execute(
+                backend.page_sql(filters),
+                backend.page_params(query, filter_params, page_size, (page - 1) * page_size),
+            )
+            rows = cursor.fetchall()
+
+    listings = ConsultListing.objects.in_bulk([consult_id for consult_id, _, _ in rows])
+    items = []
+    for consult_id, rank, snippet in rows:
+        listing = listings.get(consult_id)
+        if listing is None:
+            continue
+        items.append({
+            'consult_id': consult_id,
+            'date': listing.date,
+            'consult_type': listing.consult_type,
+            'patient_id': listing.patient_id,
+            'patient_name': f'{listing.patient_name} {listing.patient_last_name}',
+            'doctor_name': listing.doctor_name,
+            'icd_code': listing.icd_code,
+            'rank': rank,
+            'snippet': highlight(snippet),
+        })
+
+    type_facets = [
+        {'value': value, 'label': CONSULT_TYPE_LABELS.get(value, value), 'count': count,
+         'selected': value == consult_type}
+        for value, count in sorted(type_counts.items(), key=lambda pair: (-pair[1], pair[0]))
+    ]
+    return SearchResults(text, items, total, type_facets, icd_facets, page, page_size)
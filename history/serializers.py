@@ -0,0 +1,131 @@
+"""
+Serializadores de la API REST
+"""
+from django.utils import timezone
+from rest_framework import serializers
+from .models import Person, Doctor, Consult, Diagnosis, Treatment, MedicalRecord
+
+
+def parse_fields_param(request):
+    """Obtiene el conjunto de campos pedidos en ?fields=a,b,c (None si no se pidió)"""
+    if request is None:
+        return None
+    raw = request.query_params.get('fields', '')
+    fields = {field.strip() for field in raw.split(',') if field.strip()}
+    return fields or None
+
+
+class DynamicFieldsMixin:
+    """
+    Permite respuestas parciales (sparse fieldsets) con ?fields=
+    Los serializadores anidados no usan este mixin y devuelven todos sus campos
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        requested = parse_fields_param(self.context.get('request'))
+        if requested is None:
+            return
+
+        for field_name in set(self.fields) - requested:
+            self.fields.pop(field_name)
+
+
+class AgeField(serializers.ReadOnlyField):
+    """
+    Edad calculada a partir de la fecha de nacimiento
+    La fecha actual y cada edad se calculan una sola vez por respuesta
+    """
+
+    def __init__(self, **kwargs):
+        kwargs['source'] = 'birth_date'
+        super().__init__(**kwargs)
+
+    def to_representation(self, birth_date):
+        if birth_date is None:
+            return None
+
+        cache = self.root.context.setdefault('_age_cache', {})
+        if birth_date not in cache:
+            today = cache.setdefault('_today', timezone.now().date())
+            cache[birth_date] = today.year - birth_date.year - (
+                (today.month, today.day) < (birth_date.month, birth_date.day)
+            )
+        return cache[birth_date]
+
+
+class PersonSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
+    age = AgeField()
+
+    class Meta:
+        model = Person
+        fields = [
+            'id', 'name', 'last_name', 'dni', 'birth_date', 'age', 'gender',
+            'phone', 'email', 'address', 'observations', 'is_active',
+            'created_at', 'updated_at',
+        ]
+
+
+class DoctorSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
+    full_name = serializers.CharField(source='display_name', read_only=True)
+    email = serializers.EmailField(source='user.email', read_only=True)
+    specialty_display = serializers.CharField(source='get_specialty_display', read_only=True)
+
+    class Meta:
+        model = Doctor
+        fields = [
+            'id', 'full_name', 'email', 'license_number', 'specialty',
+            'specialty_display', 'phone', 'is_active', 'created_at', 'updated_at',
+        ]
+
+
+class DiagnosisSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Diagnosis
+        fields = ['id', 'description', 'icd_code', 'created_at', 'updated_at']
+
+
+class TreatmentSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Treatment
+        fields = [
+            'id', 'description', 'medications', 'instructions', 'follow_up_date',
+            'created_at', 'updated_at',
+        ]
+
+
+class ConsultSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
+    patient_name = serializers.SerializerMethodField()
+    doctor_name = serializers.CharField(source='doctor.display_name', read_only=True)
+    consult_type_display = serializers.CharField(source='get_consult_type_display', read_only=True)
+    diagnosis = serializers.SerializerMethodField()
+    treatment = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Consult
+        fields = [
+            'id', 'patient', 'patient_name', 'doctor', 'doctor_name', 'date',
+            'consult_type', 'consult_type_display', 'reason', 'symptoms',
+            'vital_signs', 'diagnosis', 'treatment', 'created_at', 'updated_at',
+        ]
+
+    def get_patient_name(self, consult):
+        return f"{consult.patient.name} {consult.patient.last_name}"
+
+    def get_diagnosis(self, consult):
+        # La relación inversa uno a uno lanza AttributeError si no existe
+        diagnosis = getattr(consult, 'diagnosis', None)
+        return DiagnosisSerializer(diagnosis).data if diagnosis else None
+
+    def get_treatment(self, consult):
+        treatment = getattr(consult, 'treatment', None)
+        return TreatmentSerializer(treatment).data if treatment else None
+
+
+class MedicalRecordSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
+    class Meta:
+        model = MedicalRecord
+        fields = [
+            'id', 'patient', 'allergies', 'chronic_conditions', 'family_history',
+            'social_history', 'created_at', 'updated_at',
+        ]
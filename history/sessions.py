@@ -0,0 +1,146 @@
+"""
+Motor de sesiones (SESSION_ENGINE = 'history.sessions')
+
+- cached_db: las sesiones se leen de la caché y solo van a django_session al
+  escribirse o cuando la caché no las tiene. Con CSRF_USE_SESSIONS el token CSRF
+  vive en la sesión, así que esto evita una consulta por petición
+- cookie firmada para los roles de SESSION_SIGNED_COOKIE_ROLES (p. ej. recepción):
+  la sesión viaja entera en la cookie, sin caché ni base de datos. No se puede
+  revocar desde el servidor antes de que expire, por eso es solo para roles de
+  pocos privilegios
+
+La caché tiene que ser compartida entre procesos (redis): con LocMem cada worker
+guarda su copia, y un logout o un cambio en la sesión (incluido el secreto CSRF)
+hecho en un worker no llega a los demás. check_session_cache avisa de esa
+combinación en `manage.py check`
+
+sweep_expired_sessions borra por lotes las filas vencidas de django_session
+(ver el comando sweep_sessions)
+"""
+import time
+from django.conf import settings
+from django.core import checks
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.contrib.auth.signals import user_logged_in
+from django.contrib.sessions.backends.cached_db import SessionStore as CachedDBStore
+from django.contrib.sessions.models import Session
+from django.core import signing
+from django.dispatch import receiver
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+# Marca guardada en la sesión de los usuarios que usan cookie firmada
+STORAGE_KEY = '_session_storage'
+SIGNED_COOKIE = 'signed_cookie'
+SIGNED_COOKIE_SALT = 'django.contrib.sessions.backends.signed_cookies'
+
+
+def is_signed_key(session_key):
+    """Las claves de cookie firmada llevan ':' (datos:firma); las de base de datos no"""
+    return bool(session_key) and ':' in session_key
+
+
+class SessionStore(CachedDBStore):
+
+    def uses_signed_cookie(self):
+        return self._session.get(STORAGE_KEY) == SIGNED_COOKIE
+
+    def load(self):
+        if is_signed_key(self.session_key):
+            try:
+                return signing.loads(
+                    self.session_key,
+                    serializer=self.serializer,
+                    max_age=self.get_session_cookie_age(),
+                    salt=SIGNED_COOKIE_SALT,
+                )
+            except Exception:
+                # Firma inválida o vencida: sesión nueva
+                self._session_key = None
+                return {}
+        return super().load()
+
+    def exists(self, session_key):
+        if is_signed_key(session_key):
+            return False
+        return super().exists(session_key)
+
+    def save(self, must_create=False):
+        if not self.uses_signed_cookie():
+            return super().save(must_create=must_create)
+        # Al pasar a cookie firmada se borra la fila creada antes del login
+        if self.session_key and not is_signed_key(self.session_key):
+            super().delete(self.session_key)
+        self._session_key = signing.dumps(
+            self._get_session(no_load=must_create),
+            compress=True,
+            salt=SIGNED_COOKIE_SALT,
+            serializer=self.serializer,
+        )
+        self.modified = True
+
+    def delete(self, session_key=None):
+        if session_key is None:
+            session_key = self.session_key
+        if is_signed_key(session_key):
+            if session_key == self.session_key:
+                self._session_key = None
+                self._session_cache = {}
+            return
+        super().delete(session_key)
+
+    def cycle_key(self):
+        if self.uses_signed_cookie():
+            # La clave es el contenido firmado: basta con volver a firmarlo
+            self.save()
+            return
+        super().cycle_key()
+
+
+@receiver(user_logged_in)
+def choose_session_storage(sender, request, user, **kwargs):
+    """Marca la sesión para cookie firmada si el rol del usuario lo permite"""
+    roles = getattr(settings, 'SESSION_SIGNED_COOKIE_ROLES', ())
+    session = getattr(request, 'session', None)
+    if not roles or not isinstance(session, SessionStore):
+        return
+    from .utils import get_user_role
+
+    if get_user_role(user) in roles:
+        session[STORAGE_KEY] = SIGNED_COOKIE
+
+
+def check_session_cache(app_configs=None, **kwargs):
+    """Aviso si history.sessions usa una caché propia de cada proceso"""
+    if settings.SESSION_ENGINE != __name__:
+        return []
+    backend = settings.CACHES.get(settings.SESSION_CACHE_ALIAS, {}).get('BACKEND', '')
+    try:
+        backend_class = import_string(backend)
+    except ImportError:
+        return []
+    if not issubclass(backend_class, (LocMemCache, DummyCache)):
+        return []
+    return [checks.Warning(
+        f'SESSION_ENGINE={__name__} con la caché {backend}, que no se comparte entre procesos',
+        hint='Con varios workers un logout en uno no cierra la sesión en los demás. Use una caché '
+             'compartida (CACHE_BACKEND=redis) o SESSION_ENGINE=django.contrib.sessions.backends.db',
+        obj=backend,
+        id='history.W001',
+    )]
+
+
+def sweep_expired_sessions(batch_size=5000, pause=0.0, now=None):
+    """Borra las sesiones vencidas en lotes cortos (sin bloquear la tabla); devuelve cuántas"""
+    now = now or timezone.now()
+    deleted = 0
+    while True:
+        keys = list(
+            Session.objects.filter(expire_date__lt=now).values_list('session_key', flat=True)[:batch_size]
+        )
+        if not keys:
+            return deleted
+        deleted += Session.objects.filter(session_key__in=keys).delete()[0]
+        if pause:
+            time.sleep(pause)
@@ -0,0 +1,8 @@
+"""
+Señales propias de la aplicación
+"""
+from django.dispatch import Signal
+
+# Se envía una vez por lote cuando se insertan consultas con bulk_create
+# (bulk_create no dispara post_save). Argumentos: consults
+consults_bulk_created = Signal()
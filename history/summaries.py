@@ -0,0 +1,163 @@
+"""
+Resumen de consultas por paciente (PatientSummary)
+
+Por paciente con consultas: cantidad, fecha de la primera y la última y el próximo
+seguimiento pendiente, es decir la fecha de seguimiento más temprana entre las
+posteriores al día de la última consulta (una visita posterior cumple los anteriores).
+Así el listado de pacientes ordena y filtra por "última visita" y "seguimiento
+vencido" sin agregar sobre Consult y Treatment en cada fila.
+
+Cada escritura de consulta o tratamiento recalcula solo el resumen de su paciente
+(dos consultas con índice y un upsert); los borrados solo actualizan o quitan filas
+existentes, así un borrado en cascada del paciente no vuelve a crear la suya. Las
+escrituras sin señales (QuerySet.update, SQL directo) se reparan con
+`manage.py reconcile_patient_summaries`
+"""
+from django.db.models import Count, Max, Min
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.utils import timezone
+from .signals import consults_bulk_created
+
+RECONCILE_BATCH_SIZE = 2000
+
+SUMMARY_FIELDS = ('consult_count', 'first_consult_date', 'last_consult_date', 'next_follow_up_date')
+
+
+def compute_summaries(consult_model, treatment_model, patient_ids):
+    """
+    {patient_id: valores} de los pacientes con consultas. La migración 0006 tiene su
+    propia copia fija; los cambios acá no la afectan
+    """
+    rows = (
+        consult_model.objects.filter(patient_id__in=patient_ids)
+        .values('patient_id')
+        .annotate(consult_count=Count('id'), first_consult_date=Min('date'), last_consult_date=Max('date'))
+        .order_by()
+    )
+    summaries = {row.pop('patient_id'): {**row, 'next_follow_up_date': None} for row in rows}
+    if not summaries:
+        return summaries
+
+    follow_ups = treatment_model.objects.filter(
+        consult__patient_id__in=list(summaries), follow_up_date__isnull=False
+    ).values_list('consult__patient_id', 'follow_up_date')
+    for patient_id, follow_up in follow_ups:
+        summary = summaries[patient_id]
+        pending = summary['next_follow_up_date']
+        if follow_up > timezone.localdate(summary['last_consult_date']) and (pending is None or follow_up < pending):
+            summary['next_follow_up_date'] = follow_up
+    return summaries
+
+
+def write_summaries(summary_model, summaries):
+    """Inserta o reemplaza las filas en una sola consulta (INSERT ... ON CONFLICT)"""
+    summary_model.objects.bulk_create(
+        [summary_model(patient_id=patient_id, **values) for patient_id, values in summaries.items()],
+        update_conflicts=True, unique_fields=['patient'], update_fields=[*SUMMARY_FIELDS, 'updated_at'],
+    )
+
+
+def refresh_patient_summaries(patient_ids, create=True):
+    """
+    Recalcula los resúmenes de los pacientes. create=False solo actualiza o borra
+    filas existentes (se usa en los borrados)
+    """
+    from .models import Consult, PatientSummary, Treatment
+
+    patient_ids = {patient_id for patient_id in patient_ids if patient_id is not None}
+    if not patient_ids:
+        return
+    summaries = compute_summaries(Consult, Treatment, patient_ids)
+    without_consults = patient_ids - summaries.keys()
+    if without_consults:
+        PatientSummary.objects.filter(patient_id__in=without_consults).delete()
+    if not summaries:
+        return
+    if create:
+        write_summaries(PatientSummary, summaries)
+    else:
+        for patient_id, values in summaries.items():
+            PatientSummary.objects.filter(patient_id=patient_id).update(updated_at=timezone.now(), **values)
+
+
+def reconcile_patient_summaries(batch_size=RECONCILE_BATCH_SIZE):
+    """
+    Compara la tabla con lo calculado desde las consultas, por lotes de pacientes, y
+    corrige solo las filas distintas. Devuelve (pacientes revisados, filas escritas,
+    filas borradas)
+    """
+    from .models import Consult, PatientSummary, Person, Treatment
+
+    checked = written = removed = 0
+    last_id = 0
+    while True:
+        patient_ids = list(
+            Person.objects.filter(id__gt=last_id).order_by('id').values_list('id', flat=True)[:batch_size]
+        )
+        if not patient_ids:
+            break
+        expected = compute_summaries(Consult, Treatment, patient_ids)
+        stored = {
+            row.pop('patient_id'): row
+            for row in PatientSummary.objects.filter(patient_id__in=patient_ids).values('patient_id', *SUMMARY_FIELDS)
+        }
+        stale = stored.keys() - expected.keys()
+        if stale:
+            removed += PatientSummary.objects.filter(patient_id__in=stale).delete()[0]
+        changed = {patient_id: values for patient_id, values in expected.items() if stored.get(patient_id) != values}
+        if changed:
+            write_summaries(PatientSummary, changed)
+            written += len(changed)
+
+        checked += len(patient_ids)
+        if len(patient_ids) < batch_size:
+            break
+        last_id = patient_ids[-1]
+
+    # Filas de pacientes que ya no existen (borrados con SQL directo)
+    removed += PatientSummary.objects.exclude(patient__in=Person.objects.all()).delete()[0]
+    return checked, written, removed
+
+
+def _consult_patient_ids(consult_ids):
+    from .models import Consult
+
+    return Consult.objects.filter(id__in=consult_ids).values_list('patient_id', flat=True)
+
+
+def consult_pre_save(sender, instance, raw=False, **kwargs):
+    # Si la edición cambia el paciente también hay que recalcular el anterior
+    if not raw and not instance._state.adding:
+        instance._summary_patient_ids = set(_consult_patient_ids([instance.pk]))
+
+
+def consult_saved(sender, instance, raw=False, **kwargs):
+    if not raw:
+        refresh_patient_summaries({instance.patient_id, *getattr(instance, '_summary_patient_ids', ())})
+
+
+def consult_deleted(sender, instance, **kwargs):
+    refresh_patient_summaries([instance.patient_id], create=False)
+
+
+def treatment_saved(sender, instance, raw=False, **kwargs):
+    if not raw:
+        refresh_patient_summaries(_consult_patient_ids([instance.consult_id]))
+
+
+def treatment_deleted(sender, instance, **kwargs):
+    refresh_patient_summaries(_consult_patient_ids([instance.consult_id]), create=False)
+
+
+def consults_bulk_saved(sender, consults, **kwargs):
+    refresh_patient_summaries(consult.patient_id for consult in consults)
+
+
+def connect_signals():
+    """Se llama desde HistoryConfig.ready()"""
+    pre_save.connect(consult_pre_save, sender='history.Consult', dispatch_uid='summary-consult-pre')
+    post_save.connect(consult_saved, sender='history.Consult', dispatch_uid='summary-consult')
+    post_delete.connect(consult_deleted, sender='history.Consult', dispatch_uid='summary-consult-delete')
+    post_save.connect(treatment_saved, sender='history.Treatment', dispatch_uid='summary-treatment')
+    post_delete.connect(treatment_deleted, sender='history.Treatment', dispatch_uid='summary-treatment-delete')
+    consults_bulk_created.connect(consults_bulk_saved, dispatch_uid='summary-bulk-consults')
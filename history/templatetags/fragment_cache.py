@@ -0,0 +1,60 @@
+"""
+{% cachefragment nombre parte1 parte2 ... %} ... {% endcachefragment %}
+
+Guarda en caché el HTML del bloque con la clave de history.fragment_cache: las
+instancias aportan id y updated_at, las etiquetas de modelo ('history.Treatment')
+su contador de versión y el resto de los valores su texto. Ejemplo:
+
+    {% load fragment_cache %}
+    {% cachefragment 'consult-row' consult consult.patient consult.doctor %}
+        ...
+    {% endcachefragment %}
+"""
+from django import template
+from django.core.cache import cache
+from history.fragment_cache import get_fragment_cache_config, make_fragment_key
+
+register = template.Library()
+
+# Contadores de versión ya leídos durante el render de la plantilla
+VERSIONS_CONTEXT_KEY = 'fragment_cache_versions'
+
+
+class CacheFragmentNode(template.Node):
+
+    def __init__(self, nodelist, name, parts):
+        self.nodelist = nodelist
+        self.name = name
+        self.parts = parts
+
+    def render(self, context):
+        config = get_fragment_cache_config()
+        if not config['ENABLED']:
+            return self.nodelist.render(context)
+
+        if VERSIONS_CONTEXT_KEY not in context.render_context:
+            context.render_context[VERSIONS_CONTEXT_KEY] = {}
+        key = make_fragment_key(
+            self.name.resolve(context),
+            [part.resolve(context) for part in self.parts],
+            versions=context.render_context[VERSIONS_CONTEXT_KEY],
+        )
+        content = cache.get(key)
+        if content is None:
+            content = self.nodelist.render(context)
+            cache.set(key, content, config['TIMEOUT'])
+        return content
+
+
+@register.tag('cachefragment')
+def do_cachefragment(parser, token):
+    bits = token.split_contents()
+    if len(bits) < 2:
+        raise template.TemplateSyntaxError(f"'{bits[0]}' requiere al menos un nombre de fragmento")
+    nodelist = parser.parse(('endcachefragment',))
+    parser.delete_first_token()
+    return CacheFragmentNode(
+        nodelist,
+        parser.compile_filter(bits[1]),
+        [parser.compile_filter(bit) for bit in bits[2:]],
+    )
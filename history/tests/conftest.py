@@ -4,6 +4,9 @@ from django.contrib.auth.models import User
 from history.models import Person, Doctor, Consult, UserProfile
 from datetime import date, datetime
 
+# Plugin de presupuestos de consultas: marcador query_budget y fixture query_budget
+from .query_budget import pytest_configure, query_budget  # noqa: F401
+
 
 @pytest.fixture
 def admin_user():
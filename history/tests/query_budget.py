@@ -0,0 +1,187 @@
+"""
+Presupuestos de consultas SQL y detector de N+1 para los tests
+
+- QueryCapture: registra cada consulta con su forma normalizada y el lugar que la
+  originó (línea de la plantilla si se ejecutó al renderizar, o el frame del proyecto)
+- QueryBudgetMixin: assertQueryBudget (mismo número de consultas para distintos
+  tamaños de datos, sin superar el presupuesto) y assertNoRepeatedQueries
+- Plugin de pytest (cargado desde conftest.py): marcador
+  @pytest.mark.query_budget(max_queries=None, max_repeats=...) y fixture query_budget
+"""
+import os
+import re
+import sys
+from collections import defaultdict
+from contextlib import ExitStack, contextmanager
+import pytest
+from django.conf import settings
+from django.db import connections
+
+# Cantidad de veces que puede repetirse una misma forma de consulta desde el mismo lugar
+DEFAULT_MAX_REPEATS = 2
+
+_IN_LIST_RE = re.compile(r'\(\s*%s(?:\s*,\s*%s)*\s*\)')
+_SPACES_RE = re.compile(r'\s+')
+_PROJECT_DIR = os.path.normcase(str(settings.BASE_DIR))
+_SKIPPED_FILES = (
+    os.path.normcase(os.path.abspath(__file__)),
+    os.path.normcase(os.path.dirname(os.__file__)),
+)
+
+
+def query_shape(sql):
+    """Forma de la consulta: los IN (%s, %s, ...) de distinto largo cuentan igual"""
+    return _SPACES_RE.sub(' ', _IN_LIST_RE.sub('(%s...)', sql)).strip()
+
+
+def _template_location(frame):
+    """Plantilla y línea del nodo que se estaba renderizando, si lo hay"""
+    while frame is not None:
+        if frame.f_code.co_name == 'render_annotated':
+            node = frame.f_locals.get('self')
+            origin = getattr(node, 'origin', None)
+            token = getattr(node, 'token', None)
+            if origin is not None and token is not None:
+                return f'{origin.template_name}:{token.lineno} {token.contents[:80]!r}'
+        frame = frame.f_back
+    return None
+
+
+def _code_location(frame):
+    """Primer frame del proyecto (fuera de las librerías y de este módulo)"""
+    while frame is not None:
+        filename = os.path.normcase(frame.f_code.co_filename)
+        if (
+            filename.startswith(_PROJECT_DIR)
+            and 'site-packages' not in filename
+            and not filename.startswith(_SKIPPED_FILES)
+        ):
+            return f'{os.path.relpath(frame.f_code.co_filename, settings.BASE_DIR)}:{frame.f_lineno} in {frame.f_code.co_name}'
+        frame = frame.f_back
+    return '<desconocido>'
+
+
+class CapturedQuery:
+    __slots__ = ('sql', 'shape', 'location')
+
+    def __init__(self, sql, location):
+        self.sql = sql
+        self.shape = query_shape(sql)
+        self.location = location
+
+
+class QueryCapture:
+    """Context manager que registra las consultas de todas las conexiones"""
+
+    def __init__(self):
+        self.queries = []
+        self._stack = None
+
+    def __call__(self, execute, sql, params, many, context):
+        frame = sys._getframe(1)
+        location = _template_location(frame) or _code_location(frame)
+        self.queries.append(CapturedQuery(sql, location))
+        return execute(sql, params, many, context)
+
+    def __enter__(self):
+        self._stack = ExitStack()
+        for connection in connections.all():
+            self._stack.enter_context(connection.execute_wrapper(self))
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stack.close()
+
+    def __len__(self):
+        return len(self.queries)
+
+    def repeated(self, max_repeats=DEFAULT_MAX_REPEATS):
+        """[(cantidad, lugar, forma)] de las consultas repetidas más de max_repeats veces"""
+        groups = defaultdict(int)
+        for query in self.queries:
+            groups[(query.location, query.shape)] += 1
+        return sorted(
+            ((count, location, shape) for (location, shape), count in groups.items() if count > max_repeats),
+            reverse=True
+        )
+
+    def report(self):
+        return '\n'.join(f'  {n}. [{query.location}] {query.sql}' for n, query in enumerate(self.queries, 1))
+
+
+def format_repeated(repeated):
+    lines = ['Consultas repetidas (posible N+1):']
+    for count, location, shape in repeated:
+        lines.append(f'  {count}x en {location}\n      {shape}')
+    return '\n'.join(lines)
+
+
+class QueryBudgetMixin:
+    """Aserciones de presupuesto de consultas para TestCase"""
+
+    def assertQueryBudget(self, budget, make_request, populate, sizes=(1, 5, 20), max_repeats=DEFAULT_MAX_REPEATS):
+        """
+        Para cada tamaño llama a populate(total) (crea datos hasta ese total) y mide
+        make_request(). Falla si algún tamaño supera el presupuesto, si el número
+        de consultas cambia con el tamaño o si hay consultas repetidas
+        """
+        counts = {}
+        for size in sizes:
+            populate(size)
+            with QueryCapture() as capture:
+                make_request()
+            counts[size] = len(capture)
+
+            self.assertLessEqual(
+                len(capture), budget,
+                f'{len(capture)} consultas con {size} filas (presupuesto {budget}):\n{capture.report()}'
+            )
+            repeated = capture.repeated(max_repeats)
+            if repeated:
+                self.fail(f'Con {size} filas. {format_repeated(repeated)}')
+
+        self.assertEqual(
+            len(set(counts.values())), 1,
+            f'El número de consultas depende de la cantidad de filas: {counts}'
+        )
+        return counts
+
+    @contextmanager
+    def assertNoRepeatedQueries(self, max_repeats=DEFAULT_MAX_REPEATS):
+        with QueryCapture() as capture:
+            yield capture
+        repeated = capture.repeated(max_repeats)
+        if repeated:
+            self.fail(format_repeated(repeated))
+
+
+# ========== Plugin de pytest ==========
+
+def pytest_configure(config):
+    config.addinivalue_line(
+        'markers',
+        'query_budget(max_queries=None, max_repeats=2): presupuesto de consultas del test y detección de N+1'
+    )
+
+
+@pytest.fixture
+def query_budget(request):
+    """
+    Captura las consultas del test y al final verifica el marcador query_budget
+    (o los valores por defecto: sin límite total, max_repeats=2)
+    """
+    marker = request.node.get_closest_marker('query_budget')
+    options = dict(marker.kwargs) if marker else {}
+    if marker and marker.args:
+        options.setdefault('max_queries', marker.args[0])
+    max_queries = options.get('max_queries')
+    max_repeats = options.get('max_repeats', DEFAULT_MAX_REPEATS)
+
+    with QueryCapture() as capture:
+        yield capture
+
+    if max_queries is not None and len(capture) > max_queries:
+        pytest.fail(f'{len(capture)} consultas (presupuesto {max_queries}):\n{capture.report()}')
+    repeated = capture.repeated(max_repeats)
+    if repeated:
+        pytest.fail(format_repeated(repeated))
@@ -0,0 +1,253 @@
+from django.test import TestCase, Client
+from django.contrib.auth.models import User
+from history.models import Person, Doctor, Consult, Diagnosis, Treatment, MedicalRecord
+from datetime import date, timedelta
+from django.utils import timezone
+
+
+class ApiTest(TestCase):
+    """Tests para la API REST v1"""
+
+    def setUp(self):
+        self.client = Client()
+
+        self.admin_user = User.objects.create_user(
+            username='admin',
+            email='admin@example.com',
+            password='testpass123',
+            is_staff=True,
+            is_superuser=True
+        )
+
+        self.doctor_user = User.objects.create_user(
+            username='doctor',
+            email='doctor@example.com',
+            password='testpass123',
+            first_name='Juan',
+            last_name='Médico'
+        )
+        self.doctor = Doctor.objects.create(
+            user=self.doctor_user,
+            license_number='MP12345',
+            specialty='GP',
+            phone='+54911234567'
+        )
+
+        self.patient = Person.objects.create(
+            name='Juan',
+            last_name='Pérez',
+            dni='12345678',
+            birth_date=date(1990, 1, 1),
+            gender='M',
+            phone='+54911234567',
+            email='juan.perez@example.com',
+            address='Calle 123'
+        )
+        self.other_patient = Person.objects.create(
+            name='Ana',
+            last_name='García',
+            dni='87654321',
+            birth_date=date(1985, 5, 15),
+            gender='F',
+            phone='+54911234568',
+            email='ana.garcia@example.com',
+            address='Calle 456'
+        )
+
+        self.consult = Consult.objects.create(
+            patient=self.patient,
+            doctor=self.doctor,
+            date=timezone.now() - timedelta(days=1),
+            consult_type='FIRST',
+            reason='Dolor de cabeza',
+            symptoms='Cefalea'
+        )
+        Diagnosis.objects.create(consult=self.consult, description='Migraña', icd_code='G43.9')
+        Treatment.objects.create(consult=self.consult, description='Analgésicos')
+        MedicalRecord.objects.create(patient=self.patient, allergies='Penicilina')
+
+    def test_requires_authentication(self):
+        """La API requiere usuario autenticado"""
+        response = self.client.get('/api/v1/patients/')
+        self.assertIn(response.status_code, [401, 403])
+
+    def test_patients_admin_sees_all(self):
+        """El administrador ve todos los pacientes"""
+        self.client.login(username='admin', password='testpass123')
+        response = self.client.get('/api/v1/patients/')
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(len(data['results']), 2)
+        self.assertIn('next', data)
+        self.assertNotIn('count', data)
+
+    def test_patients_doctor_scoping(self):
+        """El doctor solo ve pacientes con los que tiene consultas"""
+        self.client.login(username='doctor', password='testpass123')
+        response = self.client.get('/api/v1/patients/')
+        self.assertEqual(response.status_code, 200)
+        ids = [item['id'] for item in response.json()['results']]
+        self.assertEqual(ids, [self.patient.id])
+
+        response = self.client.get(f'/api/v1/patients/{self.other_patient.id}/')
+        self.assertEqual(response.status_code, 404)
+
+    def test_sparse_fieldsets(self):
+        """?fields= limita los campos devueltos"""
+        self.client.login(username='admin', password='testpass123')
+        response = self.client.get('/api/v1/patients/?fields=id,dni,age')
+        item = response.json()['results'][0]
+        self.assertEqual(set(item), {'id', 'dni', 'age'})
+        self.assertEqual(item['age'], Person.objects.get(id=item['id']).age)
+
+    def test_consults_nested_single_query(self):
+        """Las consultas incluyen diagnóstico y tratamiento sin N+1"""
+        self.client.login(username='admin', password='testpass123')
+        for i in range(3):
+            Consult.objects.create(
+                patient=self.other_patient,
+                doctor=self.doctor,
+                date=timezone.now() - timedelta(days=10 + i),
+                consult_type='ROUTINE',
+                reason='Control',
+                symptoms='Ninguno'
+            )
+
+        self.client.get('/api/v1/consults/')
+        # usuario autenticado + una única consulta con todos los JOIN
+        with self.assertNumQueries(2):
+            response = self.client.get('/api/v1/consults/')
+        results = response.json()['results']
+        self.assertEqual(len(results), 4)
+        first = results[0]
+        self.assertEqual(first['diagnosis']['icd_code'], 'G43.9')
+        self.assertEqual(first['treatment']['description'], 'Analgésicos')
+        self.assertEqual(first['doctor_name'], 'Juan Médico')
+        self.assertIsNone(results[1]['diagnosis'])
+
+    def test_doctors_admin_only(self):
+        """El listado de doctores es solo para administradores"""
+        self.client.login(username='doctor', password='testpass123')
+        response = self.client.get('/api/v1/doctors/')
+        self.assertEqual(response.status_code, 403)
+
+        self.client.login(username='admin', password='testpass123')
+        response = self.client.get('/api/v1/doctors/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['results'][0]['license_number'], 'MP12345')
+
+    def test_medical_records_scoping(self):
+        """Las historias clínicas respetan el acceso al paciente"""
+        MedicalRecord.objects.create(patient=self.other_patient)
+        self.client.login(username='doctor', password='testpass123')
+        response = self.client.get('/api/v1/medical-records/')
+        patients = [item['patient'] for item in response.json()['results']]
+        self.assertEqual(patients, [self.patient.id])
+
+
+class PatientTimelineTest(TestCase):
+    """Tests para el historial de consultas paginado por cursor"""
+
+    def setUp(self):
+        self.client = Client()
+        self.admin_user = User.objects.create_user(
+            username='admin',
+            email='admin@example.com',
+            password='testpass123',
+            is_staff=True,
+            is_superuser=True
+        )
+        doctor_user = User.objects.create_user(
+            username='doctor',
+            email='doctor@example.com',
+            password='testpass123',
+            first_name='Juan',
+            last_name='Médico'
+        )
+        self.doctor = Doctor.objects.create(
+            user=doctor_user,
+            license_number='MP12345',
+            specialty='GP',
+            phone='+54911234567'
+        )
+        self.patient = Person.objects.create(
+            name='Juan',
+            last_name='Pérez',
+            dni='12345678',
+            birth_date=date(1990, 1, 1),
+            gender='M',
+            phone='+54911234567',
+            email='juan.perez@example.com',
+            address='Calle 123'
+        )
+        now = timezone.now()
+        self.consults = []
+        for i in range(25):
+            consult = Consult.objects.create(
+                patient=self.patient,
+                doctor=self.doctor,
+                # Dos consultas por fecha para probar el desempate por id
+                date=now - timedelta(days=i // 2),
+                consult_type='FOLLOW',
+                reason=f'Control {i}',
+                symptoms='Ninguno'
+            )
+            self.consults.append(consult)
+        # Con la misma fecha, la más reciente es la de mayor id
+        self.latest = self.consults[1]
+        Diagnosis.objects.create(consult=self.latest, description='Migraña', icd_code='G43.9')
+        Treatment.objects.create(consult=self.latest, description='Reposo ' * 30)
+
+    def test_timeline_pages_cover_all_consults(self):
+        """Las páginas no repiten ni omiten consultas"""
+        self.client.login(username='admin', password='testpass123')
+        url = f'/api/v1/patients/{self.patient.pk}/timeline/'
+        seen = []
+        cursor = None
+        while True:
+            response = self.client.get(url, {'limit': 10, **({'cursor': cursor} if cursor else {})})
+            self.assertEqual(response.status_code, 200)
+            data = response.json()
+            seen.extend(item['id'] for item in data['results'])
+            cursor = data['next_cursor']
+            if not cursor:
+                break
+        self.assertEqual(len(seen), 25)
+        self.assertEqual(len(set(seen)), 25)
+
+    def test_timeline_includes_diagnosis_and_treatment(self):
+        """Incluye código ICD y resumen de tratamiento en una sola consulta SQL"""
+        from history.timeline import get_timeline_page
+
+        with self.assertNumQueries(1):
+            items, next_cursor = get_timeline_page(self.patient, limit=5)
+        self.assertEqual(items[0]['id'], self.latest.id)
+        self.assertEqual(items[0]['icd_code'], 'G43.9')
+        self.assertTrue(items[0]['treatment_summary'].endswith('…'))
+        self.assertEqual(items[0]['doctor_name'], 'Juan Médico')
+        self.assertIsNotNone(next_cursor)
+
+    def test_timeline_access_control(self):
+        """Un doctor sin consultas con el paciente no ve su historial"""
+        other_user = User.objects.create_user(
+            username='otro',
+            email='otro@example.com',
+            password='testpass123'
+        )
+        Doctor.objects.create(
+            user=other_user,
+            license_number='MP99999',
+            specialty='GP',
+            phone='+54911234567'
+        )
+        self.client.login(username='otro', password='testpass123')
+        response = self.client.get(f'/api/v1/patients/{self.patient.pk}/timeline/')
+        self.assertEqual(response.status_code, 404)
+
+    def test_patient_detail_loads_first_page(self):
+        """La ficha del paciente solo carga la primera página"""
+        self.client.login(username='admin', password='testpass123')
+        response = self.client.get(f'/patients/{self.patient.pk}/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context['consults']), 20)
+        self.assertContains(response, 'timeline-more')
@@ -0,0 +1,112 @@
+import io
+from collections import Counter
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+from history.benchmark_data import BenchmarkDataSeeder, SeedError, clear_benchmark_data, copy_value
+from history.models import Person, Doctor, Consult, Diagnosis, Treatment, AuditLog
+from history.signals import consults_bulk_created
+from datetime import date
+
+
+class BenchmarkDataSeederTest(TestCase):
+    """Tests para el generador de datos de benchmark"""
+
+    def seed(self, **kwargs):
+        options = {
+            'patients': 40, 'consults': 300, 'doctors': 6, 'batch_size': 100,
+            'method': 'bulk', 'end_date': date(2025, 6, 30),
+        }
+        options.update(kwargs)
+        return BenchmarkDataSeeder(**options).run()
+
+    def snapshot(self):
+        return list(Consult.objects.order_by('pk').values_list(
+            'patient__dni', 'doctor__license_number', 'date', 'consult_type', 'diagnosis__icd_code'
+        ))
+
+    def test_counts_and_report(self):
+        """Se crean las cantidades pedidas y el reporte cuenta las filas por tabla"""
+        report = self.seed(audit_ratio=1.5)
+        self.assertEqual(Person.objects.count(), 40)
+        self.assertEqual(Doctor.objects.count(), 6)
+        self.assertEqual(Consult.objects.count(), 300)
+        self.assertEqual(report.tables['history_consult'][0], 300)
+        self.assertEqual(report.tables['history_diagnosis'][0], Diagnosis.objects.count())
+        self.assertEqual(report.tables['history_treatment'][0], Treatment.objects.count())
+        self.assertGreater(AuditLog.objects.count(), 300)
+        self.assertTrue(User.objects.get(username='bench_admin').check_password('bench-pass'))
+        self.assertIn('total', list(report.lines())[-1])
+
+    def test_deterministic(self):
+        """La misma semilla genera exactamente los mismos datos"""
+        self.seed()
+        first = self.snapshot()
+        clear_benchmark_data()
+        self.assertEqual(Consult.objects.count(), 0)
+        self.seed()
+        second = self.snapshot()
+        self.assertEqual(first, second)
+
+        clear_benchmark_data()
+        self.seed(seed=7)
+        self.assertNotEqual(first, self.snapshot())
+
+    def test_skewed_distribution(self):
+        """Los primeros doctores y los pacientes crónicos concentran las consultas"""
+        self.seed(consults=1000)
+        by_doctor = Counter(Consult.objects.values_list('doctor__license_number', flat=True))
+        self.assertGreater(by_doctor['BENCH000000'], 3 * by_doctor['BENCH000005'])
+        by_patient = sorted(Counter(Consult.objects.values_list('patient_id', flat=True)).values())
+        self.assertGreater(by_patient[-1], 5 * by_patient[len(by_patient) // 2])
+        self.assertFalse(Consult.objects.filter(date__date__gt=date(2025, 6, 30)).exists())
+
+    def test_sequences_are_reset(self):
+        """Después de generar con ids explícitos se pueden crear registros normalmente"""
+        self.seed()
+        person = Person.objects.create(
+            name='Juan', last_name='Pérez', dni='12345678', birth_date=date(1990, 1, 1),
+            gender='M', phone='+54911234567', email='juan.perez@example.com', address='Calle 123'
+        )
+        self.assertGreater(person.pk, Person.objects.exclude(pk=person.pk).order_by('-pk').first().pk)
+
+    def test_signal_sent_per_batch(self):
+        """consults_bulk_created se envía una vez por lote de consultas"""
+        batches = []
+
+        def receiver(sender, consults, **kwargs):
+            batches.append(len(consults))
+
+        consults_bulk_created.connect(receiver)
+        try:
+            self.seed(consults=250)
+        finally:
+            consults_bulk_created.disconnect(receiver)
+        self.assertEqual(batches, [100, 100, 50])
+
+    def test_existing_data_and_copy_errors(self):
+        """No se mezcla con datos generados antes y COPY exige PostgreSQL"""
+        self.seed()
+        with self.assertRaises(SeedError):
+            self.seed()
+        clear_benchmark_data()
+        with self.assertRaises(SeedError):
+            self.seed(method='copy')
+
+    def test_copy_value(self):
+        """Escapado del formato de texto de COPY"""
+        self.assertEqual(copy_value(None), '\\N')
+        self.assertEqual(copy_value(True), 't')
+        self.assertEqual(copy_value('a\tb\nc\\d'), 'a\\tb\\nc\\\\d')
+
+    def test_management_command(self):
+        """El comando informa el rendimiento y --clear permite regenerar"""
+        out = io.StringIO()
+        options = {'patients': 10, 'consults': 20, 'doctors': 2, 'end_date': date(2025, 6, 30), 'stdout': out}
+        call_command('seed_benchmark_data', **options)
+        self.assertIn('filas/s', out.getvalue())
+        with self.assertRaises(CommandError):
+            call_command('seed_benchmark_data', **options)
+        call_command('seed_benchmark_data', clear=True, **options)
+        self.assertEqual(Consult.objects.count(), 20)
@@ -0,0 +1,130 @@
+from datetime import date, timedelta
+from unittest import mock
+from django.contrib.auth.models import User
+from django.test import TestCase, Client, RequestFactory
+from django.urls import reverse
+from django.utils import timezone
+from history.conditional import _run_probe, last_birthday, probe_consult, probe_medical_record, probe_patient
+from history.models import Consult
+from .factories import ConsultFactory, DiagnosisFactory, DoctorFactory, MedicalRecordFactory, PersonFactory
+
+
+class ConditionalGetTest(TestCase):
+    """Tests para las respuestas 304 de las páginas de paciente, consulta e historia clínica"""
+
+    def setUp(self):
+        self.admin = User.objects.create_user(username='admin', password='testpass123', is_staff=True, is_superuser=True)
+        self.doctor = DoctorFactory()
+        self.doctor.user.set_password('testpass123')
+        self.doctor.user.save()
+        self.patient = PersonFactory()
+        MedicalRecordFactory(patient=self.patient)
+        self.consult = ConsultFactory(patient=self.patient, doctor=self.doctor)
+        self.client = Client()
+        self.client.login(username='admin', password='testpass123')
+        self.url = reverse('patient_detail', args=[self.patient.pk])
+
+    def revalidate(self, url=None, client=None):
+        client = client or self.client
+        url = url or self.url
+        first = client.get(url)
+        self.assertEqual(first.status_code, 200)
+        return first, client.get(url, HTTP_IF_NONE_MATCH=first['ETag'])
+
+    def probe(self, probe, **kwargs):
+        request = RequestFactory().get('/')
+        request.user = User.objects.get(pk=self.admin.pk)
+        return _run_probe(request, probe, (), kwargs)
+
+    def test_not_modified_without_rendering(self):
+        first, second = self.revalidate()
+        self.assertIn('private', first['Cache-Control'])
+        self.assertIn('no-cache', first['Cache-Control'])
+        self.assertIn('Last-Modified', first)
+        self.assertEqual(second.status_code, 304)
+        self.assertEqual(second.content, b'')
+        self.assertFalse(second.templates)
+
+    def test_changes_invalidate_etag(self):
+        """Guardar un diagnóstico o borrar una consulta cambia el ETag"""
+        first, _ = self.revalidate()
+        DiagnosisFactory(consult=self.consult)
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(response.status_code, 200)
+
+        etag = response['ETag']
+        ConsultFactory(patient=self.patient, doctor=self.doctor)
+        Consult.objects.filter(pk=self.consult.pk).delete()
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_doctor_rename_invalidates_etag(self):
+        """La ficha y el detalle muestran el nombre del doctor"""
+        patient_etag, _ = self.probe(probe_patient, pk=self.patient.pk)
+        consult_etag, _ = self.probe(probe_consult, pk=self.consult.pk)
+        self.doctor.user.last_name = 'Otro Apellido'
+        self.doctor.user.save()
+        self.assertNotEqual(self.probe(probe_patient, pk=self.patient.pk)[0], patient_etag)
+        self.assertNotEqual(self.probe(probe_consult, pk=self.consult.pk)[0], consult_etag)
+
+    def test_birthday_invalidates_patient_page(self):
+        """La ficha muestra la edad: al pasar el cumpleaños no se responde 304"""
+        today = timezone.now()
+        tomorrow = today.date() + timedelta(days=1)
+        self.patient.birth_date = tomorrow.replace(year=tomorrow.year - 30)
+        self.patient.save()
+        first, second = self.revalidate()
+        self.assertEqual(second.status_code, 304)
+        with mock.patch('django.utils.timezone.now', return_value=today + timedelta(days=1)):
+            response = self.client.get(
+                self.url, HTTP_IF_NONE_MATCH=first['ETag'], HTTP_IF_MODIFIED_SINCE=first['Last-Modified']
+            )
+            self.assertEqual(response.status_code, 200)
+            self.assertContains(response, '30 años')
+
+    def test_last_birthday_on_february_29(self):
+        # Person.age suma el año el 1 de marzo en los años no bisiestos
+        self.assertEqual(last_birthday(date(2000, 2, 29), date(2026, 2, 28)).date(), date(2025, 3, 1))
+        self.assertEqual(last_birthday(date(2000, 2, 29), date(2026, 3, 1)).date(), date(2026, 3, 1))
+        self.assertEqual(last_birthday(date(2000, 2, 29), date(2028, 2, 29)).date(), date(2028, 2, 29))
+
+    def test_etag_is_scoped_per_user(self):
+        admin_response = self.client.get(self.url)
+        doctor = Client()
+        doctor.login(username=self.doctor.user.username, password='testpass123')
+        response = doctor.get(self.url, HTTP_IF_NONE_MATCH=admin_response['ETag'])
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], admin_response['ETag'])
+
+    def test_no_conditional_without_access(self):
+        other = DoctorFactory()
+        other.user.set_password('testpass123')
+        other.user.save()
+        client = Client()
+        client.login(username=other.user.username, password='testpass123')
+        response = client.get(self.url)
+        self.assertEqual(response.status_code, 302)
+        self.assertNotIn('ETag', response)
+
+    def test_pending_messages_force_render(self):
+        """Tras guardar la historia clínica el mensaje de éxito se muestra aunque coincida el ETag"""
+        first = self.client.get(self.url)
+        response = self.client.post(reverse('medical_record_edit', args=[self.patient.pk]), {'allergies': 'Polen'})
+        self.assertEqual(response.status_code, 302)
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('ETag', response)
+        self.assertNotEqual(self.client.get(self.url)['ETag'], first['ETag'])
+
+    def test_medical_record_form(self):
+        etag, _ = self.probe(probe_medical_record, patient_pk=self.patient.pk)
+        url = reverse('medical_record_edit', args=[self.patient.pk])
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=f'"{etag}"').status_code, 304)
+
+    def test_consult_detail(self):
+        etag, _ = self.probe(probe_consult, pk=self.consult.pk)
+        url = reverse('consult_detail', args=[self.consult.pk])
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=f'"{etag}"').status_code, 304)
+
+        self.consult.save()
+        self.assertNotEqual(self.probe(probe_consult, pk=self.consult.pk)[0], etag)
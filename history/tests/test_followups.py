@@ -0,0 +1,133 @@
+from datetime import timedelta
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase, Client
+from django.urls import reverse
+from django.utils import timezone
+from history.followups import decode_cursor, get_follow_up_page, window_range
+from history.models import Treatment
+from .factories import ConsultFactory, DoctorFactory, PersonFactory
+
+
+class FollowUpPageTest(TestCase):
+    """Tests para la agenda de seguimientos sobre instantáneas por día"""
+
+    def setUp(self):
+        cache.clear()
+        self.today = timezone.localdate()
+        self.doctor = DoctorFactory()
+        self.other_doctor = DoctorFactory()
+
+    def follow_up(self, days, doctor=None, visit_days_ago=30):
+        consult = ConsultFactory(
+            patient=PersonFactory(), doctor=doctor or self.doctor,
+            date=timezone.now() - timedelta(days=visit_days_ago),
+        )
+        return Treatment.objects.create(
+            consult=consult, description='Control', follow_up_date=self.today + timedelta(days=days)
+        )
+
+    def page(self, window, **kwargs):
+        items, cursor = get_follow_up_page(window, today=self.today, **kwargs)
+        return [item['treatment_id'] for item in items], cursor
+
+    def test_windows(self):
+        overdue = self.follow_up(-3)
+        today = self.follow_up(0)
+        soon = self.follow_up(2)
+        self.follow_up(20)
+        self.assertEqual(self.page('overdue')[0], [overdue.pk])
+        self.assertEqual(self.page('today')[0], [today.pk])
+        self.assertEqual(self.page('upcoming', days=7)[0], [soon.pk])
+
+    def test_visit_after_follow_up_clears_it(self):
+        treatment = self.follow_up(-3)
+        ConsultFactory(patient=treatment.consult.patient, doctor=self.doctor, date=timezone.now())
+        self.assertEqual(self.page('overdue')[0], [])
+
+    def test_per_doctor(self):
+        mine = self.follow_up(1)
+        theirs = self.follow_up(1, doctor=self.other_doctor)
+        self.assertEqual(self.page('upcoming', doctor_id=self.doctor.pk)[0], [mine.pk])
+        self.assertEqual(self.page('upcoming')[0], [mine.pk, theirs.pk])
+
+    def test_keyset_cursor(self):
+        treatments = [self.follow_up(days) for days in (1, 1, 2, 3)]
+        ids, cursor = self.page('upcoming', limit=3)
+        self.assertEqual(ids, [treatment.pk for treatment in treatments[:3]])
+        self.assertEqual(decode_cursor(cursor), (treatments[2].follow_up_date, treatments[2].pk))
+        ids, cursor = self.page('upcoming', limit=3, cursor=cursor)
+        self.assertEqual(ids, [treatments[3].pk])
+        self.assertIsNone(cursor)
+
+    def test_snapshot_cached_and_invalidated(self):
+        treatment = self.follow_up(1)
+        self.page('upcoming')
+        # Solo la consulta agregada que arma las claves
+        with self.assertNumQueries(1):
+            self.page('upcoming')
+
+        treatment.follow_up_date = self.today + timedelta(days=2)
+        treatment.description = 'Control de presión'
+        treatment.save()
+        items, _ = get_follow_up_page('upcoming', today=self.today)
+        self.assertEqual(items[0]['follow_up_date'], treatment.follow_up_date)
+        self.assertEqual(items[0]['treatment_summary'], 'Control de presión')
+
+    def test_snapshot_sees_changes_without_signals(self):
+        """Un cambio hecho en otro proceso (sin señales ni versiones locales) también invalida"""
+        treatment = self.follow_up(1)
+        self.page('upcoming')
+        Treatment.objects.filter(pk=treatment.pk).update(description='Control de glucemia', updated_at=timezone.now())
+        items, _ = get_follow_up_page('upcoming', today=self.today)
+        self.assertEqual(items[0]['treatment_summary'], 'Control de glucemia')
+
+        Treatment.objects.filter(pk=treatment.pk).delete()
+        self.assertEqual(self.page('upcoming')[0], [])
+
+    def test_upcoming_window_is_capped(self):
+        with self.settings(FOLLOW_UPS={'MAX_DAYS': 10}):
+            self.assertEqual(window_range('upcoming', 365, self.today)[1], self.today + timedelta(days=10))
+
+
+class FollowUpViewTest(TestCase):
+    """Tests para la vista y la API de la agenda de seguimientos"""
+
+    def setUp(self):
+        cache.clear()
+        User.objects.create_user(username='admin', password='testpass123', is_staff=True, is_superuser=True)
+        self.doctor = DoctorFactory()
+        self.doctor.user.set_password('testpass123')
+        self.doctor.user.save()
+        consult = ConsultFactory(doctor=self.doctor, date=timezone.now() - timedelta(days=10))
+        self.mine = Treatment.objects.create(
+            consult=consult, description='-', follow_up_date=timezone.localdate() + timedelta(days=1)
+        )
+        consult = ConsultFactory(date=timezone.now() - timedelta(days=10))
+        self.theirs = Treatment.objects.create(
+            consult=consult, description='-', follow_up_date=timezone.localdate() + timedelta(days=1)
+        )
+
+    def client_for(self, username):
+        client = Client()
+        client.login(username=username, password='testpass123')
+        return client
+
+    def test_view(self):
+        response = self.client_for('admin').get(reverse('follow_up_list'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([item['treatment_id'] for item in response.context['items']], [self.mine.pk, self.theirs.pk])
+
+        response = self.client_for(self.doctor.user.username).get(reverse('follow_up_list'))
+        self.assertEqual([item['treatment_id'] for item in response.context['items']], [self.mine.pk])
+
+    def test_api(self):
+        url = reverse('api-follow-up-list')
+        response = self.client_for(self.doctor.user.username).get(url, {'window': 'upcoming', 'days': 3})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([item['treatment_id'] for item in response.json()['results']], [self.mine.pk])
+
+        admin = self.client_for('admin')
+        response = admin.get(url, {'doctor': self.doctor.pk})
+        self.assertEqual([item['treatment_id'] for item in response.json()['results']], [self.mine.pk])
+        self.assertEqual(admin.get(url, {'window': 'later'}).status_code, 400)
@@ -0,0 +1,116 @@
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.template import Context, Template
+from django.test import TestCase, Client, override_settings
+from django.urls import reverse
+from history.fragment_cache import bump_model_version, get_model_versions, make_fragment_key
+from history.models import Consult
+from history.signals import consults_bulk_created
+from .factories import ConsultFactory, DiagnosisFactory, DoctorFactory, MedicalRecordFactory, PersonFactory
+
+
+class FragmentKeyTest(TestCase):
+    """Tests para las claves de fragmento y los contadores de versión"""
+
+    def setUp(self):
+        cache.clear()
+
+    def test_key_changes_when_instance_is_saved(self):
+        patient = PersonFactory()
+        key = make_fragment_key('patient-info', [patient])
+        self.assertEqual(make_fragment_key('patient-info', [patient]), key)
+        patient.name = 'Otro'
+        patient.save()
+        self.assertNotEqual(make_fragment_key('patient-info', [patient]), key)
+
+    def test_key_changes_with_model_version(self):
+        key = make_fragment_key('row', [1, 'history.Treatment'])
+        bump_model_version('history.Treatment')
+        self.assertNotEqual(make_fragment_key('row', [1, 'history.Treatment']), key)
+
+    def test_save_and_delete_bump_version(self):
+        diagnosis = DiagnosisFactory()
+        version = get_model_versions(['history.Diagnosis'])['history.Diagnosis']
+        diagnosis.save()
+        self.assertEqual(get_model_versions(['history.Diagnosis'])['history.Diagnosis'], version + 1)
+        diagnosis.delete()
+        self.assertEqual(get_model_versions(['history.Diagnosis'])['history.Diagnosis'], version + 2)
+
+    def test_bulk_created_consults_bump_version(self):
+        version = get_model_versions(['history.Consult'])['history.Consult']
+        consults_bulk_created.send(sender=Consult, consults=[])
+        self.assertEqual(get_model_versions(['history.Consult'])['history.Consult'], version + 1)
+
+    def test_lost_counter_does_not_reuse_versions(self):
+        """Si la caché pierde el contador el nuevo valor no coincide con uno anterior"""
+        version = get_model_versions(['history.Person'])['history.Person']
+        cache.clear()
+        self.assertGreaterEqual(get_model_versions(['history.Person'])['history.Person'], version)
+        self.assertGreater(bump_model_version('history.Person'), version)
+
+
+class CacheFragmentTagTest(TestCase):
+    """Tests para el tag {% cachefragment %}"""
+
+    template = Template(
+        "{% load fragment_cache %}"
+        "{% cachefragment 'name' patient %}{{ patient.name }}{% endcachefragment %}"
+    )
+
+    def setUp(self):
+        cache.clear()
+        self.patient = PersonFactory(name='Juan')
+
+    def render(self):
+        return self.template.render(Context({'patient': self.patient}))
+
+    def test_served_from_cache_until_saved(self):
+        self.assertEqual(self.render(), 'Juan')
+        # Sin guardar la clave no cambia: se sirve el HTML anterior
+        self.patient.name = 'Pedro'
+        self.assertEqual(self.render(), 'Juan')
+        self.patient.save()
+        self.assertEqual(self.render(), 'Pedro')
+
+    @override_settings(FRAGMENT_CACHE={'ENABLED': False})
+    def test_disabled(self):
+        self.assertEqual(self.render(), 'Juan')
+        self.patient.name = 'Pedro'
+        self.assertEqual(self.render(), 'Pedro')
+
+
+class FragmentCacheViewTest(TestCase):
+    """Los fragmentos cacheados no incluyen lo que depende del rol"""
+
+    def setUp(self):
+        cache.clear()
+        User.objects.create_user(username='admin', password='testpass123', is_staff=True, is_superuser=True)
+        self.doctor = DoctorFactory()
+        self.doctor.user.set_password('testpass123')
+        self.doctor.user.save()
+        self.patient = PersonFactory(name='Juan')
+        self.record = MedicalRecordFactory(patient=self.patient, allergies='Penicilina')
+        ConsultFactory(patient=self.patient, doctor=self.doctor)
+
+    def get_detail(self, username):
+        client = Client()
+        client.login(username=username, password='testpass123')
+        response = client.get(reverse('patient_detail', args=[self.patient.pk]))
+        self.assertEqual(response.status_code, 200)
+        return response.content.decode()
+
+    def test_role_buttons_outside_fragment(self):
+        edit_url = reverse('patient_edit', args=[self.patient.pk])
+        self.assertIn(edit_url, self.get_detail('admin'))
+        # El doctor recibe los fragmentos cacheados por el admin, sin sus botones
+        content = self.get_detail(self.doctor.user.username)
+        self.assertIn('Penicilina', content)
+        self.assertNotIn(edit_url, content)
+
+    def test_saved_medical_record_invalidates_panel(self):
+        self.assertIn('Penicilina', self.get_detail('admin'))
+        self.record.allergies = 'Látex'
+        self.record.save()
+        content = self.get_detail('admin')
+        self.assertIn('Látex', content)
+        self.assertNotIn('Penicilina', content)
@@ -0,0 +1,55 @@
+from unittest import mock
+from django.test import TestCase, Client
+from history import health
+
+
+class HealthCheckTest(TestCase):
+    """Tests para /healthz y /readyz"""
+
+    def setUp(self):
+        health.reset_readiness_cache()
+        self.client = Client()
+
+    def tearDown(self):
+        health.reset_readiness_cache()
+
+    def test_healthz_does_not_touch_database(self):
+        """La liveness responde sin consultas a la base de datos"""
+        with self.assertNumQueries(0):
+            response = self.client.get('/healthz')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {'status': 'ok'})
+
+    def test_readyz_ok(self):
+        """Con todo en orden /readyz devuelve 200 y el detalle de cada comprobación"""
+        response = self.client.get('/readyz')
+        self.assertEqual(response.status_code, 200)
+        checks = response.json()['checks']
+        self.assertEqual(set(checks), {'database', 'migrations', 'cache', 'disk', 'memory'})
+        self.assertTrue(all(check['status'] == 'ok' for check in checks.values()))
+
+    def test_readyz_result_is_cached(self):
+        """Los probes seguidos reutilizan el resultado sin volver a la base de datos"""
+        self.client.get('/readyz')
+        with self.assertNumQueries(0):
+            response = self.client.get('/readyz')
+        self.assertEqual(response.status_code, 200)
+
+    def test_readyz_thresholds(self):
+        """Superar los umbrales de HEALTH_CHECK devuelve 503"""
+        with self.settings(HEALTH_CHECK={'DISK_USAGE_MAX': 0, 'MEMORY_MIN': 10 ** 9}):
+            response = self.client.get('/readyz')
+        self.assertEqual(response.status_code, 503)
+        checks = response.json()['checks']
+        self.assertEqual(checks['disk']['status'], 'error')
+        self.assertEqual(checks['database']['status'], 'ok')
+        if health.available_memory_mb() is not None:
+            self.assertEqual(checks['memory']['status'], 'error')
+
+    def test_readyz_database_error(self):
+        """Si la base de datos no responde se omite la comprobación de migraciones"""
+        with mock.patch.object(health, 'check_database', side_effect=RuntimeError('sin conexión')):
+            ok, checks = health.run_readiness_checks()
+        self.assertFalse(ok)
+        self.assertEqual(checks['database'], {'status': 'error', 'detail': 'sin conexión'})
+        self.assertEqual(checks['migrations'], {'status': 'skipped'})
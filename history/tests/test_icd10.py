@@ -0,0 +1,160 @@
+import mmap
+import os
+import shutil
+import tempfile
+from django.contrib.auth.models import User
+from django.test import TestCase, Client, override_settings
+from django.urls import reverse
+from history.forms import DiagnosisForm
+from history.icd10 import ICD10Catalog, compile_catalog, get_icd10_catalog, get_icd10_config
+from history.models import Diagnosis
+from .factories import ConsultFactory, DoctorFactory
+
+SOURCE = """# Catálogo de prueba
+chapter\tA00-B99\tCiertas enfermedades infecciosas y parasitarias
+chapter\tI00-I99\tEnfermedades del sistema circulatorio
+chapter\tJ00-J99\tEnfermedades del sistema respiratorio
+block\tJ00-J06\tInfecciones agudas de las vías respiratorias superiores
+block\tI10-I15\tEnfermedades hipertensivas
+code\tJ06.9\tInfección aguda de las vías respiratorias superiores, no especificada
+code\tJ02.9\tFaringitis aguda, no especificada
+code\tJ02\tFaringitis aguda
+code\tI10\tHipertensión esencial (primaria)
+code\tA09.9\tGastroenteritis y colitis de origen no especificado
+"""
+
+
+class ICD10CatalogTest(TestCase):
+    """Tests para el índice compilado del catálogo CIE-10"""
+
+    def setUp(self):
+        self.catalog = ICD10Catalog(compile_catalog(SOURCE.splitlines(True)))
+
+    def test_lookup(self):
+        self.assertEqual(len(self.catalog), 5)
+        self.assertEqual(self.catalog.lookup(' j06.9 ').description,
+                         'Infección aguda de las vías respiratorias superiores, no especificada')
+        self.assertEqual(self.catalog.lookup('J069').code, 'J06.9')
+        self.assertIn('I10', self.catalog)
+        self.assertNotIn('I11', self.catalog)
+        self.assertNotIn('J0', self.catalog)
+
+    def test_complete_by_code_prefix(self):
+        self.assertEqual([entry.code for entry in self.catalog.complete('j0')], ['J02', 'J02.9', 'J06.9'])
+        self.assertEqual([entry.code for entry in self.catalog.complete('J02.')], ['J02', 'J02.9'])
+        self.assertEqual([entry.code for entry in self.catalog.complete('J0', limit=1)], ['J02'])
+
+    def test_complete_by_description_words(self):
+        self.assertEqual([entry.code for entry in self.catalog.complete('faring')], ['J02', 'J02.9'])
+        # Sin acentos y con todas las palabras
+        self.assertEqual([entry.code for entry in self.catalog.complete('infeccion superiores')], ['J06.9'])
+        self.assertEqual(self.catalog.complete('xx'), [])
+
+    def test_chapters_and_blocks(self):
+        self.assertEqual(self.catalog.chapter('J02.9').number, 'III')
+        self.assertEqual(self.catalog.block('J02.9').first, 'J00')
+        self.assertIsNone(self.catalog.chapter('K29.7'))
+        self.assertIsNone(self.catalog.block('A09.9'))
+
+    def test_rollup(self):
+        counts = [('J02.9', 2), ('J06.9', 1), ('I10', 4), ('A09.9', 1), ('???', 1)]
+        self.assertEqual(
+            [(group['key'], group['count']) for group in self.catalog.rollup(counts)],
+            [('II', 4), ('III', 3), ('I', 1), (None, 1)],
+        )
+        self.assertEqual(
+            [(group['key'], group['count']) for group in self.catalog.rollup(counts, 'block')],
+            [('I10-I15', 4), ('J00-J06', 3), ('A09', 1), (None, 1)],
+        )
+
+
+class ICD10IndexFileTest(TestCase):
+    """Tests para el índice en disco compartido por mmap"""
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.source = os.path.join(self.directory, 'icd10.tsv')
+        with open(self.source, 'w', encoding='utf-8') as source:
+            source.write(SOURCE)
+        get_icd10_catalog.cache_clear()
+
+    def tearDown(self):
+        get_icd10_catalog.cache_clear()
+        shutil.rmtree(self.directory)
+
+    def test_builds_and_maps_index(self):
+        with override_settings(ICD10={'SOURCE_PATH': self.source}):
+            catalog = get_icd10_catalog()
+            self.assertIsInstance(catalog.buffer, mmap.mmap)
+            self.assertTrue(os.path.exists(get_icd10_config()['INDEX_PATH']))
+            self.assertIs(get_icd10_catalog(), catalog)
+
+    def test_stale_index_is_rebuilt(self):
+        with override_settings(ICD10={'SOURCE_PATH': self.source}):
+            get_icd10_catalog()
+            with open(self.source, 'a', encoding='utf-8') as source:
+                source.write('code\tI11\tEnfermedad cardíaca hipertensiva\n')
+            index_path = get_icd10_config()['INDEX_PATH']
+            os.utime(self.source, (os.path.getmtime(index_path) + 10,) * 2)
+            get_icd10_catalog.cache_clear()
+            self.assertIn('I11', get_icd10_catalog())
+
+
+class DiagnosisFormICD10Test(TestCase):
+    """Tests para la validación del código CIE-10 en DiagnosisForm"""
+
+    def form(self, icd_code):
+        return DiagnosisForm(data={'description': 'Diagnóstico', 'icd_code': icd_code})
+
+    def test_normalizes_code(self):
+        form = self.form(' g44.2 ')
+        self.assertTrue(form.is_valid())
+        self.assertEqual(form.cleaned_data['icd_code'], 'G44.2')
+
+    def test_rejects_invalid_codes(self):
+        for icd_code in ('hola', 'J0', 'P98'):
+            form = self.form(icd_code)
+            self.assertFalse(form.is_valid())
+            self.assertIn('icd_code', form.errors)
+
+    def test_strict_mode_requires_catalog_entry(self):
+        self.assertTrue(self.form('J98.4').is_valid())
+        with override_settings(ICD10={'STRICT': True}):
+            self.assertFalse(self.form('J98.4').is_valid())
+            self.assertTrue(self.form('J06.9').is_valid())
+
+
+class ICD10APITest(TestCase):
+    """Tests para el autocompletado y la agrupación por capítulo de la API"""
+
+    def setUp(self):
+        self.doctor = DoctorFactory()
+        self.doctor.user.set_password('testpass123')
+        self.doctor.user.save()
+        mine = ConsultFactory(doctor=self.doctor)
+        Diagnosis.objects.create(consult=mine, description='Hipertensión', icd_code='I10')
+        theirs = ConsultFactory()
+        Diagnosis.objects.create(consult=theirs, description='Faringitis', icd_code='J02.9')
+        self.client = Client()
+        self.client.login(username=self.doctor.user.username, password='testpass123')
+
+    def test_autocomplete_and_detail(self):
+        response = self.client.get(reverse('api-icd10-list'), {'q': 'g43'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([item['code'] for item in response.json()['results']], ['G43', 'G43.0', 'G43.1', 'G43.9'])
+
+        response = self.client.get(reverse('api-icd10-detail', args=['G43.0']))
+        self.assertEqual(response.json()['chapter'], 'VI')
+        self.assertEqual(self.client.get(reverse('api-icd10-detail', args=['G43.7'])).status_code, 404)
+
+    def test_rollup_is_scoped(self):
+        response = self.client.get(reverse('api-icd10-rollup'), {'level': 'chapter'})
+        self.assertEqual(response.json()['results'], [
+            {'key': 'IX', 'title': 'Enfermedades del sistema circulatorio', 'count': 1},
+        ])
+
+        admin = User.objects.create_user(username='admin', password='testpass123', is_staff=True, is_superuser=True)
+        self.client.force_login(admin)
+        response = self.client.get(reverse('api-icd10-rollup'), {'level': 'block'})
+        self.assertEqual([group['key'] for group in response.json()['results']], ['I10-I15', 'J00-J06'])
+        self.assertEqual(self.client.get(reverse('api-icd10-rollup'), {'level': 'x'}).status_code, 400)
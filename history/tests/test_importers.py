@@ -0,0 +1,283 @@
+import io
+import json
+import os
+import tempfile
+from unittest import mock
+from django.db import connection
+from django.test import TestCase, Client
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from history.models import Person, Doctor, Consult, ConsultListing, Diagnosis, Treatment
+from history.importers import PatientImporter, ConsultIngester, iter_rows
+from history.signals import consults_bulk_created
+from datetime import date
+
+HEADER = 'name,last_name,dni,birth_date,gender,phone,email,address,observations\n'
+
+
+def patient_row(n, **overrides):
+    values = {
+        'name': f'Nombre{n}',
+        'last_name': f'Apellido{n}',
+        'dni': f'{20000000 + n}',
+        'birth_date': '1980-05-10',
+        'gender': 'F',
+        'phone': f'+5491100{n:05d}',
+        'email': f'paciente{n}@example.com',
+        'address': 'Calle 123',
+        'observations': '',
+    }
+    values.update(overrides)
+    return ','.join(values.values()) + '\n'
+
+
+class PatientImporterTest(TestCase):
+    """Tests para la importación masiva de pacientes"""
+
+    def setUp(self):
+        Person.objects.create(
+            name='Juan',
+            last_name='Pérez',
+            dni='12345678',
+            birth_date=date(1990, 1, 1),
+            gender='M',
+            phone='+54911234567',
+            email='juan.perez@example.com',
+            address='Calle 123'
+        )
+
+    def run_csv(self, content, **kwargs):
+        fileobj = io.BytesIO(content.encode('utf-8'))
+        return PatientImporter(**kwargs).run(iter_rows(fileobj, 'pacientes.csv'))
+
+    def test_import_valid_rows(self):
+        """Las filas válidas se crean con bulk_create"""
+        content = HEADER + ''.join(patient_row(n) for n in range(5))
+        result = self.run_csv(content, batch_size=2)
+        self.assertEqual(result.total, 5)
+        self.assertEqual(result.created, 5)
+        self.assertEqual(result.errors, [])
+        self.assertEqual(Person.objects.count(), 6)
+
+    def test_invalid_rows_are_reported(self):
+        """Las filas inválidas se informan con su número de fila"""
+        content = HEADER + patient_row(1) + patient_row(2, dni='12AB') + patient_row(3, email='no-es-email')
+        result = self.run_csv(content)
+        self.assertEqual(result.created, 1)
+        self.assertEqual([line for line, _, _ in result.errors], [3, 4])
+        self.assertIn('dni', result.errors[0][2])
+        self.assertIn('email', result.errors[1][2])
+
+    def test_duplicates_against_database_and_file(self):
+        """Se detectan duplicados existentes y dentro del mismo archivo"""
+        content = (
+            HEADER
+            + patient_row(1, dni='12345678')
+            + patient_row(2)
+            + patient_row(3, email='paciente2@example.com')
+        )
+        result = self.run_csv(content)
+        self.assertEqual(result.created, 1)
+        messages = [message for _, _, message in result.errors]
+        self.assertTrue(messages[0].startswith('DNI duplicado'))
+        self.assertTrue(messages[1].startswith('Email duplicado'))
+
+    def test_constant_queries_per_batch(self):
+        """Cada lote usa una consulta de duplicados y una inserción"""
+        content = HEADER + ''.join(patient_row(n) for n in range(50))
+        fileobj = io.BytesIO(content.encode('utf-8'))
+        importer = PatientImporter(batch_size=50)
+        # SAVEPOINT + SELECT duplicados + INSERT + RELEASE
+        with self.assertNumQueries(4):
+            result = importer.run(iter_rows(fileobj, 'pacientes.csv'))
+        self.assertEqual(result.created, 50)
+
+    def test_dry_run_does_not_write(self):
+        """En modo dry-run solo se valida"""
+        result = self.run_csv(HEADER + patient_row(1), dry_run=True)
+        self.assertEqual(result.created, 1)
+        self.assertEqual(Person.objects.count(), 1)
+
+    def test_import_xlsx(self):
+        """Se pueden importar archivos XLSX"""
+        import openpyxl
+
+        wb = openpyxl.Workbook()
+        ws = wb.active
+        ws.append(HEADER.strip().split(','))
+        ws.append(['Ana', 'García', 30111222, date(1985, 5, 15), 'F', '+54911234568', 'ana@example.com', 'Calle 456', None])
+        buffer = io.BytesIO()
+        wb.save(buffer)
+        buffer.seek(0)
+
+        result = PatientImporter().run(iter_rows(buffer, 'pacientes.xlsx'))
+        self.assertEqual(result.errors, [])
+        self.assertTrue(Person.objects.filter(dni='30111222', birth_date=date(1985, 5, 15)).exists())
+
+    def test_management_command_writes_error_file(self):
+        """El comando genera el archivo de errores"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, 'pacientes.csv')
+            errors_path = os.path.join(tmpdir, 'errores.csv')
+            with open(path, 'w', encoding='utf-8') as fileobj:
+                fileobj.write(HEADER + patient_row(1) + patient_row(2, dni='x'))
+
+            out = io.StringIO()
+            call_command('import_patients', path, errors_file=errors_path, stdout=out)
+
+            self.assertIn('1 pacientes creados de 2 filas', out.getvalue())
+            with open(errors_path, encoding='utf-8') as fileobj:
+                lines = fileobj.read().splitlines()
+            self.assertEqual(lines[0], 'row,dni,email,errors')
+            self.assertTrue(lines[1].startswith('3,x,'))
+
+    def test_admin_upload(self):
+        """La carga desde el admin importa el archivo"""
+        User.objects.create_user(
+            username='admin',
+            email='admin@example.com',
+            password='testpass123',
+            is_staff=True,
+            is_superuser=True
+        )
+        client = Client()
+        client.login(username='admin', password='testpass123')
+        response = client.get('/admin/history/person/')
+        self.assertContains(response, '/admin/history/person/import/')
+
+        upload = SimpleUploadedFile('pacientes.csv', (HEADER + patient_row(1)).encode('utf-8'), content_type='text/csv')
+        response = client.post('/admin/history/person/import/', {'file': upload, 'batch_size': 100})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(Person.objects.filter(dni='20000001').exists())
+
+
+class ConsultIngesterTest(TestCase):
+    """Tests para la ingesta masiva de consultas"""
+
+    def setUp(self):
+        doctor_user = User.objects.create_user(
+            username='doctor',
+            email='doctor@example.com',
+            password='testpass123'
+        )
+        self.doctor = Doctor.objects.create(
+            user=doctor_user,
+            license_number='MP12345',
+            specialty='GP',
+            phone='+54911234567'
+        )
+        self.patient = Person.objects.create(
+            name='Juan',
+            last_name='Pérez',
+            dni='12345678',
+            birth_date=date(1990, 1, 1),
+            gender='M',
+            phone='+54911234567',
+            email='juan.perez@example.com',
+            address='Calle 123'
+        )
+
+    def record(self, **overrides):
+        values = {
+            'patient_dni': '12345678',
+            'doctor_license': 'MP12345',
+            'date': '2020-03-01T10:30:00',
+            'consult_type': 'FOLLOW',
+            'reason': 'Control',
+            'symptoms': 'Ninguno',
+            'diagnosis': {'description': 'Hipertensión', 'icd_code': 'I10'},
+            'treatment': {'description': 'Enalapril', 'follow_up_date': '2020-04-01'},
+        }
+        values.update(overrides)
+        return json.dumps(values)
+
+    def test_ingest_ndjson_lines(self):
+        """Se crean consultas con diagnóstico y tratamiento"""
+        lines = [self.record(), '', self.record(diagnosis=None, treatment=None)]
+        result = ConsultIngester(batch_size=10).run(lines)
+        self.assertEqual(result.errors, [])
+        self.assertEqual(result.created, 2)
+        self.assertEqual(Consult.objects.count(), 2)
+        self.assertEqual(Diagnosis.objects.get().icd_code, 'I10')
+        self.assertEqual(Treatment.objects.get().follow_up_date, date(2020, 4, 1))
+
+    def test_unknown_references_and_invalid_json(self):
+        """Se informan DNI/matrícula inexistentes y JSON inválido"""
+        lines = [
+            self.record(patient_dni='99999999'),
+            self.record(doctor_license='XX'),
+            '{no es json',
+            self.record(consult_type='OTRO'),
+        ]
+        result = ConsultIngester().run(lines)
+        self.assertEqual(result.created, 0)
+        messages = [message for _, _, message in result.errors]
+        self.assertIn('Paciente no encontrado', messages[0])
+        self.assertIn('Doctor no encontrado', messages[1])
+        self.assertIn('JSON inválido', messages[2])
+        self.assertIn('consult_type', messages[3])
+
+    def test_constant_queries_per_batch(self):
+        """Los mapas de búsqueda se construyen una vez por lote"""
+        lines = [self.record() for _ in range(30)]
+        with self.assertNumQueries(13):
+            # pacientes + doctores + SAVEPOINT + 3 INSERT + listado (SELECT + DELETE + INSERT)
+            # + resumen de pacientes (2 SELECT + upsert) + RELEASE
+            result = ConsultIngester(batch_size=30).run(lines)
+        self.assertEqual(result.created, 30)
+
+    def test_row_by_row_insert_keeps_listing_consistent(self):
+        """Sin ids devueltos por bulk_create las consultas se guardan una a una sin duplicar el listado"""
+        with mock.patch.object(type(connection.features), 'can_return_rows_from_bulk_insert',
+                               new_callable=mock.PropertyMock, return_value=False):
+            result = ConsultIngester(batch_size=10).run([self.record(), self.record()])
+        self.assertEqual(result.created, 2)
+        self.assertEqual(ConsultListing.objects.count(), 2)
+        self.assertEqual(set(ConsultListing.objects.values_list('icd_code', flat=True)), {'I10'})
+
+    def test_signal_sent_per_batch(self):
+        """consults_bulk_created se envía una vez por lote"""
+        received = []
+
+        def receiver(sender, consults, **kwargs):
+            received.append(len(consults))
+
+        consults_bulk_created.connect(receiver)
+        try:
+            ConsultIngester(batch_size=2).run([self.record() for _ in range(5)])
+        finally:
+            consults_bulk_created.disconnect(receiver)
+        self.assertEqual(received, [2, 2, 1])
+
+    def test_api_bulk_endpoint(self):
+        """El endpoint acepta NDJSON y es solo para administradores"""
+        client = Client()
+        client.login(username='doctor', password='testpass123')
+        body = '\n'.join([self.record(), self.record()])
+        response = client.post('/api/v1/consults/bulk/', body, content_type='application/x-ndjson')
+        self.assertEqual(response.status_code, 403)
+
+        User.objects.create_user(
+            username='admin',
+            email='admin@example.com',
+            password='testpass123',
+            is_staff=True,
+            is_superuser=True
+        )
+        client.login(username='admin', password='testpass123')
+        response = client.post('/api/v1/consults/bulk/', body, content_type='application/x-ndjson')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()['created'], 2)
+        self.assertEqual(Consult.objects.count(), 2)
+
+    def test_management_command(self):
+        """El comando lee NDJSON desde archivo"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, 'consultas.ndjson')
+            with open(path, 'w', encoding='utf-8') as fileobj:
+                fileobj.write(self.record() + '\n' + self.record(patient_dni='1') + '\n')
+
+            out = io.StringIO()
+            call_command('ingest_consults', path, stdout=out)
+            self.assertIn('1 consultas creadas de 2 registros', out.getvalue())
@@ -0,0 +1,121 @@
+import json
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.test import TestCase, Client, override_settings
+from django.urls import reverse
+from history.cache_backends import LocMemCache
+from history.instrumentation import get_current_metrics, start_metrics, stop_metrics
+from history.models import Person
+from datetime import date
+
+INSTRUMENTED_TEMPLATES = [
+    {**settings.TEMPLATES[0], 'BACKEND': 'history.instrumentation.InstrumentedDjangoTemplates', 'NAME': 'django'}
+]
+
+
+@override_settings(
+    MIDDLEWARE=['history.middleware.RequestInstrumentationMiddleware'] + settings.MIDDLEWARE,
+    TEMPLATES=INSTRUMENTED_TEMPLATES,
+)
+class RequestInstrumentationTest(TestCase):
+    """Tests para la instrumentación por petición"""
+
+    def setUp(self):
+        User.objects.create_user(
+            username='admin',
+            email='admin@example.com',
+            password='testpass123',
+            is_staff=True,
+            is_superuser=True
+        )
+        Person.objects.create(
+            name='Juan',
+            last_name='Pérez',
+            dni='12345678',
+            birth_date=date(1990, 1, 1),
+            gender='M',
+            phone='+54911234567',
+            email='juan.perez@example.com',
+            address='Calle 123'
+        )
+        self.client = Client()
+        self.client.login(username='admin', password='testpass123')
+
+    @staticmethod
+    def parse_server_timing(header):
+        metrics = {}
+        for entry in header.split(', '):
+            name, *params = entry.split(';')
+            metrics[name] = dict(param.split('=', 1) for param in params)
+        return metrics
+
+    def test_server_timing_header(self):
+        """patient_list informa consultas, tiempo de base de datos y renderizado"""
+        response = self.client.get(reverse('patient_list'))
+        self.assertEqual(response.status_code, 200)
+
+        timing = self.parse_server_timing(response['Server-Timing'])
+        self.assertEqual(set(timing), {'db', 'db-slowest', 'cache', 'render', 'total'})
+        self.assertRegex(timing['db']['desc'], r'^"\d+ queries"$')
+        self.assertNotEqual(timing['db']['desc'], '"0 queries"')
+        self.assertGreater(float(timing['render']['dur']), 0)
+        self.assertGreaterEqual(float(timing['total']['dur']), float(timing['db']['dur']))
+
+    def test_server_timing_hidden_from_external_clients(self):
+        """Fuera de las IPs internas el encabezado es solo para staff"""
+        external = {'REMOTE_ADDR': '203.0.113.5'}
+        response = Client().get(reverse('login'), **external)
+        self.assertNotIn('Server-Timing', response)
+        self.assertIn('Server-Timing', self.client.get(reverse('patient_list'), **external))
+        with self.settings(REQUEST_INSTRUMENTATION={'SERVER_TIMING_PUBLIC': True}):
+            self.assertIn('Server-Timing', Client().get(reverse('login'), **external))
+
+    def test_structured_log_line(self):
+        """Se escribe una línea JSON con la vista y las métricas"""
+        with self.assertLogs('history.performance', level='INFO') as logs:
+            self.client.get(reverse('patient_list'))
+        record = json.loads(logs.records[-1].getMessage())
+        self.assertEqual(record['url_name'], 'patient_list')
+        self.assertEqual(record['status'], 200)
+        self.assertGreater(record['queries'], 0)
+        self.assertTrue(record['slowest_query'])
+
+    def test_sampling_disabled(self):
+        """Con SAMPLE_RATE=0 no se mide la petición"""
+        with self.settings(REQUEST_INSTRUMENTATION={'SAMPLE_RATE': 0.0}):
+            response = Client().get(reverse('login'))
+        self.assertNotIn('Server-Timing', response)
+
+    def test_slow_request_threshold(self):
+        """Solo se loguean las peticiones más lentas que SLOW_REQUEST_MS"""
+        with self.settings(REQUEST_INSTRUMENTATION={'SLOW_REQUEST_MS': 60000}):
+            with self.assertNoLogs('history.performance', level='INFO'):
+                response = Client().get(reverse('login'))
+        self.assertIn('Server-Timing', response)
+
+
+class InstrumentedCacheTest(TestCase):
+    """Tests para los backends de caché instrumentados"""
+
+    def test_hits_and_misses(self):
+        """get y get_many cuentan aciertos y fallos de la petición en curso"""
+        cache = LocMemCache('instrumentation-test', {})
+        cache.set('a', 1)
+        metrics, token = start_metrics()
+        try:
+            self.assertEqual(cache.get('a'), 1)
+            self.assertIsNone(cache.get('b'))
+            self.assertEqual(cache.get('b', 'x'), 'x')
+            self.assertEqual(cache.get_many(['a', 'c']), {'a': 1})
+        finally:
+            stop_metrics(token)
+        self.assertEqual((metrics.cache_hits, metrics.cache_misses), (2, 3))
+        self.assertIsNone(get_current_metrics())
+
+    def test_without_request(self):
+        """Fuera de una petición medida el backend funciona igual"""
+        with self.settings(CACHES={'default': {'BACKEND': 'history.cache_backends.LocMemCache'}}):
+            cache = caches['default']
+            cache.set('a', 1)
+            self.assertEqual(cache.get('a'), 1)
@@ -0,0 +1,135 @@
+from datetime import date, datetime
+from io import StringIO
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from history.models import Consult, ConsultListing, Diagnosis, Treatment
+from history.reports import ReportGenerator
+from history.signals import consults_bulk_created
+from .factories import ConsultFactory, DoctorFactory, PersonFactory
+
+
+class ConsultListingSyncTest(TestCase):
+    """Tests para el mantenimiento de ConsultListing por señales"""
+
+    def setUp(self):
+        self.patient = PersonFactory(name='Juan', last_name='Pérez', dni='12345678')
+        self.doctor = DoctorFactory(user__first_name='Ana', user__last_name='García', specialty='CARD')
+        self.consult = ConsultFactory(patient=self.patient, doctor=self.doctor, consult_type='FOLLOW')
+
+    def listing(self):
+        return ConsultListing.objects.get(consult=self.consult)
+
+    def test_created_with_consult(self):
+        listing = self.listing()
+        self.assertEqual(listing.patient_name, 'Juan')
+        self.assertEqual(listing.patient_dni, '12345678')
+        self.assertEqual(listing.doctor_name, 'Ana García')
+        self.assertEqual(listing.get_doctor_specialty_display(), 'Cardiología')
+        self.assertEqual(listing.get_consult_type_display(), 'Consulta de Seguimiento')
+        self.assertEqual(listing.icd_code, '')
+
+    def test_diagnosis_and_treatment(self):
+        diagnosis = Diagnosis.objects.create(consult=self.consult, description='HTA', icd_code='I10')
+        Treatment.objects.create(consult=self.consult, description='Enalapril', follow_up_date=date(2025, 7, 1))
+        listing = self.listing()
+        self.assertEqual(listing.icd_code, 'I10')
+        self.assertEqual(listing.follow_up_date, date(2025, 7, 1))
+
+        diagnosis.delete()
+        self.assertEqual(self.listing().icd_code, '')
+
+    def test_related_names_are_propagated(self):
+        self.patient.last_name = 'Gómez'
+        self.patient.save()
+        self.doctor.user.first_name = 'Ana María'
+        self.doctor.user.save()
+        listing = self.listing()
+        self.assertEqual(listing.patient_last_name, 'Gómez')
+        self.assertEqual(listing.doctor_name, 'Ana María García')
+
+    def test_login_does_not_touch_listing(self):
+        """El login guarda solo last_login"""
+        self.doctor.user.set_password('testpass123')
+        self.doctor.user.save()
+        with CaptureQueriesContext(connection) as queries:
+            Client().login(username=self.doctor.user.username, password='testpass123')
+        self.assertFalse([query for query in queries if 'history_consultlisting' in query['sql']])
+
+    def test_deleting_consult_removes_row(self):
+        Diagnosis.objects.create(consult=self.consult, description='HTA', icd_code='I10')
+        self.consult.delete()
+        self.assertFalse(ConsultListing.objects.exists())
+
+    def test_bulk_created_consults(self):
+        consults = Consult.objects.bulk_create([
+            Consult(patient=self.patient, doctor=self.doctor, date=timezone.now(), reason='Control', symptoms='-')
+            for _ in range(3)
+        ])
+        self.assertEqual(ConsultListing.objects.count(), 1)
+        consults_bulk_created.send(sender=Consult, consults=consults)
+        self.assertEqual(ConsultListing.objects.count(), 4)
+
+    def test_rebuild_command(self):
+        """Tras un QuerySet.update (sin señales) el comando regenera las filas"""
+        Consult.objects.update(reason='Actualizado')
+        self.assertNotEqual(self.listing().reason, 'Actualizado')
+        out = StringIO()
+        call_command('rebuild_consult_listing', stdout=out)
+        self.assertEqual(self.listing().reason, 'Actualizado')
+        self.assertIn('1 filas', out.getvalue())
+
+    def test_export_reads_listing(self):
+        wb = ReportGenerator().generate_consults_excel(ConsultListing.objects.all())
+        values = [cell.value for cell in wb.active[7]]
+        self.assertEqual(values[1:3], ['Juan Pérez', 'Dr. Ana García'])
+
+
+@override_settings(ROOT_URLCONF='history.tests.test_query_budgets')
+class ConsultListViewTest(TestCase):
+    """Tests para el listado de consultas sobre ConsultListing"""
+
+    def setUp(self):
+        User.objects.create_user(username='admin', password='testpass123', is_staff=True, is_superuser=True)
+        self.doctor = DoctorFactory()
+        self.doctor.user.set_password('testpass123')
+        self.doctor.user.save()
+        self.mine = ConsultFactory(
+            doctor=self.doctor, patient=PersonFactory(dni='11222333'), consult_type='EMERGENCY',
+            date=timezone.make_aware(datetime(2025, 3, 10, 10, 0)),
+        )
+        self.other = ConsultFactory(
+            patient=PersonFactory(dni='44555666'), consult_type='ROUTINE',
+            date=timezone.make_aware(datetime(2025, 5, 20, 10, 0)),
+        )
+        self.client = Client()
+        self.client.login(username='admin', password='testpass123')
+
+    def listed(self, client=None, **params):
+        response = (client or self.client).get(reverse('consult_list'), params)
+        self.assertEqual(response.status_code, 200)
+        return [consult.pk for consult in response.context['page_obj']]
+
+    def test_no_join_with_patient_or_doctor(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.listed()
+        listing_queries = [query['sql'] for query in queries if 'history_consultlisting' in query['sql']]
+        self.assertTrue(listing_queries)
+        for sql in listing_queries:
+            self.assertNotIn('JOIN', sql)
+
+    def test_filters(self):
+        self.assertEqual(self.listed(), [self.other.pk, self.mine.pk])
+        self.assertEqual(self.listed(search='11222'), [self.mine.pk])
+        self.assertEqual(self.listed(consult_type='ROUTINE'), [self.other.pk])
+        self.assertEqual(self.listed(date_from='2025-03-10', date_to='2025-03-10'), [self.mine.pk])
+        self.assertEqual(self.listed(date_from='2025-04-01'), [self.other.pk])
+
+    def test_doctor_sees_own_consults(self):
+        client = Client()
+        client.login(username=self.doctor.user.username, password='testpass123')
+        self.assertEqual(self.listed(client), [self.mine.pk])
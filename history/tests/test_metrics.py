@@ -0,0 +1,88 @@
+import os
+import subprocess
+import sys
+import tempfile
+from unittest import mock
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.test import TestCase, Client, override_settings
+from django.urls import reverse
+from prometheus_client import REGISTRY
+from history.metrics import track_report, render_metrics
+
+WORKER_SCRIPT = '''
+from history.metrics import AUDIT_LOG_WRITES, REPORTS_IN_PROGRESS
+AUDIT_LOG_WRITES.labels('CREATE').inc(3)
+REPORTS_IN_PROGRESS.labels('pdf').inc()
+'''
+
+
+@override_settings(
+    MIDDLEWARE=[
+        'history.middleware.RequestInstrumentationMiddleware',
+        'history.middleware.MetricsMiddleware',
+    ] + settings.MIDDLEWARE,
+)
+class MetricsTest(TestCase):
+    """Tests para las métricas de Prometheus y el endpoint /metrics"""
+
+    def setUp(self):
+        User.objects.create_user(
+            username='admin',
+            email='admin@example.com',
+            password='testpass123',
+            is_staff=True,
+            is_superuser=True
+        )
+        self.client = Client()
+
+    def sample(self, name, labels):
+        return REGISTRY.get_sample_value(name, labels) or 0
+
+    def test_request_latency_per_view(self):
+        """Cada petición se cuenta en el histograma de su vista"""
+        self.client.login(username='admin', password='testpass123')
+        labels = {'view': 'patient_list', 'method': 'GET', 'status': '200'}
+        before = self.sample('history_request_duration_seconds_count', labels)
+        queries_before = self.sample('history_request_db_queries_count', {'view': 'patient_list'})
+
+        self.client.get(reverse('patient_list'))
+
+        self.assertEqual(self.sample('history_request_duration_seconds_count', labels), before + 1)
+        self.assertEqual(self.sample('history_request_db_queries_count', {'view': 'patient_list'}), queries_before + 1)
+
+    def test_metrics_endpoint_access(self):
+        """/metrics solo responde a IPs internas o con token"""
+        response = self.client.get('/metrics')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b'history_request_duration_seconds', response.content)
+
+        response = self.client.get('/metrics', REMOTE_ADDR='10.0.0.8')
+        self.assertEqual(response.status_code, 403)
+
+        with self.settings(METRICS_TOKEN='secreto'):
+            response = self.client.get('/metrics', REMOTE_ADDR='10.0.0.8', HTTP_AUTHORIZATION='Bearer secreto')
+        self.assertEqual(response.status_code, 200)
+
+    def test_track_report(self):
+        """La generación de reportes registra duración y reportes en curso"""
+        labels = {'report': 'patients', 'format': 'pdf'}
+        before = self.sample('history_report_generation_seconds_count', labels)
+        with track_report('patients', 'pdf'):
+            self.assertEqual(self.sample('history_reports_in_progress', {'format': 'pdf'}), 1)
+        self.assertEqual(self.sample('history_reports_in_progress', {'format': 'pdf'}), 0)
+        self.assertEqual(self.sample('history_report_generation_seconds_count', labels), before + 1)
+
+    def test_multiprocess_aggregation(self):
+        """Con PROMETHEUS_MULTIPROC_DIR se suman los valores de todos los procesos"""
+        with tempfile.TemporaryDirectory() as metrics_dir:
+            env = dict(os.environ, PROMETHEUS_MULTIPROC_DIR=metrics_dir)
+            for _ in range(2):
+                subprocess.run([sys.executable, '-c', WORKER_SCRIPT], env=env, check=True, cwd=settings.BASE_DIR)
+
+            with mock.patch.dict(os.environ, {'PROMETHEUS_MULTIPROC_DIR': metrics_dir}):
+                content, _ = render_metrics()
+
+        content = content.decode()
+        self.assertIn('history_audit_log_writes_total{action="CREATE"} 6.0', content)
+        self.assertIn('history_reports_in_progress{format="pdf"} 2.0', content)
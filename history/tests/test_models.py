@@ -141,6 +141,26 @@ class DoctorModelTest(TestCase):
                 phone='+54911234568'
             )
 
+    def test_names_follow_user(self):
+        """El nombre guardado en Doctor sigue al del usuario"""
+        doctor = Doctor.objects.create(**self.doctor_data)
+        self.assertEqual(doctor.display_name, 'Dr. Juan Médico')
+        self.user.last_name = 'Pérez'
+        self.user.save()
+        doctor.refresh_from_db()
+        self.assertEqual(doctor.display_name, 'Dr. Juan Pérez')
+        self.assertEqual(doctor.sort_name, 'pérez\tdr. juan')
+
+    def test_ordering_without_user_join(self):
+        """Se ordena por apellido y nombre sin JOIN con auth_user"""
+        Doctor.objects.create(**self.doctor_data)
+        user2 = User.objects.create_user(username='doctor2', first_name='ana', last_name='médico')
+        Doctor.objects.create(user=user2, license_number='MP54321', specialty='CARD', phone='+54911234568')
+        with self.assertNumQueries(1) as queries:
+            names = [doctor.full_name for doctor in Doctor.objects.all()]
+        self.assertEqual(names, ['ana médico', 'Dr. Juan Médico'])
+        self.assertNotIn('auth_user', queries.captured_queries[0]['sql'])
+
 
 class ConsultModelTest(TestCase):
     """Tests para el modelo Consult"""
@@ -0,0 +1,100 @@
+import tempfile
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.test import TestCase, Client, override_settings
+from django.urls import reverse
+from history.models import Person
+from history.profiler import ProfileStore, get_profile_store, make_profile_token
+from datetime import date
+
+
+class RequestProfilerTest(TestCase):
+    """Tests para el perfilado de peticiones lentas"""
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        overrides = override_settings(
+            MIDDLEWARE=['history.middleware.RequestProfilerMiddleware'] + settings.MIDDLEWARE,
+            PROFILER={'DIRECTORY': self.tmpdir.name, 'SAMPLE_RATE': 0.0, 'MAX_ENTRIES': 3},
+        )
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+
+        User.objects.create_user(
+            username='admin',
+            email='admin@example.com',
+            password='testpass123',
+            is_staff=True,
+            is_superuser=True
+        )
+        Person.objects.create(
+            name='Juan',
+            last_name='Pérez',
+            dni='12345678',
+            birth_date=date(1990, 1, 1),
+            gender='M',
+            phone='+54911234567',
+            email='juan.perez@example.com',
+            address='Calle 123'
+        )
+        self.client = Client()
+        self.client.login(username='admin', password='testpass123')
+
+    def test_signed_header_captures_profile(self):
+        """Con el encabezado firmado se guarda el perfil con SQL y EXPLAIN"""
+        response = self.client.get(reverse('patient_list'), HTTP_X_PROFILE=make_profile_token())
+        entry = get_profile_store().get(response['X-Profile-Id'])
+
+        self.assertEqual(entry['view'], 'patient_list')
+        self.assertTrue(entry['forced'])
+        self.assertEqual(entry['query_count'], len(entry['queries']))
+        self.assertGreater(entry['query_count'], 0)
+        self.assertTrue(entry['explain'])
+        self.assertTrue(entry['explain'][0]['plan'])
+        self.assertIn('cumulative', entry['stats'])
+        # No se guardan los parámetros de las consultas
+        self.assertNotIn('params', entry['queries'][0])
+
+    def test_invalid_header_is_ignored(self):
+        """Un token inválido no activa el perfilado"""
+        response = self.client.get(reverse('patient_list'), HTTP_X_PROFILE='profile:falso')
+        self.assertNotIn('X-Profile-Id', response)
+        self.assertEqual(get_profile_store().list(), [])
+
+    def test_sampled_requests_below_threshold_are_discarded(self):
+        """Las muestras más rápidas que SLOW_REQUEST_MS no se guardan"""
+        profiler = {'DIRECTORY': self.tmpdir.name, 'SAMPLE_RATE': 1.0, 'SLOW_REQUEST_MS': 60000}
+        with self.settings(PROFILER=profiler):
+            Client().get(reverse('login'))
+        self.assertEqual(get_profile_store().list(), [])
+
+        with self.settings(PROFILER={**profiler, 'SLOW_REQUEST_MS': 0}):
+            Client().get(reverse('login'))
+        entries = get_profile_store().list()
+        self.assertEqual(len(entries), 1)
+        self.assertFalse(entries[0]['forced'])
+
+    def test_ring_buffer_is_bounded(self):
+        """El buffer conserva solo los MAX_ENTRIES perfiles más nuevos"""
+        store = ProfileStore(self.tmpdir.name, max_entries=3)
+        ids = [store.save({'method': 'GET', 'path': f'/{n}/'}) for n in range(5)]
+        self.assertEqual(store.entry_ids(), ids[:1:-1])
+        self.assertIsNone(store.get('../../etc/passwd'))
+
+    def test_admin_views(self):
+        """Los superusuarios navegan los perfiles desde el admin"""
+        response = self.client.get(reverse('patient_list'), HTTP_X_PROFILE=make_profile_token())
+        entry_id = response['X-Profile-Id']
+
+        response = self.client.get(reverse('admin_profile_list'))
+        self.assertContains(response, reverse('admin_profile_detail', args=[entry_id]))
+        self.assertContains(response, 'X-Profile: ')
+
+        response = self.client.get(reverse('admin_profile_detail', args=[entry_id]))
+        self.assertContains(response, 'cProfile')
+
+        User.objects.create_user(username='staff', password='testpass123', is_staff=True)
+        client = Client()
+        client.login(username='staff', password='testpass123')
+        self.assertEqual(client.get(reverse('admin_profile_list')).status_code, 403)
@@ -0,0 +1,175 @@
+import pytest
+from django.contrib.auth.models import User
+from django.test import TestCase, Client, override_settings
+from django.urls import path, reverse
+from django.utils import timezone
+from crud.urls_test import urlpatterns as base_urlpatterns
+from history import views
+from history.models import Person, Doctor, Consult
+from datetime import date
+from .query_budget import QueryBudgetMixin, QueryCapture
+
+# consults/list.html enlaza a consult_edit, que no tiene vista propia: se usa el
+# detalle para poder renderizar el listado
+urlpatterns = base_urlpatterns + [
+    path('consults/<int:pk>/edit/', views.consult_detail, name='consult_edit'),
+]
+
+
+@override_settings(ROOT_URLCONF=__name__)
+class QueryBudgetTest(QueryBudgetMixin, TestCase):
+    """Presupuestos de consultas: el número de consultas no depende de la cantidad de filas"""
+
+    def setUp(self):
+        User.objects.create_user(
+            username='admin',
+            email='admin@example.com',
+            password='testpass123',
+            is_staff=True,
+            is_superuser=True
+        )
+        doctor_user = User.objects.create_user(
+            username='doctor',
+            email='doctor@example.com',
+            password='testpass123',
+            first_name='Ana',
+            last_name='García'
+        )
+        self.doctor = Doctor.objects.create(
+            user=doctor_user,
+            license_number='MP12345',
+            specialty='GP',
+            phone='+54911234567'
+        )
+        self.client = Client()
+        self.client.login(username='admin', password='testpass123')
+
+    def create_patient(self, index):
+        return Person.objects.create(
+            name=f'Paciente{index}',
+            last_name='Pérez',
+            dni=f'{10000000 + index}',
+            birth_date=date(1990, 1, 1),
+            gender='M',
+            phone='+54911234567',
+            email=f'paciente{index}@example.com',
+            address='Calle 123'
+        )
+
+    def populate_patients(self, total):
+        for index in range(Person.objects.count(), total):
+            self.create_patient(index)
+
+    def populate_consults(self, total, patient=None):
+        """Cada consulta con un paciente distinto (salvo que se pase uno) y el médico de prueba"""
+        for index in range(Consult.objects.count(), total):
+            Consult.objects.create(
+                patient=patient or self.create_patient(index),
+                doctor=self.doctor,
+                date=timezone.now(),
+                consult_type='ROUTINE',
+                reason=f'Control {index}'
+            )
+
+    def get_ok(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def test_patient_list(self):
+        """patient_list: O(1) consultas en la cantidad de pacientes"""
+        self.assertQueryBudget(8, lambda: self.get_ok(reverse('patient_list')), self.populate_patients)
+
+    def test_consult_list(self):
+        """consult_list: paciente y médico de cada fila vienen en el mismo JOIN"""
+        self.assertQueryBudget(8, lambda: self.get_ok(reverse('consult_list')), self.populate_consults)
+
+    def test_dashboard_doctor(self):
+        """dashboard de un médico: las consultas recientes no disparan una consulta por fila"""
+        self.client.login(username='doctor', password='testpass123')
+        self.assertQueryBudget(12, lambda: self.get_ok(reverse('dashboard')), self.populate_consults)
+
+    def test_patient_detail(self):
+        """patient_detail: no depende de la cantidad de consultas del paciente"""
+        patient = self.create_patient(999)
+        self.assertQueryBudget(
+            8,
+            lambda: self.get_ok(reverse('patient_detail', args=[patient.pk])),
+            lambda total: self.populate_consults(total, patient=patient)
+        )
+
+    def test_api_consult_list(self):
+        """API de consultas: select_related de paciente y médico"""
+        self.assertQueryBudget(8, lambda: self.get_ok(reverse('api-consult-list')), self.populate_consults)
+
+
+class QueryCaptureTest(TestCase):
+    """Tests para el detector de consultas repetidas"""
+
+    def setUp(self):
+        user = User.objects.create_user(username='doctor', password='testpass123')
+        doctor = Doctor.objects.create(user=user, license_number='MP1', specialty='GP', phone='+54911234567')
+        for index in range(4):
+            patient = Person.objects.create(
+                name=f'Paciente{index}',
+                last_name='Pérez',
+                dni=f'{20000000 + index}',
+                birth_date=date(1990, 1, 1),
+                gender='F',
+                phone='+54911234567',
+                email=f'p{index}@example.com',
+                address='Calle 123'
+            )
+            Consult.objects.create(
+                patient=patient, doctor=doctor, date=timezone.now(), consult_type='ROUTINE', reason='Control'
+            )
+
+    def test_detects_n_plus_one_in_code(self):
+        """Un acceso a la relación dentro de un bucle se informa con su línea de código"""
+        with QueryCapture() as capture:
+            names = [consult.patient.name for consult in Consult.objects.all()]
+        self.assertEqual(len(names), 4)
+
+        repeated = capture.repeated(max_repeats=2)
+        self.assertEqual(len(repeated), 1)
+        count, location, shape = repeated[0]
+        self.assertEqual(count, 4)
+        self.assertIn('test_query_budgets.py', location)
+        self.assertIn('history_person', shape)
+
+    def test_detects_n_plus_one_in_template(self):
+        """Si la consulta sale de una plantilla se informa la plantilla y la línea"""
+        from django.template import engines
+        template = engines['django'].from_string(
+            '{% for consult in consults %}\n{{ consult.patient.name }}\n{% endfor %}'
+        )
+        with QueryCapture() as capture:
+            template.render({'consults': Consult.objects.all()})
+
+        count, location, shape = capture.repeated()[0]
+        self.assertEqual(count, 4)
+        self.assertIn(':2 ', location)
+        self.assertIn('consult.patient.name', location)
+
+    def test_in_lists_share_shape(self):
+        """Los IN de distinto largo tienen la misma forma"""
+        with QueryCapture() as capture:
+            list(Person.objects.filter(pk__in=[1, 2]))
+            list(Person.objects.filter(pk__in=[1, 2, 3]))
+        self.assertEqual(capture.queries[0].shape, capture.queries[1].shape)
+
+    def test_select_related_is_clean(self):
+        """Con select_related no hay consultas repetidas"""
+        with QueryCapture() as capture:
+            [consult.patient.name for consult in Consult.objects.select_related('patient')]
+        self.assertEqual(len(capture), 1)
+        self.assertEqual(capture.repeated(), [])
+
+
+@pytest.mark.django_db
+@pytest.mark.query_budget(max_queries=3)
+def test_query_budget_marker(query_budget):
+    """El fixture query_budget aplica el presupuesto del marcador"""
+    Person.objects.filter(is_active=True).count()
+    Consult.objects.select_related('patient', 'doctor__user').count()
+    assert len(query_budget) == 2
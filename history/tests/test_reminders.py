@@ -0,0 +1,202 @@
+import smtplib
+import socketserver
+import threading
+from datetime import timedelta
+from io import StringIO
+from django.core import mail
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from history.models import FollowUpReminder, Treatment
+from history.reminders import ReminderSender
+from .factories import ConsultFactory, DoctorFactory, PersonFactory
+
+
+class FakeConnection:
+    """Conexión SMTP que falla con los errores indicados por destinatario"""
+
+    def __init__(self, errors=None):
+        self.errors = errors or {}
+        self.sent = []
+        self.opened = 0
+
+    def open(self):
+        self.opened += 1
+
+    def close(self):
+        pass
+
+    def send_messages(self, messages):
+        for message in messages:
+            error = self.errors.get(message.to[0])
+            if error:
+                raise error
+            self.sent.append(message)
+        return len(messages)
+
+
+class ReminderSenderTest(TestCase):
+    """Tests para el envío de recordatorios de seguimiento"""
+
+    def setUp(self):
+        self.today = timezone.localdate()
+        self.doctor = DoctorFactory(user__first_name='Ana', user__last_name='García')
+
+    def follow_up(self, email, days=1):
+        consult = ConsultFactory(
+            patient=PersonFactory(name='Juan', email=email), doctor=self.doctor,
+            date=timezone.now() - timedelta(days=20),
+        )
+        return Treatment.objects.create(
+            consult=consult, description='-', follow_up_date=self.today + timedelta(days=days)
+        )
+
+    def run_sender(self, **kwargs):
+        return ReminderSender(today=self.today, rate=0, **kwargs).run()
+
+    def test_sends_once(self):
+        treatment = self.follow_up('juan@example.com')
+        self.follow_up('lejos@example.com', days=10)
+        result = self.run_sender()
+        self.assertEqual(result.sent, 1)
+        self.assertEqual(len(mail.outbox), 1)
+        message = mail.outbox[0]
+        self.assertEqual(message.to, ['juan@example.com'])
+        self.assertIn(treatment.follow_up_date.strftime('%d/%m/%Y'), message.subject)
+        self.assertIn('Dr. Ana García', message.body)
+        self.assertEqual(message.alternatives[0][1], 'text/html')
+
+        # Repetir la corrida no reenvía
+        result = self.run_sender()
+        self.assertEqual((result.queued, result.sent), (0, 0))
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(FollowUpReminder.objects.get().status, 'SENT')
+
+    def test_new_date_gets_new_reminder(self):
+        treatment = self.follow_up('juan@example.com')
+        self.run_sender()
+        treatment.follow_up_date = self.today
+        treatment.save()
+        self.assertEqual(self.run_sender().sent, 1)
+        self.assertEqual(FollowUpReminder.objects.count(), 2)
+
+    def test_transient_error_retried_with_backoff(self):
+        self.follow_up('juan@example.com')
+        self.follow_up('ana@example.com')
+        connection = FakeConnection({'juan@example.com': smtplib.SMTPServerDisconnected('desconectado')})
+        result = self.run_sender(connection=connection)
+        self.assertEqual((result.sent, result.failed), (1, 1))
+        self.assertEqual(connection.opened, 2)  # se reabrió tras el error
+
+        reminder = FollowUpReminder.objects.get(email='juan@example.com')
+        self.assertEqual((reminder.status, reminder.attempts), ('FAILED', 1))
+        self.assertGreater(reminder.next_attempt_at, timezone.now())
+
+        # Antes de la espera no se reintenta; después sí
+        self.assertEqual(self.run_sender(connection=FakeConnection()).sent, 0)
+        FollowUpReminder.objects.filter(pk=reminder.pk).update(next_attempt_at=timezone.now())
+        connection = FakeConnection()
+        self.assertEqual(self.run_sender(connection=connection).sent, 1)
+        self.assertEqual([message.to for message in connection.sent], [['juan@example.com']])
+
+    def test_permanent_error_not_retried(self):
+        self.follow_up('juan@example.com')
+        error = smtplib.SMTPRecipientsRefused({'juan@example.com': (550, b'No existe')})
+        self.run_sender(connection=FakeConnection({'juan@example.com': error}))
+        FollowUpReminder.objects.update(next_attempt_at=timezone.now())
+        self.assertEqual(self.run_sender(connection=FakeConnection()).sent, 0)
+
+    def test_claimed_elsewhere_is_skipped(self):
+        self.follow_up('juan@example.com')
+        sender = ReminderSender(today=self.today, rate=0)
+        items = sender.due_items()
+        sender.queue(items)
+        FollowUpReminder.objects.update(status='SENDING')
+        result = self.run_sender()
+        self.assertEqual(result.sent, 0)
+        self.assertEqual(len(mail.outbox), 0)
+
+    def test_throttle(self):
+        for index in range(3):
+            self.follow_up(f'p{index}@example.com')
+        waits = []
+        ReminderSender(today=self.today, rate=2, sleep=waits.append).run()
+        self.assertEqual(len(waits), 2)
+        self.assertTrue(all(0 < wait <= 0.5 for wait in waits))
+
+    def test_command_dry_run(self):
+        self.follow_up('juan@example.com')
+        out = StringIO()
+        call_command('send_follow_up_reminders', '--dry-run', stdout=out)
+        self.assertIn('1 recordatorios debidos', out.getvalue())
+        self.assertFalse(FollowUpReminder.objects.exists())
+
+
+class SMTPStubHandler(socketserver.StreamRequestHandler):
+    """Lo mínimo de SMTP que usa smtplib sin TLS ni autenticación; guarda los destinatarios"""
+
+    def reply(self, line):
+        self.wfile.write(f'{line}\r\n'.encode())
+
+    def handle(self):
+        self.server.connections += 1
+        recipients = []
+        self.reply('220 stub')
+        for raw in self.rfile:
+            command = raw.decode().strip()
+            verb = command[:4].upper()
+            if verb == 'EHLO':
+                self.reply('250 stub')
+            elif verb == 'RCPT':
+                recipients.append(command.split(':', 1)[1].strip().strip('<>'))
+                self.reply('250 OK')
+            elif verb == 'DATA':
+                self.reply('354 fin con <CRLF>.<CRLF>')
+                for data_line in self.rfile:
+                    if data_line in (b'.\r\n', b'.\n'):
+                        break
+                self.server.received.append(recipients)
+                recipients = []
+                self.reply('250 OK')
+            elif verb == 'RSET':
+                recipients = []
+                self.reply('250 OK')
+            elif verb == 'QUIT':
+                self.reply('221 chau')
+                return
+            else:  # HELO, MAIL, NOOP
+                self.reply('250 OK')
+
+
+class LocalSMTPServerTest(TestCase):
+    """Envío real por SMTP contra un servidor local mínimo (socketserver)"""
+
+    def setUp(self):
+        self.server = socketserver.ThreadingTCPServer(('127.0.0.1', 0), SMTPStubHandler)
+        self.server.daemon_threads = True
+        self.server.connections = 0
+        self.server.received = []
+        self.thread = threading.Thread(target=self.server.serve_forever, kwargs={'poll_interval': 0.05}, daemon=True)
+        self.thread.start()
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.thread.join(timeout=2)
+
+    def test_batch_over_one_connection(self):
+        doctor = DoctorFactory()
+        for index in range(3):
+            consult = ConsultFactory(
+                patient=PersonFactory(email=f'p{index}@example.com'), doctor=doctor,
+                date=timezone.now() - timedelta(days=20),
+            )
+            Treatment.objects.create(consult=consult, description='-', follow_up_date=timezone.localdate())
+
+        port = self.server.server_address[1]
+        with override_settings(EMAIL_BACKEND='django.core.mail.backends.smtp.EmailBackend',
+                               EMAIL_HOST='127.0.0.1', EMAIL_PORT=port, EMAIL_USE_TLS=False):
+            result = ReminderSender(rate=0, batch_size=2).run()
+        self.assertEqual(result.sent, 3)
+        self.assertEqual(sorted(rcpt[0] for rcpt in self.server.received), ['p0@example.com', 'p1@example.com', 'p2@example.com'])
+        self.assertEqual(self.server.connections, 1)
@@ -0,0 +1,79 @@
+import io
+import subprocess
+import sys
+from django.conf import settings
+from django.test import TestCase, Client, override_settings
+from django.contrib.auth.models import User
+from history.models import Person
+from history.reports import ReportGenerator, get_report_backend, workbook_to_bytes
+from datetime import date
+
+
+class ReportBackendsTest(TestCase):
+    """Tests para los backends de reportes cargados al primer uso"""
+
+    def setUp(self):
+        Person.objects.create(
+            name='Juan',
+            last_name='Pérez',
+            dni='12345678',
+            birth_date=date(1990, 1, 1),
+            gender='M',
+            phone='+54911234567',
+            email='juan.perez@example.com',
+            address='Calle 123'
+        )
+
+    def test_urlconf_does_not_import_report_engines(self):
+        """Cargar las URLs no importa ReportLab ni openpyxl"""
+        code = (
+            'import django, sys; django.setup(); import crud.urls; '
+            "print('reportlab' in sys.modules, 'openpyxl' in sys.modules)"
+        )
+        output = subprocess.run(
+            [sys.executable, '-c', code],
+            cwd=settings.BASE_DIR,
+            env={'DJANGO_SETTINGS_MODULE': 'crud.settings_test', 'PATH': ''},
+            capture_output=True, text=True, check=True
+        ).stdout
+        self.assertEqual(output.split(), ['False', 'False'])
+
+    def test_unknown_format(self):
+        """Un formato no registrado lanza ValueError"""
+        with self.assertRaises(ValueError):
+            get_report_backend('csv')
+
+    def test_backend_is_reused(self):
+        """El backend se instancia una sola vez por proceso"""
+        self.assertIs(get_report_backend('pdf'), get_report_backend('pdf'))
+
+    def test_patients_pdf_and_excel(self):
+        """Los reportes de pacientes se generan en ambos formatos"""
+        generator = ReportGenerator()
+        patients = Person.objects.all()
+
+        buffer = generator.generate_patients_pdf(patients)
+        self.assertTrue(buffer.getvalue().startswith(b'%PDF'))
+
+        content = workbook_to_bytes(generator.generate_patients_excel(patients))
+        self.assertTrue(content.startswith(b'PK'))
+
+    @override_settings(ROOT_URLCONF='crud.urls')
+    def test_statistics_excel_report_view(self):
+        """La vista de estadísticas devuelve un Excel válido"""
+        User.objects.create_user(
+            username='admin',
+            email='admin@example.com',
+            password='testpass123',
+            is_staff=True,
+            is_superuser=True
+        )
+        client = Client()
+        client.login(username='admin', password='testpass123')
+        response = client.post('/reports/statistics/', {'format': 'excel'})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.content.startswith(b'PK'))
+
+        import openpyxl
+        wb = openpyxl.load_workbook(io.BytesIO(response.content))
+        self.assertEqual(wb['Resumen General']['B3'].value, 1)
@@ -0,0 +1,121 @@
+from django.contrib.auth.models import User
+from django.test import TestCase, Client
+from django.urls import reverse
+from history.models import Consult, Diagnosis, Treatment
+from history.search import install_search_index, search_consults
+from .factories import ConsultFactory, DoctorFactory
+
+
+class ConsultSearchTest(TestCase):
+    """Tests para la búsqueda de texto en las consultas (FTS5 en SQLite)"""
+
+    @classmethod
+    def setUpTestData(cls):
+        # Los tests corren sin migraciones: la tabla y los triggers se crean acá
+        install_search_index()
+
+    def setUp(self):
+        self.doctor = DoctorFactory()
+        self.other_doctor = DoctorFactory()
+        self.migraine = ConsultFactory(
+            doctor=self.doctor, consult_type='FIRST',
+            reason='Cefalea intensa', symptoms='Dolor de cabeza pulsátil y náuseas',
+        )
+        Diagnosis.objects.create(consult=self.migraine, description='Migraña sin aura', icd_code='G43.0')
+        self.fever = ConsultFactory(
+            doctor=self.doctor, consult_type='EMERGENCY',
+            reason='Fiebre alta', symptoms='Dolores musculares',
+        )
+        Treatment.objects.create(consult=self.fever, description='Reposo', medications='Paracetamol 500mg')
+        self.theirs = ConsultFactory(
+            doctor=self.other_doctor, consult_type='FIRST',
+            reason='Control', symptoms='Dolor de cabeza leve',
+        )
+
+    def ids(self, text, **kwargs):
+        return [item['consult_id'] for item in search_consults(text, **kwargs).items]
+
+    def test_matches_all_fields(self):
+        self.assertEqual(self.ids('migraña'), [self.migraine.pk])
+        self.assertEqual(self.ids('paracetamol'), [self.fever.pk])
+        self.assertEqual(self.ids('G43'), [self.migraine.pk])
+        # Sin acentos y por prefijo
+        self.assertEqual(self.ids('cefalea nauseas'), [self.migraine.pk])
+        self.assertEqual(set(self.ids('dolor')), {self.migraine.pk, self.fever.pk, self.theirs.pk})
+
+    def test_doctor_scope(self):
+        self.assertEqual(set(self.ids('cabeza', doctor_id=self.doctor.pk)), {self.migraine.pk})
+        self.assertEqual(set(self.ids('cabeza')), {self.migraine.pk, self.theirs.pk})
+
+    def test_index_follows_edits_and_deletes(self):
+        Consult.objects.filter(pk=self.theirs.pk).update(reason='Lumbalgia')
+        self.assertEqual(self.ids('lumbalgia'), [self.theirs.pk])
+        Treatment.objects.filter(consult=self.fever).delete()
+        self.assertEqual(self.ids('paracetamol'), [])
+        self.migraine.delete()
+        self.assertEqual(self.ids('migraña'), [])
+
+    def test_snippet_is_highlighted_and_escaped(self):
+        Consult.objects.filter(pk=self.theirs.pk).update(reason='<b>Vértigo</b> al levantarse')
+        item = search_consults('vertigo').items[0]
+        self.assertIn('<mark>Vértigo</mark>', item['snippet'])
+        self.assertIn('&lt;b&gt;', item['snippet'])
+
+    def test_facets(self):
+        results = search_consults('dolor')
+        self.assertEqual(results.total, 3)
+        self.assertEqual(
+            [(facet['value'], facet['count']) for facet in results.type_facets],
+            [('FIRST', 2), ('EMERGENCY', 1)],
+        )
+        self.assertEqual([(facet['value'], facet['count']) for facet in results.icd_facets], [('G43.0', 1)])
+
+        results = search_consults('dolor', consult_type='FIRST')
+        self.assertEqual(results.total, 2)
+        # La faceta elegida sigue mostrando las demás opciones
+        self.assertEqual(len(results.type_facets), 2)
+        self.assertEqual(search_consults('dolor', icd_code='G43.0').total, 1)
+
+    def test_operators_are_not_interpreted(self):
+        self.assertEqual(self.ids('dolor" OR NEAR('), [])
+        self.assertEqual(search_consults('  ').total, 0)
+
+
+class ConsultSearchViewTest(TestCase):
+    """Tests para la vista y la API de búsqueda de consultas"""
+
+    @classmethod
+    def setUpTestData(cls):
+        install_search_index()
+
+    def setUp(self):
+        User.objects.create_user(username='admin', password='testpass123', is_staff=True, is_superuser=True)
+        self.doctor = DoctorFactory()
+        self.doctor.user.set_password('testpass123')
+        self.doctor.user.save()
+        self.mine = ConsultFactory(doctor=self.doctor, reason='Tos seca persistente')
+        self.theirs = ConsultFactory(reason='Tos con flemas')
+
+    def client_for(self, username):
+        client = Client()
+        client.login(username=username, password='testpass123')
+        return client
+
+    def test_view(self):
+        response = self.client_for(self.doctor.user.username).get(reverse('consult_search'), {'q': 'tos'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([item['consult_id'] for item in response.context['results'].items], [self.mine.pk])
+        self.assertContains(response, '<mark>Tos</mark>')
+
+        response = self.client_for('admin').get(reverse('consult_search'), {'q': 'tos'})
+        self.assertEqual(response.context['results'].total, 2)
+
+    def test_api(self):
+        url = reverse('api-consult-search-list')
+        client = self.client_for(self.doctor.user.username)
+        response = client.get(url, {'q': 'tos'})
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual([item['consult_id'] for item in data['results']], [self.mine.pk])
+        self.assertEqual(data['facets']['consult_type'][0]['count'], 1)
+        self.assertEqual(client.get(url).status_code, 400)
@@ -0,0 +1,141 @@
+import re
+from datetime import timedelta
+from io import StringIO
+from django.contrib.auth.models import User
+from django.contrib.sessions.models import Session
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from history.models import UserProfile
+from history.sessions import (
+    SIGNED_COOKIE, STORAGE_KEY, check_session_cache, is_signed_key, sweep_expired_sessions
+)
+
+CSRF_INPUT_RE = re.compile(r'name="csrfmiddlewaretoken" value="([^"]+)"')
+
+
+@override_settings(SESSION_ENGINE='history.sessions', SESSION_SIGNED_COOKIE_ROLES=['reception'])
+class SessionEngineTest(TestCase):
+    """Tests para el motor de sesiones cached_db con cookies firmadas por rol"""
+
+    def setUp(self):
+        cache.clear()
+        User.objects.create_user(
+            username='admin',
+            email='admin@example.com',
+            password='testpass123',
+            is_staff=True,
+            is_superuser=True
+        )
+        reception = User.objects.create_user(username='reception', password='testpass123')
+        UserProfile.objects.create(user=reception, role='RECEPTION', phone='+54911234567')
+
+    def login(self, username):
+        client = Client(enforce_csrf_checks=True)
+        token = CSRF_INPUT_RE.search(client.get(reverse('login')).content.decode()).group(1)
+        response = client.post(reverse('login'), {
+            'username': username, 'password': 'testpass123', 'csrfmiddlewaretoken': token
+        })
+        self.assertEqual(response.status_code, 302)
+        return client
+
+    def session_queries(self, client, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return [query['sql'] for query in queries if 'django_session' in query['sql']]
+
+    def test_cached_db_reads_from_cache(self):
+        """Con la sesión en caché las peticiones no consultan django_session"""
+        client = self.login('admin')
+        session_key = client.cookies['sessionid'].value
+        self.assertFalse(is_signed_key(session_key))
+        self.assertTrue(Session.objects.filter(session_key=session_key).exists())
+        self.assertEqual(self.session_queries(client, reverse('patient_list')), [])
+
+    def test_cache_miss_falls_back_to_database(self):
+        """Si la caché se vacía la sesión sigue válida (se lee una vez de la base)"""
+        client = self.login('admin')
+        cache.clear()
+        self.assertEqual(len(self.session_queries(client, reverse('patient_list'))), 1)
+        self.assertEqual(self.session_queries(client, reverse('patient_list')), [])
+
+    @override_settings(SESSION_ENGINE='django.contrib.sessions.backends.db')
+    def test_db_engine_queries_every_request(self):
+        """Referencia: el motor db lee django_session en cada petición"""
+        client = self.login('admin')
+        self.assertEqual(len(self.session_queries(client, reverse('patient_list'))), 1)
+
+    def test_signed_cookie_for_low_privilege_role(self):
+        """Recepción usa cookie firmada: sin filas en django_session ni consultas de sesión"""
+        client = self.login('reception')
+        session_key = client.cookies['sessionid'].value
+        self.assertTrue(is_signed_key(session_key))
+        self.assertFalse(Session.objects.exists())
+        self.assertEqual(self.session_queries(client, reverse('patient_list')), [])
+
+        # El CSRF guardado en la sesión sigue funcionando con la cookie firmada
+        response = client.get(reverse('patient_list'))
+        self.assertEqual(response.wsgi_request.session[STORAGE_KEY], SIGNED_COOKIE)
+
+    def test_tampered_signed_cookie_is_rejected(self):
+        """Una cookie firmada alterada no autentica"""
+        client = self.login('reception')
+        client.cookies['sessionid'] = client.cookies['sessionid'].value[:-2] + 'xx'
+        response = client.get(reverse('patient_list'))
+        self.assertEqual(response.status_code, 302)
+        self.assertIn(reverse('login'), response['Location'])
+
+    def test_logout_clears_signed_cookie(self):
+        """Al cerrar sesión la cookie firmada deja de valer"""
+        client = self.login('reception')
+        client.get(reverse('logout'))
+        response = client.get(reverse('patient_list'))
+        self.assertEqual(response.status_code, 302)
+
+
+class SessionCacheCheckTest(TestCase):
+    """Tests para el aviso de history.sessions con una caché por proceso"""
+
+    @override_settings(SESSION_ENGINE='history.sessions')
+    def test_warns_with_per_process_cache(self):
+        messages = check_session_cache()
+        self.assertEqual([message.id for message in messages], ['history.W001'])
+
+    @override_settings(SESSION_ENGINE='history.sessions', CACHES={
+        'default': {'BACKEND': 'django.core.cache.backends.db.DatabaseCache', 'LOCATION': 'cache_table'},
+    })
+    def test_shared_cache_is_accepted(self):
+        self.assertEqual(check_session_cache(), [])
+
+    @override_settings(SESSION_ENGINE='django.contrib.sessions.backends.db')
+    def test_other_engines_are_ignored(self):
+        self.assertEqual(check_session_cache(), [])
+
+
+class SessionSweeperTest(TestCase):
+    """Tests para la limpieza de sesiones vencidas"""
+
+    def setUp(self):
+        now = timezone.now()
+        for index in range(7):
+            Session.objects.create(session_key=f'expired{index:04d}', session_data='', expire_date=now - timedelta(hours=1))
+        Session.objects.create(session_key='activesession', session_data='', expire_date=now + timedelta(hours=1))
+
+    def test_sweep_in_batches(self):
+        """Se borran solo las vencidas, en lotes"""
+        with CaptureQueriesContext(connection) as queries:
+            deleted = sweep_expired_sessions(batch_size=3)
+        self.assertEqual(deleted, 7)
+        self.assertEqual(list(Session.objects.values_list('session_key', flat=True)), ['activesession'])
+        deletes = [query for query in queries if query['sql'].startswith('DELETE')]
+        self.assertEqual(len(deletes), 3)
+
+    def test_management_command(self):
+        out = StringIO()
+        call_command('sweep_sessions', batch_size=100, stdout=out)
+        self.assertIn('7 sesiones vencidas borradas', out.getvalue())
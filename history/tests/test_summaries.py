@@ -0,0 +1,115 @@
+from datetime import date, datetime, timedelta
+from io import StringIO
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase, Client
+from django.urls import reverse
+from django.utils import timezone
+from history.models import Consult, PatientSummary, Treatment
+from history.signals import consults_bulk_created
+from .factories import ConsultFactory, DoctorFactory, PersonFactory
+
+
+def aware(*args):
+    return timezone.make_aware(datetime(*args))
+
+
+class PatientSummarySyncTest(TestCase):
+    """Tests para el mantenimiento de PatientSummary por señales"""
+
+    def setUp(self):
+        self.patient = PersonFactory()
+        self.doctor = DoctorFactory()
+        self.first = ConsultFactory(patient=self.patient, doctor=self.doctor, date=aware(2025, 3, 1, 10, 0))
+        self.last = ConsultFactory(patient=self.patient, doctor=self.doctor, date=aware(2025, 6, 1, 10, 0))
+
+    def summary(self):
+        return PatientSummary.objects.get(patient=self.patient)
+
+    def test_counts_and_dates(self):
+        summary = self.summary()
+        self.assertEqual(summary.consult_count, 2)
+        self.assertEqual(summary.first_consult_date, self.first.date)
+        self.assertEqual(summary.last_consult_date, self.last.date)
+        self.assertIsNone(summary.next_follow_up_date)
+
+    def test_follow_up_after_last_visit(self):
+        """Solo cuentan los seguimientos posteriores a la última consulta"""
+        Treatment.objects.create(consult=self.first, description='-', follow_up_date=date(2025, 4, 1))
+        self.assertIsNone(self.summary().next_follow_up_date)
+        treatment = Treatment.objects.create(consult=self.last, description='-', follow_up_date=date(2025, 7, 1))
+        self.assertEqual(self.summary().next_follow_up_date, date(2025, 7, 1))
+
+        treatment.delete()
+        self.assertIsNone(self.summary().next_follow_up_date)
+
+    def test_delete_and_reassign(self):
+        other = PersonFactory()
+        self.first.patient = other
+        self.first.save()
+        self.assertEqual(self.summary().consult_count, 1)
+        self.assertEqual(PatientSummary.objects.get(patient=other).consult_count, 1)
+
+        self.last.delete()
+        self.assertFalse(PatientSummary.objects.filter(patient=self.patient).exists())
+
+    def test_deleting_patient(self):
+        Treatment.objects.create(consult=self.last, description='-', follow_up_date=date(2025, 7, 1))
+        self.patient.delete()
+        self.assertFalse(PatientSummary.objects.exists())
+
+    def test_bulk_created_consults(self):
+        patient = PersonFactory()
+        consults = Consult.objects.bulk_create([
+            Consult(patient=patient, doctor=self.doctor, date=aware(2025, 1, day, 9, 0), reason='-', symptoms='-')
+            for day in (1, 2, 3)
+        ])
+        consults_bulk_created.send(sender=Consult, consults=consults)
+        self.assertEqual(PatientSummary.objects.get(patient=patient).consult_count, 3)
+
+    def test_reconcile_command(self):
+        """Tras un QuerySet.update (sin señales) el comando corrige solo las filas distintas"""
+        PatientSummary.objects.update(consult_count=7)
+        untouched = PersonFactory()
+        ConsultFactory(patient=untouched, doctor=self.doctor)
+        out = StringIO()
+        call_command('reconcile_patient_summaries', '--batch-size', '1', stdout=out)
+        self.assertEqual(self.summary().consult_count, 2)
+        self.assertIn('1 resúmenes corregidos', out.getvalue())
+
+
+class PatientListSummaryTest(TestCase):
+    """Tests para el orden y el filtro por resumen en el listado de pacientes"""
+
+    def setUp(self):
+        User.objects.create_user(username='admin', password='testpass123', is_staff=True, is_superuser=True)
+        doctor = DoctorFactory()
+        today = timezone.localdate()
+        self.recent = PersonFactory(last_name='Alvarez')
+        self.old = PersonFactory(last_name='Benitez')
+        self.never = PersonFactory(last_name='Castro')
+        ConsultFactory(patient=self.recent, doctor=doctor, date=timezone.now() - timedelta(days=1))
+        consult = ConsultFactory(patient=self.old, doctor=doctor, date=timezone.now() - timedelta(days=60))
+        Treatment.objects.create(consult=consult, description='-', follow_up_date=today - timedelta(days=30))
+        self.client = Client()
+        self.client.login(username='admin', password='testpass123')
+
+    def listed(self, **params):
+        response = self.client.get(reverse('patient_list'), params)
+        self.assertEqual(response.status_code, 200)
+        return [patient.pk for patient in response.context['page_obj']]
+
+    def test_order_by_last_visit(self):
+        self.assertEqual(self.listed(order='-last_visit'), [self.recent.pk, self.old.pk, self.never.pk])
+        self.assertEqual(self.listed(order='last_visit'), [self.old.pk, self.recent.pk, self.never.pk])
+
+    def test_follow_up_due(self):
+        self.assertEqual(self.listed(follow_up_due='on'), [self.old.pk])
+
+    def test_single_query_for_rows(self):
+        """El resumen viene en la consulta de la página (sin una consulta por fila)"""
+        response = self.client.get(reverse('patient_list'))
+        patients = list(response.context['page_obj'])
+        with self.assertNumQueries(0):
+            [patient.summary.consult_count for patient in patients if patient.pk != self.never.pk]
+        self.assertFalse(PatientSummary.objects.filter(patient=self.never).exists())
@@ -3,7 +3,7 @@ from django.test import TestCase, Client
 from django.contrib.auth.models import User
 from django.urls import reverse
 from django.core.files.uploadedfile import SimpleUploadedFile
-from history.models import Person, Doctor, Consult, UserProfile
+from history.models import Person, Doctor, Consult, UserProfile, MedicalRecord
 from datetime import date, datetime, timedelta
 import json
 
@@ -264,6 +264,53 @@ class PatientViewsTest(TestCase):
         self.assertEqual(response.status_code, 200)
         self.assertContains(response, 'Juan Pérez')
     
+    def test_patient_detail_does_not_create_medical_record(self):
+        """Ver la ficha no crea una historia clínica vacía"""
+        self.client.login(username='admin', password='testpass123')
+        response = self.client.get(reverse('patient_detail', args=[self.patient.pk]))
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertIsNone(response.context['medical_record'])
+        self.assertFalse(MedicalRecord.objects.filter(patient=self.patient).exists())
+        self.assertContains(response, 'No hay información de historia clínica registrada')
+    
+    def test_medical_record_created_on_first_save(self):
+        """La historia clínica se crea al guardarla por primera vez"""
+        self.client.login(username='admin', password='testpass123')
+        response = self.client.post(reverse('medical_record_edit', args=[self.patient.pk]), {
+            'allergies': 'Penicilina',
+        })
+        
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(MedicalRecord.objects.get(patient=self.patient).allergies, 'Penicilina')
+        
+        response = self.client.get(reverse('patient_detail', args=[self.patient.pk]))
+        self.assertContains(response, 'Penicilina')
+    
+    def test_prune_empty_medical_records(self):
+        """El comando elimina solo las historias clínicas vacías"""
+        from django.core.management import call_command
+        from io import StringIO
+        
+        other_patient = Person.objects.create(
+            name='Ana',
+            last_name='García',
+            dni='87654321',
+            birth_date=date(1985, 5, 15),
+            gender='F',
+            phone='+54911234568',
+            email='ana.garcia@example.com',
+            address='Calle 456'
+        )
+        MedicalRecord.objects.create(patient=self.patient, allergies='', family_history=None)
+        MedicalRecord.objects.create(patient=other_patient, chronic_conditions='Diabetes')
+        
+        out = StringIO()
+        call_command('prune_empty_medical_records', stdout=out)
+        
+        self.assertIn('1 historias clínicas vacías eliminadas', out.getvalue())
+        self.assertEqual(list(MedicalRecord.objects.values_list('patient_id', flat=True)), [other_patient.id])
+    
     def test_patient_create_admin(self):
         """Test crear paciente como administrador"""
         self.client.login(username='admin', password='testpass123')
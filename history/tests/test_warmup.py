@@ -0,0 +1,41 @@
+import gc
+import sys
+from unittest import mock
+from django.test import TestCase
+from history import warmup
+
+
+class WarmUpTest(TestCase):
+    """Tests para el precalentamiento previo al fork"""
+
+    def test_compiles_all_app_templates(self):
+        """Se compilan las plantillas de history/templates"""
+        names = list(warmup.iter_template_names())
+        self.assertIn('base.html', names)
+        self.assertIn('patients/detail.html', names)
+
+        compiled, failed = warmup.compile_templates()
+        self.assertEqual(failed, [])
+        self.assertEqual(len(compiled), len(names))
+
+    def test_import_views_populates_resolver(self):
+        """Las vistas quedan importadas y el URLconf resuelto"""
+        self.assertGreater(warmup.import_views(), 0)
+        self.assertIn('history.report_views', sys.modules)
+
+    def test_warm_up_freezes_and_closes_connections(self):
+        """warm_up congela el heap y cierra las conexiones antes del fork"""
+        with mock.patch.object(warmup.connections, 'close_all') as close_all, \
+                mock.patch.object(warmup.gc, 'freeze') as freeze:
+            stats = warmup.warm_up()
+        close_all.assert_called_once()
+        freeze.assert_called_once()
+        self.assertTrue(stats['caches_primed'])
+        self.assertEqual(stats['templates_failed'], [])
+
+    def test_warm_up_without_freeze(self):
+        """Sin freeze no se toca el recolector"""
+        with mock.patch.object(warmup.connections, 'close_all'):
+            stats = warmup.warm_up(freeze=False)
+        self.assertEqual(stats['frozen_objects'], 0)
+        self.assertEqual(gc.get_freeze_count(), 0)
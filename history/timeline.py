@@ -0,0 +1,80 @@
+"""
+Historial de consultas por paciente paginado por cursor de fecha
+"""
+import base64
+from django.db.models import Q
+from django.urls import reverse
+from django.utils.dateparse import parse_datetime
+from .models import Consult
+
+TIMELINE_PAGE_SIZE = 20
+TREATMENT_SUMMARY_LENGTH = 80
+
+CONSULT_TYPES = dict(Consult.CONSULT_TYPE_CHOICES)
+
+
+def encode_cursor(date, consult_id):
+    raw = f'{date.isoformat()}|{consult_id}'.encode()
+    return base64.urlsafe_b64encode(raw).decode()
+
+
+def decode_cursor(cursor):
+    """Devuelve (fecha, id) o None si el cursor es inválido"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode()).decode()
+        date_value, consult_id = raw.rsplit('|', 1)
+        date = parse_datetime(date_value)
+        if date is None:
+            return None
+        return date, int(consult_id)
+    except (ValueError, UnicodeError):
+        return None
+
+
+def _summary(text, length=TREATMENT_SUMMARY_LENGTH):
+    if not text:
+        return ''
+    return text if len(text) <= length else text[:length].rstrip() + '…'
+
+
+def get_timeline_page(patient, cursor=None, limit=TIMELINE_PAGE_SIZE):
+    """
+    Página del historial de consultas (más recientes primero) en una sola consulta SQL
+    con doctor, código ICD del diagnóstico y resumen del tratamiento
+    Devuelve (items, next_cursor)
+    """
+    consults = Consult.objects.filter(patient=patient)
+
+    position = decode_cursor(cursor) if cursor else None
+    if position:
+        date, consult_id = position
+        consults = consults.filter(Q(date__lt=date) | Q(date=date, id__lt=consult_id))
+
+    rows = list(
+        consults.order_by('-date', '-id').values(
+            'id', 'date', 'consult_type', 'reason',
+            'doctor__display_name',
+            'diagnosis__icd_code', 'treatment__description',
+        )[:limit + 1]
+    )
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1]['date'], rows[-1]['id'])
+
+    items = [
+        {
+            'id': row['id'],
+            'date': row['date'],
+            'consult_type': row['consult_type'],
+            'consult_type_display': CONSULT_TYPES.get(row['consult_type'], row['consult_type']),
+            'reason': row['reason'],
+            'doctor_name': row['doctor__display_name'],
+            'icd_code': row['diagnosis__icd_code'] or '',
+            'treatment_summary': _summary(row['treatment__description']),
+            'url': reverse('consult_detail', args=[row['id']]),
+        }
+        for row in rows
+    ]
+    return items, next_cursor
@@ -1,8 +1,11 @@
+from datetime import datetime, time
+from django.conf import settings
 from django.contrib.auth.models import User
 from django.core.exceptions import PermissionDenied
 from django.contrib import messages
 from django.shortcuts import redirect
-from .models import Doctor, UserProfile, Consult
+from django.utils import timezone
+from .models import Person, Doctor, UserProfile, Consult
 
 def is_administrator(user):
     """Verifica si el usuario es administrador"""
@@ -69,6 +72,49 @@ def can_access_consult(user, consult):
     
     return False
 
+def get_accessible_patients(user, queryset=None):
+    """
+    Restringe un queryset de pacientes con las mismas reglas que can_access_patient
+    - Los administradores ven todos los pacientes
+    - Los doctores solo ven pacientes con los que tienen consultas
+    """
+    if queryset is None:
+        queryset = Person.objects.all()
+
+    if not user or not getattr(user, 'is_authenticated', False):
+        return queryset.none()
+
+    if is_administrator(user):
+        return queryset
+
+    doctor = get_doctor_profile(user)
+    if doctor:
+        patient_ids = Consult.objects.filter(doctor=doctor).values('patient_id')
+        return queryset.filter(id__in=patient_ids)
+
+    return queryset.none()
+
+def get_accessible_consults(user, queryset=None):
+    """
+    Restringe un queryset de consultas con las mismas reglas que can_access_consult
+    - Los administradores ven todas las consultas
+    - Los doctores solo ven sus propias consultas
+    """
+    if queryset is None:
+        queryset = Consult.objects.all()
+
+    if not user or not getattr(user, 'is_authenticated', False):
+        return queryset.none()
+
+    if is_administrator(user):
+        return queryset
+
+    doctor = get_doctor_profile(user)
+    if doctor:
+        return queryset.filter(doctor=doctor)
+
+    return queryset.none()
+
 def is_patient(user):
     """Verificar si el usuario es paciente"""
     try:
@@ -132,6 +178,7 @@ def require_role(required_role):
 def log_audit_action(user, action, model_name, object_id=None, description="", request=None):
     """Registrar acción en el log de auditoría"""
     from .models import AuditLog
+    from .metrics import record_audit_write
     
     AuditLog.objects.create(
         user=user,
@@ -142,4 +189,10 @@ def log_audit_action(user, action, model_name, object_id=None, description="", r
         ip_address=request.META.get('REMOTE_ADDR') if request else None,
         user_agent=request.META.get('HTTP_USER_AGENT') if request else None
     )
+    record_audit_write(action)
+
 
+def start_of_day(day):
+    """Medianoche del día en la zona horaria actual, para filtrar rangos sobre columnas DateTime"""
+    moment = datetime.combine(day, time.min)
+    return timezone.make_aware(moment) if settings.USE_TZ else moment
@@ -1,22 +1,37 @@
+from datetime import timedelta
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth import login, logout
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.forms import AuthenticationForm
 from django.contrib import messages
 from django.core.paginator import Paginator
-from django.db.models import Q, Count
+from django.db.models import F, Q, Count
 from django.http import JsonResponse
+from django.utils import timezone
 from django.views.decorators.csrf import csrf_exempt
-from .models import Person, Doctor, Consult, Diagnosis, Treatment, MedicalRecord
+from .models import Person, Doctor, Consult, ConsultListing, Diagnosis, Treatment, MedicalRecord
 from .forms import (
     PatientForm, DoctorForm, DoctorUserForm, ConsultForm, 
-    DiagnosisForm, TreatmentForm, MedicalRecordForm, PatientSearchForm
+    DiagnosisForm, TreatmentForm, MedicalRecordForm, PatientSearchForm, ConsultSearchForm,
+    FollowUpFilterForm, ConsultTextSearchForm
 )
+from .conditional import conditional_page, probe_patient, probe_consult, probe_medical_record
+from .followups import DEFAULT_UPCOMING_DAYS, follow_up_scope, get_follow_up_page, window_range
+from .search import search_consults, search_scope
+from .timeline import get_timeline_page
 from .utils import (
     is_administrator, is_doctor, get_doctor_profile, 
-    can_access_patient, can_access_consult, get_user_role, require_role
+    can_access_patient, can_access_consult, get_user_role, require_role, start_of_day
 )
 
+# Pacientes sin consultas (sin resumen) al final
+PATIENT_ORDERINGS = {
+    '-last_visit': F('summary__last_consult_date').desc(nulls_last=True),
+    'last_visit': F('summary__last_consult_date').asc(nulls_last=True),
+    'follow_up': F('summary__next_follow_up_date').asc(nulls_last=True),
+    '-consults': F('summary__consult_count').desc(nulls_last=True),
+}
+
 @csrf_exempt
 def login_view(request):
     if request.user.is_authenticated:
@@ -51,7 +66,7 @@ def dashboard(request):
         total_consults = Consult.objects.count()
         
         # Consultas recientes
-        recent_consults = Consult.objects.all().order_by('-date')[:5]
+        recent_consults = ConsultListing.objects.order_by('-date')[:5]
         
         context = {
             'user_role': user_role,
@@ -95,11 +110,13 @@ def dashboard_data_api(request):
 @require_role('any')
 def patient_list(request):
     search_form = PatientSearchForm(request.GET)
-    patients = Person.objects.filter(is_active=True)
+    # El resumen (visitas y seguimiento) viene en el mismo LEFT JOIN
+    patients = Person.objects.filter(is_active=True).select_related('summary')
     
     if search_form.is_valid():
         search = search_form.cleaned_data.get('search')
         gender = search_form.cleaned_data.get('gender')
+        order = search_form.cleaned_data.get('order')
         
         if search:
             patients = patients.filter(
@@ -110,6 +127,12 @@ def patient_list(request):
         
         if gender:
             patients = patients.filter(gender=gender)
+
+        if search_form.cleaned_data.get('follow_up_due'):
+            patients = patients.filter(summary__next_follow_up_date__lte=timezone.localdate())
+
+        if order in PATIENT_ORDERINGS:
+            patients = patients.order_by(PATIENT_ORDERINGS[order], 'last_name', 'name', 'id')
     
     # Si es doctor, solo mostrar sus pacientes
     if get_user_role(request.user) == 'doctor':
@@ -122,27 +145,36 @@ def patient_list(request):
     page_number = request.GET.get('page')
     page_obj = paginator.get_page(page_number)
     
+    filters = request.GET.copy()
+    filters.pop('page', None)
+    
     return render(request, 'patients/list.html', {
         'page_obj': page_obj,
         'search_form': search_form,
+        'filters_query': filters.urlencode(),
+        'today': timezone.localdate(),
         'user_role': get_user_role(request.user)
     })
 
 @login_required
 @require_role('any')
+@conditional_page(probe_patient)
 def patient_detail(request, pk):
-    patient = get_object_or_404(Person, pk=pk, is_active=True)
+    # La historia clínica viene en el mismo JOIN; no se crea al leer
+    patient = get_object_or_404(Person.objects.select_related('medicalrecord'), pk=pk, is_active=True)
     
     if not can_access_patient(request.user, patient):
         messages.error(request, 'No tienes permisos para ver este paciente')
         return redirect('patient_list')
     
-    consults = Consult.objects.filter(patient=patient).order_by('-date')
-    medical_record, created = MedicalRecord.objects.get_or_create(patient=patient)
+    # Solo la primera página; el resto se carga al hacer scroll desde la API
+    consults, next_cursor = get_timeline_page(patient)
+    medical_record = getattr(patient, 'medicalrecord', None)
     
     return render(request, 'patients/detail.html', {
         'patient': patient,
         'consults': consults,
+        'next_cursor': next_cursor,
         'medical_record': medical_record,
         'user_role': get_user_role(request.user)
     })
@@ -207,13 +239,41 @@ def patient_delete(request, pk):
 @login_required
 @require_role('any')
 def consult_list(request):
-    consults = Consult.objects.all().order_by('-date')
+    # Modelo de lectura desnormalizado (history.listing): paciente, doctor y tipo sin JOIN
+    consults = ConsultListing.objects.order_by('-date')
+    search_form = ConsultSearchForm(request.GET)
+    
+    if search_form.is_valid():
+        search = search_form.cleaned_data.get('search')
+        consult_type = search_form.cleaned_data.get('consult_type')
+        date_from = search_form.cleaned_data.get('date_from')
+        date_to = search_form.cleaned_data.get('date_to')
+        
+        if search:
+            consults = consults.filter(
+                Q(patient_name__icontains=search) |
+                Q(patient_last_name__icontains=search) |
+                Q(patient_dni__icontains=search) |
+                Q(doctor_name__icontains=search)
+            )
+        
+        if consult_type:
+            consults = consults.filter(consult_type=consult_type)
+        
+        # Rangos sobre la columna (no date__date) para usar los índices
+        if date_from:
+            consults = consults.filter(date__gte=start_of_day(date_from))
+        
+        if date_to:
+            consults = consults.filter(date__lt=start_of_day(date_to + timedelta(days=1)))
     
     # Si es doctor, solo mostrar sus consultas
+    own_doctor_id = None
     if get_user_role(request.user) == 'doctor':
         doctor = get_doctor_profile(request.user)
         if doctor:
-            consults = consults.filter(doctor=doctor)
+            consults = consults.filter(doctor_id=doctor.pk)
+            own_doctor_id = doctor.pk
     
     paginator = Paginator(consults, 10)
     page_number = request.GET.get('page')
@@ -221,11 +281,14 @@ def consult_list(request):
     
     return render(request, 'consults/list.html', {
         'page_obj': page_obj,
+        'search_form': search_form,
+        'own_doctor_id': own_doctor_id,
         'user_role': get_user_role(request.user)
     })
 
 @login_required
 @require_role('any')
+@conditional_page(probe_consult)
 def consult_detail(request, pk):
     consult = get_object_or_404(Consult, pk=pk)
     
@@ -250,6 +313,48 @@ def consult_detail(request, pk):
         'user_role': get_user_role(request.user)
     })
 
+def _query_with(request, **changes):
+    """Querystring actual con los cambios indicados (None quita el parámetro)"""
+    params = request.GET.copy()
+    for name, value in changes.items():
+        if value is None:
+            params.pop(name, None)
+        else:
+            params[name] = value
+    return f'?{params.urlencode()}'
+
+@login_required
+@require_role('doctor')
+def consult_search(request):
+    # Texto completo sobre motivo, síntomas, diagnóstico y tratamiento (history.search)
+    form = ConsultTextSearchForm(request.GET)
+    results = None
+    if form.is_valid() and form.cleaned_data.get('q'):
+        scope = search_scope(request.user)
+        if scope is False:
+            messages.error(request, 'No tienes permisos para buscar consultas')
+            return redirect('dashboard')
+        results = search_consults(
+            form.cleaned_data['q'], scope,
+            consult_type=form.cleaned_data.get('consult_type') or None,
+            icd_code=form.cleaned_data.get('icd_code') or None,
+            page=form.cleaned_data.get('page') or 1,
+        )
+        # Elegir una faceta vuelve a la primera página; elegirla de nuevo la quita
+        for name, facets in (('consult_type', results.type_facets), ('icd_code', results.icd_facets)):
+            for facet in facets:
+                facet['url'] = _query_with(request, page=None, **{name: None if facet['selected'] else facet['value']})
+        if results.has_previous:
+            results.previous_url = _query_with(request, page=str(results.page - 1))
+        if results.has_next:
+            results.next_url = _query_with(request, page=str(results.page + 1))
+
+    return render(request, 'consults/search.html', {
+        'form': form,
+        'results': results,
+        'user_role': get_user_role(request.user)
+    })
+
 @login_required
 @require_role('any')
 def consult_create(request):
@@ -273,6 +378,42 @@ def consult_create(request):
         'user_role': get_user_role(request.user)
     })
 
+# ========== SEGUIMIENTOS ==========
+
+@login_required
+@require_role('doctor')
+def follow_up_list(request):
+    form = FollowUpFilterForm(request.GET)
+    window, days, doctor_id = 'upcoming', DEFAULT_UPCOMING_DAYS, None
+    if form.is_valid():
+        window = form.cleaned_data.get('window') or window
+        days = form.cleaned_data.get('days') or days
+        doctor = form.cleaned_data.get('doctor')
+        doctor_id = doctor.pk if doctor else None
+    
+    scope = follow_up_scope(request.user, doctor_id)
+    if scope is False:
+        messages.error(request, 'No tienes permisos para ver la agenda de seguimientos')
+        return redirect('dashboard')
+    
+    items, next_cursor = get_follow_up_page(window, scope, days, request.GET.get('cursor'))
+    next_query = None
+    if next_cursor:
+        params = request.GET.copy()
+        params['cursor'] = next_cursor
+        next_query = params.urlencode()
+    first_day, last_day = window_range(window, days)
+    
+    return render(request, 'followups/list.html', {
+        'items': items,
+        'form': form,
+        'window': window,
+        'first_day': first_day,
+        'last_day': last_day,
+        'next_query': next_query,
+        'user_role': get_user_role(request.user)
+    })
+
 # ========== DOCTORES ==========
 
 @login_required
@@ -317,14 +458,16 @@ def doctor_create(request):
 
 @login_required
 @require_role('any')
+@conditional_page(probe_medical_record)
 def medical_record_edit(request, patient_pk):
-    patient = get_object_or_404(Person, pk=patient_pk, is_active=True)
+    patient = get_object_or_404(Person.objects.select_related('medicalrecord'), pk=patient_pk, is_active=True)
     
     if not can_access_patient(request.user, patient):
         messages.error(request, 'No tienes permisos para editar esta historia clínica')
         return redirect('patient_list')
     
-    medical_record, created = MedicalRecord.objects.get_or_create(patient=patient)
+    # Se crea recién al guardar por primera vez
+    medical_record = getattr(patient, 'medicalrecord', None) or MedicalRecord(patient=patient)
     
     if request.method == 'POST':
         form = MedicalRecordForm(request.POST, instance=medical_record)
@@ -0,0 +1,134 @@
+"""
+Precalentamiento de workers antes del fork (gunicorn --preload)
+
+Todo lo que se carga aquí queda en memoria compartida copy-on-write entre los
+workers: módulos de vistas, URLconf, plantillas compiladas y cachés de referencia.
+gc.freeze() mueve esos objetos a la generación permanente para que el recolector
+de basura de cada worker no los toque (y no copie sus páginas de memoria)
+"""
+import gc
+import logging
+import os
+import time
+from importlib import import_module
+from django.apps import apps
+from django.conf import settings
+from django.db import DatabaseError, connections
+from django.template import TemplateDoesNotExist, TemplateSyntaxError, engines
+from django.urls import get_resolver
+from django.utils import translation
+
+logger = logging.getLogger(__name__)
+
+# Módulos que el URLconf no importa por sí solo
+VIEW_MODULES = (
+    'history.views',
+    'history.report_views',
+    'history.api_views',
+    'history.admin',
+)
+
+
+def import_views():
+    """Importa las vistas y resuelve el URLconf completo"""
+    for module in VIEW_MODULES:
+        import_module(module)
+    resolver = get_resolver()
+    # reverse_dict fuerza el _populate() de todos los patrones (incluidos los include())
+    resolver.reverse_dict
+    return len(resolver.url_patterns)
+
+
+def iter_template_names(app_label='history'):
+    """Nombres de todas las plantillas del directorio templates/ de la app"""
+    template_dir = os.path.join(apps.get_app_config(app_label).path, 'templates')
+    for root, _, files in os.walk(template_dir):
+        for filename in sorted(files):
+            if filename.endswith(('.html', '.txt')):
+                path = os.path.join(root, filename)
+                yield os.path.relpath(path, template_dir).replace(os.sep, '/')
+
+
+def compile_templates(app_label='history'):
+    """
+    Compila las plantillas de la app. Con DEBUG=False Django usa el loader cacheado,
+    así que las plantillas compiladas quedan disponibles para todos los workers
+    Devuelve (compiladas, fallidas)
+    """
+    engine = engines['django']
+    compiled = []
+    failed = []
+    for name in iter_template_names(app_label):
+        try:
+            engine.get_template(name)
+        except (TemplateDoesNotExist, TemplateSyntaxError) as exc:
+            logger.warning('No se pudo compilar la plantilla %s: %s', name, exc)
+            failed.append(name)
+        else:
+            compiled.append(name)
+    return compiled, failed
+
+
+def prime_caches():
+    """Carga cachés de referencia del proceso: tipos de contenido, traducciones y CIE-10"""
+    from django.contrib.contenttypes.models import ContentType
+
+    # Los catálogos de traducción se cargan una vez por proceso al activar el idioma
+    translation.activate(settings.LANGUAGE_CODE)
+    translation.deactivate()
+
+    # Los backends de reportes son perezosos (ver history.reports); con --preload
+    # conviene cargarlos antes del fork para compartir ReportLab/openpyxl
+    if getattr(settings, 'WARMUP_REPORT_BACKENDS', False):
+        from .reports import get_report_backend, REPORT_BACKENDS
+        for report_format in getattr(settings, 'REPORT_BACKENDS', REPORT_BACKENDS):
+            get_report_backend(report_format)
+
+    # Índice CIE-10 (mmap de solo lectura): abierto en el maestro, compartido por los workers
+    from .icd10 import get_icd10_catalog
+    try:
+        get_icd10_catalog()
+    except (OSError, ValueError) as exc:
+        logger.warning('No se pudo cargar el catálogo CIE-10: %s', exc)
+
+    try:
+        # Caché por proceso usada por el admin (LogEntry) y los permisos de usuario
+        ContentType.objects.get_for_models(*apps.get_models())
+    except DatabaseError as exc:
+        logger.warning('No se pudieron precargar las cachés de referencia: %s', exc)
+        return False
+    return True
+
+
+def warm_up(freeze=True):
+    """
+    Precalienta el proceso actual. Llamar en el proceso maestro (gunicorn --preload,
+    hook when_ready) antes de crear los workers
+    Devuelve un diccionario con lo realizado
+    """
+    started_at = time.perf_counter()
+    url_patterns = import_views()
+    compiled, failed = compile_templates()
+    caches_primed = prime_caches()
+
+    # Las conexiones abiertas no deben heredarse entre procesos
+    connections.close_all()
+
+    stats = {
+        'url_patterns': url_patterns,
+        'templates_compiled': len(compiled),
+        'templates_failed': failed,
+        'caches_primed': caches_primed,
+        'frozen_objects': 0,
+    }
+    if freeze:
+        gc.collect()
+        gc.freeze()
+        stats['frozen_objects'] = gc.get_freeze_count()
+    stats['elapsed_ms'] = round((time.perf_counter() - started_at) * 1000, 1)
+
+    logger.info(
+        'Warm-up: %(templates_compiled)s plantillas, %(frozen_objects)s objetos congelados en %(elapsed_ms)s ms',
+        stats
+    )
+    return stats
@@ -45,6 +45,35 @@ document.addEventListener('DOMContentLoaded', function() {
         });
     });
 
+    // Autocompletado de códigos CIE-10 (catálogo en /api/v1/icd10/)
+    document.querySelectorAll('input[data-icd10-autocomplete]').forEach(function(input, position) {
+        var list = document.createElement('datalist');
+        list.id = 'icd10-options-' + position;
+        input.setAttribute('list', list.id);
+        input.parentNode.appendChild(list);
+        var timeout;
+        input.addEventListener('input', function() {
+            clearTimeout(timeout);
+            if (input.value.trim().length < 2) {
+                return;
+            }
+            timeout = setTimeout(function() {
+                var url = input.getAttribute('data-icd10-autocomplete') + '?q=' + encodeURIComponent(input.value);
+                fetch(url, {credentials: 'same-origin'})
+                    .then(function(response) { return response.ok ? response.json() : {results: []}; })
+                    .then(function(data) {
+                        list.innerHTML = '';
+                        data.results.forEach(function(item) {
+                            var option = document.createElement('option');
+                            option.value = item.code;
+                            option.label = item.description;
+                            list.appendChild(option);
+                        });
+                    });
+            }, 200);
+        });
+    });
+
     // Búsqueda en tiempo real (si existe el campo de búsqueda)
     var searchInput = document.querySelector('input[name="search"]');
     if (searchInput) {